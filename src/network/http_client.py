@@ -1,57 +1,303 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import Optional, Dict, Any, Union
 import httpx  # 只使用 httpx
 
-@dataclass
+from util import json_codec
+from .retry_policy import RetryPolicy, RetryBudget, RetryStats, classify_error
+from .rate_limiter import TrafficLimiter
+
+_MISSING = object()
+
+
 class HttpResponse:
-    ##响应结构体
-    status_code: int
-    headers: dict
-    body: str
-    elapsed: float
-    exception: Exception = None
+    """响应结构体
+
+    使用 __slots__ 并保留原始字节，响应头与文本均按需惰性生成，
+    JSON 只解析一次并缓存，仅被采样保留的成功响应几乎没有额外开销。
+
+    属性:
+        status_code: HTTP状态码，请求异常时为 -1
+        content: 原始响应体字节
+        elapsed: 请求耗时（秒），发生重试时为包含退避在内的总耗时，不含限流等待
+        exception: 请求过程中的异常
+        error_kind: 异常归类，如 connect_timeout / read_timeout / throttled，无异常时为 None
+        attempts: 实际发送的请求次数（含重试和对冲）
+        throttle_wait: 等待限流令牌和并发名额的时间（秒）
+    """
+    __slots__ = (
+        'status_code', 'content', 'elapsed', 'exception', 'error_kind', 'attempts', 'throttle_wait',
+        '_raw_headers', '_headers', '_encoding', '_text', '_json'
+    )
+
+    def __init__(
+        self,
+        status_code: int,
+        content: bytes = b"",
+        elapsed: float = 0.0,
+        exception: Exception = None,
+        raw_headers: Any = None,
+        encoding: Optional[str] = None
+    ):
+        self.status_code = status_code
+        self.content = content
+        self.elapsed = elapsed
+        self.exception = exception
+        self.error_kind = classify_error(exception) if exception is not None else None
+        self.attempts = 1
+        self.throttle_wait = 0.0
+        self._raw_headers = raw_headers
+        self._headers = None
+        self._encoding = encoding
+        self._text = None
+        self._json = _MISSING
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """响应头（首次访问时才转换为 dict，未采集时为空字典）"""
+        if self._headers is None:
+            self._headers = dict(self._raw_headers) if self._raw_headers is not None else {}
+            self._raw_headers = None
+        return self._headers
+
+    @property
+    def text(self) -> str:
+        """按需解码的响应文本"""
+        if self._text is None:
+            self._text = self.content.decode(self._encoding or 'utf-8', errors='replace')
+        return self._text
+
+    @property
+    def body(self) -> str:
+        """兼容旧接口，等同于 text"""
+        return self.text
+
+    def json(self) -> Any:
+        """解析响应JSON，结果缓存，重复调用不会再次解析"""
+        if self._json is _MISSING:
+            self._json = json_codec.loads(self.content)
+        return self._json
+
+    def __repr__(self) -> str:
+        return f"<HttpResponse [{self.status_code}] {len(self.content)} bytes {self.elapsed:.3f}s attempts={self.attempts}>"
+
+
 class HttpClient:
-    def __init__(self, timeout: int = 30, verify_ssl: bool = True):
+    def __init__(
+        self,
+        timeout: int = 30,
+        verify_ssl: bool = True,
+        capture_headers: bool = True,
+        connect_timeout: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        limiter: Optional[TrafficLimiter] = None
+    ):
+        """初始化HTTP客户端
+
+        Args:
+            timeout: 读写超时时间（秒）
+            verify_ssl: 是否校验证书
+            capture_headers: 是否保留响应头，压测时关闭可减少每次请求的开销
+            connect_timeout: 建连超时时间（秒），默认与 timeout 相同
+            retry_policy: 默认重试策略，默认不重试
+            retry_budget: 重试预算，多个客户端可共享同一个预算
+            limiter: 限流器，多个客户端应共享同一个实例
+        """
         self._client = httpx.Client(
-            timeout=timeout,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout if connect_timeout is not None else timeout),
             verify=verify_ssl
         )
+        self.capture_headers = capture_headers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.retry_stats = RetryStats()
+        self.limiter = limiter
+        self._hedge_executor = None
 
     def request(
-        self, 
-        method: str, 
-        url: str, 
-        headers: Optional[Dict[str, str]] = None, 
-        body: Optional[Dict[str, Any]] = None
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[Union[Dict[str, Any], bytes]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        case_id: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> HttpResponse:
+        """发送请求，按重试策略进行重试和对冲
+
+        返回最后一次尝试的响应，elapsed 为包含所有重试与退避在内的总耗时，
+        attempts 为实际发送的请求数，避免重试掩盖尾部延迟。
+        配置了限流器时每次尝试都需先获得许可，等待时间计入 throttle_wait，不计入 elapsed。
+        body 为字典时序列化为JSON（每个请求一次，重试与对冲复用），为 bytes 时原样发送，
+        Content-Type 取 content_type，默认 application/json；headers 中已指定时以 headers 为准。
+        """
+        headers, body = self._encode_body(headers, body, content_type)
+        policy = retry_policy or self.retry_policy
+        self.retry_budget.deposit()
+        start = time.perf_counter()
+        attempts = 0
+        retries = 0
+        hedged = False
+        budget_exhausted = False
+        throttle_wait = 0.0
+        error_kinds = []
+
+        while True:
+            if policy.can_hedge(method):
+                response, sent = self._send_hedged(method, url, headers, body, case_id, policy.hedge_after)
+                hedged = hedged or sent > 1
+            else:
+                response, sent = self._send(method, url, headers, body, case_id), 1
+            attempts += sent
+            throttle_wait += response.throttle_wait
+            if response.error_kind is not None:
+                error_kinds.append(response.error_kind)
+
+            if retries >= policy.max_retries:
+                break
+            if not policy.should_retry(method, response.error_kind, response.status_code):
+                break
+            if not self.retry_budget.try_withdraw():
+                budget_exhausted = True
+                break
+            retries += 1
+            time.sleep(policy.backoff(retries))
+
+        response.attempts = attempts
+        response.throttle_wait = throttle_wait
+        response.elapsed = time.perf_counter() - start - throttle_wait
+        self.retry_stats.record(attempts, retries, hedged, budget_exhausted, error_kinds)
+        return response
+
+    @staticmethod
+    def _encode_body(
+        headers: Optional[Dict[str, str]],
+        body: Optional[Union[Dict[str, Any], bytes]],
+        content_type: Optional[str]
+    ):
+        """返回 (请求头, 请求体字节)，没有请求体时原样返回"""
+        if body is None:
+            return headers, None
+        if not isinstance(body, (bytes, bytearray)):
+            body = json_codec.dumps(body)
+        if headers and any(key.lower() == 'content-type' for key in headers):
+            return headers, body
+        headers = dict(headers) if headers else {}
+        headers['Content-Type'] = content_type or json_codec.JSON_CONTENT_TYPE
+        return headers, body
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        case_id: Optional[str] = None
+    ) -> HttpResponse:
+        """发送单次请求"""
+        if self.limiter is None:
+            return self._send_once(method, url, headers, body)
+        try:
+            with self.limiter.acquire(url, case_id) as permit:
+                response = self._send_once(method, url, headers, body)
+        except Exception as e:
+            return HttpResponse(status_code=-1, exception=e)
+        response.throttle_wait = permit.wait
+        return response
+
+    def _send_once(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes]
     ) -> HttpResponse:
         try:
             response = self._client.request(
                 method,
                 url,
                 headers=headers,
-                json=body
+                content=body
             )
             return HttpResponse(
                 status_code=response.status_code,
-                headers=dict(response.headers),
+                content=response.content,
                 elapsed=response.elapsed.total_seconds(),
-                body=response.text,
-                exception=None
+                raw_headers=response.headers if self.capture_headers else None,
+                encoding=response.charset_encoding
             )
         except Exception as e:
             return HttpResponse(
                 status_code=-1,
-                headers={},
-                body="",
-                elapsed=0,
                 exception=e
             )
 
-    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
-        return self.request('GET', url, headers=headers)
+    def _send_hedged(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        case_id: Optional[str],
+        hedge_after: float
+    ):
+        """发送请求，超过 hedge_after 秒未返回时再发送一个对冲请求，取先成功的结果
+
+        Returns:
+            (响应, 实际发送的请求数)
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        primary = self._hedge_executor.submit(self._send, method, url, headers, body, case_id)
+        try:
+            return primary.result(timeout=hedge_after), 1
+        except FutureTimeout:
+            pass
+
+        backup = self._hedge_executor.submit(self._send, method, url, headers, body, case_id)
+        response = None
+        for future in as_completed((primary, backup)):
+            response = future.result()
+            if response.error_kind is None:
+                break
+        return response, 2
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        case_id: Optional[str] = None
+    ) -> HttpResponse:
+        return self.request('GET', url, headers=headers, retry_policy=retry_policy, case_id=case_id)
+
+    def post(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[Union[Dict[str, Any], bytes]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        case_id: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> HttpResponse:
+        return self.request('POST', url, headers=headers, body=body, retry_policy=retry_policy, case_id=case_id,
+                            content_type=content_type)
 
-    def post(self, url: str, headers: Optional[Dict[str, str]] = None, body: Optional[Dict[str, Any]] = None) -> HttpResponse:
-        return self.request('POST', url, headers=headers, body=body)
+    def pool_stats(self) -> Dict[str, int]:
+        """连接池状态：连接数、其中空闲的连接数、等待分配连接的请求数"""
+        pool = getattr(self._client._transport, '_pool', None)
+        connections = list(getattr(pool, 'connections', None) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            'connections': len(connections),
+            'idle': idle,
+            'active': len(connections) - idle,
+            'pending': len(getattr(pool, '_requests', None) or [])
+        }
 
     def close(self):
-        self._client.close()
\ No newline at end of file
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self._client.close()
@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+
+class LimitExceeded(Exception):
+    """在 max_wait 内无法获得令牌或并发名额时抛出"""
+    error_kind = "throttled"
+
+
+class TokenBucket:
+    """令牌桶限流器
+
+    采用预约方式：取令牌时先扣减（允许为负），再按欠额计算需要等待的时间，
+    多个线程按到达顺序排队，无需轮询。
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒产生的令牌数
+            burst: 桶容量，默认等于 rate（至少为 1）
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else max(1.0, self.rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """获取令牌，必要时阻塞等待
+
+        Returns:
+            float: 实际等待的时间（秒）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            wait = (tokens - self._tokens) / self.rate if self._tokens < tokens else 0.0
+            if max_wait is not None and wait > max_wait:
+                raise LimitExceeded(f"限流等待时间 {wait:.3f}s 超过上限 {max_wait}s")
+            self._tokens -= tokens
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """归还已取得但未使用的令牌（后续作用域限流失败、请求没有发出时）"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + tokens)
+
+
+class Bulkhead:
+    """隔离舱：限制同一资源的并发请求数"""
+
+    def __init__(self, max_concurrent: int):
+        if max_concurrent <= 0:
+            raise ValueError("max_concurrent必须大于0")
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """获取并发名额
+
+        Returns:
+            float: 实际等待的时间（秒）
+        """
+        start = time.perf_counter()
+        # max_wait 为 None 时一直等待；Semaphore 的 timeout 不能用 -1 表示不限时
+        if not self._semaphore.acquire(timeout=max_wait):
+            raise LimitExceeded(f"并发数已达上限 {self.max_concurrent}，等待超过 {max_wait}s")
+        with self._lock:
+            self.active += 1
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+
+@dataclass
+class LimitConfig:
+    """单个作用域的限流配置
+
+    属性:
+        rate: 每秒请求数上限，None 表示不限速
+        burst: 令牌桶容量
+        max_concurrent: 并发请求数上限，None 表示不限制
+        max_wait: 最长等待时间（秒），超过则直接判定为限流失败，None 表示一直等待
+    """
+    rate: Optional[float] = None
+    burst: Optional[float] = None
+    max_concurrent: Optional[int] = None
+    max_wait: Optional[float] = None
+
+    def build(self) -> 'ScopeLimiter':
+        return ScopeLimiter(
+            bucket=TokenBucket(self.rate, self.burst) if self.rate else None,
+            bulkhead=Bulkhead(self.max_concurrent) if self.max_concurrent else None,
+            max_wait=self.max_wait
+        )
+
+
+@dataclass
+class ScopeLimiter:
+    """某个作用域（全局/接口/用例）对应的令牌桶与隔离舱"""
+    bucket: Optional[TokenBucket] = None
+    bulkhead: Optional[Bulkhead] = None
+    max_wait: Optional[float] = None
+
+
+class Permit:
+    """一次请求获得的许可，记录限流等待时间"""
+    __slots__ = ('wait',)
+
+    def __init__(self):
+        self.wait = 0.0
+
+
+class TrafficLimiter:
+    """全局、接口、用例三级限流与并发隔离
+
+    套件YAML中的配置示例::
+
+        limits:
+          global: {rate: 200, max_concurrent: 50}
+          endpoints:
+            /api/v2/traffic/zhijie/user-credit: {rate: 50, max_concurrent: 10, max_wait: 5}
+          cases:
+            case_001: {rate: 20}
+
+    接口按URL路径匹配。先按 用例 -> 接口 -> 全局 的顺序获取并发名额，
+    使等待慢接口名额的请求不会占用全局名额，再依次获取令牌。
+    """
+
+    def __init__(
+        self,
+        global_limit: Optional[LimitConfig] = None,
+        endpoints: Optional[Dict[str, LimitConfig]] = None,
+        cases: Optional[Dict[str, LimitConfig]] = None
+    ):
+        self._global = global_limit.build() if global_limit else None
+        self._endpoints = {path: limit.build() for path, limit in (endpoints or {}).items()}
+        self._cases = {case_id: limit.build() for case_id, limit in (cases or {}).items()}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['TrafficLimiter']:
+        """从套件YAML的 limits 配置构建，未配置时返回 None"""
+        if not config:
+            return None
+        return cls(
+            global_limit=LimitConfig(**config['global']) if config.get('global') else None,
+            endpoints={path: LimitConfig(**limit) for path, limit in (config.get('endpoints') or {}).items()},
+            cases={case_id: LimitConfig(**limit) for case_id, limit in (config.get('cases') or {}).items()}
+        )
+
+    def _scopes(self, url: str, case_id: Optional[str]) -> List[ScopeLimiter]:
+        scopes = []
+        if case_id is not None and case_id in self._cases:
+            scopes.append(self._cases[case_id])
+        endpoint = self._endpoints.get(urlsplit(url).path)
+        if endpoint is not None:
+            scopes.append(endpoint)
+        if self._global is not None:
+            scopes.append(self._global)
+        return scopes
+
+    @contextmanager
+    def acquire(self, url: str, case_id: Optional[str] = None) -> Iterator[Permit]:
+        """获取请求许可，退出上下文时释放并发名额"""
+        permit = Permit()
+        held = []
+        try:
+            scopes = self._scopes(url, case_id)
+            for scope in scopes:
+                if scope.bulkhead is not None:
+                    permit.wait += scope.bulkhead.acquire(scope.max_wait)
+                    held.append(scope.bulkhead)
+            taken = []
+            try:
+                for scope in scopes:
+                    if scope.bucket is not None:
+                        permit.wait += scope.bucket.acquire(max_wait=scope.max_wait)
+                        taken.append(scope.bucket)
+            except LimitExceeded:
+                # 请求不会发出，前面作用域已扣减的令牌归还，不挤占后续请求的速率
+                for bucket in taken:
+                    bucket.refund()
+                raise
+            yield permit
+        finally:
+            for bulkhead in reversed(held):
+                bulkhead.release()
+
+    def active_requests(self) -> Dict[str, int]:
+        """各接口当前的并发请求数"""
+        return {
+            path: scope.bulkhead.active
+            for path, scope in self._endpoints.items()
+            if scope.bulkhead is not None
+        }
@@ -0,0 +1,187 @@
+import random
+import threading
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+# 幂等的HTTP方法，出现任意网络错误或可重试状态码时都允许重试
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# 请求尚未到达服务端的错误，非幂等请求重试也是安全的
+SAFE_ERRORS = ("connect_timeout", "connect_error", "pool_timeout")
+
+
+def classify_error(exc: Exception) -> str:
+    """将请求异常归类为错误类型，用于重试判断和统计"""
+    kind = getattr(exc, "error_kind", None)
+    if kind is not None:
+        return kind
+    if isinstance(exc, httpx.ConnectTimeout):
+        return "connect_timeout"
+    if isinstance(exc, httpx.ReadTimeout):
+        return "read_timeout"
+    if isinstance(exc, httpx.WriteTimeout):
+        return "write_timeout"
+    if isinstance(exc, httpx.PoolTimeout):
+        return "pool_timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect_error"
+    if isinstance(exc, httpx.RemoteProtocolError):
+        return "protocol_error"
+    if isinstance(exc, httpx.ReadError):
+        return "read_error"
+    if isinstance(exc, httpx.WriteError):
+        return "write_error"
+    return "error"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试与对冲请求策略
+
+    属性:
+        max_retries: 最大重试次数（不含首次请求），0 表示不重试
+        backoff_base: 指数退避基数（秒）
+        backoff_max: 单次退避时间上限（秒）
+        jitter: 抖动方式，full / equal / none
+        retry_on_status: 幂等请求遇到这些状态码时重试
+        retry_on_errors: 非幂等请求也允许重试的错误类型
+        idempotent_methods: 视为幂等的HTTP方法
+        hedge_after: 超过该延迟（秒）仍未返回时发送一个对冲请求，None 表示关闭
+        hedge_methods: 允许发送对冲请求的HTTP方法
+    """
+    max_retries: int = 0
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+    jitter: str = "full"
+    retry_on_status: Tuple[int, ...] = (502, 503, 504)
+    retry_on_errors: Tuple[str, ...] = SAFE_ERRORS
+    idempotent_methods: Tuple[str, ...] = IDEMPOTENT_METHODS
+    hedge_after: Optional[float] = None
+    hedge_methods: Tuple[str, ...] = IDEMPOTENT_METHODS
+
+    def __post_init__(self):
+        """初始化后的验证"""
+        if self.max_retries < 0:
+            raise ValueError("max_retries不能小于0")
+        if self.jitter not in ("full", "equal", "none"):
+            raise ValueError(f"不支持的抖动方式: {self.jitter}")
+
+    @classmethod
+    def from_config(cls, config: Any, base: Optional['RetryPolicy'] = None) -> 'RetryPolicy':
+        """从配置构建策略
+
+        Args:
+            config: 整数（仅指定重试次数，如 kyc_config.yaml 中的 retry: 3）或字典
+            base: 作为默认值的策略，用于用例级配置覆盖套件级配置
+        """
+        base = base or cls()
+        if config is None:
+            return base
+        if isinstance(config, int):
+            return replace(base, max_retries=config)
+        if not isinstance(config, dict):
+            raise ValueError(f"无效的重试配置: {config}")
+
+        known = {f.name for f in fields(cls)}
+        unknown = set(config) - known
+        if unknown:
+            raise ValueError(f"未知的重试配置项: {', '.join(sorted(unknown))}")
+        overrides = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in config.items()
+        }
+        return replace(base, **overrides)
+
+    def is_idempotent(self, method: str) -> bool:
+        return method.upper() in self.idempotent_methods
+
+    def should_retry(self, method: str, error_kind: Optional[str], status_code: int) -> bool:
+        """判断一次失败的尝试是否可以重试"""
+        if error_kind is not None:
+            return self.is_idempotent(method) or error_kind in self.retry_on_errors
+        if status_code in self.retry_on_status:
+            return self.is_idempotent(method)
+        return False
+
+    def can_hedge(self, method: str) -> bool:
+        return self.hedge_after is not None and method.upper() in self.hedge_methods
+
+    def backoff(self, attempt: int) -> float:
+        """计算第 attempt 次重试前的等待时间（指数退避加抖动）"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter == "full":
+            return random.uniform(0, delay)
+        if self.jitter == "equal":
+            return delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+
+class RetryBudget:
+    """重试预算
+
+    每个请求存入 ratio 个令牌，每次重试消耗一个令牌，另外保留 min_tokens
+    个令牌保证低流量时也能重试。服务整体故障时重试量被限制在请求量的固定比例，
+    避免重试风暴放大故障。
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 1000.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            # ratio 多次累加有浮点误差（如 10 个 0.2 为 1.9999999999999998），留出容差
+            if self._tokens >= 1 - 1e-9:
+                self._tokens -= 1
+                return True
+            return False
+
+
+@dataclass
+class RetryStats:
+    """重试统计，线程安全地累加
+
+    属性:
+        requests: 逻辑请求数
+        attempts: 实际发送的请求数（含重试和对冲）
+        retries: 重试次数
+        hedges: 对冲请求次数
+        budget_exhausted: 因预算不足放弃的重试次数
+        errors: 按错误类型统计的次数
+    """
+    requests: int = 0
+    attempts: int = 0
+    retries: int = 0
+    hedges: int = 0
+    budget_exhausted: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, attempts: int, retries: int, hedged: bool, budget_exhausted: bool, error_kinds: List[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            self.attempts += attempts
+            self.retries += retries
+            self.hedges += 1 if hedged else 0
+            self.budget_exhausted += 1 if budget_exhausted else 0
+            for kind in error_kinds:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'hedges': self.hedges,
+                'budget_exhausted': self.budget_exhausted,
+                'errors': dict(self.errors)
+            }
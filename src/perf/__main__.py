@@ -0,0 +1,35 @@
+"""压测命令行入口
+
+在 src 目录下执行::
+
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "1m:10,5m:10:hold,30s:0"
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "spike:base=5,peak=50,hold=2m"
+    python -m perf run ../tests/test_cases_user_credit.yaml --executor arrival_rate --stages "2m:20" --max-vus 50
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "adaptive:duration=30m,max_vus=100,latency_target=800ms"
+    python -m perf run ../tests/test_cases_user_credit.yaml --vus 20 --warmup 30s --duration 5m --drain 10s
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "5m:20" --thresholds "p95<500ms,checks>99%" --verdict verdict.json
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "5m:20" --result-log run.bin && python -m perf analyze run.bin
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "10m:50" --timeseries series.csv --rolling 10s,1m
+    python -m perf run ../tests/test_cases_user_credit.yaml --vus 20 --duration 30m --no-dashboard > run.log
+    python -m perf run ../tests/test_cases_user_credit.yaml --vus 20 --duration 10m --metrics-port 9464   # 运行期间 curl localhost:9464/metrics
+    python -m perf run ../tests/workload_mixed.yaml --var base_url=http://127.0.0.1:8081   # 授信/检查/还款按 70/20/10 混合
+    python -m perf html run.bin -o report.html
+    python -m perf compare baseline.json run.bin --threshold 10%
+    python -m perf mock --scenario ../tests/mock_gateway.yaml --port 8081 --workers 4   # 离线压测: --var base_url=http://127.0.0.1:8081
+    python -m perf run ../tests/test_cases_user_credit.yaml --stages "3m:10" --timeout 5 --faults ../tests/fault_proxy.yaml
+    python -m perf proxy http://192.168.1.2:8081 --faults ../tests/fault_proxy.yaml --port 8082
+    python -m perf run ../tests/test_cases_user_credit.yaml --vus 20 --duration 5m --record capture.jsonl
+    python -m perf import-log gateway-access.log -o capture.jsonl --field time=ts
+    python -m perf replay capture.jsonl --suite ../tests/test_cases_user_credit.yaml --base-url http://127.0.0.1:8081 --speed 10x --workers 4
+
+未指定 --stages 时使用套件YAML中的 load_profile；阈值未通过时退出码为1。
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perf.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
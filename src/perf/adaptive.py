@@ -0,0 +1,161 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .profile import ADAPTIVE, VUS, parse_duration
+from .stats import LatencyHistogram
+
+_LATENCY_METRICS = {'p50': 0.5, 'p90': 0.9, 'p95': 0.95, 'p99': 0.99}
+
+
+class AdaptiveProfile:
+    """AIMD 自适应并发控制
+
+    作为 LoadEngine 的负载模型使用（闭环VU模型），每个 interval 统计一次窗口内的结果：
+    出现超时、HttpClient 返回 -1、5xx 响应，或失败率/延迟超过目标时，
+    并发数乘以 decrease 下调；否则加上 increase 缓慢上调。
+    长时间无人值守的压测会稳定在系统拐点附近，而不会把服务压垮。
+
+    套件YAML中的配置示例::
+
+        load_profile:
+          executor: adaptive
+          duration: 30m
+          initial: 5
+          min_vus: 1
+          max_vus: 200
+          increase: 1
+          decrease: 0.7
+          interval: 5s
+          latency_metric: p95
+          latency_target: 800ms
+          max_error_rate: 0.01
+    """
+    executor = VUS
+
+    def __init__(
+        self,
+        duration: float,
+        initial: int = 1,
+        min_vus: int = 1,
+        max_vus: int = 100,
+        increase: float = 1.0,
+        decrease: float = 0.7,
+        interval: float = 5.0,
+        latency_metric: str = 'p95',
+        latency_target: Optional[float] = None,
+        max_error_rate: float = 0.01,
+        name: str = ADAPTIVE
+    ):
+        if not 0 < decrease < 1:
+            raise ValueError("decrease必须在0和1之间")
+        if latency_metric not in _LATENCY_METRICS:
+            raise ValueError(f"不支持的延迟指标: {latency_metric}")
+        if min_vus < 1 or max_vus < min_vus:
+            raise ValueError("并发范围配置无效")
+        self.duration = duration
+        self.min_vus = min_vus
+        self.max_vus = max_vus
+        self.increase = increase
+        self.decrease = decrease
+        self.interval = interval
+        self.latency_metric = latency_metric
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+        self.name = name
+        self.limit = float(min(max(initial, min_vus), max_vus))
+        self.trajectory: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._window_start: Optional[float] = None
+        self._reset_window()
+
+    @property
+    def peak(self) -> float:
+        return self.max_vus
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'AdaptiveProfile':
+        """从 load_profile 配置（或命令行 adaptive:key=value,... 参数）构建"""
+        config = {key: value for key, value in config.items() if key != 'executor'}
+        if 'duration' not in config:
+            raise ValueError("自适应模型需要配置 duration")
+        kwargs = {'duration': parse_duration(config.pop('duration'))}
+        for key in ('interval', 'latency_target'):
+            if key in config:
+                kwargs[key] = parse_duration(config.pop(key))
+        for key in ('initial', 'min_vus', 'max_vus'):
+            if key in config:
+                kwargs[key] = int(config.pop(key))
+        for key in ('increase', 'decrease', 'max_error_rate'):
+            if key in config:
+                kwargs[key] = float(config.pop(key))
+        for key in ('latency_metric', 'name'):
+            if key in config:
+                kwargs[key] = str(config.pop(key))
+        if config:
+            raise ValueError(f"未知的自适应配置项: {', '.join(sorted(config))}")
+        return cls(**kwargs)
+
+    def _reset_window(self) -> None:
+        self._requests = 0
+        self._failed = 0
+        self._overload = 0
+        self._latency = LatencyHistogram()
+
+    def observe(self, result) -> None:
+        """记录一次请求结果，由引擎在工作线程中调用"""
+        with self._lock:
+            self._requests += 1
+            if not result.passed:
+                self._failed += 1
+            if result.status_code == -1 or result.status_code >= 500:
+                self._overload += 1
+            self._latency.record(result.latency)
+
+    def target_at(self, elapsed: float) -> Tuple[Optional[str], float]:
+        """按窗口统计调整并发上限，返回 (阶段名, 目标VU数)"""
+        if elapsed >= self.duration:
+            return None, 0
+        if self._window_start is None:
+            self._window_start = elapsed
+        elif elapsed - self._window_start >= self.interval:
+            self._adjust(elapsed, elapsed - self._window_start)
+            self._window_start = elapsed
+        return self.name, int(self.limit)
+
+    def _adjust(self, elapsed: float, window: float) -> None:
+        with self._lock:
+            requests, failed, overload, latency = self._requests, self._failed, self._overload, self._latency
+            self._reset_window()
+
+        error_rate = failed / requests if requests else 0.0
+        observed = latency.percentile(_LATENCY_METRICS[self.latency_metric]) if requests else 0.0
+        reasons = []
+        if overload:
+            reasons.append(f"超时/异常/5xx {overload} 次")
+        if error_rate > self.max_error_rate:
+            reasons.append(f"失败率 {error_rate * 100:.2f}%")
+        if self.latency_target is not None and observed > self.latency_target:
+            reasons.append(f"{self.latency_metric} {observed * 1000:.0f}ms")
+
+        previous = self.limit
+        if reasons:
+            self.limit = max(float(self.min_vus), self.limit * self.decrease)
+        elif requests:
+            self.limit = min(float(self.max_vus), self.limit + self.increase)
+
+        point = {
+            'elapsed': round(elapsed, 3),
+            'timestamp': time.time(),
+            'vus': int(self.limit),
+            'requests': requests,
+            'rps': requests / window,
+            'error_rate': error_rate,
+            f'{self.latency_metric}_ms': observed * 1000,
+            'decreased': bool(reasons)
+        }
+        self.trajectory.append(point)
+        if int(previous) != int(self.limit):
+            action = f"下调（{', '.join(reasons)}）" if reasons else "上调"
+            print(f"[自适应] t={elapsed:.0f}s 并发 {int(previous)} -> {int(self.limit)} {action}, "
+                  f"吞吐 {point['rps']:.1f}/s")
@@ -0,0 +1,146 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .resultlog import ResultLog
+from .runinfo import config_hash
+from .stats import LatencyHistogram
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class EndpointBaseline:
+    """单个接口（或 total）的基线数据
+
+    属性:
+        requests: 请求数
+        failed: 失败数
+        histogram: 延迟直方图，桶编号 -> 次数（只保存非零桶，桶划分与 LatencyHistogram 相同）
+    """
+    requests: int
+    failed: int
+    histogram: Dict[int, int]
+
+    def to_histogram(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for index, count in self.histogram.items():
+            histogram.counts[index] = count
+            histogram.count += count
+            histogram.total += count * LatencyHistogram.bucket_value(index)
+        if self.histogram:
+            histogram.min = LatencyHistogram.bucket_value(min(self.histogram))
+            histogram.max = LatencyHistogram.bucket_value(max(self.histogram))
+        return histogram
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'requests': self.requests, 'failed': self.failed,
+                'histogram': {str(index): count for index, count in sorted(self.histogram.items())}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EndpointBaseline':
+        return cls(data['requests'], data['failed'], {int(index): count for index, count in data['histogram'].items()})
+
+
+@dataclass
+class Baseline:
+    """一次压测的基线，用于与之后的压测对比
+
+    保存分接口的延迟直方图、每秒请求数与失败数序列、配置摘要和代码版本，
+    体积与压测时长成正比、与请求数无关，可作为制品长期保存。
+
+    属性:
+        name: 基线名称，默认为结果日志路径
+        created_at: 生成时间（epoch 秒）
+        config_hash: 压测配置摘要，不同时两次压测不可直接比较
+        git_revision: 压测时的代码版本
+        info: 压测配置与环境信息
+        endpoints: 接口 -> 基线数据，total 为所有接口合计
+        interval: 序列的时间片长度（秒）
+        requests: 每个时间片完成的请求数
+        failed: 每个时间片的失败数
+    """
+    name: str
+    created_at: float
+    config_hash: Optional[str]
+    git_revision: Optional[str]
+    info: Dict[str, Any]
+    endpoints: Dict[str, EndpointBaseline]
+    interval: float = 1.0
+    requests: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_log(cls, log: ResultLog, name: Optional[str] = None, include_warmup: bool = False) -> 'Baseline':
+        """从结果日志生成基线，序列按 1 秒时间片"""
+        aggregate = log.aggregate(interval=1.0, include_warmup=include_warmup)
+        endpoints = {}
+        for index, endpoint in enumerate(log.meta['endpoints'], start=1):
+            if aggregate.endpoint_requests[index]:
+                endpoints[endpoint] = cls._endpoint(aggregate.endpoint_requests[index], aggregate.endpoint_failed[index],
+                                                    aggregate.endpoint_latency[index])
+        endpoints['total'] = cls._endpoint(aggregate.endpoint_requests.sum(), aggregate.endpoint_failed.sum(),
+                                           aggregate.endpoint_latency.sum(axis=0))
+        info = log.info
+        return cls(
+            name=name or log.path,
+            created_at=time.time(),
+            config_hash=config_hash(info['run']) if info.get('run') else None,
+            git_revision=info.get('run', {}).get('git_revision'),
+            info=info,
+            endpoints=endpoints,
+            interval=aggregate.interval,
+            requests=aggregate.requests.tolist(),
+            failed=aggregate.failed.tolist()
+        )
+
+    @staticmethod
+    def _endpoint(requests, failed, counts) -> EndpointBaseline:
+        nonzero = counts.nonzero()[0]
+        return EndpointBaseline(int(requests), int(failed), {int(i): int(counts[i]) for i in nonzero})
+
+    @classmethod
+    def load(cls, path: str) -> 'Baseline':
+        """读取基线文件；传入结果日志时直接从日志生成"""
+        if not path.endswith('.json'):
+            return cls.from_log(ResultLog(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != BASELINE_VERSION:
+            raise ValueError(f"不支持的基线版本: {data.get('version')}")
+        if data.get('log_base') != LatencyHistogram.LOG_BASE:
+            raise ValueError("基线的直方图分桶与当前版本不一致")
+        return cls(
+            name=data['name'],
+            created_at=data['created_at'],
+            config_hash=data.get('config_hash'),
+            git_revision=data.get('git_revision'),
+            info=data.get('info') or {},
+            endpoints={name: EndpointBaseline.from_dict(item) for name, item in data['endpoints'].items()},
+            interval=data['interval'],
+            requests=data['requests'],
+            failed=data['failed']
+        )
+
+    def save(self, path: str) -> None:
+        data = {
+            'version': BASELINE_VERSION,
+            'log_base': LatencyHistogram.LOG_BASE,
+            'name': self.name,
+            'created_at': self.created_at,
+            'config_hash': self.config_hash,
+            'git_revision': self.git_revision,
+            'info': self.info,
+            'endpoints': {name: item.to_dict() for name, item in self.endpoints.items()},
+            'interval': self.interval,
+            'requests': self.requests,
+            'failed': self.failed
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def rates(self) -> List[float]:
+        """每个时间片的吞吐（请求/秒），去掉首尾不完整的时间片"""
+        series = self.requests[1:-1] if len(self.requests) > 2 else self.requests
+        return [count / self.interval for count in series]
@@ -0,0 +1,175 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .engine import LoadEngine
+from .executor import SuiteExecutor
+from .profile import ARRIVAL_RATE, LoadProfile, LoadStage
+from .thresholds import SLORule
+
+
+@dataclass
+class CapacityLevel:
+    """一个负载级别的测量结果
+
+    属性:
+        rate: 目标到达速率（迭代/秒）
+        summary: 测量窗口内的统计汇总
+        dropped_iterations: 因并发上限被丢弃的迭代数
+        violations: 违反的SLO
+    """
+    rate: float
+    summary: Dict[str, Any]
+    dropped_iterations: int = 0
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def sustainable(self) -> bool:
+        return not self.violations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rate': self.rate,
+            'achieved_rps': self.summary['rps'],
+            'requests': self.summary['requests'],
+            'error_rate': self.summary['error_rate'],
+            'latency_ms': self.summary['latency_ms'],
+            'dropped_iterations': self.dropped_iterations,
+            'sustainable': self.sustainable,
+            'violations': self.violations
+        }
+
+
+class CapacitySearch:
+    """最大可持续吞吐量搜索
+
+    以套件为负载，在到达速率模型下逐级加压。每个级别先稳定 settle 秒（不计入统计），
+    再测量 measure 秒，依据SLO判断该级别是否可持续。
+    step 模式按固定步长递增，首次违反SLO即停止；
+    binary 模式先按步长倍增找到上界，再在最后一个可持续级别与上界之间二分，
+    直到区间小于 precision。迭代因并发上限被丢弃也视为不可持续。
+    """
+
+    def __init__(
+        self,
+        executor: SuiteExecutor,
+        slo: List[SLORule],
+        start_rate: float = 1.0,
+        step: float = 1.0,
+        max_rate: float = 1000.0,
+        mode: str = 'step',
+        settle: float = 30.0,
+        measure: float = 60.0,
+        precision: float = 1.0,
+        max_vus: Optional[int] = None
+    ):
+        if mode not in ('step', 'binary'):
+            raise ValueError(f"不支持的搜索模式: {mode}")
+        if not slo:
+            raise ValueError("容量搜索至少需要一条SLO")
+        self.executor = executor
+        self.slo = slo
+        self.start_rate = start_rate
+        self.step = step
+        self.max_rate = max_rate
+        self.mode = mode
+        self.settle = settle
+        self.measure = measure
+        self.precision = precision
+        self.max_vus = max_vus
+        self.levels: List[CapacityLevel] = []
+
+    def measure_level(self, rate: float) -> CapacityLevel:
+        """在指定速率下运行一个级别并评估SLO"""
+        stages = []
+        if self.settle > 0:
+            stages.append(LoadStage('settle', self.settle, rate, ramp=0))
+        stages.append(LoadStage('measure', self.measure, rate, ramp=0))
+        profile = LoadProfile(executor=ARRIVAL_RATE, stages=stages, start=rate, max_vus=self.max_vus)
+        engine = LoadEngine(self.executor, profile)
+        report = engine.run()
+
+        measured = report['stages'].get('measure')
+        summary = measured['total'] if measured else engine.stats.report()['total']
+        level = CapacityLevel(rate=rate, summary=summary, dropped_iterations=engine.dropped_iterations)
+        if summary['requests'] == 0:
+            level.violations.append("测量窗口内没有完成的请求")
+        for rule in self.slo:
+            violation = rule.check(summary)
+            if violation:
+                level.violations.append(violation)
+        if engine.dropped_iterations:
+            level.violations.append(f"丢弃迭代 {engine.dropped_iterations} 次，并发上限不足以维持该速率")
+        if engine.aborted:
+            level.violations.append(f"压测中止: {engine.aborted}")
+        self.levels.append(level)
+        print(f"速率 {rate:g}/s: 吞吐 {summary['rps']:.2f}/s, p99 {summary['latency_ms']['p99']:.1f}ms, "
+              f"失败率 {summary['error_rate'] * 100:.2f}% -> {'通过' if level.sustainable else '; '.join(level.violations)}")
+        return level
+
+    def run(self) -> Dict[str, Any]:
+        """执行搜索，返回最大可持续速率与延迟-吞吐曲线"""
+        best, _ = self._search_step() if self.mode == 'step' else self._search_binary()
+        curve = sorted((level.to_dict() for level in self.levels), key=lambda item: item['rate'])
+        return {
+            'mode': self.mode,
+            'slo': [str(rule) for rule in self.slo],
+            'iteration_requests': self.executor.iteration_requests,
+            'max_sustainable_rate': best.rate if best else None,
+            'max_sustainable_rps': best.summary['rps'] if best else None,
+            'curve': curve
+        }
+
+    def _search_step(self) -> Tuple[Optional[CapacityLevel], Optional[CapacityLevel]]:
+        best = None
+        rate = self.start_rate
+        while rate <= self.max_rate:
+            level = self.measure_level(rate)
+            if not level.sustainable:
+                return best, level
+            best = level
+            rate += self.step
+        return best, None
+
+    def _search_binary(self) -> Tuple[Optional[CapacityLevel], Optional[CapacityLevel]]:
+        best = None
+        failed = None
+        rate = self.start_rate
+        step = self.step
+        while rate <= self.max_rate:
+            level = self.measure_level(rate)
+            if not level.sustainable:
+                failed = level
+                break
+            best = level
+            rate += step
+            step *= 2
+        if failed is None:
+            return best, None
+
+        low = best.rate if best else 0.0
+        high = failed.rate
+        while high - low > self.precision:
+            rate = (low + high) / 2
+            level = self.measure_level(rate)
+            if level.sustainable:
+                best, low = level, rate
+            else:
+                failed, high = level, rate
+        return best, failed
+
+
+def print_capacity_report(result: Dict[str, Any]) -> None:
+    """打印延迟-吞吐曲线与最大可持续速率"""
+    print("\n容量搜索报告==================================")
+    print(f"SLO: {', '.join(result['slo'])}, 搜索模式: {result['mode']}")
+    print(f"{'目标速率':>10} {'实际吞吐':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10} {'失败率':>8}  结果")
+    for point in result['curve']:
+        latency = point['latency_ms']
+        print(f"{point['rate']:>10.2f} {point['achieved_rps']:>10.2f} {latency['p50']:>10.1f} "
+              f"{latency['p95']:>10.1f} {latency['p99']:>10.1f} {point['error_rate'] * 100:>7.2f}%  "
+              f"{'通过' if point['sustainable'] else '违反SLO'}")
+    if result['max_sustainable_rate'] is None:
+        print("\n起始速率已违反SLO，未找到可持续的速率")
+    else:
+        print(f"\n最大可持续速率: {result['max_sustainable_rate']:g} 迭代/秒 "
+              f"(每迭代 {result['iteration_requests']} 个请求, 实际吞吐 {result['max_sustainable_rps']:.2f} 请求/秒)")
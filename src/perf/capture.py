@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CAPTURE_VERSION = 1
+# 访问日志中各字段的默认名称，依次尝试
+ACCESS_LOG_FIELDS = {
+    'time': ('time', 'timestamp', '@timestamp', 'ts', 'time_local', 'time_iso8601'),
+    'method': ('method', 'request_method'),
+    'url': ('url', 'uri', 'path', 'request_uri'),
+    'body': ('request_body', 'body', 'req_body', 'request'),
+    'status': ('status', 'status_code'),
+    'latency': ('request_time', 'latency', 'duration', 'upstream_response_time'),
+}
+
+
+@dataclass
+class CapturedRequest:
+    """抓取的一次请求
+
+    属性:
+        t: 发送时间（epoch 秒）
+        method: 请求方法
+        url: 请求地址，代理与访问日志抓取的只有路径
+        headers: 请求头
+        body: 请求体中 data、timestamp 以外的字段（如 channelCode）；data 为明文时也不含 sign
+        data: 加密前的业务数据，重放时重新加密签名
+        encrypted: 只抓到密文时的 data 字段，重放时用平台私钥解密后重新加密签名，
+            没有私钥时连同 body 中的原签名原样发送（签名只覆盖 data）
+        case_id: 用例ID，压测时抓取的才有
+        status: 原始响应的HTTP状态码
+        code: 原始响应的业务返回码
+        latency: 原始请求耗时（秒）
+    """
+    t: float
+    method: str
+    url: str
+    headers: Optional[Dict[str, str]] = None
+    body: Any = None
+    data: Any = None
+    encrypted: Optional[str] = None
+    case_id: Optional[str] = None
+    status: Optional[int] = None
+    code: Optional[str] = None
+    latency: Optional[float] = None
+
+    def to_json(self) -> str:
+        return json.dumps({key: value for key, value in asdict(self).items() if value is not None},
+                          ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CapturedRequest':
+        return cls(**data)
+
+    @staticmethod
+    def split_body(body: Any) -> Tuple[Any, Any, Optional[str]]:
+        """把请求体拆为 (其余字段, 明文数据, 密文数据)，密文的签名保留在其余字段中"""
+        if not isinstance(body, dict) or body.get('data') is None:
+            return body, None, None
+        data = body['data']
+        generated = ('data', 'timestamp') if isinstance(data, str) else ('data', 'sign', 'timestamp')
+        rest = {key: value for key, value in body.items() if key not in generated}
+        if isinstance(data, str):
+            return rest, None, data
+        return rest, data, None
+
+
+class TrafficRecorder:
+    """把请求追加写入 JSONL 抓包文件，可被多个线程同时调用
+
+    第一行为文件头 {"capture": 版本, "source": 来源, "started_at": 开始时间}，
+    之后每行一条 CapturedRequest；started_at 作为重放时间轴的起点。
+    """
+
+    def __init__(self, path: str, source: str, started_at: Optional[float] = None):
+        self.path = path
+        self.source = source
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        header = {'capture': CAPTURE_VERSION, 'source': source, 'started_at': started_at or time.time()}
+        self._file.write(json.dumps(header) + '\n')
+
+    def record(self, request: CapturedRequest) -> None:
+        line = request.to_json() + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> 'TrafficRecorder':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+    if header.get('capture') != CAPTURE_VERSION:
+        raise ValueError(f"不是支持的抓包文件: {path}")
+    return header
+
+
+def read_capture(path: str, shard: int = 0, shards: int = 1) -> Iterator[CapturedRequest]:
+    """按文件顺序读取抓包记录，shards 大于 1 时只解析下标对 shards 取余等于 shard 的记录"""
+    read_header(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for index, line in enumerate(f):
+            if index % shards == shard and line.strip():
+                yield CapturedRequest.from_dict(json.loads(line))
+
+
+def _pick(entry: Dict[str, Any], names: Tuple[str, ...]) -> Any:
+    for name in names:
+        if entry.get(name) not in (None, '', '-'):
+            return entry[name]
+    return None
+
+
+def parse_log_time(value: Any) -> float:
+    """访问日志时间：epoch 秒或毫秒、ISO 8601、或 nginx 的 19/Oct/2026:12:00:00 +0800"""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
+        value = float(value)
+        return value / 1000 if value > 1e11 else value
+    text = str(value).strip()
+    for parse in (lambda s: datetime.fromisoformat(s.replace('Z', '+00:00')),
+                  lambda s: datetime.strptime(s, '%d/%b/%Y:%H:%M:%S %z')):
+        try:
+            return parse(text).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析的时间: {value}")
+
+
+def _parse_body(value: Any) -> Any:
+    """访问日志中的请求体可能是对象、JSON字符串或 nginx 转义后的字符串"""
+    if not isinstance(value, str):
+        return value
+    text = value.replace('\\x22', '"') if '\\x22' in value else value
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def import_access_log(path: str, output: str, fields: Optional[Dict[str, str]] = None) -> int:
+    """把 JSON 格式（每行一个对象）的网关访问日志转换为抓包文件，返回转换的请求数
+
+    fields 指定字段名，如 {'time': 'ts', 'body': 'req'}，未指定的按 ACCESS_LOG_FIELDS 依次尝试。
+    记录按时间排序后写出，started_at 取最早的请求时间。
+    """
+    names = {key: (fields[key],) if fields and key in fields else default for key, default in ACCESS_LOG_FIELDS.items()}
+    requests: List[CapturedRequest] = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number} 不是JSON: {e}")
+            url, when = _pick(entry, names['url']), _pick(entry, names['time'])
+            if url is None or when is None:
+                raise ValueError(f"{path}:{number} 缺少请求地址或时间字段")
+            rest, data, encrypted = CapturedRequest.split_body(_parse_body(_pick(entry, names['body'])))
+            status, latency = _pick(entry, names['status']), _pick(entry, names['latency'])
+            requests.append(CapturedRequest(
+                t=parse_log_time(when),
+                method=str(_pick(entry, names['method']) or 'POST').upper(),
+                url=str(url),
+                body=rest,
+                data=data,
+                encrypted=encrypted,
+                status=int(status) if status is not None else None,
+                latency=float(latency) if latency is not None else None
+            ))
+    requests.sort(key=lambda item: item.t)
+    with TrafficRecorder(output, 'access-log', started_at=requests[0].t if requests else None) as recorder:
+        for request in requests:
+            recorder.record(request)
+    return len(requests)
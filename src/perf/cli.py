@@ -0,0 +1,503 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Union
+
+from test.test_suite import TestSuite
+from .capacity import CapacitySearch, print_capacity_report
+from .dashboard import Dashboard, dashboard_enabled
+from .engine import LoadEngine
+from .executor import SuiteExecutor
+from .faultproxy import FaultProxy, FaultSchedule, print_fault_summary
+from .htmlreport import write_html
+from .metrics import MetricsServer
+from .mockgateway import run_gateway
+from .adaptive import AdaptiveProfile
+from .baseline import Baseline
+from .capture import TrafficRecorder, import_access_log
+from .compare import LATENCY_QUANTILES, CompareOptions, compare_baselines, print_comparison
+from .profile import ARRIVAL_RATE, VUS, LoadProfile, LoadStage, parse_duration
+from .replay import parse_speed, print_replay_summary, replay
+from .report import print_report
+from .resultlog import ResultLog, ResultLogWriter
+from .runinfo import environment, file_sha256, git_revision
+from .thresholds import Thresholds, parse_slo
+from .timeseries import TimeSeries
+from .workload import MixedExecutor, Workload, is_workload
+
+
+def load_suite(path: str, overrides: Optional[List[str]] = None) -> Union[TestSuite, Workload]:
+    """加载套件或混合场景负载文件，并用命令行的 key=value 覆盖变量"""
+    suite = Workload.from_yaml(path) if is_workload(path) else TestSuite.from_yaml(path)
+    for item in overrides or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"无效的变量覆盖: {item}，应为 key=value")
+        suite.variables[key.strip()] = value
+    return suite
+
+
+def build_executor(suite: Union[TestSuite, Workload], timeout: int,
+                   recorder: Optional[TrafficRecorder] = None) -> Union[SuiteExecutor, MixedExecutor]:
+    if isinstance(suite, Workload):
+        return MixedExecutor(suite, timeout=timeout, recorder=recorder)
+    return SuiteExecutor(suite, timeout=timeout, recorder=recorder)
+
+
+def build_profile(args, suite: TestSuite) -> LoadProfile:
+    """命令行 --vus/--stages 优先，否则使用套件中的 load_profile"""
+    if args.vus is not None:
+        if not args.duration:
+            raise ValueError("--vus 需要与 --duration 一起使用")
+        length = parse_duration(args.warmup) + parse_duration(args.duration)
+        stage = LoadStage('steady', length, args.vus, ramp=0)
+        return LoadProfile(executor=args.executor or VUS, stages=[stage], start=args.vus, max_vus=args.max_vus)
+    if args.stages:
+        return LoadProfile.from_cli(args.stages, executor=args.executor or VUS, max_vus=args.max_vus)
+    if not suite.load_profile:
+        raise ValueError("未指定 --stages，且套件未配置 load_profile")
+    profile = LoadProfile.from_config(suite.load_profile)
+    if args.executor:
+        if isinstance(profile, AdaptiveProfile):
+            raise ValueError("自适应并发模型不支持 --executor")
+        profile.executor = args.executor
+    if args.max_vus:
+        profile.max_vus = args.max_vus
+    return profile
+
+
+def build_thresholds(args, suite: TestSuite) -> Optional[Thresholds]:
+    """套件中的 thresholds，命令行 --thresholds 替换整体阈值，--abort-on-fail 开启中止"""
+    thresholds = Thresholds.from_config(suite.thresholds)
+    if args.thresholds:
+        thresholds.total = parse_slo(args.thresholds)
+    if args.abort_on_fail:
+        thresholds.abort_on_fail = True
+    return thresholds if thresholds else None
+
+
+def describe_profile(profile: LoadProfile) -> str:
+    if isinstance(profile, AdaptiveProfile):
+        return f"自适应并发, 时长: {profile.duration:g}s, 并发范围: {profile.min_vus}-{profile.max_vus}"
+    return f"{profile.executor}, 阶段: {[(s.name, s.duration, s.target) for s in profile.stages]}"
+
+
+def _mask_variable(item: str) -> str:
+    key, _, value = item.partition('=')
+    if any(word in key.lower() for word in ('key', 'secret', 'token', 'password')):
+        value = '***'
+    return f"{key}={value}"
+
+
+def run_info(args, suite: TestSuite, profile: LoadProfile) -> dict:
+    """写入结果日志的压测配置与环境信息"""
+    run = {
+        'suite': suite.name,
+        'suite_path': args.suite,
+        'suite_sha256': file_sha256(args.suite),
+        'git_revision': git_revision(os.path.dirname(os.path.abspath(args.suite))),
+        'profile': describe_profile(profile),
+        'warmup': args.warmup,
+        'duration': args.duration,
+        'drain': args.drain,
+        'timeout': args.timeout,
+        'thresholds': args.thresholds or suite.thresholds,
+        'variables': [_mask_variable(item) for item in args.var or []]
+    }
+    if args.faults:
+        # 故障脚本不同的两次压测不可直接比较，一并计入配置摘要
+        run['faults'] = args.faults
+        run['faults_sha256'] = file_sha256(args.faults)
+    return {'run': run, 'environment': environment()}
+
+
+def cmd_run(args) -> int:
+    if (args.html or args.save_baseline) and not args.result_log:
+        raise ValueError("--html 与 --save-baseline 需要同时指定 --result-log")
+    suite = load_suite(args.suite, args.var)
+    profile = build_profile(args, suite)
+    proxy = None
+    if args.faults:
+        if not suite.variables.get('base_url'):
+            raise ValueError("--faults 需要套件变量 base_url 指向被测服务")
+        proxy = FaultProxy(suite.variables['base_url'], FaultSchedule.load(args.faults), seed=args.faults_seed)
+        # 用例地址在创建执行器时解析，代理需先启动；故障阶段的时间从此刻（压测开始，含预热）算起
+        proxy.start()
+        suite.variables['base_url'] = proxy.url
+        print(f"故障注入代理: {proxy.url} -> {proxy.target}，脚本 {args.faults}")
+    recorder = TrafficRecorder(args.record, 'harness') if args.record else None
+    executor = build_executor(suite, args.timeout, recorder)
+    thresholds = build_thresholds(args, suite)
+    result_log = ResultLogWriter(args.result_log, info=run_info(args, suite, profile)) if args.result_log else None
+    timeseries = None
+    if args.timeseries:
+        timeseries = TimeSeries(
+            interval=parse_duration(args.interval),
+            windows=[parse_duration(item) for item in args.rolling.split(',') if item.strip()],
+            path=args.timeseries
+        )
+    engine = LoadEngine(
+        executor,
+        profile,
+        thresholds=thresholds,
+        warmup=parse_duration(args.warmup),
+        duration=parse_duration(args.duration) if args.duration else None,
+        drain=parse_duration(args.drain) if args.drain else None,
+        result_log=result_log,
+        timeseries=timeseries
+    )
+
+    print(f"开始压测: {suite.name}")
+    print(f"负载模型: {describe_profile(profile)}")
+    dashboard = args.dashboard if args.dashboard is not None else dashboard_enabled()
+    metrics = MetricsServer(engine, args.metrics_host, args.metrics_port) if args.metrics_port is not None else None
+    if metrics is not None:
+        metrics.start()
+        print(f"指标端点: {metrics.url}")
+    try:
+        if dashboard:
+            with Dashboard(engine):
+                report = engine.run()
+        else:
+            report = engine.run()
+    finally:
+        if proxy is not None:
+            proxy.stop()
+        if metrics is not None:
+            metrics.stop()
+        if result_log is not None:
+            result_log.close()
+        if recorder is not None:
+            recorder.close()
+    print_report(report)
+    if proxy is not None:
+        print_fault_summary(proxy)
+    if recorder is not None:
+        print(f"\n抓包已保存: {args.record}（{recorder.count} 个请求），可用 perf replay 重放")
+    if result_log is not None:
+        print(f"\n结果日志已保存: {args.result_log}（{result_log.count} 条记录）")
+        if args.html:
+            write_html(args.html, ResultLog(args.result_log))
+            print(f"HTML报告已保存: {args.html}")
+        if args.save_baseline:
+            Baseline.from_log(ResultLog(args.result_log)).save(args.save_baseline)
+            print(f"基线已保存: {args.save_baseline}")
+    if timeseries is not None:
+        print(f"时间序列已保存: {args.timeseries}（{timeseries.rows_written} 行）")
+
+    trajectory = report['run'].get('concurrency_trajectory')
+    if args.trajectory and trajectory is not None:
+        with open(args.trajectory, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(trajectory[0]) if trajectory else ['elapsed', 'vus'])
+            writer.writeheader()
+            writer.writerows(trajectory)
+        print(f"并发轨迹已保存: {args.trajectory}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n报告已保存: {args.output}")
+    verdict = report.get('thresholds')
+    if args.verdict and verdict is not None:
+        with open(args.verdict, 'w', encoding='utf-8') as f:
+            json.dump(verdict, f, ensure_ascii=False, indent=2)
+        print(f"判定结果已保存: {args.verdict}")
+    if report['run'].get('aborted'):
+        return 1
+    return 0 if verdict is None or verdict['passed'] else 1
+
+
+def cmd_analyze(args) -> int:
+    log = ResultLog(args.log)
+    report = log.summarize(include_warmup=args.include_warmup)
+    print(f"结果日志: {args.log}, 记录数: {len(log)}")
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n报告已保存: {args.output}")
+    return 0
+
+
+def cmd_html(args) -> int:
+    log = ResultLog(args.log)
+    started = time.perf_counter()
+    write_html(args.output, log, include_warmup=args.include_warmup,
+               interval=parse_duration(args.interval) if args.interval else None)
+    print(f"HTML报告已保存: {args.output}（{len(log)} 条记录，用时 {time.perf_counter() - started:.1f}s）")
+    return 0
+
+
+def cmd_baseline(args) -> int:
+    baseline = Baseline.from_log(ResultLog(args.log), name=args.name, include_warmup=args.include_warmup)
+    baseline.save(args.output)
+    print(f"基线已保存: {args.output}（版本 {baseline.git_revision or '-'}，配置 {baseline.config_hash or '-'}）")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    metrics = [item.strip() for item in args.metrics.split(',') if item.strip()]
+    unknown = [metric for metric in metrics if metric not in LATENCY_QUANTILES]
+    if unknown:
+        raise ValueError(f"不支持的对比指标: {', '.join(unknown)}，可选 {', '.join(LATENCY_QUANTILES)}")
+    options = CompareOptions(
+        threshold=_parse_ratio(args.threshold),
+        error_threshold=_parse_ratio(args.error_threshold),
+        alpha=args.alpha,
+        metrics=metrics
+    )
+    result = compare_baselines(Baseline.load(args.base), Baseline.load(args.candidate), options)
+    print_comparison(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n对比结果已保存: {args.output}")
+    return 0 if result['passed'] else 1
+
+
+def _parse_ratio(text: str) -> float:
+    """解析 10% 或 0.1 形式的比例"""
+    text = text.strip()
+    return float(text[:-1]) / 100 if text.endswith('%') else float(text)
+
+
+def cmd_proxy(args) -> int:
+    schedule = FaultSchedule.load(args.faults) if args.faults else FaultSchedule.from_config(None)
+    recorder = TrafficRecorder(args.record, 'proxy') if args.record else None
+    proxy = FaultProxy(args.target, schedule, host=args.host, port=args.port, seed=args.seed, recorder=recorder)
+    proxy.start()
+    print(f"故障注入代理: {proxy.url} -> {proxy.target}（{schedule.mode} 模式），脚本 {args.faults or '无（只转发）'}")
+    try:
+        if args.duration:
+            time.sleep(parse_duration(args.duration))
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.stop()
+        if recorder is not None:
+            recorder.close()
+    print_fault_summary(proxy)
+    if recorder is not None:
+        print(f"抓包已保存: {args.record}（{recorder.count} 个请求）")
+    return 0
+
+
+def cmd_import_log(args) -> int:
+    fields = dict(_parse_assignment(item) for item in args.field or [])
+    count = import_access_log(args.log, args.output, fields)
+    print(f"抓包已保存: {args.output}（{count} 个请求）")
+    return 0
+
+
+def _parse_assignment(item: str):
+    key, sep, value = item.partition('=')
+    if not sep:
+        raise ValueError(f"无效的参数: {item}，应为 key=value")
+    return key.strip(), value.strip()
+
+
+def cmd_replay(args) -> int:
+    if args.suite:
+        variables = load_suite(args.suite, args.var).variables
+    else:
+        variables = dict(_parse_assignment(item) for item in args.var or [])
+    missing = [key for key in ('channel_private_key', 'platform_public_key') if not variables.get(key)]
+    if missing:
+        raise ValueError(f"重放需要密钥 {', '.join(missing)}，用 --suite 或 --var 提供")
+    report = replay(
+        args.capture,
+        workers=args.workers,
+        channel_private_key=variables['channel_private_key'],
+        platform_public_key=variables['platform_public_key'],
+        platform_private_key=variables.get('platform_private_key'),
+        base_url=args.base_url,
+        speed=parse_speed(args.speed),
+        concurrency=args.concurrency,
+        timeout=args.timeout
+    )
+    print_report(report)
+    print_replay_summary(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n报告已保存: {args.output}")
+    return 0
+
+
+def cmd_mock(args) -> int:
+    print(f"模拟网关: http://{args.host}:{args.port}，进程数 {args.workers}，脚本 {args.scenario}")
+    run_gateway(args.scenario, args.suite, host=args.host, port=args.port, workers=args.workers,
+                duration=parse_duration(args.duration) if args.duration else None, seed=args.seed)
+    return 0
+
+
+def cmd_capacity(args) -> int:
+    suite = load_suite(args.suite, args.var)
+    search = CapacitySearch(
+        build_executor(suite, args.timeout),
+        slo=parse_slo(args.slo),
+        start_rate=args.start_rate,
+        step=args.step,
+        max_rate=args.max_rate,
+        mode=args.mode,
+        settle=parse_duration(args.settle),
+        measure=parse_duration(args.measure),
+        precision=args.precision,
+        max_vus=args.max_vus
+    )
+    print(f"开始容量搜索: {suite.name}, SLO: {args.slo}")
+    result = search.run()
+    print_capacity_report(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+    if args.curve:
+        with open(args.curve, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['rate', 'achieved_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate', 'sustainable'])
+            for point in result['curve']:
+                latency = point['latency_ms']
+                writer.writerow([point['rate'], round(point['achieved_rps'], 3), round(latency['p50'], 2),
+                                 round(latency['p95'], 2), round(latency['p99'], 2),
+                                 round(point['error_rate'], 6), point['sustainable']])
+        print(f"延迟-吞吐曲线已保存: {args.curve}")
+    return 0 if result['max_sustainable_rate'] is not None else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m perf', description='接口压测工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='按负载模型执行压测')
+    run.add_argument('suite', help='测试套件或混合场景负载YAML路径')
+    run.add_argument('--stages', help='负载阶段，如 "1m:20,5m:20:hold,30s:0" 、"steps:step=10,every=1m,count=5" '
+                     '或 "adaptive:duration=30m,max_vus=200,latency_target=800ms"')
+    run.add_argument('--executor', choices=[VUS, ARRIVAL_RATE], help='负载模型：并发VU数或到达速率')
+    run.add_argument('--max-vus', type=int, help='到达速率模型下同时执行的最大迭代数')
+    run.add_argument('--vus', type=float, help='以恒定负载运行（VU数，arrival_rate 模型下为每秒迭代数），需配合 --duration')
+    run.add_argument('--duration', help='预热之后的测量时长，如 5m；到期即停止，不论负载模型是否结束')
+    run.add_argument('--warmup', default='0', help='预热时长，期间的请求不计入统计，如 30s')
+    run.add_argument('--drain', help='停止后等待进行中请求完成的最长时间，如 10s，默认等待全部完成')
+    run.add_argument('--timeout', type=int, default=30, help='请求超时时间（秒）')
+    run.add_argument('--var', action='append', help='覆盖套件变量，如 base_url=http://127.0.0.1:8081')
+    run.add_argument('--output', help='保存JSON报告的路径')
+    run.add_argument('--trajectory', help='自适应并发模型下保存并发轨迹CSV的路径')
+    run.add_argument('--thresholds', help='整体阈值，替换套件配置，如 "p95<500ms,error_rate<1%%,rps>=20"')
+    run.add_argument('--abort-on-fail', action='store_true', help='违反阈值时立即中止压测')
+    run.add_argument('--verdict', help='保存阈值判定JSON的路径；未通过或压测中止时退出码为1')
+    run.add_argument('--result-log', help='逐请求写入二进制结果日志的路径，可用 analyze 子命令事后分析')
+    run.add_argument('--dashboard', action=argparse.BooleanOptionalAction, default=None,
+                     help='实时终端视图，默认在交互式终端中开启，CI 或输出重定向时关闭')
+    run.add_argument('--html', help='压测结束后从结果日志生成HTML报告的路径，需配合 --result-log')
+    run.add_argument('--save-baseline', help='压测结束后从结果日志生成基线文件的路径，需配合 --result-log')
+    run.add_argument('--metrics-port', type=int, help='在该端口提供 OpenMetrics 格式的 /metrics 抓取端点')
+    run.add_argument('--metrics-host', default='127.0.0.1', help='指标端点监听地址')
+    run.add_argument('--faults', help='故障注入脚本，压测经由本地代理访问 base_url')
+    run.add_argument('--faults-seed', type=int, help='故障注入的随机种子')
+    run.add_argument('--record', help='把每个请求（加密前的数据与发送时间）保存为抓包文件，供 replay 重放')
+    run.add_argument('--timeseries', help='保存分时间片统计的路径，.csv 或 .jsonl')
+    run.add_argument('--interval', default='1s', help='时间序列的时间片长度，如 1s、5s')
+    run.add_argument('--rolling', default='10s,60s', help='时间序列的滚动窗口，逗号分隔，如 10s,1m')
+    run.set_defaults(func=cmd_run)
+
+    analyze = subparsers.add_parser('analyze', help='从二进制结果日志生成报告')
+    analyze.add_argument('log', help='结果日志路径')
+    analyze.add_argument('--include-warmup', action='store_true', help='统计中包含预热期间的请求')
+    analyze.add_argument('--output', help='保存JSON报告的路径')
+    analyze.set_defaults(func=cmd_analyze)
+
+    baseline = subparsers.add_parser('baseline', help='从二进制结果日志生成基线文件')
+    baseline.add_argument('log', help='结果日志路径')
+    baseline.add_argument('--output', '-o', default='baseline.json', help='基线文件路径')
+    baseline.add_argument('--name', help='基线名称，默认为结果日志路径')
+    baseline.add_argument('--include-warmup', action='store_true', help='统计中包含预热期间的请求')
+    baseline.set_defaults(func=cmd_baseline)
+
+    compare = subparsers.add_parser('compare', help='对比两次压测，存在显著回归时退出码为1')
+    compare.add_argument('base', help='基线文件（.json）或结果日志')
+    compare.add_argument('candidate', help='待对比的基线文件（.json）或结果日志')
+    compare.add_argument('--threshold', default='10%', help='延迟变慢、吞吐下降超过该比例判为回归')
+    compare.add_argument('--error-threshold', default='0.5%', help='失败率上升超过该值（百分点）判为回归')
+    compare.add_argument('--alpha', type=float, default=0.01, help='显著性水平')
+    compare.add_argument('--metrics', default='p50,p95,p99', help='参与判定的延迟分位数')
+    compare.add_argument('--output', help='保存JSON对比结果的路径')
+    compare.set_defaults(func=cmd_compare)
+
+    mock = subparsers.add_parser('mock', help='启动带加解密与验签的模拟网关')
+    mock.add_argument('--scenario', default='../tests/mock_gateway.yaml', help='模拟脚本（密钥、延迟、错误率、业务码）')
+    mock.add_argument('--suite', action='append', help='从套件的渠道私钥推导该套件各渠道的公钥，可多次指定')
+    mock.add_argument('--host', default='127.0.0.1', help='监听地址')
+    mock.add_argument('--port', type=int, default=8081, help='监听端口')
+    mock.add_argument('--workers', type=int, default=1, help='进程数，大于1时共享端口以利用多核')
+    mock.add_argument('--duration', help='运行时长，默认一直运行')
+    mock.add_argument('--seed', type=int, help='随机种子，便于复现')
+    mock.set_defaults(func=cmd_mock)
+
+    proxy = subparsers.add_parser('proxy', help='启动故障注入代理（延迟、限速、断连、半开连接、残缺响应）')
+    proxy.add_argument('target', help='上游地址，如 http://192.168.1.2:8081')
+    proxy.add_argument('--faults', help='故障注入脚本，如 ../tests/fault_proxy.yaml，默认只转发')
+    proxy.add_argument('--host', default='127.0.0.1', help='监听地址')
+    proxy.add_argument('--port', type=int, default=8082, help='监听端口')
+    proxy.add_argument('--duration', help='运行时长，默认一直运行')
+    proxy.add_argument('--seed', type=int, help='随机种子，便于复现')
+    proxy.add_argument('--record', help='把经过代理的请求保存为抓包文件（仅 http 模式）')
+    proxy.set_defaults(func=cmd_proxy)
+
+    import_log = subparsers.add_parser('import-log', help='把JSON格式的网关访问日志转换为抓包文件')
+    import_log.add_argument('log', help='访问日志，每行一个JSON对象')
+    import_log.add_argument('-o', '--output', required=True, help='抓包文件路径')
+    import_log.add_argument('--field', action='append', help='指定字段名，如 time=ts、body=req_body、url=uri')
+    import_log.set_defaults(func=cmd_import_log)
+
+    replayer = subparsers.add_parser('replay', help='按原始时间间隔重放抓包文件')
+    replayer.add_argument('capture', help='抓包文件（run/proxy --record 或 import-log 生成）')
+    replayer.add_argument('--suite', help='从套件读取密钥变量 channel_private_key、platform_public_key')
+    replayer.add_argument('--var', action='append', help='覆盖密钥变量；提供 platform_private_key 时可重新加密只有密文的请求')
+    replayer.add_argument('--base-url', help='替换请求的协议与主机，如 http://127.0.0.1:8081')
+    replayer.add_argument('--speed', default='1x', help='重放速度，如 1x、10x、0.5x 或 max')
+    replayer.add_argument('--workers', type=int, default=1, help='进程数，大流量时分摊加密签名')
+    replayer.add_argument('--concurrency', type=int, default=32, help='每个进程同时在途的请求数上限')
+    replayer.add_argument('--timeout', type=int, default=30, help='请求超时时间（秒）')
+    replayer.add_argument('--output', help='保存JSON报告的路径')
+    replayer.set_defaults(func=cmd_replay)
+
+    report = subparsers.add_parser('html', help='从二进制结果日志生成单文件HTML报告')
+    report.add_argument('log', help='结果日志路径')
+    report.add_argument('--output', '-o', default='report.html', help='HTML报告路径')
+    report.add_argument('--interval', help='图表的时间片长度，默认按时长自动选择')
+    report.add_argument('--include-warmup', action='store_true', help='统计中包含预热期间的请求')
+    report.set_defaults(func=cmd_html)
+
+    capacity = subparsers.add_parser('capacity', help='搜索满足SLO的最大可持续到达速率')
+    capacity.add_argument('suite', help='测试套件或混合场景负载YAML路径（作为负载）')
+    capacity.add_argument('--slo', default='p99<800ms,error_rate<0.5%', help='SLO，如 "p99<800ms,error_rate<0.5%%"')
+    capacity.add_argument('--mode', choices=['step', 'binary'], default='step', help='逐级递增或二分搜索')
+    capacity.add_argument('--start-rate', type=float, default=1.0, help='起始到达速率（迭代/秒）')
+    capacity.add_argument('--step', type=float, default=1.0, help='每级增加的速率（binary 模式下逐级倍增）')
+    capacity.add_argument('--max-rate', type=float, default=1000.0, help='速率上限')
+    capacity.add_argument('--precision', type=float, default=1.0, help='binary 模式的结果精度')
+    capacity.add_argument('--settle', default='30s', help='每级的稳定时间，不计入统计')
+    capacity.add_argument('--measure', default='60s', help='每级的测量时间')
+    capacity.add_argument('--max-vus', type=int, help='同时执行的最大迭代数')
+    capacity.add_argument('--timeout', type=int, default=30, help='请求超时时间（秒）')
+    capacity.add_argument('--var', action='append', help='覆盖套件变量，如 base_url=http://127.0.0.1:8081')
+    capacity.add_argument('--output', help='保存JSON结果的路径')
+    capacity.add_argument('--curve', help='保存延迟-吞吐曲线CSV的路径')
+    capacity.set_defaults(func=cmd_capacity)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 2
@@ -0,0 +1,173 @@
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from .baseline import Baseline
+from .stats import LatencyHistogram
+
+LATENCY_QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p95': 0.95, 'p99': 0.99}
+
+
+def mann_whitney(base: Mapping[float, int], candidate: Mapping[float, int]) -> Dict[str, float]:
+    """按取值计数的 Mann-Whitney U 检验（正态近似，含并列校正）
+
+    直方图的同一个桶视为并列值，计算量与桶数相关、与样本数无关。
+    返回 z 值、双侧 p 值，以及 candidate 中随机取一个大于 base 中随机取一个的概率
+    （0.5 表示两个分布没有差别，大于 0.5 表示 candidate 偏大）。
+    """
+    n_base = sum(base.values())
+    n_candidate = sum(candidate.values())
+    if not n_base or not n_candidate:
+        return {'z': 0.0, 'p_value': 1.0, 'probability': 0.5}
+    total = n_base + n_candidate
+    rank = 0
+    rank_sum = 0.0
+    ties = 0.0
+    for value in sorted(set(base) | set(candidate)):
+        count = base.get(value, 0) + candidate.get(value, 0)
+        rank_sum += candidate.get(value, 0) * (rank + (count + 1) / 2)
+        ties += count ** 3 - count
+        rank += count
+    u = rank_sum - n_candidate * (n_candidate + 1) / 2
+    mean = n_base * n_candidate / 2
+    variance = n_base * n_candidate / 12 * ((total + 1) - ties / (total * (total - 1) if total > 1 else 1))
+    z = (u - mean) / math.sqrt(variance) if variance > 0 else 0.0
+    return {'z': z, 'p_value': math.erfc(abs(z) / math.sqrt(2)), 'probability': u / (n_base * n_candidate)}
+
+
+def _above(histogram: Mapping[int, int], index: int) -> int:
+    return sum(count for bucket, count in histogram.items() if bucket > index)
+
+
+def proportion_test(failed_a: int, total_a: int, failed_b: int, total_b: int) -> float:
+    """两个比例差异的 z 检验，返回双侧 p 值"""
+    if not total_a or not total_b:
+        return 1.0
+    pooled = (failed_a + failed_b) / (total_a + total_b)
+    variance = pooled * (1 - pooled) * (1 / total_a + 1 / total_b)
+    if variance <= 0:
+        return 1.0
+    z = (failed_b / total_b - failed_a / total_a) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+@dataclass
+class CompareOptions:
+    """回归判定标准
+
+    属性:
+        threshold: 延迟分位数变慢、吞吐下降超过该比例才算回归，如 0.1 表示 10%
+        error_threshold: 失败率上升超过该值（绝对值）才算回归，如 0.005 表示 0.5 个百分点
+        alpha: 显著性水平，检验的 p 值小于 alpha 才算显著
+        metrics: 参与判定的延迟分位数
+    """
+    threshold: float = 0.1
+    error_threshold: float = 0.005
+    alpha: float = 0.01
+    metrics: Sequence[str] = ('p50', 'p95', 'p99')
+
+
+def _change(base: float, candidate: float) -> Optional[float]:
+    return (candidate - base) / base if base else None
+
+
+def compare_baselines(base: Baseline, candidate: Baseline, options: Optional[CompareOptions] = None) -> Dict[str, Any]:
+    """对比两次压测，变化超过阈值且统计显著时判为回归
+
+    延迟分位数用超过基线分位数的请求比例做比例检验，失败率用比例检验，
+    吞吐用每秒请求数序列做 Mann-Whitney 检验；整体延迟分布的 Mann-Whitney 结果一并给出。
+    """
+    options = options or CompareOptions()
+    endpoints = []
+    regressions = []
+    for name in [name for name in base.endpoints if name in candidate.endpoints]:
+        a, b = base.endpoints[name], candidate.endpoints[name]
+        hist_a, hist_b = a.to_histogram(), b.to_histogram()
+        test = mann_whitney(a.histogram, b.histogram)
+        metrics = []
+        quantiles = [LATENCY_QUANTILES[metric] for metric in options.metrics]
+        for metric, value_a, value_b in zip(options.metrics, hist_a.percentiles(quantiles), hist_b.percentiles(quantiles)):
+            change = _change(value_a, value_b)
+            # 分位数的显著性：超过基线分位数的请求比例是否显著增加
+            index = LatencyHistogram.bucket_of(value_a)
+            tail_a, tail_b = _above(a.histogram, index), _above(b.histogram, index)
+            p_value = proportion_test(tail_a, a.requests, tail_b, b.requests)
+            slower = b.requests and a.requests and tail_b / b.requests > tail_a / a.requests
+            regressed = bool(slower) and p_value < options.alpha and change is not None and change > options.threshold
+            metrics.append({'metric': metric, 'base_ms': value_a * 1000, 'candidate_ms': value_b * 1000,
+                            'change': change, 'p_value': p_value, 'regressed': regressed})
+            if regressed:
+                regressions.append(f"{name} {metric} {value_a * 1000:.1f}ms -> {value_b * 1000:.1f}ms (+{change * 100:.1f}%)")
+
+        rate_a = a.failed / a.requests if a.requests else 0.0
+        rate_b = b.failed / b.requests if b.requests else 0.0
+        error_p = proportion_test(a.failed, a.requests, b.failed, b.requests)
+        error_regressed = error_p < options.alpha and rate_b - rate_a > options.error_threshold
+        if error_regressed:
+            regressions.append(f"{name} error_rate {rate_a * 100:.2f}% -> {rate_b * 100:.2f}%")
+        endpoints.append({
+            'endpoint': name,
+            'requests': [a.requests, b.requests],
+            'latency': metrics,
+            'latency_test': test,
+            'error_rate': {'base': rate_a, 'candidate': rate_b, 'p_value': error_p, 'regressed': error_regressed}
+        })
+
+    rates_a, rates_b = base.rates(), candidate.rates()
+    mean_a = sum(rates_a) / len(rates_a) if rates_a else 0.0
+    mean_b = sum(rates_b) / len(rates_b) if rates_b else 0.0
+    rps_test = mann_whitney(Counter(rates_a), Counter(rates_b))
+    rps_change = _change(mean_a, mean_b)
+    rps_regressed = rps_test['p_value'] < options.alpha and rps_change is not None and rps_change < -options.threshold
+    if rps_regressed:
+        regressions.append(f"rps {mean_a:.2f}/s -> {mean_b:.2f}/s ({rps_change * 100:.1f}%)")
+
+    return {
+        'base': {'name': base.name, 'git_revision': base.git_revision, 'config_hash': base.config_hash},
+        'candidate': {'name': candidate.name, 'git_revision': candidate.git_revision, 'config_hash': candidate.config_hash},
+        'comparable': base.config_hash == candidate.config_hash,
+        'options': {'threshold': options.threshold, 'error_threshold': options.error_threshold,
+                    'alpha': options.alpha, 'metrics': list(options.metrics)},
+        'endpoints': endpoints,
+        'throughput': {'base_rps': mean_a, 'candidate_rps': mean_b, 'change': rps_change,
+                       'test': rps_test, 'regressed': rps_regressed},
+        'missing': sorted(set(base.endpoints) ^ set(candidate.endpoints)),
+        'regressions': regressions,
+        'passed': not regressions
+    }
+
+
+def _format_change(change: Optional[float]) -> str:
+    return '-' if change is None else f"{change * 100:+.1f}%"
+
+
+def print_comparison(result: Dict[str, Any]) -> None:
+    """在控制台打印对比结果"""
+    base, candidate = result['base'], result['candidate']
+    print(f"基线: {base['name']}  版本 {base['git_revision'] or '-'}  配置 {base['config_hash'] or '-'}")
+    print(f"对比: {candidate['name']}  版本 {candidate['git_revision'] or '-'}  配置 {candidate['config_hash'] or '-'}")
+    if not result['comparable']:
+        print("警告: 两次压测的配置不同，结果仅供参考")
+    if result['missing']:
+        print(f"只在一方出现的接口: {', '.join(result['missing'])}")
+
+    print(f"\n{'接口':<44} {'指标':<10} {'基线':>10} {'对比':>10} {'变化':>8}  p值")
+    for item in result['endpoints']:
+        for metric in item['latency']:
+            flag = '  回归' if metric['regressed'] else ''
+            print(f"{item['endpoint'][-44:]:<44} {metric['metric']:<10} {metric['base_ms']:>8.1f}ms {metric['candidate_ms']:>8.1f}ms "
+                  f"{_format_change(metric['change']):>8}  {metric['p_value']:.2g}{flag}")
+        error = item['error_rate']
+        print(f"{'':<44} {'失败率':<10} {error['base'] * 100:>9.2f}% {error['candidate'] * 100:>9.2f}% "
+              f"{(error['candidate'] - error['base']) * 100:>+7.2f}pp  {error['p_value']:.2g}{'  回归' if error['regressed'] else ''}")
+    throughput = result['throughput']
+    print(f"{'吞吐':<44} {'rps':<10} {throughput['base_rps']:>8.2f}/s {throughput['candidate_rps']:>8.2f}/s "
+          f"{_format_change(throughput['change']):>8}  {throughput['test']['p_value']:.2g}"
+          f"{'  回归' if throughput['regressed'] else ''}")
+
+    if result['regressions']:
+        print("\n性能回归:")
+        for line in result['regressions']:
+            print(f"  {line}")
+    print(f"结论: {'通过' if result['passed'] else '存在回归'}")
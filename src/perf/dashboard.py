@@ -0,0 +1,173 @@
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple
+
+from .timeseries import TOTAL, _Bucket
+
+# 终端控制序列：光标回到左上角并清屏
+_CLEAR = "\x1b[H\x1b[J"
+
+
+def dashboard_enabled(stream=None) -> bool:
+    """默认在交互式终端中开启，CI 环境、非TTY输出或 TERM=dumb 时关闭"""
+    stream = stream or sys.stdout
+    if os.environ.get('CI') or os.environ.get('TERM') == 'dumb':
+        return False
+    isatty = getattr(stream, 'isatty', None)
+    return bool(isatty and isatty())
+
+
+class _EventLog(io.TextIOBase):
+    """仪表盘运行期间代替 sys.stdout，保留最近的输出行在仪表盘底部显示"""
+
+    def __init__(self, size: int):
+        self.lines: deque = deque(maxlen=size)
+        self._partial = ''
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            parts = (self._partial + text).split('\n')
+            self._partial = parts.pop()
+            self.lines.extend(line for line in parts if line.strip())
+        return len(text)
+
+    def flush_partial(self) -> List[str]:
+        with self._lock:
+            if self._partial.strip():
+                self.lines.append(self._partial)
+            self._partial = ''
+            return list(self.lines)
+
+
+class Dashboard:
+    """压测过程中的实时终端视图
+
+    在独立线程中每 refresh 秒重绘一次，只读取 StatsCollector 的合并统计与引擎的状态字段，
+    不在请求路径上增加任何操作。显示当前阶段、活跃VU、累计请求数，整体与分接口的当前吞吐、
+    失败率和 p50/p99，以及次数最多的失败指纹。当前值按两次刷新之间的增量计算：
+    请求数、失败数与延迟直方图逐桶相减，长时间运行后仍能反映最近的变化，而不是被累计值抹平。
+    运行期间其他线程的 print 输出被收集起来，在视图底部显示最近几行，避免刷屏；
+    结束后恢复标准输出并保留最后一帧。
+    """
+
+    def __init__(self, engine, refresh: float = 1.0, top_failures: int = 5, event_lines: int = 5, stream=None):
+        self.engine = engine
+        self.refresh = refresh
+        self.top_failures = top_failures
+        self.stream = stream or sys.stdout
+        self._events = _EventLog(event_lines)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._redirect = None
+        self._started = 0.0
+        self._last_totals: Dict[str, _Bucket] = {}
+        self._last_time = time.monotonic()
+
+    def start(self) -> None:
+        self._started = self._last_time = time.monotonic()
+        self._redirect = redirect_stdout(self._events)
+        self._redirect.__enter__()
+        self._thread = threading.Thread(target=self._loop, name="dashboard", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止刷新，绘制最后一帧并恢复标准输出"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._draw()
+        self._redirect.__exit__(None, None, None)
+        self._redirect = None
+
+    def __enter__(self) -> 'Dashboard':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.refresh):
+            self._draw()
+
+    def _draw(self) -> None:
+        try:
+            frame = self.render(self.engine.stats.report())
+        except Exception as e:
+            frame = f"仪表盘刷新失败: {e}"
+        self.stream.write(_CLEAR + frame + '\n')
+        self.stream.flush()
+
+    def _interval(self) -> Tuple[float, Dict[str, _Bucket]]:
+        """两次刷新之间的时长，以及按接口（另有 total）统计的这段时间内的请求数、失败数与延迟直方图"""
+        now = time.monotonic()
+        span = max(now - self._last_time, 1e-6)
+        totals: Dict[str, _Bucket] = {TOTAL: _Bucket()}
+        for (_, endpoint, _, _, _), stats in self.engine.stats.merged().stats.items():
+            bucket = totals.get(endpoint)
+            if bucket is None:
+                bucket = totals[endpoint] = _Bucket()
+            for target in (bucket, totals[TOTAL]):
+                target.requests += stats.requests
+                target.failed += stats.failed
+                target.latency.merge(stats.latency)
+        deltas = {}
+        for key, bucket in totals.items():
+            delta = deltas[key] = _Bucket()
+            delta.merge(bucket)
+            previous = self._last_totals.get(key)
+            if previous is not None:
+                delta.subtract(previous)
+        self._last_totals = totals
+        self._last_time = now
+        return span, deltas
+
+    @staticmethod
+    def _error_rate(bucket: _Bucket) -> float:
+        return bucket.failed / bucket.requests if bucket.requests else 0.0
+
+    def render(self, report: Dict[str, Any]) -> str:
+        """生成一帧视图文本"""
+        engine = self.engine
+        width = shutil.get_terminal_size((120, 40)).columns
+        span, window = self._interval()
+        total = window[TOTAL]
+        stage = engine.current_stage or ('预热' if not engine.stopping else '排空')
+        lines = [
+            f"压测进行中  已运行 {time.monotonic() - self._started:6.0f}s  阶段 {stage}  "
+            f"活跃VU {engine.active_vus}  丢弃迭代 {engine.dropped_iterations}  累计请求 {report['total']['requests']}",
+            f"最近 {span:.1f}s  吞吐 {total.requests / span:8.2f}/s  失败率 {self._error_rate(total) * 100:6.2f}%  "
+            f"p50 {total.quantile(0.5) * 1000:.1f}ms  p99 {total.quantile(0.99) * 1000:.1f}ms",
+            "",
+            f"{'接口':<48} {'累计请求':>8} {'吞吐/s':>9} {'失败率':>8} {'p50 ms':>9} {'p99 ms':>9}",
+        ]
+        for endpoint, summary in report['endpoints'].items():
+            bucket = window.get(endpoint) or _Bucket()
+            lines.append(
+                f"{endpoint[-48:]:<48} {summary['requests']:>8} {bucket.requests / span:>9.2f} "
+                f"{self._error_rate(bucket) * 100:>7.2f}% {bucket.quantile(0.5) * 1000:>9.1f} "
+                f"{bucket.quantile(0.99) * 1000:>9.1f}"
+            )
+        failures = report.get('failures') or []
+        if failures:
+            lines += ["", f"失败分组 前 {min(self.top_failures, len(failures))} / {len(failures)} 种:"]
+            for group in failures[:self.top_failures]:
+                lines.append(f"{group['count']:>8}  {group['stage']:<8} {str(group['code'] or '-'):<10} {group['template']}")
+        if engine.violations:
+            lines += ["", "违反阈值: " + '; '.join(engine.violations.values())]
+        events = self._events.flush_partial()
+        if events:
+            lines += ["", "最近输出:"] + [f"  {line}" for line in events]
+        return '\n'.join(line[:width] for line in lines)
@@ -0,0 +1,471 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .executor import RequestResult, SuiteExecutor
+from .hooks import CASE, ITERATION, RUN, SETUP, TEARDOWN, VU, WORKER
+from .profile import ARRIVAL_RATE, LoadProfile
+from .resultlog import ResultLogWriter
+from .stats import StatsCollector
+from .thresholds import Thresholds
+from .timeseries import TimeSeries
+
+
+class VirtualUser:
+    """虚拟用户：逐个执行迭代中的用例，用例之间按思考时间、迭代之间按 pacing 等待
+
+    VU 不独占线程：等待只是调度堆中的一个到期时间，到期后由工作线程执行下一个请求，
+    大量处于思考时间中的VU几乎不占用CPU和内存。vus 模型下VU循环执行迭代，
+    retired 后完成当前迭代再退出；arrival_rate 模型下每个到达的迭代是一个 once 的VU。
+
+    context 是VU的会话上下文，用例提取的变量跨迭代保留；completed 记录已成功执行的
+    只需执行一次的用例（执行器的 once_cases），之后的迭代跳过它们。
+    arrival_rate 模型下每个到达的迭代都是新用户，一次性用例每次都会执行。
+    started 表示 vu 范围的 setup 钩子已执行成功；setup 失败的VU直接结束，不执行迭代。
+    """
+    __slots__ = ('index', 'once', 'retired', 'finished', 'started', 'cases', 'position', 'iteration_start',
+                 'context', 'completed')
+
+    def __init__(self, index: int, once: bool = False):
+        self.index = index
+        self.once = once
+        self.retired = False
+        self.finished = False
+        self.started = False
+        self.cases: List[str] = []
+        self.position = 0
+        self.iteration_start = 0.0
+        self.context: Dict[str, Any] = {}
+        self.completed = set()
+
+    @property
+    def iteration_done(self) -> bool:
+        return self.position >= len(self.cases)
+
+
+class LoadEngine:
+    """按负载模型驱动 SuiteExecutor 的压测引擎
+
+    控制线程每个 tick 根据 LoadProfile 计算当前阶段与目标值：
+    vus 模型下逐个增减虚拟用户，减少时让最后加入的VU完成当前迭代后退出，
+    避免并发数突变；arrival_rate 模型下按目标速率启动迭代，
+    同时执行的迭代数达到 max_vus 时丢弃新的迭代并计数。
+    每个请求按其开始时所处的阶段记录统计。
+    VU 的请求由调度线程按到期时间分派给工作线程池执行，每个工作线程一个客户端；
+    执行器提供的思考时间与 pacing 只推迟VU的下次到期时间，不占用线程。
+    执行器的 setup / teardown 钩子在压测开始前后（run）、工作线程创建与压测结束时（worker）、
+    VU开始与退出时（vu）、每次迭代前后（iteration）以及用例前后（case）执行，耗时不计入统计；
+    各范围钩子写入的变量依次叠加：VU上下文 > 工作线程 > 整次压测。run 范围的 setup 失败时不开始压测；
+    worker 或 vu 范围的 setup 失败时，分派到该工作线程的VU或该VU直接结束，不发送请求，也不执行对应的 teardown，
+    并且中止压测（不再补充VU），次数与原因记入报告的 run.setup_failures 与 run.aborted，阈值判定为未通过；
+    失败只记入钩子统计，不计入压测的失败率。
+    执行VU的请求时发生的意外异常（不属于请求本身的失败）会结束该VU，次数记入报告的 run.step_errors。
+    负载模型提供 observe(result) 时（如 AdaptiveProfile），每个请求结果都会回传给它，
+    用于闭环调整目标值。
+    配置 thresholds 时每 check_interval 秒按累计统计检查一次阈值，
+    abort_on_fail 时违反即停止压测，最终判定写入报告的 thresholds 字段。
+
+    warmup 秒内照常发送请求但不计入统计，用于排除建连、服务端缓存等冷启动影响；
+    duration 限定预热之后的测量时长，到期即停止，不论负载模型是否结束。
+    停止后不再发起新请求，已发出的请求在 drain 秒内完成的仍计入统计，
+    超时未完成的记为 interrupted 并丢弃；drain 为 None 时等待全部完成。
+    排空超时时只跳过仍在执行请求的工作线程，其余工作线程及其上的VU照常执行 teardown 并关闭客户端。
+    提供 result_log 时每个请求（含预热）都追加到二进制结果日志；
+    提供 timeseries 时测量期间的请求按完成时间计入时间序列，控制线程每个 tick 输出已结束的时间片。
+    """
+
+    def __init__(
+        self,
+        executor: SuiteExecutor,
+        profile: LoadProfile,
+        stats: Optional[StatsCollector] = None,
+        tick: float = 0.1,
+        thresholds: Optional[Thresholds] = None,
+        check_interval: float = 1.0,
+        warmup: float = 0.0,
+        duration: Optional[float] = None,
+        drain: Optional[float] = None,
+        result_log: Optional[ResultLogWriter] = None,
+        timeseries: Optional[TimeSeries] = None
+    ):
+        self.executor = executor
+        self.profile = profile
+        self.stats = stats or StatsCollector()
+        self.tick = tick
+        self.thresholds = thresholds
+        self.check_interval = check_interval
+        self.warmup = warmup
+        self.duration = duration
+        self.drain = drain
+        self.result_log = result_log
+        self.timeseries = timeseries
+        self.warmup_requests = 0
+        self.interrupted = 0
+        self.aborted: Optional[str] = None
+        self.violations: Dict[str, str] = {}
+        self.stopping = False
+        self.current_stage: Optional[str] = None
+        self.dropped_iterations = 0
+        self.max_active_vus = 0
+        self._vus: List[VirtualUser] = []
+        self._vu_seq = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._executing = 0
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[float, int, VirtualUser]] = []
+        self._queue_seq = itertools.count()
+        self._wakeup = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self.step_errors = 0
+        self.setup_failures = 0
+        # 工作线程标识 -> (客户端, 变量, worker 范围 setup 是否成功)
+        self._workers: Dict[int, Tuple[Any, Dict[str, Any], bool]] = {}
+        # 正在执行 _step 的工作线程标识 -> VU
+        self._running: Dict[int, VirtualUser] = {}
+        self._run_context: Dict[str, Any] = {}
+        self._live = set()
+        self._observe = getattr(profile, 'observe', None)
+        self._closed = False
+
+    @property
+    def active_vus(self) -> int:
+        if self.profile.executor == ARRIVAL_RATE:
+            return self._in_flight
+        return sum(1 for vu in self._vus if not vu.retired)
+
+    def run_case(self, client, case_id: str, context: Optional[Dict[str, Any]] = None) -> RequestResult:
+        """执行一个用例，结果按请求开始时的阶段记录并返回"""
+        stage = self.current_stage
+        result = self.executor.execute_case(client, case_id, context)
+        if self._closed:
+            return result
+        if self.result_log is not None:
+            self.result_log.write(stage, result)
+        if stage is not None:
+            self.stats.record(stage, result)
+            if self.timeseries is not None:
+                self.timeseries.record(result)
+        else:
+            with self._lock:
+                self.warmup_requests += 1
+        if self._observe is not None:
+            self._observe(result)
+        return result
+
+    def stop(self) -> None:
+        """请求停止：不再启动新的迭代"""
+        self.stopping = True
+
+    def run(self) -> Dict[str, Any]:
+        """按负载模型执行，返回分阶段统计报告"""
+        if not self._run_scope_hooks(SETUP):
+            error = self.executor.hook_stats.to_dict()[f"{SETUP}:{RUN}"]['error']
+            raise ValueError(f"压测前的 setup 钩子失败: {error}")
+        start = time.monotonic()
+        wall_start = time.time()
+        stage_start = wall_start
+        arrival = self.profile.executor == ARRIVAL_RATE
+        if arrival:
+            self._max_in_flight = workers = self._arrival_workers()
+        else:
+            # 同时执行请求的VU不会超过目标VU数的峰值，线程按需创建
+            workers = max(1, int(math.ceil(self.profile.peak)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="arrival" if arrival else "vu")
+        scheduler = threading.Thread(target=self._dispatch, args=(pool,), name="vu-scheduler", daemon=True)
+        scheduler.start()
+        due = 0.0
+        last = start
+        next_check = start + self.check_interval
+
+        deadline = self.warmup + self.duration if self.duration is not None else None
+        if self.timeseries is not None:
+            self.timeseries.start(wall_start + self.warmup)
+
+        try:
+            while not self.stopping:
+                now = time.monotonic()
+                elapsed = now - start
+                if deadline is not None and elapsed >= deadline:
+                    break
+                stage, target = self.profile.target_at(elapsed)
+                if stage is None:
+                    break
+                # 预热期间阶段为 None，请求不计入统计
+                measured = stage if elapsed >= self.warmup else None
+                if measured != self.current_stage:
+                    if self.current_stage is not None:
+                        self.stats.mark_stage(self.current_stage, stage_start, time.time())
+                    stage_start = time.time()
+                    self.current_stage = measured
+                if measured is not None:
+                    self.stats.mark_stage(measured, stage_start, time.time())
+
+                if not arrival:
+                    self._scale_vus(int(round(target)))
+                else:
+                    due += target * (now - last)
+                    while due >= 1:
+                        due -= 1
+                        self._submit_arrival()
+                last = now
+                self.max_active_vus = max(self.max_active_vus, self.active_vus)
+                if self.thresholds and now >= next_check:
+                    next_check = now + self.check_interval
+                    self._check_thresholds(elapsed)
+                if self.timeseries is not None:
+                    self.timeseries.flush()
+                time.sleep(self.tick)
+        finally:
+            self.stopping = True
+            if self.current_stage is not None:
+                self.stats.mark_stage(self.current_stage, stage_start, time.time())
+            self._drain(pool, scheduler)
+            if self.timeseries is not None:
+                self.timeseries.flush(final=True)
+            self._run_scope_hooks(TEARDOWN)
+
+        report = self.stats.report()
+        report['run'] = {
+            'executor': self.profile.executor,
+            'started_at': wall_start,
+            'duration': time.time() - wall_start,
+            'max_active_vus': self.max_active_vus,
+            'dropped_iterations': self.dropped_iterations,
+            'warmup': self.warmup,
+            'warmup_requests': self.warmup_requests,
+            'interrupted': self.interrupted
+        }
+        if self.step_errors:
+            report['run']['step_errors'] = self.step_errors
+        if self.setup_failures:
+            report['run']['setup_failures'] = self.setup_failures
+        if self.aborted is not None:
+            report['run']['aborted'] = self.aborted
+        if self.thresholds is not None:
+            report['thresholds'] = self.thresholds.evaluate(report, aborted=self.aborted)
+        hooks = self.executor.hook_stats.to_dict()
+        if hooks:
+            report['run']['hooks'] = hooks
+        trajectory = getattr(self.profile, 'trajectory', None)
+        if trajectory is not None:
+            report['run']['concurrency_trajectory'] = trajectory
+        return report
+
+    def _drain(self, pool: ThreadPoolExecutor, scheduler: threading.Thread) -> None:
+        """等待执行中的请求完成，最多等待 drain 秒；处于思考时间的VU不再继续"""
+        drain_deadline = time.monotonic() + self.drain if self.drain is not None else None
+
+        def remaining() -> Optional[float]:
+            return None if drain_deadline is None else max(0.0, drain_deadline - time.monotonic())
+
+        with self._wakeup:
+            self._wakeup.notify()
+        scheduler.join()
+        pool.shutdown(wait=drain_deadline is None)
+        while self._executing and remaining() != 0.0:
+            time.sleep(min(self.tick, remaining() or self.tick))
+
+        with self._lock:
+            self._closed = True
+            self.interrupted = self._executing
+            running = dict(self._running)
+            live = [vu for vu in self._live if vu not in running.values()]
+        if self.interrupted:
+            print(f"排空超时，{self.interrupted} 个进行中的请求被中断，其结果不计入统计")
+        # 仍在执行的工作线程的客户端与VU留给该线程，其余的照常清理
+        idle = [worker for ident, worker in self._workers.items() if ident not in running]
+        self._teardown_vus(live, idle)
+        for client, context, ready in idle:
+            if ready:
+                self.executor.run_hooks(TEARDOWN, WORKER, client, ChainMap(context, self._run_context))
+            client.close()
+
+    def _run_scope_hooks(self, phase: str) -> bool:
+        """run 范围的钩子使用临时客户端执行"""
+        client = self.executor.new_client()
+        try:
+            return self.executor.run_hooks(phase, RUN, client, self._run_context)
+        finally:
+            client.close()
+
+    def _teardown_vus(self, vus: List[VirtualUser], workers: List[Tuple[Any, Dict[str, Any], bool]]) -> None:
+        """压测结束时仍在运行的VU执行 vu 范围的 teardown，分给空闲的工作线程客户端并行执行"""
+        if not vus or not workers:
+            return
+        workers = workers[:32]
+
+        def teardown(index: int) -> None:
+            client, context, _ = workers[index]
+            for vu in vus[index::len(workers)]:
+                self.executor.run_hooks(TEARDOWN, VU, client, ChainMap(vu.context, context, self._run_context))
+
+        with ThreadPoolExecutor(max_workers=len(workers), thread_name_prefix="teardown") as pool:
+            list(pool.map(teardown, range(len(workers))))
+
+    def _check_thresholds(self, elapsed: float) -> None:
+        """按累计统计实时检查阈值，宽限期过后违反阈值时提示，允许中止时停止压测"""
+        if elapsed < self.thresholds.abort_grace:
+            return
+        violations = self.thresholds.violations(self.stats.report(), live=True)
+        if violations and self.thresholds.abort_on_fail:
+            self.aborted = f"t={elapsed:.0f}s {'; '.join(violations.values())}"
+            print(f"违反阈值，中止压测: {self.aborted}")
+            self.stop()
+        elif violations.keys() != self.violations.keys():
+            print(f"[阈值] t={elapsed:.0f}s {'; '.join(violations.values()) if violations else '恢复正常'}")
+        self.violations = violations
+
+    def _scale_vus(self, target: int) -> None:
+        """逐步调整VU数量到目标值，减少时让最后加入的VU完成当前迭代后退出"""
+        running = [vu for vu in self._vus if not vu.retired]
+        if len(running) < target:
+            for _ in range(target - len(running)):
+                self._vu_seq += 1
+                vu = VirtualUser(self._vu_seq)
+                self._vus.append(vu)
+                self._schedule(vu, time.monotonic())
+        elif len(running) > target:
+            for vu in running[target:]:
+                vu.retired = True
+        self._vus = [vu for vu in self._vus if not vu.finished]
+
+    def _arrival_workers(self) -> int:
+        if self.profile.max_vus:
+            return int(self.profile.max_vus)
+        return max(10, int(math.ceil(self.profile.peak * 2)))
+
+    def _submit_arrival(self) -> None:
+        with self._lock:
+            if self._in_flight >= self._max_in_flight:
+                self.dropped_iterations += 1
+                return
+            self._in_flight += 1
+            self._vu_seq += 1
+            vu = VirtualUser(self._vu_seq, once=True)
+        self._schedule(vu, time.monotonic())
+
+    def _schedule(self, vu: VirtualUser, due: float) -> None:
+        """VU 在 due（monotonic 时间）到期后执行下一个请求"""
+        with self._wakeup:
+            heapq.heappush(self._queue, (due, next(self._queue_seq), vu))
+            if self._queue[0][2] is vu:
+                self._wakeup.notify()
+
+    def _dispatch(self, pool: ThreadPoolExecutor) -> None:
+        """调度线程：把到期的VU交给工作线程，停止后不再分派"""
+        with self._wakeup:
+            while not self.stopping:
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    vu = heapq.heappop(self._queue)[2]
+                    with self._lock:
+                        self._executing += 1
+                    pool.submit(self._step, vu)
+                self._wakeup.wait(min(self._queue[0][0] - now, self.tick) if self._queue else self.tick)
+
+    def _worker(self) -> Tuple[Any, Dict[str, Any], bool]:
+        """工作线程各自的客户端、变量与 worker 范围 setup 是否成功，首次使用时执行 setup，压测结束时统一清理"""
+        worker = getattr(self._local, 'worker', None)
+        if worker is None:
+            client, context = self.executor.new_client(), {}
+            ready = self.executor.run_hooks(SETUP, WORKER, client, ChainMap(context, self._run_context))
+            worker = self._local.worker = (client, context, ready)
+            with self._lock:
+                self._workers[threading.get_ident()] = worker
+        return worker
+
+    def _step(self, vu: VirtualUser) -> None:
+        """执行VU的下一个请求，再按思考时间或 pacing 安排下次到期"""
+        client = context = None
+        ident = threading.get_ident()
+        with self._lock:
+            self._running[ident] = vu
+        try:
+            if self.stopping:
+                # 停止前已交给线程池的VU不再发起请求，仍在运行的VU由 _teardown_vus 清理
+                return
+            client, worker_context, ready = self._worker()
+            context = ChainMap(vu.context, worker_context, self._run_context)
+            if not ready:
+                self._setup_failed(WORKER)
+                self._finish(vu, client, context)
+                return
+            if vu.iteration_done:
+                if vu.retired:
+                    self._finish(vu, client, context)
+                    return
+                if not vu.started:
+                    if not self.executor.run_hooks(SETUP, VU, client, context):
+                        self._setup_failed(VU)
+                        self._finish(vu, client, context)
+                        return
+                    vu.started = True
+                    with self._lock:
+                        self._live.add(vu)
+                vu.cases = [case_id for case_id in self.executor.next_iteration() if case_id not in vu.completed]
+                vu.position = 0
+                vu.iteration_start = time.monotonic()
+                if not vu.cases:
+                    # 本轮只剩已执行过的一次性用例
+                    self._schedule(vu, vu.iteration_start + max(self.executor.pacing_interval(), self.tick))
+                    return
+                self.executor.run_hooks(SETUP, ITERATION, client, context, vu.cases[0])
+            case_id = vu.cases[vu.position]
+            vu.position += 1
+            self.executor.run_hooks(SETUP, CASE, client, context, case_id)
+            result = self.run_case(client, case_id, context)
+            self.executor.run_hooks(TEARDOWN, CASE, client, context, case_id)
+            if result.passed and case_id in self.executor.once_cases:
+                vu.completed.add(case_id)
+            if self.stopping:
+                return
+            wait = self.executor.think_time(case_id)
+            if vu.iteration_done:
+                self.executor.run_hooks(TEARDOWN, ITERATION, client, context, case_id)
+                if vu.once or vu.retired:
+                    self._finish(vu, client, context)
+                    return
+                pacing = self.executor.pacing_interval()
+                if pacing:
+                    wait = max(wait, vu.iteration_start + pacing - time.monotonic())
+            self._schedule(vu, time.monotonic() + wait)
+        except Exception as e:
+            with self._lock:
+                self.step_errors += 1
+                first = self.step_errors == 1
+            if first:
+                print(f"VU {vu.index} 执行异常，该VU结束: {type(e).__name__}: {e}")
+            if not vu.finished:
+                self._finish(vu, client, context if context is not None else ChainMap(vu.context, self._run_context))
+        finally:
+            with self._lock:
+                self._executing -= 1
+                del self._running[ident]
+
+    def _setup_failed(self, scope: str) -> None:
+        """worker 或 vu 范围的 setup 失败：与 run 范围一样中止压测，避免控制线程不断补充注定失败的VU"""
+        error = self.executor.hook_stats.to_dict()[f"{SETUP}:{scope}"]['error']
+        with self._lock:
+            self.setup_failures += 1
+            first = self.aborted is None
+            if first:
+                self.aborted = f"{scope} 范围的 setup 钩子失败: {error}"
+        if first:
+            print(f"中止压测: {self.aborted}")
+        self.stop()
+
+    def _finish(self, vu: VirtualUser, client, context: ChainMap) -> None:
+        if vu.started:
+            self.executor.run_hooks(TEARDOWN, VU, client, context)
+            with self._lock:
+                self._live.discard(vu)
+        vu.finished = True
+        if vu.once:
+            with self._lock:
+                self._in_flight -= 1
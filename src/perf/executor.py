@@ -0,0 +1,472 @@
+import copy
+import logging
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import ChainMap
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from network.http_client import HttpClient, HttpResponse
+from network.retry_policy import RetryBudget
+from util import json_codec
+from util.rsa_util import RSAEncrypUtil
+from test.test_suite import TestSuite
+from . import failures
+from .capture import CapturedRequest, TrafficRecorder
+from .extract import Extractor, has_placeholder, substitute
+from .hooks import CASE, SETUP, TEARDOWN, HookStats, parse_hooks, run_hooks
+from .thinktime import ThinkTime
+
+# 加解密工具按块输出 INFO 日志，httpx 逐请求输出 INFO 日志，压测时会成为瓶颈
+logging.getLogger('util.rsa_util').setLevel(logging.WARNING)
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# 预序列化请求体中的槽位，序列化后为 "@@name@@"
+_SLOT = re.compile(rb'"@@(\w+)@@"')
+
+
+class RequestResult:
+    """单次用例请求的结果
+
+    属性:
+        case_id: 用例ID
+        endpoint: 接口路径
+        start: 请求开始时间（epoch 秒）
+        latency: 请求耗时（秒，不含限流等待）
+        throttle_wait: 限流等待时间（秒）
+        status_code: HTTP状态码，请求异常时为 -1
+        biz_code: 业务返回码
+        attempts: 实际发送的请求数
+        passed: 是否通过校验
+        error: 失败原因
+        failure_stage: 失败所处的校验环节，取值见 perf.failures
+        payload: 失败时的响应内容片段
+        build_time: 构建请求（加密、签名）耗时（秒）
+        check_time: 校验响应（验签、解密、比对）耗时（秒）
+    """
+    __slots__ = (
+        'case_id', 'endpoint', 'start', 'latency', 'throttle_wait', 'status_code', 'biz_code',
+        'attempts', 'passed', 'error', 'failure_stage', 'payload', 'build_time', 'check_time'
+    )
+
+    def __init__(self, case_id: str, endpoint: str, start: float):
+        self.case_id = case_id
+        self.endpoint = endpoint
+        self.start = start
+        self.latency = 0.0
+        self.throttle_wait = 0.0
+        self.status_code = 0
+        self.biz_code = None
+        self.attempts = 0
+        self.passed = False
+        self.error = None
+        self.failure_stage = None
+        self.payload = None
+        self.build_time = 0.0
+        self.check_time = 0.0
+
+
+def collect_results(
+    order: List[str],
+    responses: Dict[str, Tuple[float, str, HttpResponse]],
+    failed_cases: List[Dict[str, Any]]
+) -> List[RequestResult]:
+    """把单元测试运行器逐个用例执行的结果转换为 RequestResult，以便用 StatsCollector 统计
+
+    Args:
+        order: 用例执行顺序
+        responses: 用例ID -> (请求开始时间, 请求地址, 响应)，请求未发出的用例不在其中
+        failed_cases: 运行器记录的失败用例，元素包含 case_id 与 error
+
+    Returns:
+        按执行顺序排列的结果列表
+    """
+    errors = {item['case_id']: str(item['error']) for item in failed_cases}
+    results = []
+    for case_id in order:
+        start, url, response = responses.get(case_id, (time.time(), '', None))
+        result = RequestResult(case_id, urlsplit(url).path, start)
+        if response is None:
+            result.status_code = -1
+        else:
+            result.latency = response.elapsed
+            result.throttle_wait = response.throttle_wait
+            result.status_code = response.status_code
+            result.attempts = response.attempts
+        result.error = errors.get(case_id)
+        result.passed = result.error is None
+        if not result.passed and response is not None and response.content:
+            result.payload = failures.truncate_payload(response.text)
+        results.append(result)
+    return results
+
+
+def generate_random_id_number() -> str:
+    """生成随机的18位身份证号码"""
+    area_codes = [
+        '110101', '110102', '110105', '110106', '110107', '110108', '110109', '110111',  # 北京
+        '310101', '310104', '310105', '310106', '310107', '310109', '310110', '310112',  # 上海
+        '440103', '440104', '440105', '440106', '440111', '440112', '440113', '440114',  # 广州
+        '510104', '510105', '510106', '510107', '510108', '510112', '510113', '510114',  # 成都
+    ]
+    area_code = random.choice(area_codes)
+    year = random.randint(1960, 2005)
+    month = random.randint(1, 12)
+    days_in_month = [31, 29 if year % 4 == 0 else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    day = random.randint(1, days_in_month[month - 1])
+    sequence = random.randint(0, 999)
+    base = f"{area_code}{year}{month:02d}{day:02d}{sequence:03d}"
+
+    weights = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+    check_codes = '10X98765432'
+    weight_sum = sum(int(base[i]) * weights[i] for i in range(17))
+    return f"{base}{check_codes[weight_sum % 11]}"
+
+
+def _slot(name: str) -> str:
+    return f"@@{name}@@"
+
+
+class PreparedBody:
+    """预先序列化的用例请求体
+
+    不含 ${name} 占位符的用例，请求体中不随请求变化的部分只序列化一次，每次请求只把
+    身份证号、生日、时间戳、密文与签名填入对应的槽位，拼接出待加密的 data 与最终发送的字节。
+
+    属性:
+        data: data 明文的片段，奇数位为槽位名；data 不是字典（不加密）时为 None
+        body: 请求体的片段，奇数位为槽位名
+        slots: data 中的槽位名
+        rest: 抓包时保存的请求体（加密的请求去掉 data、sign、timestamp）
+    """
+    __slots__ = ('data', 'body', 'slots', 'rest')
+
+    def __init__(self, body: Dict[str, Any]):
+        data = body.get('data')
+        if isinstance(data, dict):
+            data = copy.deepcopy(data)
+            if 'idNo' in data:
+                data['idNo'] = _slot('idNo')
+            auth_info = data.get('userAuthInfo')
+            if isinstance(auth_info, dict):
+                auth_info['idNo'] = _slot('idNo')
+                auth_info['birthDay'] = _slot('birthDay')
+            self.data = self._split(data)
+            self.slots = set(self.data[1::2])
+            self.rest = {key: value for key, value in body.items() if key not in ('data', 'sign', 'timestamp')}
+            body = dict(body, timestamp=_slot('timestamp'), data=_slot('data'), sign=_slot('sign'))
+        else:
+            self.data = None
+            self.slots = set()
+            self.rest = body
+        self.body = self._split(body)
+
+    @classmethod
+    def prepare(cls, body: Any) -> Optional['PreparedBody']:
+        """请求体不是字典或本身含有槽位形式的字符串时返回 None，按原方式逐次构建"""
+        if not isinstance(body, dict) or _SLOT.search(json_codec.dumps(body)):
+            return None
+        return cls(body)
+
+    @staticmethod
+    def _split(value: Any) -> List[Any]:
+        parts = _SLOT.split(json_codec.dumps(value))
+        parts[1::2] = [name.decode('ascii') for name in parts[1::2]]
+        return parts
+
+    @staticmethod
+    def render(parts: List[Any], values: Dict[str, bytes]) -> bytes:
+        """按槽位名填入已序列化的值"""
+        if len(parts) == 1:
+            return parts[0]
+        return b''.join([values[part] if index & 1 else part for index, part in enumerate(parts)])
+
+
+class SuiteExecutor:
+    """压测用的套件执行器
+
+    从 benniu_user_credit 的执行逻辑提炼而来：为每次请求生成随机身份证号，
+    加密 data 字段并签名，发送请求后依次校验状态码、响应格式、业务返回码、
+    签名，解密后按 expected_data 校验（用例的预期预先编译为 ResponseValidator）。
+    用例模板在每次请求时复制，不会修改套件本身，也不打印逐条日志，结果以 RequestResult 返回。
+
+    密钥默认读取套件变量 channel_private_key 与 platform_public_key。
+    传入 context（每个VU一份）时，请求地址与请求体中的 ${name} 先在 context、再在套件变量中查找，
+    用例配置的 extract 从解密后的响应数据中提取值写回 context，供后续用例使用。
+    套件与用例的 setup / teardown 钩子由压测引擎按范围调用 run_hooks 执行，被钩子引用的用例不参与迭代。
+    提供 recorder 时每个请求（加密前的数据、发送时间与响应结果）都写入抓包文件，供 perf replay 重放。
+    """
+
+    def __init__(
+        self,
+        suite: TestSuite,
+        timeout: int = 30,
+        channel_private_key: Optional[str] = None,
+        platform_public_key: Optional[str] = None,
+        recorder: Optional[TrafficRecorder] = None
+    ):
+        self.suite = suite
+        self.recorder = recorder
+        self.timeout = timeout
+        self.channel_private_key = channel_private_key or suite.variables.get('channel_private_key', '')
+        self.platform_public_key = platform_public_key or suite.variables.get('platform_public_key', '')
+        base_dir = os.path.dirname(os.path.abspath(suite.path)) if suite.path else None
+        self.hook_stats = HookStats()
+        self._hooks = {}
+        for phase in (SETUP, TEARDOWN):
+            for hook in parse_hooks(getattr(suite, phase), base_dir=base_dir):
+                self._hooks.setdefault((phase, hook.scope), []).append(hook)
+            for case_id, case in suite.cases.items():
+                hooks = parse_hooks(getattr(case, phase), CASE, base_dir)
+                if hooks:
+                    self._hooks[(phase, CASE, case_id)] = hooks
+        hook_cases = {hook.case for hooks in self._hooks.values() for hook in hooks if hook.case}
+        unknown = hook_cases - set(suite.cases)
+        if unknown:
+            raise ValueError(f"钩子引用的用例不存在: {', '.join(sorted(unknown))}")
+        self.order = [case_id for case_id in suite.get_execution_order() if case_id not in hook_cases]
+        self.retry_budget = RetryBudget()
+        self._urls = {
+            case_id: suite.resolve_variables(case.api_path)
+            for case_id, case in suite.cases.items()
+        }
+        self.endpoints = {case_id: urlsplit(url).path for case_id, url in self._urls.items()}
+        default_think_time = ThinkTime.from_config(suite.think_time)
+        self._think_times = {
+            case_id: ThinkTime.from_config(case.think_time) if case.think_time is not None else default_think_time
+            for case_id, case in suite.cases.items()
+        }
+        self.pacing = ThinkTime.from_config(suite.pacing)
+        self.extractors = {
+            case_id: [Extractor.from_config(name, expr) for name, expr in (case.extract or {}).items()]
+            for case_id, case in suite.cases.items()
+        }
+        self.validators = {case_id: suite.get_validator(case_id) for case_id in suite.cases}
+        self.once_cases = {case_id for case_id, case in suite.cases.items() if case.once}
+        self._templated = {
+            case_id for case_id, case in suite.cases.items()
+            if has_placeholder(case.body) or has_placeholder(self._urls[case_id])
+        }
+        self._prepared = {
+            case_id: PreparedBody.prepare(case.body)
+            for case_id, case in suite.cases.items() if case_id not in self._templated
+        }
+        self._clients = weakref.WeakSet()
+        self._clients_lock = threading.Lock()
+
+    def new_client(self) -> HttpClient:
+        """创建工作线程使用的客户端，限流器和重试预算在所有客户端间共享"""
+        client = HttpClient(
+            timeout=self.timeout,
+            capture_headers=False,
+            retry_budget=self.retry_budget,
+            limiter=self.suite.get_limiter()
+        )
+        with self._clients_lock:
+            self._clients.add(client)
+        return client
+
+    def pool_stats(self) -> Dict[str, int]:
+        """汇总所有存活客户端的连接池状态"""
+        total = {'clients': 0, 'connections': 0, 'idle': 0, 'active': 0, 'pending': 0}
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            total['clients'] += 1
+            for key, value in client.pool_stats().items():
+                total[key] += value
+        return total
+
+    @property
+    def iteration_requests(self) -> float:
+        """每次迭代发出的请求数"""
+        return len(self.order)
+
+    def next_iteration(self) -> List[str]:
+        """本次迭代要执行的用例：按依赖顺序的全部用例"""
+        return self.order
+
+    def think_time(self, case_id: str) -> float:
+        """执行用例后的思考时间（秒），用例级配置覆盖套件级配置"""
+        think_time = self._think_times[case_id]
+        return think_time.sample() if think_time is not None else 0.0
+
+    def pacing_interval(self) -> float:
+        """同一VU相邻两次迭代开始时间的最小间隔（秒），0 表示不限制"""
+        return self.pacing.sample() if self.pacing is not None else 0.0
+
+    def run_hooks(self, phase: str, scope: str, client: HttpClient, context: Dict[str, Any],
+                  case_id: Optional[str] = None) -> bool:
+        """执行某个范围的 setup / teardown 钩子，scope 为 case 时执行 case_id 的用例级钩子；全部成功时返回 True"""
+        hooks = self._hooks.get((phase, scope, case_id) if scope == CASE else (phase, scope))
+        if not hooks:
+            return True
+        return run_hooks(hooks, phase, scope, context, self.suite.variables, self.execute_case, client, self.hook_stats)
+
+    def build_body(self, case_id: str, context: Optional[Dict[str, Any]] = None) -> Any:
+        """生成一次请求的请求体：替换占位符、身份证号与时间戳后加密签名；
+        不含占位符的用例返回预序列化拼接出的JSON字节，其余返回字典"""
+        return self._build_body(case_id, context)[0]
+
+    def _variables(self, context: Optional[Dict[str, Any]]) -> ChainMap:
+        return ChainMap(context, self.suite.variables) if context is not None else ChainMap(self.suite.variables)
+
+    def _build_body(self, case_id: str, context: Optional[Dict[str, Any]] = None) -> Tuple[Any, Any]:
+        """返回 (加密签名后的请求体, 加密前的 data)"""
+        prepared = self._prepared.get(case_id)
+        if prepared is not None:
+            return self._render_body(prepared)
+        case = self.suite.cases[case_id]
+        if not isinstance(case.body, dict):
+            return case.body, None
+        if case_id in self._templated:
+            try:
+                body = substitute(case.body, self._variables(context))
+            except KeyError as e:
+                raise ValueError(f"变量 {e.args[0]} 未定义（依赖的用例没有提取到）")
+        else:
+            body = copy.deepcopy(case.body)
+        data = body.get('data')
+        if isinstance(data, dict):
+            id_number = None
+            if 'idNo' in data:
+                id_number = generate_random_id_number()
+                data['idNo'] = id_number
+            auth_info = data.get('userAuthInfo')
+            if isinstance(auth_info, dict):
+                id_number = id_number or generate_random_id_number()
+                auth_info['idNo'] = id_number
+                auth_info['birthDay'] = f"{id_number[6:10]}-{id_number[10:12]}-{id_number[12:14]}"
+
+            data_str = json_codec.dumps_str(data)
+            body['timestamp'] = int(time.time() * 1000)
+            encrypted_data = RSAEncrypUtil.build_rsa_encrypt_by_public_key(data_str, self.platform_public_key)
+            body['data'] = encrypted_data
+            body['sign'] = RSAEncrypUtil.build_rsa_sign_by_private_key(encrypted_data, self.channel_private_key)
+            return body, data
+        return body, None
+
+    def _render_body(self, prepared: PreparedBody) -> Tuple[bytes, Any]:
+        """填入本次请求的身份证号与时间戳，加密签名后拼接请求体；抓包时才解析出明文 data"""
+        if prepared.data is None:
+            return prepared.body[0], None
+        values = {}
+        if 'idNo' in prepared.slots:
+            id_number = generate_random_id_number()
+            values['idNo'] = json_codec.dumps(id_number)
+            values['birthDay'] = json_codec.dumps(f"{id_number[6:10]}-{id_number[10:12]}-{id_number[12:14]}")
+        data_str = PreparedBody.render(prepared.data, values).decode('utf-8')
+        encrypted_data = RSAEncrypUtil.build_rsa_encrypt_by_public_key(data_str, self.platform_public_key)
+        values['timestamp'] = str(int(time.time() * 1000)).encode('ascii')
+        values['data'] = json_codec.dumps(encrypted_data)
+        sign = RSAEncrypUtil.build_rsa_sign_by_private_key(encrypted_data, self.channel_private_key)
+        values['sign'] = json_codec.dumps(sign)
+        data = json_codec.loads(data_str) if self.recorder is not None else None
+        return PreparedBody.render(prepared.body, values), data
+
+    def execute_case(self, client: HttpClient, case_id: str, context: Optional[Dict[str, Any]] = None) -> RequestResult:
+        """执行单个用例并校验响应，提取的值写入 context"""
+        case = self.suite.cases[case_id]
+        result = RequestResult(case_id, self.endpoints[case_id], time.time())
+        url = self._urls[case_id]
+        try:
+            body, data = self._build_body(case_id, context)
+            if case_id in self._templated and '${' in url:
+                url = substitute(url, self._variables(context))
+        except Exception as e:
+            result.failure_stage = failures.BUILD
+            result.error = f"请求构建失败: {e}"
+            return result
+
+        sent = time.time()
+        result.build_time = sent - result.start
+        result.start = sent
+        response = client.request(
+            case.method,
+            url,
+            headers=case.headers,
+            body=body,
+            retry_policy=self.suite.get_retry_policy(case_id),
+            case_id=case_id
+        )
+        result.latency = response.elapsed
+        result.throttle_wait = response.throttle_wait
+        result.status_code = response.status_code
+        result.attempts = response.attempts
+        checked = time.perf_counter()
+        failure = self._check_response(case, response, result, context)
+        result.check_time = time.perf_counter() - checked
+        if failure is not None:
+            result.failure_stage, result.error = failure
+            if response.content:
+                result.payload = failures.truncate_payload(response.text)
+        result.passed = failure is None
+        if self.recorder is not None:
+            # 加密过的请求只保存明文 data，重放时重新加密签名；其余请求体原样保存
+            prepared = self._prepared.get(case_id)
+            if prepared is not None:
+                rest = prepared.rest
+            else:
+                rest = body if data is None else {key: value for key, value in body.items() if key not in ('data', 'sign', 'timestamp')}
+            self.recorder.record(CapturedRequest(
+                t=sent, method=case.method, url=url, headers=case.headers, body=rest, data=data,
+                case_id=case_id, status=result.status_code, code=result.biz_code, latency=result.latency
+            ))
+        return result
+
+    def _check_response(self, case, response: HttpResponse, result: RequestResult,
+                        context: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, str]]:
+        """校验响应并提取变量，返回 (校验环节, 失败原因)，通过时返回 None"""
+        if response.status_code != case.expected_status:
+            if response.error_kind is not None:
+                return failures.HTTP, f"HTTP请求异常: {response.error_kind}"
+            return failures.HTTP, f"HTTP状态码错误: {response.status_code}"
+        try:
+            response_body = response.json()
+        except ValueError as e:
+            return failures.FORMAT, f"响应格式错误: {e}"
+        validator = self.validators[case.case_id]
+        failure = validator.check_format(response_body)
+        if failure is not None:
+            return failure.stage, failure.message
+
+        result.biz_code = str(response_body['code'])
+        failure = validator.check_code(response_body)
+        if failure is not None:
+            return failure.stage, failure.message
+
+        if not RSAEncrypUtil.build_rsa_verify_by_public_key(
+            response_body['data'], self.platform_public_key, response_body['sign']
+        ):
+            return failures.SIGN, "响应签名验证失败"
+
+        try:
+            decrypted_data = RSAEncrypUtil.build_rsa_decrypt_by_private_key(
+                response_body['data'], self.channel_private_key
+            )
+            decrypted_json = json_codec.loads(decrypted_data)
+        except Exception as e:
+            return failures.DECRYPT, f"响应数据解密失败: {e}"
+
+        mismatches = validator.check_data(decrypted_json)
+        if mismatches:
+            return mismatches[0].stage, mismatches[0].message
+
+        extracted = {}
+        for extractor in self.extractors[case.case_id]:
+            try:
+                extracted[extractor.name] = extractor.extract(decrypted_json)
+            except KeyError:
+                return failures.EXTRACT, f"响应数据提取失败: {extractor.name} ({extractor.expr}) 不存在"
+        if context is not None:
+            context.update(extracted)
+        return None
+
+    def run_iteration(self, client: HttpClient) -> List[RequestResult]:
+        """按依赖顺序执行一轮全部用例，提取的变量在本轮内传递"""
+        context: Dict[str, Any] = {}
+        return [self.execute_case(client, case_id, context) for case_id in self.order]
@@ -0,0 +1,72 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Mapping, Tuple, Union
+
+from test.validators import compile_path
+
+# ${name} 占位符，name 在VU上下文与套件变量中查找
+PLACEHOLDER = re.compile(r"\$\{([^}]+)\}")
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """从解密后的响应数据中提取一个值，存入VU上下文供后续用例的 ${name} 使用
+
+    用例YAML中的写法::
+
+        extract:
+          userId: $.userId
+          loanId: $.loans[0].loanId
+
+    属性:
+        name: 上下文中的变量名
+        expr: 原始路径表达式
+        path: 编译后的键与下标序列
+    """
+    name: str
+    expr: str
+    path: Tuple[Union[str, int], ...]
+
+    @classmethod
+    def from_config(cls, name: str, expr: str) -> 'Extractor':
+        return cls(name, expr, compile_path(str(expr)))
+
+    def extract(self, data: Any) -> Any:
+        """按路径取值，路径不存在时抛出 KeyError"""
+        value = data
+        for step in self.path:
+            if isinstance(step, int) and isinstance(value, list) and -len(value) <= step < len(value):
+                value = value[step]
+            elif isinstance(value, dict) and step in value:
+                value = value[step]
+            else:
+                raise KeyError(self.expr)
+        return value
+
+
+def has_placeholder(value: Any) -> bool:
+    """值（含嵌套的字典与列表）中是否有 ${name} 占位符"""
+    if isinstance(value, str):
+        return '${' in value
+    if isinstance(value, dict):
+        return any(has_placeholder(item) for item in value.values())
+    if isinstance(value, list):
+        return any(has_placeholder(item) for item in value)
+    return False
+
+
+def substitute(value: Any, variables: Mapping[str, Any]) -> Any:
+    """返回替换了占位符的副本；整个字符串就是一个占位符时保留原值的类型，
+    未定义的变量抛出 KeyError"""
+    if isinstance(value, str):
+        match = PLACEHOLDER.fullmatch(value)
+        if match:
+            return variables[match.group(1)]
+        if '${' not in value:
+            return value
+        return PLACEHOLDER.sub(lambda item: str(variables[item.group(1)]), value)
+    if isinstance(value, dict):
+        return {key: substitute(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [substitute(item, variables) for item in value]
+    return value
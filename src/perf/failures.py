@@ -0,0 +1,160 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 失败所处的校验环节，按 SuiteExecutor 的校验顺序排列
+BUILD = "build"
+HTTP = "http"
+FORMAT = "format"
+CODE = "code"
+SIGN = "sign"
+DECRYPT = "decrypt"
+DATA = "data"
+EXTRACT = "extract"
+UNKNOWN = "unknown"
+
+# 运行器记录的失败原因前缀 -> 校验环节，用于没有 failure_stage 的结果
+_STAGE_PREFIXES = (
+    ("请求构建", BUILD),
+    ("HTTP", HTTP),
+    ("响应格式", FORMAT),
+    ("响应不是有效的JSON", FORMAT),
+    ("业务返回码", CODE),
+    ("响应签名", SIGN),
+    ("验签", SIGN),
+    ("响应数据解密", DECRYPT),
+    ("解密后的数据", DECRYPT),
+    ("响应数据与预期", DATA),
+    ("响应数据提取", EXTRACT),
+)
+_TEMPLATE_RULES = (
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}\b"), "<uuid>"),
+    (re.compile(r"[A-Za-z0-9+/=_-]{24,}"), "<token>"),
+    (re.compile(r"\d+(\.\d+)?"), "<n>"),
+)
+MAX_EXAMPLE_LENGTH = 500
+
+
+def classify_message(error: str) -> str:
+    """按失败原因的前缀判断校验环节"""
+    for prefix, stage in _STAGE_PREFIXES:
+        if error.startswith(prefix):
+            return stage
+    return UNKNOWN
+
+
+def template_message(error: str) -> str:
+    """把失败原因中的可变部分（数字、字符串、ID、密文等）替换为占位符"""
+    for pattern, placeholder in _TEMPLATE_RULES:
+        error = pattern.sub(placeholder, error)
+    return error
+
+
+class FailureGroup:
+    """同一指纹的失败
+
+    属性:
+        stage: 校验环节（build/http/format/code/sign/decrypt/data）
+        code: HTTP状态码、异常类型或业务返回码
+        template: 模板化的失败原因
+        count: 失败次数
+        first: 首次出现时间（epoch 秒）
+        last: 最近出现时间（epoch 秒）
+        examples: 最早的几条失败示例（用例、接口、原始原因与响应片段）
+    """
+    __slots__ = ('stage', 'code', 'template', 'count', 'first', 'last', 'examples')
+
+    def __init__(self, stage: str, code: Optional[str], template: str):
+        self.stage = stage
+        self.code = code
+        self.template = template
+        self.count = 0
+        self.first = float('inf')
+        self.last = 0.0
+        self.examples: List[Dict[str, Any]] = []
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], str]:
+        return self.stage, self.code, self.template
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.stage,
+            'code': self.code,
+            'template': self.template,
+            'count': self.count,
+            'first': self.first,
+            'last': self.last,
+            'examples': list(self.examples)
+        }
+
+
+class FailureIndex:
+    """按指纹 (校验环节, 代码, 模板化原因) 去重的失败统计
+
+    内存与不同失败的种类数相关，与失败次数无关：每个指纹只保存计数、首末时间和
+    max_examples 条示例，指纹数超过 max_groups 后新的指纹归入同环节的溢出分组。
+    """
+
+    def __init__(self, max_examples: int = 3, max_groups: int = 500):
+        self.max_examples = max_examples
+        self.max_groups = max_groups
+        self.groups: Dict[Tuple[str, Optional[str], str], FailureGroup] = {}
+
+    @staticmethod
+    def fingerprint(result) -> Tuple[str, Optional[str], str]:
+        error = result.error or ''
+        stage = getattr(result, 'failure_stage', None) or classify_message(error)
+        if stage == CODE and result.biz_code is not None:
+            code = str(result.biz_code)
+        elif stage in (HTTP, BUILD):
+            code = str(result.status_code)
+        else:
+            code = None
+        return stage, code, template_message(error)
+
+    def record(self, result) -> None:
+        key = self.fingerprint(result)
+        group = self.groups.get(key)
+        if group is None:
+            if len(self.groups) >= self.max_groups:
+                key = (key[0], None, "<其他>")
+                group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = FailureGroup(*key)
+        group.count += 1
+        if result.start < group.first:
+            group.first = result.start
+        if result.start > group.last:
+            group.last = result.start
+        if len(group.examples) < self.max_examples:
+            group.examples.append({
+                'case_id': result.case_id,
+                'endpoint': result.endpoint,
+                'start': result.start,
+                'error': result.error,
+                'payload': getattr(result, 'payload', None)
+            })
+
+    def merge(self, other: 'FailureIndex') -> None:
+        for key, theirs in list(other.groups.items()):
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = FailureGroup(*key)
+            group.count += theirs.count
+            group.first = min(group.first, theirs.first)
+            group.last = max(group.last, theirs.last)
+            room = self.max_examples - len(group.examples)
+            if room > 0:
+                group.examples.extend(list(theirs.examples)[:room])
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """按次数从多到少排列的指纹列表"""
+        return [group.to_dict() for group in sorted(self.groups.values(), key=lambda group: -group.count)]
+
+
+def truncate_payload(text: Optional[str]) -> Optional[str]:
+    """截断响应内容作为失败示例"""
+    if text is None or len(text) <= MAX_EXAMPLE_LENGTH:
+        return text
+    return text[:MAX_EXAMPLE_LENGTH] + "..."
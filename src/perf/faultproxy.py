@@ -0,0 +1,541 @@
+import asyncio
+import json
+import random
+import re
+import socket
+import ssl
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import yaml
+
+from .capture import CapturedRequest, TrafficRecorder
+from .mockgateway import REASONS, LatencyModel, parse_weights
+from .profile import parse_duration
+
+HTTP = 'http'
+TCP = 'tcp'
+_CHUNK = 16 * 1024
+# 抓包时不保存的请求头，重放时由客户端重新生成
+_HOP_HEADERS = ('host', 'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'accept-encoding', 'user-agent')
+# 各类故障在统计中的名称
+FAULTS = ('reset', 'half_open', 'status', 'partial', 'upstream_error')
+
+
+def parse_bandwidth(value: Any) -> Optional[float]:
+    """解析带宽上限（字节/秒），支持数字或 64KB/s、1MB/s 形式的字符串"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(B|KB|MB)(?:/s)?", str(value).strip(), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"无效的带宽: {value}")
+    return float(match.group(1)) * {'b': 1, 'kb': 1024, 'mb': 1024 * 1024}[match.group(2).lower()]
+
+
+@dataclass(frozen=True)
+class FaultRule:
+    """一组故障注入参数，概率按请求（tcp 模式按连接）抽样
+
+    属性:
+        latency: 响应返回前追加的延迟分布
+        bandwidth: 响应方向的带宽上限（字节/秒），None 表示不限
+        reset: 收到请求后直接重置客户端连接（RST）的概率
+        half_open: 请求照常转发、但响应被丢弃且连接保持不关闭的概率，持续 stall_time 后断开
+        status: HTTP错误状态码 -> 概率，命中时不转发请求、由代理直接返回（仅 http 模式）
+        partial: 只返回 partial_fraction 比例的响应体后停顿 stall_time 再断开的概率
+        partial_fraction: 残缺响应保留的响应体比例
+        stall_time: 半开连接与残缺响应停顿的时长（秒），0 表示立即断开
+    """
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    bandwidth: Optional[float] = None
+    reset: float = 0.0
+    half_open: float = 0.0
+    status: Tuple[Tuple[str, float], ...] = ()
+    partial: float = 0.0
+    partial_fraction: float = 0.5
+    stall_time: float = 30.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], base: Optional['FaultRule'] = None) -> 'FaultRule':
+        """从配置构建，未配置的项沿用 base"""
+        base = base or cls()
+        if not config:
+            return base
+        unknown = set(config) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"未知的故障配置项: {', '.join(sorted(unknown))}")
+        overrides: Dict[str, Any] = {}
+        for key, value in config.items():
+            if key == 'latency':
+                value = LatencyModel.from_config(value)
+            elif key == 'bandwidth':
+                value = parse_bandwidth(value)
+            elif key == 'status':
+                value = parse_weights(value)
+            elif key == 'stall_time':
+                value = parse_duration(value)
+            else:
+                value = float(value)
+            overrides[key] = value
+        return replace(base, **overrides)
+
+    def choose_fault(self, rng: random.Random) -> Tuple[Optional[str], Optional[int]]:
+        """抽样本次请求的故障，返回 (故障名称, HTTP状态码)，不注入时故障名称为 None"""
+        roll = rng.random()
+        for name in ('reset', 'half_open', 'partial'):
+            probability = getattr(self, name)
+            if roll < probability:
+                return name, None
+            roll -= probability
+        for status, probability in self.status:
+            if roll < probability:
+                return 'status', int(status)
+            roll -= probability
+        return None, None
+
+
+@dataclass(frozen=True)
+class FaultPhase:
+    """在 [at, at + duration) 时间段内生效的故障，path 为正则时只作用于匹配的请求路径（仅 http 模式）"""
+    name: str
+    at: float
+    duration: float
+    path: Optional[str]
+    overrides: Dict[str, Any]
+
+
+class FaultSchedule:
+    """故障注入脚本：默认规则与按时间生效的阶段
+
+    配置示例::
+
+        mode: http
+        defaults:
+          latency: 5ms
+        phases:
+          - {name: slow, at: 30s, duration: 30s, latency: {distribution: lognormal, median: 800ms, sigma: 0.5}}
+          - {name: resets, at: 60s, duration: 20s, reset: 0.05}
+          - {name: slow-502, at: 80s, duration: 20s, latency: 2s, status: {502: 0.2}}
+          - {name: partial, at: 100s, duration: 20s, partial: 0.1, stall_time: 10s}
+          - {name: half-open, at: 120s, duration: 20s, half_open: 0.05, stall_time: 60s}
+          - {name: narrow, at: 140s, duration: 20s, bandwidth: 2KB/s, path: user-credit}
+
+    时间从代理启动算起；多个阶段重叠时按配置顺序依次覆盖。
+    """
+
+    def __init__(self, mode: str, defaults: FaultRule, phases: List[FaultPhase]):
+        if mode not in (HTTP, TCP):
+            raise ValueError(f"不支持的代理模式: {mode}，可选 {HTTP}、{TCP}")
+        self.mode = mode
+        self.defaults = defaults
+        self.phases = phases
+        self._patterns = [re.compile(phase.path) if phase.path else None for phase in phases]
+        self._cache: Dict[Tuple[int, ...], FaultRule] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'FaultSchedule':
+        config = config or {}
+        mode = config.get('mode', HTTP)
+        phases = []
+        for index, item in enumerate(config.get('phases') or []):
+            item = dict(item)
+            at = parse_duration(item.pop('at', 0))
+            duration = parse_duration(item.pop('duration'))
+            name = str(item.pop('name', f"phase{index + 1}"))
+            path = item.pop('path', None)
+            if path and mode == TCP:
+                raise ValueError("tcp 模式下无法按请求路径注入故障")
+            FaultRule.from_config(item)  # 提前校验配置
+            phases.append(FaultPhase(name, at, duration, path, item))
+        defaults = FaultRule.from_config(config.get('defaults'))
+        if mode == TCP and (defaults.status or any('status' in phase.overrides for phase in phases)):
+            raise ValueError("tcp 模式下无法返回HTTP错误状态码")
+        return cls(mode, defaults, phases)
+
+    @classmethod
+    def load(cls, path: str) -> 'FaultSchedule':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_config(yaml.safe_load(f))
+
+    def rule(self, elapsed: float, path: Optional[str]) -> Tuple[FaultRule, str]:
+        """启动 elapsed 秒后、作用于 path 的规则与生效阶段名称（无阶段时为 baseline）"""
+        active = tuple(
+            index for index, phase in enumerate(self.phases)
+            if phase.at <= elapsed < phase.at + phase.duration
+            and (self._patterns[index] is None or (path is not None and self._patterns[index].search(path)))
+        )
+        rule = self._cache.get(active)
+        if rule is None:
+            rule = self.defaults
+            for index in active:
+                rule = FaultRule.from_config(self.phases[index].overrides, rule)
+            self._cache[active] = rule
+        return rule, '+'.join(self.phases[index].name for index in active) or 'baseline'
+
+
+def _abort(writer: asyncio.StreamWriter) -> None:
+    """以 RST 关闭连接"""
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[str, List[Tuple[str, str]]]:
+    head = await reader.readuntil(b'\r\n\r\n')
+    first, *lines = head[:-4].decode('latin-1').split('\r\n')
+    headers = []
+    for line in lines:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers.append((name.strip(), value.strip()))
+    return first, headers
+
+
+def _header(headers: List[Tuple[str, str]], name: str) -> str:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return ''
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: List[Tuple[str, str]], until_eof: bool) -> bytes:
+    """按 Content-Length 或 chunked 读取消息体，两者都没有时按 until_eof 读到连接关闭"""
+    if 'chunked' in _header(headers, 'transfer-encoding').lower():
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0].strip(), 16)
+            if size == 0:
+                while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                    pass
+                return b''.join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    length = _header(headers, 'content-length')
+    if length:
+        return await reader.readexactly(int(length))
+    return await reader.read() if until_eof else b''
+
+
+class FaultProxy:
+    """在压测程序与被测服务之间注入网络故障的代理
+
+    http 模式逐个解析请求：按规则抽样故障，可直接返回错误状态码、重置连接、
+    丢弃响应并保持连接（半开）、只返回部分响应体，并对响应追加延迟、限制带宽；
+    转发时把 Host 改为上游地址，上游支持 https。
+    tcp 模式按连接转发原始字节，故障按连接抽样，延迟加在每次客户端发送数据后的第一段响应上。
+
+    统计按生效阶段记录请求数与注入的故障数，可与压测报告的延迟、失败率对照。
+    http 模式下提供 recorder 时，经过代理的每个请求连同上游的状态码、业务码与耗时写入抓包文件，
+    未转发到上游的请求（重置、代理直接返回错误）不带响应结果。
+    """
+
+    def __init__(self, target: str, schedule: FaultSchedule, host: str = '127.0.0.1', port: int = 0,
+                 seed: Optional[int] = None, recorder: Optional[TrafficRecorder] = None):
+        parts = urlsplit(target if '://' in target else f"http://{target}")
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"无效的上游地址: {target}")
+        self.target = target
+        self.upstream_host = parts.hostname
+        self.upstream_port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.upstream_netloc = parts.netloc
+        self.upstream_ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.schedule = schedule
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.recorder = recorder
+        self.counts: Dict[str, Counter] = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._address: Optional[Tuple[str, int]] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._address or (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def _count(self, phase: str, name: str) -> None:
+        with self._lock:
+            self.counts.setdefault(phase, Counter())[name] += 1
+
+    async def _open_upstream(self):
+        return await asyncio.open_connection(self.upstream_host, self.upstream_port, ssl=self.upstream_ssl,
+                                             server_hostname=self.upstream_host if self.upstream_ssl else None)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if self.schedule.mode == TCP:
+                await self._pipe_tcp(reader, writer)
+            else:
+                await self._proxy_http(reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            # 代理停止时取消仍在停顿的连接；Python 3.11 的 start_server 回调会把取消当作异常打印
+            pass
+        finally:
+            if not writer.is_closing():
+                writer.close()
+
+    async def _proxy_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        upstream: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        try:
+            while True:
+                try:
+                    request_line, headers = await _read_head(reader)
+                except asyncio.IncompleteReadError:
+                    return
+                body = await _read_body(reader, headers, until_eof=False)
+                parts = request_line.split(' ')
+                if len(parts) != 3:
+                    return
+                method, path, _ = parts
+                received = time.time()
+                rule, phase = self.schedule.rule(time.monotonic() - self._started, path)
+                self._count(phase, 'requests')
+                fault, status = rule.choose_fault(self.rng)
+                if fault is not None:
+                    self._count(phase, fault)
+                delay = rule.latency.sample(self.rng)
+
+                if fault in ('reset', 'status'):
+                    self._record(received, method, path, headers, body)
+                if fault == 'reset':
+                    _abort(writer)
+                    return
+                if fault == 'status':
+                    await asyncio.sleep(delay)
+                    await self._send(writer, self._response_head(f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}",
+                                                                 [('Content-Type', 'text/plain')], 0), rule.bandwidth)
+                    continue
+
+                forward = [(name, self.upstream_netloc if name.lower() == 'host' else value)
+                           for name, value in headers if name.lower() not in ('content-length', 'transfer-encoding')]
+                try:
+                    if upstream is None:
+                        upstream = await self._open_upstream()
+                    upstream[1].write(self._request_head(request_line, forward, len(body)) + body)
+                    await upstream[1].drain()
+                    status_line, response_headers = await _read_head(upstream[0])
+                    close = _header(response_headers, 'connection').lower() == 'close'
+                    no_body = method == 'HEAD' or status_line.split(' ')[1][:1] == '1' or status_line.split(' ')[1] in ('204', '304')
+                    response_body = b'' if no_body else await _read_body(upstream[0], response_headers, until_eof=True)
+                except (asyncio.IncompleteReadError, ConnectionError, OSError, IndexError, ValueError):
+                    if upstream is not None:
+                        upstream[1].close()
+                        upstream = None
+                    self._record(received, method, path, headers, body, status=-1, latency=time.time() - received)
+                    self._count(phase, 'upstream_error')
+                    await self._send(writer, self._response_head("HTTP/1.1 502 Bad Gateway", [], 0), None)
+                    continue
+                if close:
+                    upstream[1].close()
+                    upstream = None
+                self._record(received, method, path, headers, body, int(status_line.split(' ')[1]), response_body,
+                             time.time() - received)
+
+                if fault == 'half_open':
+                    await asyncio.sleep(rule.stall_time)
+                    _abort(writer)
+                    return
+                await asyncio.sleep(delay)
+                kept = [(name, value) for name, value in response_headers
+                        if name.lower() not in ('content-length', 'transfer-encoding', 'connection')]
+                head = self._response_head(status_line, kept, len(response_body))
+                if fault == 'partial':
+                    await self._send(writer, head + response_body[:int(len(response_body) * rule.partial_fraction)],
+                                     rule.bandwidth)
+                    await asyncio.sleep(rule.stall_time)
+                    _abort(writer)
+                    return
+                await self._send(writer, head + response_body, rule.bandwidth)
+        finally:
+            if upstream is not None:
+                upstream[1].close()
+
+    def _record(self, t: float, method: str, path: str, headers: List[Tuple[str, str]], body: bytes,
+                status: Optional[int] = None, response_body: bytes = b'', latency: Optional[float] = None) -> None:
+        if self.recorder is None:
+            return
+        try:
+            parsed = json.loads(body) if body else None
+        except ValueError:
+            parsed = body.decode('utf-8', errors='replace')
+        code = None
+        try:
+            code = str(json.loads(response_body)['code']) if response_body else None
+        except (ValueError, KeyError, TypeError):
+            pass
+        rest, data, encrypted = CapturedRequest.split_body(parsed)
+        kept = {name: value for name, value in headers if name.lower() not in _HOP_HEADERS}
+        self.recorder.record(CapturedRequest(t=t, method=method, url=path, headers=kept or None, body=rest, data=data,
+                                             encrypted=encrypted, status=status, code=code, latency=latency))
+
+    @staticmethod
+    def _request_head(request_line: str, headers: List[Tuple[str, str]], length: int) -> bytes:
+        lines = [request_line] + [f"{name}: {value}" for name, value in headers] + [f"Content-Length: {length}", '', '']
+        return '\r\n'.join(lines).encode('latin-1')
+
+    @staticmethod
+    def _response_head(status_line: str, headers: List[Tuple[str, str]], length: int) -> bytes:
+        lines = [status_line] + [f"{name}: {value}" for name, value in headers] + [f"Content-Length: {length}", '', '']
+        return '\r\n'.join(lines).encode('latin-1')
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, data: bytes, bandwidth: Optional[float]) -> None:
+        """按带宽上限分段写出"""
+        if not bandwidth:
+            writer.write(data)
+            await writer.drain()
+            return
+        step = max(1, min(_CHUNK, int(bandwidth / 10)))
+        for offset in range(0, len(data), step):
+            chunk = data[offset:offset + step]
+            writer.write(chunk)
+            await writer.drain()
+            await asyncio.sleep(len(chunk) / bandwidth)
+
+    async def _pipe_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        rule, phase = self.schedule.rule(time.monotonic() - self._started, None)
+        self._count(phase, 'connections')
+        fault, _ = rule.choose_fault(self.rng)
+        if fault is not None:
+            self._count(phase, fault)
+        try:
+            upstream_reader, upstream_writer = await self._open_upstream()
+        except OSError:
+            self._count(phase, 'upstream_error')
+            _abort(writer)
+            return
+        sent = asyncio.Event()
+
+        async def upstream_pump():
+            while True:
+                data = await reader.read(_CHUNK)
+                if not data:
+                    if upstream_writer.can_write_eof():
+                        upstream_writer.write_eof()
+                    return
+                if fault == 'reset':
+                    _abort(writer)
+                    return
+                upstream_writer.write(data)
+                await upstream_writer.drain()
+                sent.set()
+
+        async def downstream_pump():
+            first = True
+            while True:
+                data = await upstream_reader.read(_CHUNK)
+                if not data:
+                    return
+                if fault == 'half_open':
+                    await asyncio.sleep(rule.stall_time)
+                    _abort(writer)
+                    return
+                if sent.is_set():
+                    sent.clear()
+                    await asyncio.sleep(rule.latency.sample(self.rng))
+                if fault == 'partial' and first:
+                    await self._send(writer, data[:int(len(data) * rule.partial_fraction)], rule.bandwidth)
+                    await asyncio.sleep(rule.stall_time)
+                    _abort(writer)
+                    return
+                first = False
+                await self._send(writer, data, rule.bandwidth)
+
+        upstream_task = asyncio.ensure_future(upstream_pump())
+        downstream_task = asyncio.ensure_future(downstream_pump())
+        try:
+            done, _ = await asyncio.wait([upstream_task, downstream_task], return_when=asyncio.FIRST_COMPLETED)
+            # 客户端发完数据（半关闭）后继续等待响应转发完毕
+            if done == {upstream_task} and upstream_task.exception() is None and not writer.is_closing():
+                await asyncio.wait([downstream_task])
+        finally:
+            for task in (upstream_task, downstream_task):
+                task.cancel()
+            await asyncio.gather(upstream_task, downstream_task, return_exceptions=True)
+            upstream_writer.close()
+
+    async def _serve(self, ready: threading.Event, errors: List[BaseException]) -> None:
+        self._stopped = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+        except OSError as e:
+            errors.append(e)
+            ready.set()
+            return
+        self._address = server.sockets[0].getsockname()[:2]
+        self._started = time.monotonic()
+        ready.set()
+        async with server:
+            await self._stopped.wait()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> None:
+        """在后台线程中启动代理，port 为 0 时自动选择端口"""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(ready, errors),),
+                                        name="fault-proxy", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            raise errors[0]
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+
+    def __enter__(self) -> 'FaultProxy':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """阶段 -> {requests（tcp 模式为 connections）及各故障的注入次数}"""
+        with self._lock:
+            return {phase: dict(counts) for phase, counts in self.counts.items()}
+
+
+def print_fault_summary(proxy: FaultProxy) -> None:
+    """在控制台打印各阶段的故障注入次数"""
+    unit = 'connections' if proxy.schedule.mode == TCP else 'requests'
+    summary = proxy.summary()
+    print(f"\n故障注入（{proxy.schedule.mode} 模式，上游 {proxy.target}）:")
+    if not summary:
+        print("  没有流量经过代理")
+        return
+    print(f"  {'阶段':<24} {'请求' if unit == 'requests' else '连接':>8}" + ''.join(f" {name:>14}" for name in FAULTS))
+    for phase, counts in summary.items():
+        total = counts.get(unit, 0)
+        cells = ''.join(
+            f" {counts.get(name, 0):>6}({counts.get(name, 0) / total * 100 if total else 0:5.1f}%)" for name in FAULTS
+        )
+        print(f"  {phase:<24} {total:>8}{cells}")
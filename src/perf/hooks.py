@@ -0,0 +1,166 @@
+import importlib
+import sys
+import threading
+import time
+from collections import ChainMap
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, MutableMapping, Optional
+
+SETUP = 'setup'
+TEARDOWN = 'teardown'
+# 作用范围：整次压测、每个工作线程（各持有一个客户端）、每个VU、每次迭代、用例级钩子的每次执行
+RUN = 'run'
+WORKER = 'worker'
+VU = 'vu'
+ITERATION = 'iteration'
+CASE = 'case'
+SUITE_SCOPES = (RUN, WORKER, VU, ITERATION)
+
+
+class HookError(Exception):
+    """钩子执行失败"""
+
+
+def load_callable(spec: str, base_dir: Optional[str] = None) -> Callable:
+    """按 module:function 导入可调用对象，模块先在套件文件所在目录中查找"""
+    module_name, sep, attr = spec.partition(':')
+    if not sep or not module_name or not attr:
+        raise ValueError(f"无效的钩子函数: {spec}，应为 module:function")
+    if base_dir and base_dir not in sys.path:
+        sys.path.insert(0, base_dir)
+    target = importlib.import_module(module_name)
+    for name in attr.split('.'):
+        target = getattr(target, name)
+    if not callable(target):
+        raise ValueError(f"钩子 {spec} 不可调用")
+    return target
+
+
+@dataclass(frozen=True)
+class Hook:
+    """setup / teardown 钩子，Python 函数或一个HTTP步骤（套件中的用例）二选一
+
+    套件YAML中的写法::
+
+        setup:
+          - {scope: run, call: "hooks:load_keys"}     # 整次压测一次，返回的字典存入变量
+          - {scope: vu, case: login}                  # 每个VU一次，执行 login 用例，extract 的值存入VU上下文
+        teardown:
+          - {scope: vu, case: logout}
+        test_cases:
+          case_001:
+            setup: [{call: "hooks:prepare_order"}]   # 每次执行该用例之前
+
+    函数以变量视图为参数：读取时依次查找本范围及外层范围的变量、套件变量，
+    写入（或返回字典）的值存入本范围，供后续用例的 ${name} 使用。
+    被钩子引用的用例只作为钩子执行，不参与迭代。
+
+    属性:
+        scope: run / worker / vu / iteration，用例级钩子为 case
+        call: module:function
+        case: 作为HTTP步骤执行的用例ID
+        function: 导入后的函数
+    """
+    scope: str
+    call: Optional[str] = None
+    case: Optional[str] = None
+    function: Optional[Callable] = None
+
+    @property
+    def name(self) -> str:
+        return self.call or f"case:{self.case}"
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], scope: Optional[str] = None, base_dir: Optional[str] = None) -> 'Hook':
+        if not isinstance(config, dict) or bool(config.get('call')) == bool(config.get('case')):
+            raise ValueError(f"钩子需要且只能指定 call 或 case 之一: {config}")
+        if scope is None:
+            scope = config.get('scope', VU)
+            if scope not in SUITE_SCOPES:
+                raise ValueError(f"钩子的 scope 应为 {'/'.join(SUITE_SCOPES)}: {scope}")
+        elif config.get('scope', scope) != scope:
+            raise ValueError(f"用例级钩子在每次执行用例时运行，不能指定 scope: {config}")
+        call = config.get('call')
+        return cls(scope, call=call, case=config.get('case'),
+                   function=load_callable(call, base_dir) if call else None)
+
+
+def parse_hooks(config: Any, scope: Optional[str] = None, base_dir: Optional[str] = None) -> List[Hook]:
+    """单个钩子或钩子列表"""
+    if not config:
+        return []
+    items = config if isinstance(config, list) else [config]
+    return [Hook.from_config(item, scope, base_dir) for item in items]
+
+
+class HookStats:
+    """钩子的执行次数、失败次数与耗时，按 "阶段:范围" 汇总，可被多个线程同时调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, key: str, seconds: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            item = self._stats.setdefault(key, {'runs': 0, 'failures': 0, 'seconds': 0.0, 'error': None})
+            item['runs'] += 1
+            item['seconds'] += seconds
+            if error is not None:
+                item['failures'] += 1
+                item['error'] = item['error'] or error
+
+    def merge(self, other: 'HookStats') -> None:
+        for key, item in other.to_dict().items():
+            with self._lock:
+                target = self._stats.setdefault(key, {'runs': 0, 'failures': 0, 'seconds': 0.0, 'error': None})
+                target['runs'] += item['runs']
+                target['failures'] += item['failures']
+                target['seconds'] += item['seconds']
+                target['error'] = target['error'] or item['error']
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: dict(item) for key, item in self._stats.items()}
+
+
+def run_hooks(
+    hooks: List[Hook],
+    phase: str,
+    scope: str,
+    context: MutableMapping[str, Any],
+    variables: Dict[str, Any],
+    execute_case: Callable,
+    client,
+    stats: HookStats
+) -> bool:
+    """依次执行钩子，某个钩子失败时跳过其余钩子并返回 False；耗时记入 stats，不计入压测统计
+
+    Args:
+        hooks: 要执行的钩子
+        phase: setup / teardown
+        scope: 作用范围，用于统计
+        context: 本范围的变量视图，写入的值对后续用例可见
+        variables: 套件变量，函数读取时最后查找
+        execute_case: 执行HTTP步骤的函数 (client, case_id, context) -> RequestResult
+        client: HTTP步骤使用的客户端
+        stats: 钩子统计
+    """
+    key = f"{phase}:{scope}"
+    for hook in hooks:
+        start = time.perf_counter()
+        error = None
+        try:
+            if hook.function is not None:
+                values = hook.function(ChainMap(context, variables))
+                if isinstance(values, dict):
+                    context.update(values)
+            else:
+                result = execute_case(client, hook.case, context)
+                if not result.passed:
+                    raise HookError(result.error)
+        except Exception as e:
+            error = f"{hook.name}: {e}"
+        stats.record(key, time.perf_counter() - start, error)
+        if error is not None:
+            return False
+    return True
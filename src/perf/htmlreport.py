@@ -0,0 +1,203 @@
+import html
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .resultlog import LogAggregate, ResultLog
+from .stats import LatencyHistogram
+
+_COLORS = ('#1f77b4', '#ff7f0e', '#d62728', '#2ca02c', '#9467bd', '#8c564b')
+_QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+_STYLE = """
+body { font-family: -apple-system, "Segoe UI", "PingFang SC", "Microsoft YaHei", sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 22px; } h2 { font-size: 17px; margin-top: 32px; border-bottom: 1px solid #ddd; padding-bottom: 4px; }
+table { border-collapse: collapse; font-size: 13px; margin: 8px 0; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+th { background: #f5f5f5; } td.text, th.text { text-align: left; }
+.chart { margin: 8px 0 16px; } .muted { color: #888; font-size: 12px; }
+svg text { font-size: 11px; fill: #555; }
+"""
+
+
+def _e(value: Any) -> str:
+    return html.escape(str(value))
+
+
+def _format_elapsed(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}" if seconds >= 3600 else f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _nice_max(value: float) -> float:
+    """坐标轴上限取 1/2/5 × 10^n"""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    for factor in (1, 2, 5):
+        if value <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def line_chart(title: str, xs: Sequence[float], series: List[Tuple[str, Sequence[float]]], unit: str,
+               width: int = 960, height: int = 240) -> str:
+    """内联SVG折线图，xs 为相对开始的秒数"""
+    left, right, top, bottom = 64, 16, 24, 28
+    plot_w, plot_h = width - left - right, height - top - bottom
+    x_max = max(xs[-1], 1.0) if len(xs) else 1.0
+    y_max = _nice_max(max((max(ys) for _, ys in series if len(ys)), default=0.0))
+
+    def x(value):
+        return left + plot_w * value / x_max
+
+    def y(value):
+        return top + plot_h * (1 - value / y_max)
+
+    parts = [f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">',
+             f'<text x="{left}" y="14" style="font-weight:bold">{_e(title)}</text>']
+    for i in range(5):
+        value = y_max * i / 4
+        parts.append(f'<line x1="{left}" x2="{width - right}" y1="{y(value):.1f}" y2="{y(value):.1f}" stroke="#eee"/>')
+        parts.append(f'<text x="{left - 6}" y="{y(value) + 4:.1f}" text-anchor="end">{value:g}{_e(unit)}</text>')
+    for i in range(6):
+        value = x_max * i / 5
+        parts.append(f'<text x="{x(value):.1f}" y="{height - 8}" text-anchor="middle">{_format_elapsed(value)}</text>')
+    for index, (name, ys) in enumerate(series):
+        color = _COLORS[index % len(_COLORS)]
+        points = ' '.join(f"{x(a):.1f},{y(b):.1f}" for a, b in zip(xs, ys))
+        parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{points}"/>')
+        parts.append(f'<text x="{width - right - 90 * (len(series) - index)}" y="14" fill="{color}" '
+                     f'style="fill:{color}">■ {_e(name)}</text>')
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" fill="none" stroke="#ccc"/></svg>')
+    return '<div class="chart">' + ''.join(parts) + '</div>'
+
+
+def histogram_chart(title: str, counts, markers: List[Tuple[str, float]], width: int = 960, height: int = 200,
+                    bars: int = 80) -> str:
+    """对数横轴的延迟分布柱状图，markers 为 (名称, 秒) 的分位数标记"""
+    nonzero = counts.nonzero()[0]
+    if not len(nonzero):
+        return ''
+    first, last = int(nonzero[0]), int(nonzero[-1]) + 1
+    group = max(1, -(-(last - first) // bars))
+    heights = [int(counts[i:i + group].sum()) for i in range(first, last, group)]
+    left, right, top, bottom = 64, 16, 24, 28
+    plot_w, plot_h = width - left - right, height - top - bottom
+    bar_w = plot_w / len(heights)
+    peak = max(heights)
+    low, high = LatencyHistogram.bucket_value(first), LatencyHistogram.bucket_value(last)
+
+    def x_of(seconds):
+        return left + plot_w * (math.log(seconds) - math.log(low)) / max(math.log(high) - math.log(low), 1e-9)
+
+    parts = [f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">',
+             f'<text x="{left}" y="14" style="font-weight:bold">{_e(title)}</text>']
+    for i, value in enumerate(heights):
+        bar_h = plot_h * value / peak
+        parts.append(f'<rect x="{left + i * bar_w:.1f}" y="{top + plot_h - bar_h:.1f}" width="{max(bar_w - 1, 1):.1f}" '
+                     f'height="{bar_h:.1f}" fill="#1f77b4"/>')
+    for i in range(6):
+        index = first + (last - first) * i // 5
+        seconds = LatencyHistogram.bucket_value(index)
+        parts.append(f'<text x="{x_of(seconds):.1f}" y="{height - 8}" text-anchor="middle">{seconds * 1000:.3g}ms</text>')
+    for index, (name, seconds) in enumerate(markers):
+        if low <= seconds <= high:
+            color = _COLORS[(index + 1) % len(_COLORS)]
+            parts.append(f'<line x1="{x_of(seconds):.1f}" x2="{x_of(seconds):.1f}" y1="{top}" y2="{top + plot_h}" '
+                         f'stroke="{color}" stroke-dasharray="4,3"/>')
+            parts.append(f'<text x="{x_of(seconds) + 3:.1f}" y="{top + 12 + 12 * index}" style="fill:{color}">{_e(name)}</text>')
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" fill="none" stroke="#ccc"/></svg>')
+    return '<div class="chart">' + ''.join(parts) + '</div>'
+
+
+def _table(headers: List[str], rows: List[List[Any]], text_columns: int = 1) -> str:
+    head = ''.join(f'<th class="{"text" if i < text_columns else ""}">{_e(h)}</th>' for i, h in enumerate(headers))
+    body = ''.join(
+        '<tr>' + ''.join(f'<td class="{"text" if i < text_columns else ""}">{_e(v)}</td>' for i, v in enumerate(row)) + '</tr>'
+        for row in rows
+    )
+    return f'<table><tr>{head}</tr>{body}</table>'
+
+
+def _key_values(data: Dict[str, Any]) -> str:
+    rows = [[key, value if isinstance(value, (str, int, float)) else json.dumps(value, ensure_ascii=False)]
+            for key, value in data.items()]
+    return _table(['项目', '值'], rows, text_columns=2)
+
+
+def render_html(log: ResultLog, include_warmup: bool = False, interval: Optional[float] = None) -> str:
+    """从结果日志生成单文件HTML报告，图表为内联SVG，不依赖外部资源"""
+    aggregate: LogAggregate = log.aggregate(interval=interval, include_warmup=include_warmup)
+    info = log.info
+    span = aggregate.slots * aggregate.interval
+    total_requests = int(aggregate.requests.sum())
+    total_failed = int(aggregate.failed.sum())
+
+    endpoint_quantiles = aggregate.endpoint_percentiles(_QUANTILES)
+    total_counts = aggregate.endpoint_latency.sum(axis=0)
+    total_quantiles = aggregate.total_percentiles(_QUANTILES)
+
+    def summary_row(name, requests, failed, quantiles, max_seconds):
+        return [name, requests, failed, f"{failed / requests * 100:.2f}%" if requests else '-',
+                f"{requests / span:.2f}" if span else '-'] + [f"{q * 1000:.1f}" for q in quantiles] + [f"{max_seconds * 1000:.1f}"]
+
+    def max_of(counts):
+        nonzero = counts.nonzero()[0]
+        return LatencyHistogram.bucket_value(int(nonzero[-1])) if len(nonzero) else 0.0
+
+    summary_rows = []
+    for index, name in enumerate(log.meta['endpoints'], start=1):
+        requests = int(aggregate.endpoint_requests[index])
+        if requests:
+            summary_rows.append(summary_row(name, requests, int(aggregate.endpoint_failed[index]),
+                                            [q[index] for q in endpoint_quantiles], max_of(aggregate.endpoint_latency[index])))
+    summary_rows.append(summary_row('total', total_requests, total_failed, total_quantiles, max_of(total_counts)))
+
+    xs = aggregate.times().tolist()
+    p50, p90, p99 = (values * 1000 for values in aggregate.slot_percentiles((0.5, 0.9, 0.99)))
+    rps = aggregate.requests / aggregate.interval
+    error_rate = aggregate.failed / aggregate.requests.clip(min=1) * 100
+
+    failures = []
+    for index, count in enumerate(aggregate.fingerprint_counts.tolist()):
+        if index and count:
+            fingerprint = log.meta['fingerprints'][index - 1]
+            failures.append([count, fingerprint['stage'], fingerprint['code'] or '-', fingerprint['template']])
+    failures.sort(key=lambda row: -row[0])
+
+    title = info.get('run', {}).get('suite') or log.path
+    started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(aggregate.started_at)) if total_requests else '-'
+    body = [
+        f'<h1>压测报告: {_e(title)}</h1>',
+        f'<p class="muted">结果日志 {_e(log.path)}，{len(log)} 条记录，统计 {total_requests} 条'
+        f'{"（含预热）" if include_warmup else ""}；开始于 {started}，时长 {_format_elapsed(span)}，'
+        f'时间片 {aggregate.interval:g}s；生成于 {time.strftime("%Y-%m-%d %H:%M:%S")}</p>',
+        '<h2>汇总</h2>',
+        _table(['接口', '请求', '失败', '失败率', '吞吐/s'] + [f'p{q * 100:g} ms' for q in _QUANTILES] + ['max ms'], summary_rows),
+        '<h2>延迟</h2>',
+        line_chart('延迟分位数', xs, [('p50', p50.tolist()), ('p90', p90.tolist()), ('p99', p99.tolist())], 'ms'),
+        '<h2>吞吐</h2>',
+        line_chart('每秒完成请求数', xs, [('rps', rps.tolist())], '/s'),
+        '<h2>失败率</h2>',
+        line_chart('失败率', xs, [('error_rate', error_rate.tolist())], '%'),
+        '<h2>分接口延迟分布</h2>',
+    ]
+    for index, name in enumerate(log.meta['endpoints'], start=1):
+        if aggregate.endpoint_requests[index]:
+            markers = [('p50', endpoint_quantiles[0][index]), ('p99', endpoint_quantiles[3][index])]
+            body.append(histogram_chart(name, aggregate.endpoint_latency[index], markers))
+    body.append(f'<h2>失败分组（{len(failures)} 种）</h2>')
+    body.append(_table(['次数', '环节', '代码', '原因'], failures, text_columns=0) if failures else '<p>无失败</p>')
+    if info.get('run'):
+        body += ['<h2>运行配置</h2>', _key_values(info['run'])]
+    if info.get('environment'):
+        body += ['<h2>环境</h2>', _key_values(info['environment'])]
+
+    return (f'<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>压测报告 {_e(title)}</title>'
+            f'<style>{_STYLE}</style></head><body>{"".join(body)}</body></html>')
+
+
+def write_html(path: str, log: ResultLog, include_warmup: bool = False, interval: Optional[float] = None) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_html(log, include_warmup=include_warmup, interval=interval))
@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .stats import LatencyHistogram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# 延迟桶边界取原生直方图 schema 2 的边界（相邻边界相差 2^(1/4) 倍），约 0.5ms ~ 64s，
+# 与 Prometheus 原生直方图的桶对齐，由 LatencyHistogram 的对数桶累加得到
+LATENCY_BUCKETS = tuple(2 ** (exponent / 4) for exponent in range(-44, 25))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def cumulative_buckets(histogram: LatencyHistogram, bounds=LATENCY_BUCKETS) -> List[Tuple[float, int]]:
+    """把对数桶计数折算为各边界（秒）以下的累计计数，桶按上沿归入边界"""
+    results = []
+    seen = 0
+    index = 0
+    counts = histogram.counts
+    for bound in bounds:
+        while index < len(counts) and LatencyHistogram.bucket_upper(index) <= bound * (1 + 1e-9):
+            seen += counts[index]
+            index += 1
+        results.append((bound, seen))
+    return results
+
+
+def _process_rss() -> Optional[int]:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+class MetricsExporter:
+    """把压测引擎的实时统计渲染为 OpenMetrics 文本
+
+    指标在抓取时从 StatsCollector 的合并统计生成，请求路径上没有额外开销：
+        perf_requests_total / perf_request_failures_total: 按阶段、接口、HTTP状态码、业务码计数
+        perf_request_duration_seconds: 按接口的延迟直方图
+        perf_active_vus、perf_dropped_iterations_total、perf_warmup_requests_total: 负载状态
+        perf_http_pool_*: 所有客户端连接池的连接数与等待数
+        process_cpu_seconds_total、process_resident_memory_bytes、perf_threads: 压测进程资源
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def render(self) -> str:
+        engine = self.engine
+        lines: List[str] = []
+        shard = engine.stats.merged()
+
+        requests: Dict[Tuple, List[int]] = {}
+        latency: Dict[str, LatencyHistogram] = {}
+        for (stage, endpoint, _, status_code, biz_code), stats in shard.stats.items():
+            key = (stage, endpoint, status_code, biz_code if biz_code is not None else '')
+            counts = requests.setdefault(key, [0, 0])
+            counts[0] += stats.requests
+            counts[1] += stats.failed
+            histogram = latency.get(endpoint)
+            if histogram is None:
+                histogram = latency[endpoint] = LatencyHistogram()
+            histogram.merge(stats.latency)
+
+        lines += ["# TYPE perf_requests counter", "# HELP perf_requests 已完成的请求数"]
+        for (stage, endpoint, status, biz_code), (total, _) in requests.items():
+            labels = _labels(stage=stage, endpoint=endpoint, status=status, biz_code=biz_code)
+            lines.append(f"perf_requests_total{labels} {total}")
+        lines += ["# TYPE perf_request_failures counter", "# HELP perf_request_failures 校验未通过的请求数"]
+        for (stage, endpoint, status, biz_code), (_, failed) in requests.items():
+            labels = _labels(stage=stage, endpoint=endpoint, status=status, biz_code=biz_code)
+            lines.append(f"perf_request_failures_total{labels} {failed}")
+
+        lines += ["# TYPE perf_request_duration_seconds histogram",
+                  "# UNIT perf_request_duration_seconds seconds",
+                  "# HELP perf_request_duration_seconds 请求耗时"]
+        for endpoint, histogram in latency.items():
+            for bound, count in cumulative_buckets(histogram):
+                lines.append(f"perf_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=f'{bound:.6g}')} {count}")
+            lines.append(f"perf_request_duration_seconds_bucket{_labels(endpoint=endpoint, le='+Inf')} {histogram.count}")
+            lines.append(f"perf_request_duration_seconds_count{_labels(endpoint=endpoint)} {histogram.count}")
+            lines.append(f"perf_request_duration_seconds_sum{_labels(endpoint=endpoint)} {histogram.total:.6f}")
+
+        lines += [
+            "# TYPE perf_active_vus gauge", "# HELP perf_active_vus 活跃的虚拟用户数（到达速率模型下为进行中的迭代数）",
+            f"perf_active_vus {engine.active_vus}",
+            "# TYPE perf_dropped_iterations counter", "# HELP perf_dropped_iterations 因达到 max_vus 丢弃的迭代数",
+            f"perf_dropped_iterations_total {engine.dropped_iterations}",
+            "# TYPE perf_warmup_requests counter", "# HELP perf_warmup_requests 预热期间未计入统计的请求数",
+            f"perf_warmup_requests_total {engine.warmup_requests}",
+        ]
+        if engine.current_stage is not None:
+            lines += ["# TYPE perf_stage info", "# HELP perf_stage 当前负载阶段",
+                      f"perf_stage_info{_labels(stage=engine.current_stage)} 1"]
+
+        pool = engine.executor.pool_stats()
+        lines += [
+            "# TYPE perf_http_pool_clients gauge", "# HELP perf_http_pool_clients HTTP客户端数",
+            f"perf_http_pool_clients {pool['clients']}",
+            "# TYPE perf_http_pool_connections gauge", "# HELP perf_http_pool_connections 连接池中的连接数",
+            f"perf_http_pool_connections{_labels(state='active')} {pool['active']}",
+            f"perf_http_pool_connections{_labels(state='idle')} {pool['idle']}",
+            "# TYPE perf_http_pool_pending_requests gauge", "# HELP perf_http_pool_pending_requests 等待分配连接的请求数",
+            f"perf_http_pool_pending_requests {pool['pending']}",
+        ]
+
+        lines += [
+            "# TYPE process_cpu_seconds counter", "# HELP process_cpu_seconds 压测进程占用的CPU时间",
+            f"process_cpu_seconds_total {time.process_time():.6f}",
+            "# TYPE perf_threads gauge", "# HELP perf_threads 压测进程的线程数",
+            f"perf_threads {threading.active_count()}",
+        ]
+        rss = _process_rss()
+        if rss is not None:
+            lines += ["# TYPE process_resident_memory_bytes gauge", "# UNIT process_resident_memory_bytes bytes",
+                      "# HELP process_resident_memory_bytes 压测进程的常驻内存",
+                      f"process_resident_memory_bytes {rss}"]
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics 抓取端点，port 为 0 时自动选择端口"""
+
+    def __init__(self, engine, host: str = '127.0.0.1', port: int = 9464):
+        self.exporter = MetricsExporter(engine)
+        exporter = self.exporter
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> 'MetricsServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,516 @@
+import asyncio
+import base64
+import copy
+import json
+import math
+import multiprocessing
+import random
+import re
+import socket
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+from .profile import parse_duration
+
+# 与真实网关一致的路径：/api/v2/traffic/{渠道}/{接口}
+ROUTE = re.compile(r"^/api/v2/traffic/(?P<channel>[^/?]+)/(?P<endpoint>user-credit|user-check|repay-send)(?:\?.*)?$")
+SUCCESS_CODE = "000000"
+# 默认的响应数据，与 tests 下各套件的 expected_data 一致
+DEFAULT_DATA = {
+    'user-credit': {'success': True, 'message': None},
+    'user-check': {'checkLoan': 1, 'rejectReason': None},
+    'repay-send': {'success': False},
+}
+_ENCRYPT_BLOCK = 245
+_DECRYPT_BLOCK = 256
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error',
+            502: 'Bad Gateway', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+def _parse_ms(value: Any) -> float:
+    """延迟参数：数字按毫秒，字符串按时长（如 20ms、1.5s）"""
+    return float(value) / 1000 if isinstance(value, (int, float)) else parse_duration(value)
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """服务端处理延迟的分布
+
+    配置示例::
+
+        latency: {distribution: lognormal, median: 20ms, sigma: 0.6}
+        latency: {distribution: uniform, min: 5ms, max: 50ms}
+        latency: 30ms
+
+    属性:
+        distribution: fixed / uniform / normal / lognormal / exponential
+        params: 分布参数（秒），fixed: value；uniform: min、max；normal: mean、stddev；
+            lognormal: median、sigma（无量纲）；exponential: mean
+        cap: 延迟上限（秒），防止长尾分布产生极端值
+    """
+    distribution: str = 'fixed'
+    params: Tuple[Tuple[str, float], ...] = (('value', 0.0),)
+    cap: float = 60.0
+
+    _PARAMS = {
+        'fixed': ('value',),
+        'uniform': ('min', 'max'),
+        'normal': ('mean', 'stddev'),
+        'lognormal': ('median', 'sigma'),
+        'exponential': ('mean',),
+    }
+
+    @classmethod
+    def from_config(cls, config: Any) -> 'LatencyModel':
+        if not isinstance(config, dict):
+            return cls('fixed', (('value', _parse_ms(config)),))
+        config = dict(config)
+        distribution = config.pop('distribution', 'fixed')
+        names = cls._PARAMS.get(distribution)
+        if names is None:
+            raise ValueError(f"不支持的延迟分布: {distribution}")
+        cap = _parse_ms(config.pop('cap', '60s'))
+        missing = [name for name in names if name not in config]
+        unknown = set(config) - set(names)
+        if missing or unknown:
+            raise ValueError(f"延迟分布 {distribution} 需要参数 {', '.join(names)}")
+        params = tuple((name, float(config[name]) if name == 'sigma' else _parse_ms(config[name])) for name in names)
+        return cls(distribution, params, cap)
+
+    def sample(self, rng: random.Random) -> float:
+        p = dict(self.params)
+        if self.distribution == 'fixed':
+            value = p['value']
+        elif self.distribution == 'uniform':
+            value = rng.uniform(p['min'], p['max'])
+        elif self.distribution == 'normal':
+            value = rng.gauss(p['mean'], p['stddev'])
+        elif self.distribution == 'lognormal':
+            value = p['median'] * math.exp(rng.gauss(0.0, p['sigma']))
+        else:
+            value = rng.expovariate(1 / p['mean']) if p['mean'] > 0 else 0.0
+        return min(max(value, 0.0), self.cap)
+
+
+def parse_weights(config: Optional[Dict[Any, Any]]) -> Tuple[Tuple[str, float], ...]:
+    """{取值: 权重或概率} 转为有序元组"""
+    return tuple((str(key), float(value)) for key, value in (config or {}).items())
+
+
+@dataclass(frozen=True)
+class Behavior:
+    """一个接口的模拟行为
+
+    属性:
+        latency: 处理延迟分布
+        status: HTTP错误状态码 -> 概率，如 {502: 0.01}，命中时返回空响应体
+        reset: 直接重置连接（RST）的概率
+        hang: 接收请求后不响应的概率，连接保持 hang_time 秒后关闭
+        hang_time: 不响应时保持连接的时长（秒）
+        codes: 业务返回码 -> 权重，默认全部返回 000000
+        data: 业务成功时返回的（加密前的）数据
+        responses: 按请求数据匹配的返回数据，((字段, 值)..., 数据) 的元组，命中第一条时代替 data
+        message: 响应中的 message 字段
+    """
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    status: Tuple[Tuple[str, float], ...] = ()
+    reset: float = 0.0
+    hang: float = 0.0
+    hang_time: float = 120.0
+    codes: Tuple[Tuple[str, float], ...] = ((SUCCESS_CODE, 1.0),)
+    data: Optional[Dict[str, Any]] = None
+    responses: Tuple[Tuple[Tuple[Tuple[str, Any], ...], Dict[str, Any]], ...] = ()
+    message: str = "成功"
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], base: Optional['Behavior'] = None) -> 'Behavior':
+        """从配置构建，未配置的项沿用 base"""
+        base = base or cls()
+        if not config:
+            return base
+        known = {f.name for f in fields(cls)}
+        unknown = set(config) - known
+        if unknown:
+            raise ValueError(f"未知的模拟行为配置项: {', '.join(sorted(unknown))}")
+        overrides: Dict[str, Any] = {}
+        for key, value in config.items():
+            if key == 'latency':
+                value = LatencyModel.from_config(value)
+            elif key in ('status', 'codes'):
+                value = parse_weights(value)
+            elif key == 'hang_time':
+                value = parse_duration(value)
+            elif key in ('reset', 'hang'):
+                value = float(value)
+            elif key == 'responses':
+                value = tuple((tuple(item['match'].items()), item['data']) for item in value or [])
+            overrides[key] = value
+        return replace(base, **overrides)
+
+    def choose_status(self, rng: random.Random) -> Optional[int]:
+        roll = rng.random()
+        for status, probability in self.status:
+            if roll < probability:
+                return int(status)
+            roll -= probability
+        return None
+
+    def choose_code(self, rng: random.Random) -> str:
+        codes, weights = zip(*self.codes)
+        return rng.choices(codes, weights)[0]
+
+    def response_data(self, request: Any) -> Optional[Dict[str, Any]]:
+        """按解密后的请求数据选择返回数据"""
+        if isinstance(request, dict):
+            for match, data in self.responses:
+                if all(request.get(name) == value for name, value in match):
+                    return data
+        return self.data
+
+
+@dataclass(frozen=True)
+class Phase:
+    """在 [at, at + duration) 时间段内覆盖接口行为，endpoint 为空时作用于全部接口"""
+    at: float
+    duration: float
+    endpoint: Optional[str]
+    overrides: Dict[str, Any]
+
+
+class MockScenario:
+    """模拟网关的脚本：默认行为、分接口行为和按时间生效的阶段
+
+    配置示例::
+
+        defaults:
+          latency: {distribution: lognormal, median: 20ms, sigma: 0.5}
+        endpoints:
+          user-credit:
+            codes: {"000000": 0.98, "100001": 0.02}
+            status: {502: 0.005}
+          user-check:
+            responses:
+              - {match: {phoneNo: "19585085482"}, data: {checkLoan: 0, rejectReason: "重复"}}
+        phases:
+          - {at: 60s, duration: 30s, endpoint: user-credit, latency: 800ms, reset: 0.05}
+    """
+
+    def __init__(self, defaults: Behavior, endpoints: Dict[str, Behavior], phases: List[Phase]):
+        self.defaults = defaults
+        self.endpoints = endpoints
+        self.phases = phases
+        self._cache: Dict[Tuple[str, Tuple[int, ...]], Behavior] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'MockScenario':
+        config = config or {}
+        defaults = Behavior.from_config(config.get('defaults'))
+        endpoints = {}
+        for endpoint in DEFAULT_DATA:
+            base = replace(defaults, data=defaults.data if defaults.data is not None else DEFAULT_DATA[endpoint])
+            endpoints[endpoint] = Behavior.from_config((config.get('endpoints') or {}).get(endpoint), base)
+        phases = []
+        for item in config.get('phases') or []:
+            item = dict(item)
+            at = parse_duration(item.pop('at', 0))
+            duration = parse_duration(item.pop('duration'))
+            endpoint = item.pop('endpoint', None)
+            Behavior.from_config(item)  # 提前校验配置
+            phases.append(Phase(at, duration, endpoint, item))
+        return cls(defaults, endpoints, phases)
+
+    def behavior(self, endpoint: str, elapsed: float) -> Behavior:
+        """接口在启动 elapsed 秒后的行为，多个阶段重叠时按配置顺序依次覆盖"""
+        active = tuple(
+            index for index, phase in enumerate(self.phases)
+            if phase.at <= elapsed < phase.at + phase.duration and phase.endpoint in (None, endpoint)
+        )
+        key = (endpoint, active)
+        behavior = self._cache.get(key)
+        if behavior is None:
+            behavior = self.endpoints[endpoint]
+            for index in active:
+                behavior = Behavior.from_config(self.phases[index].overrides, behavior)
+            self._cache[key] = behavior
+        return behavior
+
+
+class GatewayCodec:
+    """网关侧的加解密与签名，算法与 RSAEncrypUtil 一致，密钥只解析一次
+
+    请求: data 为平台公钥分段加密（PKCS#1 v1.5）后的 Base64，sign 为渠道私钥对 data 的 SHA256withRSA 签名；
+    响应: data 用渠道公钥加密，sign 用平台私钥签名。
+    """
+
+    def __init__(self, platform_private_key: str, channel_public_keys: Dict[str, str], default_channel_key: Optional[str] = None):
+        self.platform_private_key = serialization.load_der_private_key(base64.b64decode(platform_private_key), password=None)
+        self.channel_keys = {
+            channel: serialization.load_der_public_key(base64.b64decode(key))
+            for channel, key in channel_public_keys.items()
+        }
+        self.default_channel_key = (
+            serialization.load_der_public_key(base64.b64decode(default_channel_key)) if default_channel_key else None
+        )
+
+    @staticmethod
+    def public_key_of(private_key: str) -> str:
+        """由Base64编码的DER私钥得到对应的公钥"""
+        key = serialization.load_der_private_key(base64.b64decode(private_key), password=None)
+        der = key.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+        return base64.b64encode(der).decode('utf-8')
+
+    def channel_key(self, channel: str):
+        key = self.channel_keys.get(channel, self.default_channel_key)
+        if key is None:
+            raise KeyError(f"未配置渠道 {channel} 的公钥")
+        return key
+
+    def verify(self, channel: str, data: str, sign: str) -> bool:
+        try:
+            self.channel_key(channel).verify(base64.b64decode(sign), data.encode('utf-8'), padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except (InvalidSignature, ValueError):
+            return False
+
+    def decrypt(self, data: str) -> Any:
+        encrypted = base64.b64decode(data)
+        plain = b''.join(
+            self.platform_private_key.decrypt(encrypted[i:i + _DECRYPT_BLOCK], padding.PKCS1v15())
+            for i in range(0, len(encrypted), _DECRYPT_BLOCK)
+        )
+        return json.loads(plain.decode('utf-8'))
+
+    def encrypt_and_sign(self, channel: str, payload: Any) -> Tuple[str, str]:
+        key = self.channel_key(channel)
+        plain = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        encrypted = b''.join(
+            key.encrypt(plain[i:i + _ENCRYPT_BLOCK], padding.PKCS1v15())
+            for i in range(0, len(plain), _ENCRYPT_BLOCK)
+        )
+        data = base64.b64encode(encrypted).decode('utf-8')
+        signature = self.platform_private_key.sign(data.encode('utf-8'), padding.PKCS1v15(), hashes.SHA256())
+        return data, base64.b64encode(signature).decode('utf-8')
+
+
+class MockGateway:
+    """asyncio 实现的模拟网关
+
+    对 user-credit、user-check、repay-send 接口：验签、解密请求数据，按脚本抽样延迟、
+    HTTP错误、断连与业务码，成功时返回渠道公钥加密、平台私钥签名的 {code,message,data,sign}。
+    验签失败返回 invalid_sign_code，请求数据无法解密返回 invalid_data_code。
+    支持 HTTP/1.1 长连接，不依赖第三方 Web 框架；安装了 uvloop 时自动使用。
+    """
+
+    def __init__(self, scenario: MockScenario, codec: GatewayCodec, invalid_sign_code: str = "100002",
+                 invalid_data_code: str = "100003", seed: Optional[int] = None):
+        self.scenario = scenario
+        self.codec = codec
+        self.invalid_sign_code = invalid_sign_code
+        self.invalid_data_code = invalid_data_code
+        self.rng = random.Random(seed)
+        self.counts: Counter = Counter()
+        self._started = time.monotonic()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                parts = request_line.split(' ')
+                if len(parts) != 3:
+                    return
+                method, path, _ = parts
+                headers = {}
+                for line in header_lines:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if not await self._respond(writer, method, path, body, keep_alive) or not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            if not writer.is_closing():
+                writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes, keep_alive: bool) -> bool:
+        """处理一个请求，返回连接是否还能继续使用"""
+        received = time.monotonic()
+        match = ROUTE.match(path)
+        if method != 'POST' or match is None:
+            self.counts['404'] += 1
+            self._write(writer, 404, b'', keep_alive)
+            return True
+        channel, endpoint = match.group('channel'), match.group('endpoint')
+        behavior = self.scenario.behavior(endpoint, received - self._started)
+
+        if behavior.reset and self.rng.random() < behavior.reset:
+            self.counts[f"{endpoint} reset"] += 1
+            sock = writer.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            writer.transport.abort()
+            return False
+        if behavior.hang and self.rng.random() < behavior.hang:
+            self.counts[f"{endpoint} hang"] += 1
+            await asyncio.sleep(behavior.hang_time)
+            writer.transport.abort()
+            return False
+
+        status = behavior.choose_status(self.rng)
+        if status is not None:
+            payload, code = b'', str(status)
+        else:
+            code, payload = self._business(channel, endpoint, body, behavior)
+            status = 200
+        self.counts[f"{endpoint} {code}"] += 1
+        delay = behavior.latency.sample(self.rng) - (time.monotonic() - received)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._write(writer, status, payload, keep_alive)
+        await writer.drain()
+        return True
+
+    def _business(self, channel: str, endpoint: str, body: bytes, behavior: Behavior) -> Tuple[str, bytes]:
+        try:
+            request = json.loads(body)
+            data, sign = request['data'], request['sign']
+        except (ValueError, KeyError, TypeError):
+            return self.invalid_data_code, self._envelope(self.invalid_data_code, "请求格式错误")
+        try:
+            if not self.codec.verify(channel, data, sign):
+                return self.invalid_sign_code, self._envelope(self.invalid_sign_code, "验签失败")
+            payload = self.codec.decrypt(data)
+        except KeyError as e:
+            return self.invalid_sign_code, self._envelope(self.invalid_sign_code, str(e))
+        except Exception:
+            return self.invalid_data_code, self._envelope(self.invalid_data_code, "请求数据解密失败")
+        code = behavior.choose_code(self.rng)
+        if code != SUCCESS_CODE:
+            return code, self._envelope(code, "业务处理失败")
+        data, sign = self.codec.encrypt_and_sign(channel, copy.deepcopy(behavior.response_data(payload)))
+        return code, self._envelope(code, behavior.message, data, sign)
+
+    @staticmethod
+    def _envelope(code: str, message: str, data: str = "", sign: str = "") -> bytes:
+        return json.dumps({'code': code, 'message': message, 'data': data, 'sign': sign},
+                          ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool) -> None:
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json;charset=UTF-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + payload)
+
+    async def serve(self, host: str, port: int, reuse_port: bool = False, duration: Optional[float] = None) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, reuse_port=reuse_port, backlog=1024)
+        self._started = time.monotonic()
+        async with server:
+            if duration is None:
+                await server.serve_forever()
+            else:
+                await asyncio.sleep(duration)
+
+    def summary(self) -> str:
+        return ', '.join(f"{key}: {count}" for key, count in sorted(self.counts.items()))
+
+
+def load_gateway(scenario_path: Optional[str], suites: Optional[List[str]] = None, seed: Optional[int] = None) -> MockGateway:
+    """从脚本文件构建模拟网关，suites 中套件的渠道私钥用于推导对应渠道的公钥
+
+    脚本中的密钥配置::
+
+        keys:
+          platform_private_key: "..."       # 平台私钥（请求解密、响应签名）
+          channel_public_key: "..."         # 默认渠道公钥（请求验签、响应加密）
+          channels: {youxinfenqi: "..."}    # 按路径中的渠道名指定公钥
+    """
+    config: Dict[str, Any] = {}
+    if scenario_path:
+        with open(scenario_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    keys = config.get('keys') or {}
+    if not keys.get('platform_private_key'):
+        raise ValueError("模拟网关需要配置 keys.platform_private_key")
+    channels = dict(keys.get('channels') or {})
+    for path in suites or []:
+        with open(path, 'r', encoding='utf-8') as f:
+            suite = yaml.safe_load(f) or {}
+        private_key = (suite.get('variables') or {}).get('channel_private_key')
+        if not private_key:
+            continue
+        public_key = GatewayCodec.public_key_of(private_key)
+        for case in (suite.get('test_cases') or {}).values():
+            match = ROUTE.match(str(case.get('api_path', '')).replace('${base_url}', ''))
+            if match:
+                channels[match.group('channel')] = public_key
+    codec = GatewayCodec(keys['platform_private_key'], channels, keys.get('channel_public_key'))
+    return MockGateway(
+        MockScenario.from_config(config),
+        codec,
+        invalid_sign_code=str(config.get('invalid_sign_code', "100002")),
+        invalid_data_code=str(config.get('invalid_data_code', "100003")),
+        seed=seed
+    )
+
+
+def _use_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def _serve_worker(scenario_path: Optional[str], suites: Optional[List[str]], host: str, port: int,
+                  reuse_port: bool, duration: Optional[float], seed: Optional[int]) -> None:
+    gateway = load_gateway(scenario_path, suites, seed)
+    _use_uvloop()
+    try:
+        asyncio.run(gateway.serve(host, port, reuse_port=reuse_port, duration=duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[模拟网关 {multiprocessing.current_process().name}] {gateway.summary() or '没有请求'}")
+
+
+def run_gateway(scenario_path: Optional[str], suites: Optional[List[str]] = None, host: str = '127.0.0.1',
+                port: int = 8081, workers: int = 1, duration: Optional[float] = None, seed: Optional[int] = None) -> None:
+    """启动模拟网关；workers 大于 1 时启动多个进程共享端口（SO_REUSEPORT），加解密分摊到多个CPU"""
+    load_gateway(scenario_path, suites)  # 启动前校验脚本与密钥
+    if workers <= 1:
+        _serve_worker(scenario_path, suites, host, port, False, duration, seed)
+        return
+    processes = [
+        multiprocessing.Process(
+            target=_serve_worker,
+            args=(scenario_path, suites, host, port, True, duration, None if seed is None else seed + index),
+            name=f"mock-{index}"
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
@@ -0,0 +1,218 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+VUS = "vus"
+ARRIVAL_RATE = "arrival_rate"
+ADAPTIVE = "adaptive"
+
+
+def parse_duration(value: Any) -> float:
+    """解析时长，支持数字（秒）或 30s / 5m / 2h / 1m30s 形式的字符串"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        return float(text)
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"无效的时长: {value}")
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+@dataclass
+class LoadStage:
+    """负载阶段
+
+    属性:
+        name: 阶段名称，统计按阶段分组
+        duration: 阶段时长（秒）
+        target: 阶段目标值（VU 数或每秒到达的迭代数）
+        ramp: 从上一阶段目标线性过渡到本阶段目标所用的时间（秒），默认为整个阶段
+    """
+    name: str
+    duration: float
+    target: float
+    ramp: Optional[float] = None
+
+    def __post_init__(self):
+        """初始化后的验证"""
+        if self.duration <= 0:
+            raise ValueError(f"阶段 {self.name} 的时长必须大于0")
+        if self.target < 0:
+            raise ValueError(f"阶段 {self.name} 的目标值不能小于0")
+        if self.ramp is None:
+            self.ramp = self.duration
+        self.ramp = min(max(self.ramp, 0.0), self.duration)
+
+
+@dataclass
+class LoadProfile:
+    """声明式负载模型
+
+    executor 为 vus 时目标值表示并发VU数（闭环模型，每个VU循环执行套件）；
+    为 arrival_rate 时目标值表示每秒启动的迭代数（开环模型），
+    max_vus 限制同时执行的迭代数，超出的迭代记为丢弃。
+
+    套件YAML中的配置示例::
+
+        load_profile:
+          executor: vus
+          stages:
+            - {name: ramp-up, duration: 2m, target: 20}
+            - {name: hold, duration: 5m, target: 20}
+            - {name: ramp-down, duration: 30s, target: 0}
+
+    也可以用 pattern 生成常见模型：ramp（线性爬坡）、steps（阶梯）、
+    spike（突刺后恢复）、soak（长时间稳定负载），参数见 expand_pattern。
+    """
+    executor: str = VUS
+    stages: List[LoadStage] = field(default_factory=list)
+    start: float = 0.0
+    max_vus: Optional[int] = None
+
+    def __post_init__(self):
+        """初始化后的验证"""
+        if self.executor not in (VUS, ARRIVAL_RATE):
+            raise ValueError(f"不支持的负载模型: {self.executor}")
+        if not self.stages:
+            raise ValueError("负载模型至少需要一个阶段")
+
+    @property
+    def duration(self) -> float:
+        return sum(stage.duration for stage in self.stages)
+
+    @property
+    def peak(self) -> float:
+        return max([self.start] + [stage.target for stage in self.stages])
+
+    def target_at(self, elapsed: float) -> Tuple[Optional[str], float]:
+        """计算 elapsed 秒时所处的阶段与目标值，负载结束后阶段为 None"""
+        previous = self.start
+        offset = 0.0
+        for stage in self.stages:
+            if elapsed < offset + stage.duration:
+                within = elapsed - offset
+                if stage.ramp > 0 and within < stage.ramp:
+                    return stage.name, previous + (stage.target - previous) * within / stage.ramp
+                return stage.name, stage.target
+            previous = stage.target
+            offset += stage.duration
+        return None, previous
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'LoadProfile':
+        """从套件YAML的 load_profile 配置构建，executor 为 adaptive 时返回 AdaptiveProfile"""
+        config = dict(config)
+        executor = config.pop('executor', VUS)
+        if executor == ADAPTIVE:
+            from .adaptive import AdaptiveProfile
+            return AdaptiveProfile.from_config(config)
+        max_vus = config.pop('max_vus', None)
+        start = float(config.pop('start', 0))
+        pattern = config.pop('pattern', None)
+        if pattern is not None:
+            start, stages = expand_pattern(pattern, config)
+        else:
+            stages = [
+                LoadStage(
+                    name=str(item.get('name', f"stage-{i + 1}")),
+                    duration=parse_duration(item['duration']),
+                    target=float(item['target']),
+                    ramp=parse_duration(item['ramp']) if 'ramp' in item else None
+                )
+                for i, item in enumerate(config.get('stages') or [])
+            ]
+        return cls(executor=executor, stages=stages, start=start, max_vus=max_vus)
+
+    @classmethod
+    def from_cli(cls, spec: str, executor: str = VUS, max_vus: Optional[int] = None) -> 'LoadProfile':
+        """从命令行描述构建
+
+        格式为逗号分隔的 时长:目标[:名称]，如 "1m:20,5m:20:hold,30s:0"，
+        或 pattern 写法 "spike:base=10,peak=100,hold=5m"，
+        以及自适应并发 "adaptive:duration=30m,max_vus=200,latency_target=800ms"。
+        """
+        head, _, rest = spec.partition(':')
+        if head in PATTERNS or head == ADAPTIVE:
+            params = {}
+            for item in filter(None, rest.split(',')):
+                key, _, value = item.partition('=')
+                params[key.strip()] = value.strip()
+            if head == ADAPTIVE:
+                from .adaptive import AdaptiveProfile
+                if max_vus:
+                    params['max_vus'] = max_vus
+                return AdaptiveProfile.from_config(params)
+            start, stages = expand_pattern(head, params)
+            return cls(executor=executor, stages=stages, start=start, max_vus=max_vus)
+
+        stages = []
+        for i, item in enumerate(filter(None, spec.split(','))):
+            parts = item.strip().split(':')
+            if len(parts) not in (2, 3):
+                raise ValueError(f"无效的阶段描述: {item}")
+            name = parts[2] if len(parts) == 3 else f"stage-{i + 1}"
+            stages.append(LoadStage(name=name, duration=parse_duration(parts[0]), target=float(parts[1])))
+        return cls(executor=executor, stages=stages, max_vus=max_vus)
+
+
+def _number(params: Dict[str, Any], key: str, default: Any = None) -> float:
+    if key not in params:
+        if default is None:
+            raise ValueError(f"缺少负载参数: {key}")
+        return float(default)
+    return float(params[key])
+
+
+def _duration(params: Dict[str, Any], key: str, default: Any = None) -> float:
+    if key not in params:
+        if default is None:
+            raise ValueError(f"缺少负载参数: {key}")
+        return parse_duration(default)
+    return parse_duration(params[key])
+
+
+def expand_pattern(pattern: str, params: Dict[str, Any]) -> Tuple[float, List[LoadStage]]:
+    """将常见负载模型展开为 (起始目标值, 阶段列表)
+
+    - ramp:  from(默认0) -> to，持续 duration，可选 hold 保持时长
+    - steps: 从 start 开始每 every 秒增加 step，共 count 级，每级用 ramp 秒平滑过渡
+    - spike: base 保持 warm 秒，ramp 秒内升到 peak 并保持 hold 秒，再回落到 base 观察 recover 秒
+    - soak:  ramp 秒爬升到 target 后保持 duration
+    """
+    if pattern == 'ramp':
+        stages = [LoadStage('ramp', _duration(params, 'duration'), _number(params, 'to'))]
+        if 'hold' in params:
+            stages.append(LoadStage('hold', _duration(params, 'hold'), _number(params, 'to'), ramp=0))
+        return _number(params, 'from', 0), stages
+    if pattern == 'steps':
+        start = _number(params, 'start', 0)
+        step = _number(params, 'step')
+        every = _duration(params, 'every')
+        ramp = _duration(params, 'ramp', min(5.0, every / 5))
+        count = int(_number(params, 'count'))
+        return start, [
+            LoadStage(f"step-{i + 1}", every, start + step * (i + 1), ramp=ramp)
+            for i in range(count)
+        ]
+    if pattern == 'spike':
+        base = _number(params, 'base')
+        peak = _number(params, 'peak')
+        ramp = _duration(params, 'ramp', 10)
+        return base, [
+            LoadStage('baseline', _duration(params, 'warm', '1m'), base),
+            LoadStage('spike', _duration(params, 'hold', '1m') + ramp, peak, ramp=ramp),
+            LoadStage('recover', _duration(params, 'recover', '2m') + ramp, base, ramp=ramp),
+        ]
+    if pattern == 'soak':
+        target = _number(params, 'target')
+        return 0.0, [
+            LoadStage('ramp-up', _duration(params, 'ramp', '1m'), target),
+            LoadStage('soak', _duration(params, 'duration'), target, ramp=0),
+        ]
+    raise ValueError(f"不支持的负载模型: {pattern}")
+
+
+PATTERNS = ('ramp', 'steps', 'spike', 'soak')
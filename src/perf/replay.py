@@ -0,0 +1,315 @@
+import multiprocessing
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from network.http_client import HttpClient, HttpResponse
+from util import json_codec
+from test.validators import ResponseValidator
+from util.rsa_util import RSAEncrypUtil
+from . import failures
+from .capture import CapturedRequest, read_capture, read_header
+from .executor import RequestResult
+from .mockgateway import GatewayCodec
+from .stats import LatencyHistogram, StatsCollector
+
+STAGE = 'replay'
+# 提前多久把请求交给工作线程：加密签名在计划时间之前完成，发送时间不受其耗时影响
+PREPARE_AHEAD = 0.5
+# 多进程重放时父进程检查子进程是否异常退出的间隔（秒）
+RESULT_POLL = 1.0
+# 抓包中没有用例的预期，只校验响应格式与成功的业务返回码
+_ENVELOPE = ResponseValidator()
+
+
+def parse_speed(value: str) -> float:
+    """重放速度：1x、10x、0.5x 或 max（尽快发送），max 返回 0"""
+    text = str(value).strip().lower()
+    if text in ('max', 'asap', '0'):
+        return 0.0
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)x?", text)
+    if match is None or float(match.group(1)) <= 0:
+        raise ValueError(f"无效的重放速度: {value}，应为 1x、10x、0.5x 或 max")
+    return float(match.group(1))
+
+
+class Replayer:
+    """按抓包文件重放请求
+
+    明文 data 用 RSAEncrypUtil 以平台公钥重新加密、渠道私钥重新签名，并换上当前时间戳；
+    只有密文时用平台私钥（如果提供）解密后同样处理，否则连同原签名原样发送。
+    base_url 指定时替换请求地址的协议与主机，代理和访问日志抓到的相对路径必须指定。
+
+    speed 为 1 时按原始间隔发送，N 时间隔缩短为 1/N，0 时不等待、尽快发送；
+    请求提前 PREPARE_AHEAD 秒交给工作线程加密签名，到计划时间再发出，
+    实际发出时间比计划晚多少记为调度延迟，并发不足以维持原始节奏时会明显变大。
+    同时在途（含等待发送）的请求数不超过 concurrency，所有线程共用一个连接池。
+    """
+
+    def __init__(
+        self,
+        channel_private_key: str,
+        platform_public_key: str,
+        platform_private_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        speed: float = 1.0,
+        concurrency: int = 32,
+        timeout: int = 30
+    ):
+        self.channel_private_key = channel_private_key
+        self.platform_public_key = platform_public_key
+        self.codec = GatewayCodec(platform_private_key, {}) if platform_private_key else None
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.lag = LatencyHistogram()
+        self.diverged = 0
+        self._lock = threading.Lock()
+        self._client: Optional[HttpClient] = None
+
+    def url_of(self, request: CapturedRequest) -> str:
+        if self.base_url is None:
+            if not urlsplit(request.url).scheme:
+                raise ValueError(f"抓包中的地址 {request.url} 没有主机，需要指定 --base-url")
+            return request.url
+        parts = urlsplit(request.url)
+        return f"{self.base_url}{parts.path}{'?' + parts.query if parts.query else ''}"
+
+    def check_urls(self, requests: Iterable[CapturedRequest]) -> None:
+        """重放前检查请求地址，相对路径缺少 --base-url 时抛出 ValueError，而不是每个请求都失败"""
+        if self.base_url is None:
+            for request in requests:
+                self.url_of(request)
+
+    def build_body(self, request: CapturedRequest) -> Any:
+        """按当前时间重新加密、签名请求数据"""
+        body = dict(request.body) if isinstance(request.body, dict) else request.body
+        data = request.data
+        if data is None and request.encrypted is not None:
+            if self.codec is None:
+                body['timestamp'] = int(time.time() * 1000)
+                body['data'] = request.encrypted
+                return body
+            data = self.codec.decrypt(request.encrypted)
+        if data is None:
+            return body
+        data_str = data if isinstance(data, str) else json_codec.dumps_str(data)
+        body['timestamp'] = int(time.time() * 1000)
+        body['data'] = RSAEncrypUtil.build_rsa_encrypt_by_public_key(data_str, self.platform_public_key)
+        body['sign'] = RSAEncrypUtil.build_rsa_sign_by_private_key(body['data'], self.channel_private_key)
+        return body
+
+    @staticmethod
+    def _result(request: CapturedRequest, url: str) -> RequestResult:
+        endpoint = urlsplit(url).path
+        return RequestResult(request.case_id or endpoint.rsplit('/', 1)[-1], endpoint, time.time())
+
+    @staticmethod
+    def _build_failed(result: RequestResult, error: Exception) -> RequestResult:
+        result.failure_stage = failures.BUILD
+        result.error = f"请求构建失败: {error}"
+        return result
+
+    def send(self, request: CapturedRequest, due: Optional[float]) -> RequestResult:
+        url = self.url_of(request)
+        result = self._result(request, url)
+        try:
+            body = self.build_body(request)
+        except Exception as e:
+            return self._build_failed(result, e)
+        if due is not None and due > time.time():
+            time.sleep(due - time.time())
+        sent = time.time()
+        if due is not None:
+            with self._lock:
+                self.lag.record(max(sent - due, 0.0))
+        result.build_time = sent - result.start
+        result.start = sent
+        response = self._client.request(request.method, url, headers=request.headers, body=body)
+        result.latency = response.elapsed
+        result.throttle_wait = response.throttle_wait
+        result.status_code = response.status_code
+        result.attempts = response.attempts
+        failure = self._check_response(response, result)
+        if failure is not None:
+            result.failure_stage, result.error = failure
+            if response.content:
+                result.payload = failures.truncate_payload(response.text)
+        result.passed = failure is None
+        if request.status is not None and (request.status != result.status_code
+                                           or request.code is not None and request.code != result.biz_code):
+            with self._lock:
+                self.diverged += 1
+        return result
+
+    def _check_response(self, response: HttpResponse, result: RequestResult) -> Optional[Tuple[str, str]]:
+        """校验状态码、响应格式、业务返回码与签名（抓包中没有预期数据，不比对解密后的内容）"""
+        if response.status_code != 200:
+            if response.error_kind is not None:
+                return failures.HTTP, f"HTTP请求异常: {response.error_kind}"
+            return failures.HTTP, f"HTTP状态码错误: {response.status_code}"
+        try:
+            response_body = response.json()
+        except ValueError as e:
+            return failures.FORMAT, f"响应格式错误: {e}"
+        failure = _ENVELOPE.check_format(response_body)
+        if failure is not None:
+            return failure.stage, failure.message
+        result.biz_code = str(response_body['code'])
+        failure = _ENVELOPE.check_code(response_body)
+        if failure is not None:
+            return failure.stage, failure.message
+        if not RSAEncrypUtil.build_rsa_verify_by_public_key(
+            response_body['data'], self.platform_public_key, response_body['sign']
+        ):
+            return failures.SIGN, "响应签名验证失败"
+        return None
+
+    def run(self, path: str, start_at: float, stats: StatsCollector, shard: int = 0, shards: int = 1) -> Tuple[float, float]:
+        """重放抓包中属于 shard 的请求，start_at 对应抓包的 started_at，返回 (首个请求发送时间, 结束时间)"""
+        started_at = read_header(path)['started_at']
+        requests = sorted(read_capture(path, shard, shards), key=lambda item: item.t)
+        self.check_urls(requests)
+        slots = threading.Semaphore(self.concurrency)
+        self._client = HttpClient(timeout=self.timeout, capture_headers=False)
+
+        def task(request: CapturedRequest, due: Optional[float]) -> None:
+            try:
+                try:
+                    result = self.send(request, due)
+                except Exception as e:
+                    # 在线程池中抛出的异常会被 Future 吞掉，记为构建失败以免请求从统计中消失
+                    result = self._build_failed(self._result(request, request.url), e)
+                stats.record(STAGE, result)
+            finally:
+                slots.release()
+
+        first = None
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"replay-{shard}") as pool:
+            for request in requests:
+                due = start_at + (request.t - started_at) / self.speed if self.speed else None
+                if due is not None and due - PREPARE_AHEAD > time.time():
+                    time.sleep(due - PREPARE_AHEAD - time.time())
+                slots.acquire()
+                first = first or time.time()
+                pool.submit(task, request, due)
+        self._client.close()
+        return first or time.time(), time.time()
+
+
+def _replay_worker(path: str, options: Dict[str, Any], start_at: float, shard: int, shards: int, queue) -> None:
+    try:
+        stats = StatsCollector()
+        replayer = Replayer(**options)
+        first, last = replayer.run(path, start_at, stats, shard, shards)
+    except BaseException:
+        # 异常回传给父进程，否则父进程收不到结果
+        queue.put((shard, None, traceback.format_exc()))
+        raise
+    queue.put((shard, (stats.merged(), replayer.lag, replayer.diverged, first, last), None))
+
+
+def _collect(processes: List[multiprocessing.Process], queue) -> List[Tuple]:
+    """按进程顺序收集各重放进程的结果
+
+    每 RESULT_POLL 秒检查一次进程状态：进程回传异常或没有结果就退出（如被系统杀死）时
+    结束其余进程并抛出 RuntimeError，不会一直等待。
+    """
+    results = {}
+    try:
+        while len(results) < len(processes):
+            try:
+                shard, result, error = queue.get(timeout=RESULT_POLL)
+            except Empty:
+                for index, process in enumerate(processes):
+                    if index not in results and process.exitcode not in (None, 0):
+                        raise RuntimeError(f"重放进程 {process.name} 异常退出（exitcode {process.exitcode}），没有返回结果")
+                continue
+            if error is not None:
+                raise RuntimeError(f"重放进程 {processes[shard].name} 出错:\n{error}")
+            results[shard] = result
+    except BaseException:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+    return [results[index] for index in range(len(processes))]
+
+
+def replay(path: str, workers: int = 1, lead: float = 1.0, **options) -> Dict[str, Any]:
+    """重放抓包文件，workers 大于 1 时按记录下标分给多个进程，各进程按同一时间起点调度
+
+    Args:
+        path: 抓包文件
+        workers: 进程数，加密签名与发送分摊到多个CPU
+        lead: 各进程启动后等待 lead 秒再开始，保证起点一致
+        options: Replayer 的参数
+
+    Returns:
+        与压测报告格式相同的统计报告，replay 字段为请求数、调度延迟与原始结果不一致的请求数
+    """
+    header = read_header(path)
+    if workers > 1:
+        # 在启动进程前检查地址，参数错误时直接报错
+        Replayer(**options).check_urls(read_capture(path))
+    start_at = time.time() + lead
+    stats = StatsCollector()
+    lag = LatencyHistogram()
+    diverged = 0
+    windows = []
+    if workers <= 1:
+        replayer = Replayer(**options)
+        windows.append(replayer.run(path, start_at, stats))
+        lag, diverged = replayer.lag, replayer.diverged
+    else:
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_replay_worker, args=(path, options, start_at, index, workers, queue),
+                                    name=f"replay-{index}")
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for shard, shard_lag, shard_diverged, first, last in _collect(processes, queue):
+            stats.absorb(shard)
+            lag.merge(shard_lag)
+            diverged += shard_diverged
+            windows.append((first, last))
+
+    begin, end = min(window[0] for window in windows), max(window[1] for window in windows)
+    stats.mark_stage(STAGE, begin, end)
+    report = stats.report()
+    report['run'] = {'executor': STAGE, 'duration': end - begin,
+                     'max_active_vus': options.get('concurrency', 32) * max(workers, 1), 'dropped_iterations': 0}
+    lag_p50, lag_p99 = lag.percentiles([0.5, 0.99]) if lag.count else (0.0, 0.0)
+    report['replay'] = {
+        'capture': path,
+        'source': header.get('source'),
+        'speed': options.get('speed', 1.0),
+        'workers': workers,
+        'requests': report['total']['requests'],
+        'lag_p50_ms': lag_p50 * 1000,
+        'lag_p99_ms': lag_p99 * 1000,
+        'lag_max_ms': lag.max * 1000 if lag.count else 0.0,
+        'diverged': diverged
+    }
+    return report
+
+
+def print_replay_summary(report: Dict[str, Any]) -> None:
+    info = report['replay']
+    speed = f"{info['speed']:g}x" if info['speed'] else 'max'
+    print(f"\n重放: {info['capture']}（来源 {info['source']}），速度 {speed}，进程数 {info['workers']}，请求 {info['requests']}")
+    if info['speed']:
+        print(f"调度延迟: p50 {info['lag_p50_ms']:.1f}ms  p99 {info['lag_p99_ms']:.1f}ms  max {info['lag_max_ms']:.1f}ms"
+              f"（明显偏大时说明并发或进程数不足以维持原始节奏）")
+    print(f"状态码/业务码与抓包时不一致的请求: {info['diverged']}")
@@ -0,0 +1,93 @@
+import time
+from typing import Any, Dict, List
+
+from .thresholds import print_verdict
+
+
+def _format_line(name: str, summary: Dict[str, Any]) -> str:
+    latency = summary['latency_ms']
+    return (
+        f"{name:<24} 请求 {summary['requests']:>8}  失败率 {summary['error_rate'] * 100:6.2f}%  "
+        f"吞吐 {summary['rps']:8.2f}/s  p50 {latency['p50']:8.1f}ms  p95 {latency['p95']:8.1f}ms  "
+        f"p99 {latency['p99']:8.1f}ms  max {latency['max']:8.1f}ms  限流等待 {summary['throttle_wait_ms']:.0f}ms"
+    )
+
+
+def print_failures(failures: List[Dict[str, Any]], limit: int = 20) -> None:
+    """按指纹分组打印失败，次数多的在前，每组给出首末时间和一条示例"""
+    print(f"\n失败分组（{len(failures)} 种）:")
+    print(f"{'次数':>8}  {'环节':<8} {'代码':<10} {'首次':<8} {'最近':<8}  原因")
+    for group in failures[:limit]:
+        first = time.strftime('%H:%M:%S', time.localtime(group['first']))
+        last = time.strftime('%H:%M:%S', time.localtime(group['last']))
+        print(f"{group['count']:>8}  {group['stage']:<8} {str(group['code'] or '-'):<10} {first:<8} {last:<8}  "
+              f"{group['template']}")
+        example = group['examples'][0] if group['examples'] else None
+        if example:
+            print(f"{'':>10}示例: {example['case_id']} {example['endpoint']} {example['error']}")
+            if example['payload']:
+                print(f"{'':>10}响应: {example['payload']}")
+    if len(failures) > limit:
+        print(f"... 另有 {len(failures) - limit} 种失败，见JSON报告")
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """在控制台打印压测报告"""
+    print("\n压测报告==================================")
+    run = report.get('run', {})
+    if run:
+        print(f"负载模型: {run.get('executor')}, 总耗时: {run.get('duration', 0):.1f}s, "
+              f"最大活跃VU: {run.get('max_active_vus', 0)}, 丢弃迭代: {run.get('dropped_iterations', 0)}")
+        if run.get('warmup') or run.get('interrupted'):
+            print(f"预热: {run.get('warmup', 0):g}s（{run.get('warmup_requests', 0)} 个请求未计入统计）, "
+                  f"排空超时中断: {run.get('interrupted', 0)}")
+        if run.get('step_errors'):
+            print(f"VU执行异常: {run['step_errors']} 次（相应的VU已结束）")
+        if run.get('setup_failures'):
+            print(f"worker/vu 范围的 setup 失败: {run['setup_failures']} 次")
+        if run.get('aborted') and not (report.get('thresholds') or {}).get('results'):
+            print(f"压测已中止: {run['aborted']}")
+    for key, item in (run.get('hooks') or {}).items():
+        failed = f", 失败 {item['failures']} 次（{item['error']}）" if item['failures'] else ''
+        print(f"钩子 {key}: {item['runs']} 次, 耗时 {item['seconds']:.2f}s（不计入统计）{failed}")
+    trajectory = run.get('concurrency_trajectory')
+    if trajectory:
+        decreases = sum(1 for point in trajectory if point['decreased'])
+        print(f"自适应并发: 最终 {trajectory[-1]['vus']}, 最高 {max(p['vus'] for p in trajectory)}, "
+              f"调整窗口 {len(trajectory)} 个, 其中下调 {decreases} 次")
+
+    print("\n分阶段统计:")
+    for stage, data in report['stages'].items():
+        print(_format_line(stage, data['total']))
+        for case_id, summary in data['cases'].items():
+            print(_format_line(f"  {case_id}", summary))
+
+    if report.get('scenarios'):
+        print("\n分场景统计:")
+        requests = report['total']['requests'] or 1
+        for name, summary in report['scenarios'].items():
+            print(f"{_format_line(name, summary)}  占比 {summary['requests'] / requests * 100:.1f}%")
+
+    print("\n分用例统计:")
+    for case_id, summary in report['cases'].items():
+        print(_format_line(case_id, summary))
+
+    if report.get('endpoints'):
+        print("\n分接口统计:")
+        for endpoint, summary in report['endpoints'].items():
+            print(_format_line(endpoint, summary))
+            codes = ', '.join(f"{code}: {count}" for code, count in sorted(summary['codes'].items(), key=lambda item: -item[1]))
+            print(f"  状态码/业务码: {codes}")
+
+    print("\n总计:")
+    total = report['total']
+    print(_format_line('total', total))
+    failures = report.get('failures')
+    if failures:
+        print_failures(failures)
+    elif total['errors']:
+        print("\n失败原因:")
+        for error, count in sorted(total['errors'].items(), key=lambda item: -item[1]):
+            print(f"{count:>8}  {error}")
+    if 'thresholds' in report:
+        print_verdict(report['thresholds'])
@@ -0,0 +1,506 @@
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .failures import FailureIndex
+from .stats import LatencyHistogram
+
+MAGIC = b'PERFLOG1'
+VERSION = 1
+HEADER_SIZE = 64
+# 魔数、版本、记录长度、已写入记录数
+_HEADER = struct.Struct('<8sIIQ')
+_COUNT_OFFSET = 16
+# 开始时间、耗时、限流等待、构建耗时、校验耗时、用例、接口、阶段、HTTP状态码、业务码、失败指纹、尝试次数、是否通过
+_RECORD = struct.Struct('<dffffHHHhIIBB6x')
+RECORD_SIZE = _RECORD.size
+# 预热期间的请求也写入日志，阶段记为 WARMUP_STAGE，分析时默认排除
+WARMUP_STAGE = "(warmup)"
+_DICTIONARIES = ('cases', 'endpoints', 'stages', 'biz_codes', 'fingerprints')
+# 新名称最多延迟多久写入字典文件（秒），避免每出现一个新名称就重写整个文件
+META_INTERVAL = 1.0
+# 时间片内的延迟分布使用较粗的桶（约 8% 精度），每 _COARSE 个直方图桶合并为一个
+_COARSE = 8
+
+
+def record_dtype():
+    """与二进制记录布局一致的 NumPy 结构化类型"""
+    import numpy as np
+    return np.dtype([
+        ('start', '<f8'),
+        ('latency', '<f4'),
+        ('throttle_wait', '<f4'),
+        ('build_time', '<f4'),
+        ('check_time', '<f4'),
+        ('case', '<u2'),
+        ('endpoint', '<u2'),
+        ('stage', '<u2'),
+        ('status', '<i2'),
+        ('biz_code', '<u4'),
+        ('fingerprint', '<u4'),
+        ('attempts', 'u1'),
+        ('passed', 'u1'),
+        ('_pad', 'V6'),
+    ])
+
+
+class ResultLogWriter:
+    """逐请求的定长二进制结果日志
+
+    文件由 64 字节文件头和 48 字节定长记录组成，按块预分配后通过 mmap 追加写入，
+    每条记录写入后更新文件头中的记录数，进程崩溃时已写入的记录仍可读取。
+    用例、接口、阶段、业务码和失败指纹以编号存储（0 表示无），
+    编号对应的名称保存在同名的 .json 字典文件中，出现新名称后至多 META_INTERVAL 秒更新一次，关闭时写入最终版本
+    （进程崩溃时，最后一次更新之后才出现的名称可能缺失）；
+    info 为压测配置与环境信息，原样写入字典文件，供报告展示。
+    """
+
+    def __init__(self, path: str, chunk_records: int = 65536, info: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.info = info or {}
+        self.meta_path = path + '.json'
+        self.chunk_records = chunk_records
+        self.count = 0
+        self._lock = threading.Lock()
+        self._ids: Dict[str, Dict[Any, int]] = {name: {} for name in _DICTIONARIES}
+        self._fingerprints: List[Dict[str, Any]] = []
+        self._meta_dirty = False
+        self._meta_due = 0.0
+        self._file = open(path, 'w+b')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0).ljust(HEADER_SIZE, b'\0'))
+        self._capacity = 0
+        self._map: Optional[mmap.mmap] = None
+        self._grow()
+        self._write_meta()
+
+    def _grow(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+        self._capacity += self.chunk_records
+        self._file.truncate(HEADER_SIZE + self._capacity * RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _id(self, name: str, key: Any) -> int:
+        if key is None:
+            return 0
+        ids = self._ids[name]
+        value = ids.get(key)
+        if value is None:
+            value = ids[key] = len(ids) + 1
+            if name == 'fingerprints':
+                stage, code, template = key
+                self._fingerprints.append({'stage': stage, 'code': code, 'template': template})
+            self._meta_dirty = True
+        return value
+
+    def _write_meta(self) -> None:
+        self._meta_dirty = False
+        self._meta_due = time.monotonic() + META_INTERVAL
+        meta = {
+            'version': VERSION,
+            'record_size': RECORD_SIZE,
+            'cases': list(self._ids['cases']),
+            'endpoints': list(self._ids['endpoints']),
+            'stages': list(self._ids['stages']),
+            'biz_codes': list(self._ids['biz_codes']),
+            'fingerprints': self._fingerprints,
+            'info': self.info
+        }
+        temp_path = self.meta_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, self.meta_path)
+
+    def write(self, stage: Optional[str], result) -> None:
+        """追加一条请求结果，stage 为 None 时记为预热"""
+        fingerprint = None if result.passed else FailureIndex.fingerprint(result)
+        with self._lock:
+            if self._map is None:
+                return
+            if self.count == self._capacity:
+                self._grow()
+            _RECORD.pack_into(
+                self._map,
+                HEADER_SIZE + self.count * RECORD_SIZE,
+                result.start,
+                result.latency,
+                result.throttle_wait,
+                result.build_time,
+                result.check_time,
+                self._id('cases', result.case_id),
+                self._id('endpoints', result.endpoint),
+                self._id('stages', stage if stage is not None else WARMUP_STAGE),
+                result.status_code,
+                self._id('biz_codes', result.biz_code),
+                self._id('fingerprints', fingerprint),
+                min(result.attempts, 255),
+                1 if result.passed else 0
+            )
+            self.count += 1
+            struct.pack_into('<Q', self._map, _COUNT_OFFSET, self.count)
+            if self._meta_dirty and time.monotonic() >= self._meta_due:
+                self._write_meta()
+
+    def close(self) -> None:
+        """写入剩余数据并截掉预分配的空间"""
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.flush()
+            self._map.close()
+            self._map = None
+            self._file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+            self._file.close()
+            self._write_meta()
+
+    def __enter__(self) -> 'ResultLogWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ResultLog:
+    """结果日志的 NumPy 读取器
+
+    records 是按文件头记录数映射的结构化数组（np.memmap），不会把整个文件读入内存，
+    可直接用向量化运算做事后分析；summarize 生成与 StatsCollector.report 相同结构的报告。
+    """
+
+    def __init__(self, path: str):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("读取结果日志需要安装 numpy")
+        self.path = path
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(path, 'rb') as f:
+            magic, version, record_size, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"不是有效的结果日志: {path}")
+        if count == 0:
+            self.records = np.zeros(0, dtype=record_dtype())
+        else:
+            self.records = np.memmap(path, dtype=record_dtype(), mode='r', offset=HEADER_SIZE, shape=(count,))
+        if os.path.getsize(path) > HEADER_SIZE + count * RECORD_SIZE:
+            # 写入方没有正常关闭（仍有预分配空间），字典文件可能缺少最后出现的名称
+            self._pad_dictionaries()
+
+    def _pad_dictionaries(self) -> None:
+        """为字典中缺失的编号补上占位名称"""
+        for dictionary, field in (('cases', 'case'), ('endpoints', 'endpoint'), ('stages', 'stage'),
+                                  ('biz_codes', 'biz_code'), ('fingerprints', 'fingerprint')):
+            names = self.meta[dictionary]
+            top = int(self.records[field].max()) if len(self.records) else 0
+            for index in range(len(names) + 1, top + 1):
+                name = f"(未知 {index})"
+                names.append({'stage': None, 'code': None, 'template': name} if dictionary == 'fingerprints' else name)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self.meta.get('info') or {}
+
+    def _warmup_id(self) -> int:
+        stages = self.meta['stages']
+        return stages.index(WARMUP_STAGE) + 1 if WARMUP_STAGE in stages else 0
+
+    def chunks(self, include_warmup: bool = False, chunk_size: int = 1 << 20):
+        """分块遍历记录，每块按需从 mmap 读入，内存占用与记录总数无关"""
+        warmup_id = 0 if include_warmup else self._warmup_id()
+        for offset in range(0, len(self.records), chunk_size):
+            chunk = self.records[offset:offset + chunk_size]
+            if warmup_id:
+                chunk = chunk[chunk['stage'] != warmup_id]
+            if len(chunk):
+                yield chunk
+
+    def aggregate(self, interval: Optional[float] = None, include_warmup: bool = False,
+                  max_points: int = 1200, chunk_size: int = 1 << 20) -> 'LogAggregate':
+        """流式汇总为时间片序列与分接口延迟直方图，interval 默认按 max_points 个时间片自动选择"""
+        import numpy as np
+        start, end = math.inf, -math.inf
+        for chunk in self.chunks(include_warmup, chunk_size):
+            start = min(start, float(chunk['start'].min()))
+            end = max(end, float((chunk['start'] + chunk['latency']).max()))
+        if start == math.inf:
+            start = end = 0.0
+        span = max(end - start, 0.0)
+        if interval is None:
+            interval = max(1.0, float(math.ceil(span / max_points)))
+        aggregate = LogAggregate(self, start, interval, int(span // interval) + 1)
+        for chunk in self.chunks(include_warmup, chunk_size):
+            aggregate.add(chunk)
+        return aggregate
+
+    def name(self, dictionary: str, index: int) -> Optional[str]:
+        """编号对应的名称，0 表示无"""
+        return self.meta[dictionary][index - 1] if index else None
+
+    def summarize(self, include_warmup: bool = False, chunk_size: int = 1 << 20) -> Dict[str, Any]:
+        """按阶段、用例、接口汇总，返回与 StatsCollector.report 相同结构的报告
+
+        与 aggregate 一样分块流式累加计数与延迟直方图，不复制整列记录，
+        延迟分位数按直方图计算，与 StatsCollector 的精度一致。
+        """
+        import numpy as np
+        stages, stage_cases, cases, endpoints, total = _Groups(), _Groups(), _Groups(), _Groups(), _Groups()
+        codes: Dict[int, int] = {}
+        fingerprints = len(self.meta['fingerprints']) + 1
+        fingerprint_counts = np.zeros(fingerprints, dtype=np.int64)
+        first = np.full(fingerprints, math.inf)
+        last = np.full(fingerprints, -math.inf)
+        for chunk in self.chunks(include_warmup, chunk_size):
+            bucket = LogAggregate.bucket_indices(chunk['latency'])
+            end = chunk['start'] + chunk['latency']
+            stage = chunk['stage'].astype(np.int64)
+            case = chunk['case'].astype(np.int64)
+            endpoint = chunk['endpoint'].astype(np.int64)
+            stages.add(stage, chunk, bucket, end)
+            stage_cases.add(stage << 16 | case, chunk, bucket, end)
+            cases.add(case, chunk, bucket, end)
+            endpoints.add(endpoint, chunk, bucket, end)
+            total.add(np.zeros(len(chunk), dtype=np.int64), chunk, bucket, end)
+            # 接口、HTTP状态码与业务码合成一个键计数
+            keys = endpoint << 48 | (chunk['status'].astype(np.int64) & 0xFFFF) << 32 | chunk['biz_code'].astype(np.int64)
+            for key, count in zip(*(item.tolist() for item in np.unique(keys, return_counts=True))):
+                codes[key] = codes.get(key, 0) + count
+            fingerprint = chunk['fingerprint'].astype(np.int64)
+            fingerprint_counts += np.bincount(fingerprint, minlength=fingerprints)
+            np.minimum.at(first, fingerprint, chunk['start'])
+            np.maximum.at(last, fingerprint, chunk['start'])
+
+        stage_case_summaries = stage_cases.summaries()
+        report_stages = {
+            self.name('stages', index): {
+                'cases': {self.name('cases', key & 0xFFFF): item
+                          for key, item in stage_case_summaries.items() if key >> 16 == index},
+                'total': summary
+            }
+            for index, summary in stages.summaries().items()
+        }
+        report_endpoints = {index: dict(summary, codes={}) for index, summary in endpoints.summaries().items()}
+        for key, count in sorted(codes.items()):
+            status = (key >> 32 & 0xFFFF) - (0x10000 if key >> 32 & 0x8000 else 0)
+            biz = self.name('biz_codes', key & 0xFFFFFFFF) or '-'
+            report_endpoints[key >> 48]['codes'][f"{status}/{biz}"] = count
+
+        failures = [
+            dict(self.meta['fingerprints'][index - 1], count=int(fingerprint_counts[index]),
+                 first=float(first[index]), last=float(last[index]), examples=[])
+            for index in (np.flatnonzero(fingerprint_counts[1:]) + 1).tolist()
+        ]
+        failures.sort(key=lambda item: -item['count'])
+        summary = total.summaries().get(0) or _Groups.empty_summary()
+        summary['errors'] = {item['template']: item['count'] for item in failures}
+        return {
+            'stages': report_stages,
+            'cases': {self.name('cases', index): item for index, item in cases.summaries().items()},
+            'endpoints': {self.name('endpoints', index): item for index, item in report_endpoints.items()},
+            'total': summary,
+            'failures': failures
+        }
+
+
+class _Groups:
+    """summarize 使用的按键分组流式汇总
+
+    每个分组一行：请求数、通过数等计数与求和，开始与结束时间、延迟的极值，
+    以及与 LatencyHistogram 相同分桶的延迟直方图。行按分组键首次出现的顺序分配，
+    内存只与出现过的分组数有关。
+    """
+    _COLUMNS = (('requests', 0), ('passed', 0), ('http_errors', 0), ('attempts', 0), ('throttle_wait', 0.0),
+                ('latency', 0.0), ('min', math.inf), ('max', 0.0), ('first', math.inf), ('last', -math.inf))
+
+    def __init__(self):
+        import numpy as np
+        self.rows: Dict[int, int] = {}
+        self.columns = {name: np.zeros(0, dtype=type(fill)) for name, fill in self._COLUMNS}
+        self.histogram = np.zeros((0, LatencyHistogram.BUCKETS), dtype=np.int64)
+
+    def _grow(self, size: int) -> None:
+        import numpy as np
+        extra = size - len(self.histogram)
+        if extra <= 0:
+            return
+        for name, fill in self._COLUMNS:
+            self.columns[name] = np.concatenate([self.columns[name], np.full(extra, fill, dtype=type(fill))])
+        self.histogram = np.concatenate([self.histogram, np.zeros((extra, LatencyHistogram.BUCKETS), dtype=np.int64)])
+
+    def add(self, keys, chunk, bucket, end) -> None:
+        """累加一块记录，keys 为每条记录的分组键"""
+        import numpy as np
+        unique, inverse = np.unique(keys, return_inverse=True)
+        for key in unique.tolist():
+            self.rows.setdefault(key, len(self.rows))
+        size = len(self.rows)
+        self._grow(size)
+        row = np.array([self.rows[key] for key in unique.tolist()], dtype=np.int64)[inverse.reshape(-1)]
+        status = chunk['status']
+        columns = self.columns
+        columns['requests'] += np.bincount(row, minlength=size)
+        columns['passed'] += np.bincount(row[chunk['passed'] != 0], minlength=size)
+        columns['http_errors'] += np.bincount(row[(status < 200) | (status >= 300)], minlength=size)
+        columns['attempts'] += np.bincount(row, weights=chunk['attempts'], minlength=size).astype(np.int64)
+        columns['throttle_wait'] += np.bincount(row, weights=chunk['throttle_wait'], minlength=size)
+        columns['latency'] += np.bincount(row, weights=chunk['latency'], minlength=size)
+        np.minimum.at(columns['min'], row, chunk['latency'])
+        np.maximum.at(columns['max'], row, chunk['latency'])
+        np.minimum.at(columns['first'], row, chunk['start'])
+        np.maximum.at(columns['last'], row, end)
+        self.histogram += np.bincount(
+            row * LatencyHistogram.BUCKETS + bucket, minlength=size * LatencyHistogram.BUCKETS
+        ).reshape(size, LatencyHistogram.BUCKETS)
+
+    @staticmethod
+    def empty_summary() -> Dict[str, Any]:
+        latency = dict.fromkeys(('mean', 'p50', 'p90', 'p95', 'p99', 'max'), 0.0)
+        return {'requests': 0, 'passed': 0, 'failed': 0, 'error_rate': 0.0, 'http_error_rate': 0.0,
+                'checks': 0.0, 'attempts': 0, 'rps': 0.0, 'throttle_wait_ms': 0.0,
+                'latency_ms': latency, 'errors': {}}
+
+    def summaries(self) -> Dict[int, Dict[str, Any]]:
+        """按分组键从小到大返回各组的统计汇总，结构与 RequestStats.summary 相同"""
+        import numpy as np
+        values = np.array([LatencyHistogram.bucket_value(i) for i in range(LatencyHistogram.BUCKETS)])
+        quantiles = LogAggregate._quantiles(self.histogram, (0.5, 0.9, 0.95, 0.99), values)
+        columns = {name: column.tolist() for name, column in self.columns.items()}
+        results = {}
+        for key in sorted(self.rows):
+            row = self.rows[key]
+            requests, passed = columns['requests'][row], columns['passed'][row]
+            low, high = columns['min'][row], columns['max'][row]
+            p50, p90, p95, p99 = (min(high, max(low, float(q[row]))) * 1000 for q in quantiles)
+            duration = columns['last'][row] - columns['first'][row]
+            results[key] = {
+                'requests': requests,
+                'passed': passed,
+                'failed': requests - passed,
+                'error_rate': (requests - passed) / requests,
+                'http_error_rate': columns['http_errors'][row] / requests,
+                'checks': passed / requests,
+                'attempts': columns['attempts'][row],
+                'rps': requests / duration if duration > 0 else 0.0,
+                'throttle_wait_ms': columns['throttle_wait'][row] * 1000,
+                'latency_ms': {
+                    'mean': columns['latency'][row] / requests * 1000,
+                    'p50': p50,
+                    'p90': p90,
+                    'p95': p95,
+                    'p99': p99,
+                    'max': high * 1000,
+                },
+                'errors': {}
+            }
+        return results
+
+
+class LogAggregate:
+    """结果日志的流式汇总
+
+    按请求完成时间分入时间片，累计每个时间片的请求数、失败数与粗粒度延迟分布，
+    以及每个接口的完整延迟直方图（与 LatencyHistogram 同样的对数桶）和失败指纹计数。
+    全部为定长计数数组，汇总上千万条记录只需顺序扫描两遍。
+
+    属性:
+        started_at: 第一个时间片的开始时间（epoch 秒）
+        interval: 时间片长度（秒）
+        requests / failed: 每个时间片的请求数与失败数
+        slot_latency: 每个时间片的延迟分布，形状为 (时间片数, 粗粒度桶数)
+        endpoint_latency: 每个接口的延迟直方图，行号为接口编号（0 行不使用）
+        endpoint_requests / endpoint_failed: 每个接口的请求数与失败数
+        fingerprints: 失败指纹编号 -> 次数
+    """
+
+    def __init__(self, log: ResultLog, started_at: float, interval: float, slots: int):
+        import numpy as np
+        self.log = log
+        self.started_at = started_at
+        self.interval = interval
+        self.slots = slots
+        endpoints = len(log.meta['endpoints']) + 1
+        coarse = math.ceil(LatencyHistogram.BUCKETS / _COARSE)
+        self.requests = np.zeros(slots, dtype=np.int64)
+        self.failed = np.zeros(slots, dtype=np.int64)
+        self.slot_latency = np.zeros((slots, coarse), dtype=np.int64)
+        self.endpoint_latency = np.zeros((endpoints, LatencyHistogram.BUCKETS), dtype=np.int64)
+        self.endpoint_requests = np.zeros(endpoints, dtype=np.int64)
+        self.endpoint_failed = np.zeros(endpoints, dtype=np.int64)
+        self.fingerprint_counts = np.zeros(len(log.meta['fingerprints']) + 1, dtype=np.int64)
+
+    @staticmethod
+    def bucket_indices(latency):
+        """向量化的 LatencyHistogram.bucket_of"""
+        import numpy as np
+        micros = np.maximum(latency.astype(np.float64) * 1e6, 1.0)
+        indices = np.floor(np.log(micros) / LatencyHistogram.LOG_BASE).astype(np.int64) + 1
+        indices[micros <= 1.0] = 0
+        return np.minimum(indices, LatencyHistogram.BUCKETS - 1)
+
+    def add(self, chunk) -> None:
+        import numpy as np
+        slots, coarse = self.slot_latency.shape
+        endpoints = len(self.endpoint_requests)
+        slot = ((chunk['start'] + chunk['latency'] - self.started_at) // self.interval).astype(np.int64)
+        np.clip(slot, 0, slots - 1, out=slot)
+        bucket = self.bucket_indices(chunk['latency'])
+        endpoint = chunk['endpoint'].astype(np.int64)
+        failed = chunk['passed'] == 0
+        self.requests += np.bincount(slot, minlength=slots)
+        self.failed += np.bincount(slot[failed], minlength=slots)
+        self.slot_latency += np.bincount(slot * coarse + bucket // _COARSE, minlength=slots * coarse).reshape(slots, coarse)
+        self.endpoint_latency += np.bincount(
+            endpoint * LatencyHistogram.BUCKETS + bucket, minlength=endpoints * LatencyHistogram.BUCKETS
+        ).reshape(endpoints, LatencyHistogram.BUCKETS)
+        self.endpoint_requests += np.bincount(endpoint, minlength=endpoints)
+        self.endpoint_failed += np.bincount(endpoint[failed], minlength=endpoints)
+        self.fingerprint_counts += np.bincount(chunk['fingerprint'], minlength=len(self.fingerprint_counts))
+
+    @staticmethod
+    def _quantiles(counts, quantiles, values):
+        """按桶计数计算分位数，counts 最后一维为桶，返回对应的桶代表值"""
+        import numpy as np
+        cumulative = counts.cumsum(axis=-1)
+        total = cumulative[..., -1]
+        results = []
+        for q in quantiles:
+            target = np.maximum(np.ceil(q * total), 1)
+            index = (cumulative < target[..., None]).sum(axis=-1)
+            index = np.minimum(index, counts.shape[-1] - 1)
+            results.append(np.where(total > 0, values[index], 0.0))
+        return results
+
+    def times(self):
+        """每个时间片的开始时间相对于第一个时间片的秒数"""
+        import numpy as np
+        return np.arange(self.slots) * self.interval
+
+    def slot_percentiles(self, quantiles=(0.5, 0.9, 0.99)):
+        """每个时间片的延迟分位数（秒），没有请求的时间片为 0"""
+        import numpy as np
+        values = np.array([
+            LatencyHistogram.bucket_value(min(i * _COARSE + _COARSE // 2, LatencyHistogram.BUCKETS - 1))
+            for i in range(self.slot_latency.shape[1])
+        ])
+        return self._quantiles(self.slot_latency, quantiles, values)
+
+    def endpoint_percentiles(self, quantiles=(0.5, 0.9, 0.95, 0.99, 0.999)):
+        """每个接口的延迟分位数（秒），行号为接口编号"""
+        import numpy as np
+        values = np.array([LatencyHistogram.bucket_value(i) for i in range(LatencyHistogram.BUCKETS)])
+        return self._quantiles(self.endpoint_latency, quantiles, values)
+
+    def total_percentiles(self, quantiles=(0.5, 0.9, 0.95, 0.99, 0.999)) -> List[float]:
+        """所有接口合计的延迟分位数（秒）"""
+        import numpy as np
+        values = np.array([LatencyHistogram.bucket_value(i) for i in range(LatencyHistogram.BUCKETS)])
+        return [float(q) for q in self._quantiles(self.endpoint_latency.sum(axis=0), quantiles, values)]
@@ -0,0 +1,45 @@
+import hashlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import time
+from typing import Any, Dict, Optional
+
+
+def environment() -> Dict[str, Any]:
+    """压测机的环境信息，写入结果日志与报告，便于对比不同机器上的结果"""
+    return {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'cpu_count': os.cpu_count(),
+        'pid': os.getpid(),
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def git_revision(path: str = '.') -> Optional[str]:
+    """path 所在仓库的当前提交，有未提交的修改时附加 -dirty；不在仓库中时返回 None"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=path, capture_output=True, text=True, timeout=5)
+        if revision.returncode != 0:
+            return None
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=path,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return revision.stdout.strip() + ('-dirty' if status.stdout.strip() else '')
+
+
+def file_sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def config_hash(run: Dict[str, Any]) -> str:
+    """压测配置的摘要，配置相同的两次压测才有可比性"""
+    canonical = json.dumps(run, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
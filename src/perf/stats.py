@@ -0,0 +1,394 @@
+import math
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .failures import FailureIndex
+
+# 直方图相对精度约 1%，覆盖 1us ~ 1000s
+_PRECISION = 0.01
+_LOG_BASE = math.log1p(_PRECISION)
+_BUCKETS = int(math.log(1e9) / _LOG_BASE) + 2
+# 每个统计项最多保留的失败原因种类，超出的归入 OTHER_ERRORS，防止错误信息中的可变内容撑大内存
+MAX_ERROR_KINDS = 50
+OTHER_ERRORS = "其他错误"
+# 混合场景负载中用例ID的场景前缀分隔符，如 credit/case_001
+SCENARIO_SEPARATOR = '/'
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图
+
+    按微秒取对数分桶，相对误差约 1%，桶数固定，内存占用与请求数无关，
+    多个直方图可以逐桶相加合并。
+    """
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+    BUCKETS = _BUCKETS
+    LOG_BASE = _LOG_BASE
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_of(seconds: float) -> int:
+        micros = seconds * 1e6
+        if micros <= 1:
+            return 0
+        return min(_BUCKETS - 1, int(math.log(micros) / _LOG_BASE) + 1)
+
+    @staticmethod
+    def bucket_value(index: int) -> float:
+        """桶的代表值（秒）"""
+        if index == 0:
+            return 1e-6
+        return math.exp((index - 0.5) * _LOG_BASE) / 1e6
+
+    @staticmethod
+    def bucket_upper(index: int) -> float:
+        """桶的上沿（秒）"""
+        return math.exp(index * _LOG_BASE) / 1e6
+
+    def record(self, seconds: float) -> None:
+        self.counts[self.bucket_of(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        if other.count == 0:
+            return
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, quantiles: Iterable[float]) -> List[float]:
+        """计算多个分位数（秒），quantiles 取值 0~1"""
+        quantiles = list(quantiles)
+        if self.count == 0:
+            return [0.0] * len(quantiles)
+        targets = sorted((max(1, math.ceil(q * self.count)), i) for i, q in enumerate(quantiles))
+        results = [0.0] * len(quantiles)
+        seen = 0
+        t = 0
+        for index, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            while t < len(targets) and seen >= targets[t][0]:
+                results[targets[t][1]] = min(self.max, max(self.min, self.bucket_value(index)))
+                t += 1
+            if t == len(targets):
+                break
+        return results
+
+    def percentile(self, q: float) -> float:
+        return self.percentiles([q])[0]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class CaseStats:
+    """单个 (阶段, 用例) 维度的统计"""
+    __slots__ = (
+        'requests', 'passed', 'failed', 'http_errors', 'attempts', 'throttle_wait', 'latency', 'errors', 'first', 'last'
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.passed = 0
+        self.failed = 0
+        self.http_errors = 0
+        self.attempts = 0
+        self.throttle_wait = 0.0
+        self.latency = LatencyHistogram()
+        self.errors: Dict[str, int] = {}
+        self.first = math.inf
+        self.last = 0.0
+
+    def record(self, result) -> None:
+        self.requests += 1
+        self.attempts += result.attempts
+        self.throttle_wait += result.throttle_wait
+        self.latency.record(result.latency)
+        if not 200 <= result.status_code < 300:
+            self.http_errors += 1
+        if result.passed:
+            self.passed += 1
+        else:
+            self.failed += 1
+            self._count_error(result.error, 1)
+        if result.start < self.first:
+            self.first = result.start
+        end = result.start + result.latency
+        if end > self.last:
+            self.last = end
+
+    def merge(self, other: 'CaseStats') -> None:
+        self.requests += other.requests
+        self.passed += other.passed
+        self.failed += other.failed
+        self.http_errors += other.http_errors
+        self.attempts += other.attempts
+        self.throttle_wait += other.throttle_wait
+        self.latency.merge(other.latency)
+        for error, count in list(other.errors.items()):
+            self._count_error(error, count)
+        self.first = min(self.first, other.first)
+        self.last = max(self.last, other.last)
+
+    def _count_error(self, error: str, count: int) -> None:
+        errors = self.errors
+        if error not in errors and len(errors) >= MAX_ERROR_KINDS:
+            error = OTHER_ERRORS
+        errors[error] = errors.get(error, 0) + count
+
+    def summary(self, duration: Optional[float] = None) -> Dict[str, Any]:
+        """汇总为报告字典，延迟单位为毫秒"""
+        if duration is None:
+            duration = self.last - self.first if self.requests else 0.0
+        p50, p90, p95, p99 = self.latency.percentiles((0.5, 0.9, 0.95, 0.99))
+        return {
+            'requests': self.requests,
+            'passed': self.passed,
+            'failed': self.failed,
+            'error_rate': self.failed / self.requests if self.requests else 0.0,
+            'http_error_rate': self.http_errors / self.requests if self.requests else 0.0,
+            'checks': self.passed / self.requests if self.requests else 0.0,
+            'attempts': self.attempts,
+            'rps': self.requests / duration if duration > 0 else 0.0,
+            'throttle_wait_ms': self.throttle_wait * 1000,
+            'latency_ms': {
+                'mean': self.latency.mean * 1000,
+                'p50': p50 * 1000,
+                'p90': p90 * 1000,
+                'p95': p95 * 1000,
+                'p99': p99 * 1000,
+                'max': self.latency.max * 1000,
+            },
+            'errors': dict(self.errors)
+        }
+
+
+class FailureReservoir:
+    """固定容量的失败样本池
+
+    按蓄水池抽样（Algorithm R）保留至多 size 条失败，每条失败被保留的概率相同，
+    内存与失败总数无关。多个样本池按各自见过的失败数加权合并。
+    """
+    __slots__ = ('size', 'seen', 'samples')
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self.seen = 0
+        self.samples: List[Dict[str, Any]] = []
+
+    def offer(self, result) -> None:
+        self.seen += 1
+        if len(self.samples) < self.size:
+            self.samples.append(self._sample(result))
+            return
+        index = random.randrange(self.seen)
+        if index < self.size:
+            self.samples[index] = self._sample(result)
+
+    @staticmethod
+    def _sample(result) -> Dict[str, Any]:
+        return {
+            'case_id': result.case_id,
+            'endpoint': result.endpoint,
+            'start': result.start,
+            'status_code': result.status_code,
+            'biz_code': result.biz_code,
+            'error': result.error
+        }
+
+    def merge(self, other: 'FailureReservoir') -> None:
+        samples = list(other.samples)
+        if not samples:
+            return
+        total = self.seen + other.seen
+        merged = []
+        mine, theirs = list(self.samples), samples
+        random.shuffle(mine)
+        random.shuffle(theirs)
+        # 相当于从两边的全部失败中不放回地抽取：按两边未抽取的失败数加权选择来源，每抽一条对应一侧减一
+        left_mine, left_theirs = self.seen, other.seen
+        while len(merged) < self.size and (mine or theirs):
+            take_mine = mine and (not theirs or random.random() * (left_mine + left_theirs) < left_mine)
+            if take_mine:
+                merged.append(mine.pop())
+                left_mine -= 1
+            else:
+                merged.append(theirs.pop())
+                left_theirs -= 1
+        self.samples = merged
+        self.seen = total
+
+
+class _Shard:
+    """单个线程独占的统计分片，热路径上只有所属线程写入，不需要加锁"""
+    __slots__ = ('thread', 'stats', 'failures', 'fingerprints')
+
+    def __init__(self, thread: threading.Thread, reservoir_size: int):
+        self.thread = thread
+        self.stats: Dict[Tuple, CaseStats] = {}
+        self.failures = FailureReservoir(reservoir_size)
+        self.fingerprints = FailureIndex()
+
+
+class StatsCollector:
+    """按 (阶段, 接口, 用例, HTTP状态码, 业务返回码) 汇总请求结果的统计器
+
+    每个线程写入自己的分片，记录时不加锁；报告时合并所有分片。
+    线程退出后其分片在下次注册新分片时并入 retired，
+    因此内存只与统计维度和存活线程数有关，与请求数、运行时长无关。
+    失败只保留计数、固定容量的样本，以及按指纹去重的失败分组。
+    """
+
+    def __init__(self, reservoir_size: int = 100):
+        self.reservoir_size = reservoir_size
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None, reservoir_size)
+        self._stage_windows: Dict[str, List[float]] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread(), self.reservoir_size)
+            with self._lock:
+                self._retire_dead_shards()
+                self._shards.append(shard)
+        return shard
+
+    def _retire_dead_shards(self) -> None:
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._merge_shard(self._retired, shard)
+        self._shards = alive
+
+    @staticmethod
+    def _merge_shard(target: _Shard, shard: _Shard) -> None:
+        for key, stats in list(shard.stats.items()):
+            merged = target.stats.get(key)
+            if merged is None:
+                merged = target.stats[key] = CaseStats()
+            merged.merge(stats)
+        target.failures.merge(shard.failures)
+        target.fingerprints.merge(shard.fingerprints)
+
+    def record(self, stage: str, result) -> None:
+        shard = self._shard()
+        key = (stage, result.endpoint, result.case_id, result.status_code, result.biz_code)
+        stats = shard.stats.get(key)
+        if stats is None:
+            stats = shard.stats[key] = CaseStats()
+        stats.record(result)
+        if not result.passed:
+            shard.failures.offer(result)
+            shard.fingerprints.record(result)
+
+    def absorb(self, shard: _Shard) -> None:
+        """并入另一个统计器 merged() 的结果，用于汇总其他进程的统计"""
+        with self._lock:
+            self._merge_shard(self._retired, shard)
+
+    def mark_stage(self, stage: str, start: float, end: Optional[float] = None) -> None:
+        """记录阶段的起止时间，用于计算阶段吞吐量"""
+        with self._lock:
+            window = self._stage_windows.setdefault(stage, [start, start])
+            window[1] = end if end is not None else time.time()
+
+    def merged(self) -> _Shard:
+        """合并所有分片的当前统计，供报告和实时判断使用"""
+        result = _Shard(None, self.reservoir_size)
+        with self._lock:
+            shards = [self._retired] + self._shards
+            for shard in shards:
+                self._merge_shard(result, shard)
+        return result
+
+    def snapshot(self) -> Dict[Tuple[str, str], CaseStats]:
+        """按 (阶段, 用例) 汇总的当前统计"""
+        copy: Dict[Tuple[str, str], CaseStats] = {}
+        for (stage, _, case_id, _, _), stats in self.merged().stats.items():
+            merged = copy.get((stage, case_id))
+            if merged is None:
+                merged = copy[(stage, case_id)] = CaseStats()
+            merged.merge(stats)
+        return copy
+
+    def report(self) -> Dict[str, Any]:
+        """生成分阶段、分用例、分接口的报告，用例ID带场景前缀时另按场景汇总"""
+        shard = self.merged()
+        with self._lock:
+            windows = {stage: tuple(window) for stage, window in self._stage_windows.items()}
+
+        stage_cases: Dict[Tuple[str, str], CaseStats] = {}
+        stage_totals: Dict[str, CaseStats] = {}
+        case_totals: Dict[str, CaseStats] = {}
+        scenario_totals: Dict[str, CaseStats] = {}
+        endpoint_totals: Dict[str, CaseStats] = {}
+        endpoint_codes: Dict[str, Dict[str, int]] = {}
+        overall = CaseStats()
+        for (stage, endpoint, case_id, status_code, biz_code), stats in shard.stats.items():
+            stage_cases.setdefault((stage, case_id), CaseStats()).merge(stats)
+            stage_totals.setdefault(stage, CaseStats()).merge(stats)
+            case_totals.setdefault(case_id, CaseStats()).merge(stats)
+            if SCENARIO_SEPARATOR in case_id:
+                scenario = case_id.partition(SCENARIO_SEPARATOR)[0]
+                scenario_totals.setdefault(scenario, CaseStats()).merge(stats)
+            endpoint_totals.setdefault(endpoint, CaseStats()).merge(stats)
+            codes = endpoint_codes.setdefault(endpoint, {})
+            code = f"{status_code}/{biz_code if biz_code is not None else '-'}"
+            codes[code] = codes.get(code, 0) + stats.requests
+            overall.merge(stats)
+
+        def stage_duration(stage: str) -> Optional[float]:
+            window = windows.get(stage)
+            return window[1] - window[0] if window else None
+
+        stages: Dict[str, Dict[str, Any]] = {}
+        for (stage, case_id), stats in stage_cases.items():
+            stages.setdefault(stage, {'cases': {}})['cases'][case_id] = stats.summary(stage_duration(stage))
+        for stage, stats in stage_totals.items():
+            stages[stage]['total'] = stats.summary(stage_duration(stage))
+
+        total_duration = None
+        if windows:
+            total_duration = max(w[1] for w in windows.values()) - min(w[0] for w in windows.values())
+        endpoints = {}
+        for endpoint, stats in endpoint_totals.items():
+            endpoints[endpoint] = stats.summary(total_duration)
+            endpoints[endpoint]['codes'] = endpoint_codes[endpoint]
+        report = {
+            'stages': stages,
+            'cases': {case_id: stats.summary(total_duration) for case_id, stats in case_totals.items()},
+            'endpoints': endpoints,
+            'total': overall.summary(total_duration),
+            'failure_samples': sorted(shard.failures.samples, key=lambda item: item['start']),
+            'failures_seen': shard.failures.seen,
+            'failures': shard.fingerprints.to_list()
+        }
+        if scenario_totals:
+            report['scenarios'] = {name: stats.summary(total_duration) for name, stats in scenario_totals.items()}
+        return report
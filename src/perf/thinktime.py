@@ -0,0 +1,72 @@
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .profile import parse_duration
+
+CONSTANT = 'constant'
+UNIFORM = 'uniform'
+LOGNORMAL = 'lognormal'
+
+
+@dataclass(frozen=True)
+class ThinkTime:
+    """等待时长的分布，用于用例之间的思考时间与迭代间隔（pacing）
+
+    套件YAML中的写法::
+
+        think_time: 2s                                   # 固定 2 秒
+        think_time: {uniform: [1s, 3s]}                  # 1~3 秒均匀分布
+        think_time: {lognormal: 2s, sigma: 0.5, max: 30s}  # 中位数 2 秒的对数正态分布，长尾截断在 30 秒
+
+    属性:
+        distribution: constant / uniform / lognormal
+        value: constant 的时长，lognormal 的中位数（秒）
+        low: uniform 的下限（秒）
+        high: uniform 的上限（秒）
+        sigma: lognormal 的形状参数，越大长尾越明显
+        cap: lognormal 的上限（秒），None 表示不截断
+    """
+    distribution: str = CONSTANT
+    value: float = 0.0
+    low: float = 0.0
+    high: float = 0.0
+    sigma: float = 0.5
+    cap: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: Any) -> Optional['ThinkTime']:
+        """从YAML配置构建，未配置时返回 None"""
+        if config is None:
+            return None
+        if not isinstance(config, dict):
+            return cls(CONSTANT, value=parse_duration(config))
+        if CONSTANT in config:
+            return cls(CONSTANT, value=parse_duration(config[CONSTANT]))
+        if UNIFORM in config:
+            bounds = config[UNIFORM]
+            if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+                raise ValueError(f"uniform 需要 [下限, 上限]: {bounds}")
+            low, high = parse_duration(bounds[0]), parse_duration(bounds[1])
+            if high < low:
+                raise ValueError(f"uniform 的上限小于下限: {bounds}")
+            return cls(UNIFORM, low=low, high=high)
+        if LOGNORMAL in config:
+            sigma = float(config.get('sigma', 0.5))
+            if sigma < 0:
+                raise ValueError(f"lognormal 的 sigma 不能小于0: {sigma}")
+            cap = parse_duration(config['max']) if config.get('max') is not None else None
+            return cls(LOGNORMAL, value=parse_duration(config[LOGNORMAL]), sigma=sigma, cap=cap)
+        raise ValueError(f"无效的等待时长配置: {config}，应为时长或 {CONSTANT}/{UNIFORM}/{LOGNORMAL}")
+
+    def sample(self) -> float:
+        """按分布取一次等待时长（秒）"""
+        if self.distribution == UNIFORM:
+            return random.uniform(self.low, self.high)
+        if self.distribution == LOGNORMAL:
+            if self.value <= 0:
+                return 0.0
+            value = random.lognormvariate(math.log(self.value), self.sigma)
+            return min(value, self.cap) if self.cap is not None else value
+        return self.value
@@ -0,0 +1,193 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .profile import parse_duration
+
+LATENCY_METRICS = ('mean', 'p50', 'p90', 'p95', 'p99', 'max')
+RATIO_METRICS = ('error_rate', 'http_error_rate', 'checks')
+RATE_METRICS = ('rps',)
+# 套件未配置 thresholds 时单元测试运行器使用的标准，沿用原来 80% 通过率的要求
+DEFAULT_THRESHOLDS = {'total': ['checks>80%']}
+_RULE_PATTERN = re.compile(r"^\s*(\w+)\s*(<=|>=|<|>)\s*([\d.]+)\s*(ms|s|%|/s)?\s*$")
+
+
+@dataclass(frozen=True)
+class SLORule:
+    """单条阈值，如 p99 < 800ms、error_rate < 0.5%、rps >= 50、checks > 99%
+
+    属性:
+        metric: 指标名，延迟指标为 mean/p50/p90/p95/p99/max（毫秒），
+            比例指标为 error_rate（失败率）、http_error_rate（请求异常或非2xx比例）、checks（校验通过率），
+            吞吐指标为 rps（请求/秒）
+        op: 比较符，< / <= / > / >=
+        value: 阈值
+    """
+    metric: str
+    op: str
+    value: float
+
+    def actual(self, summary: Dict[str, Any]) -> float:
+        """从统计汇总中取出指标的实际值"""
+        if self.metric in LATENCY_METRICS:
+            return summary['latency_ms'][self.metric]
+        return summary[self.metric]
+
+    def check(self, summary: Dict[str, Any]) -> Optional[str]:
+        """检查统计结果，违反时返回说明"""
+        actual = self.actual(summary)
+        ok = {
+            '<': actual < self.value,
+            '<=': actual <= self.value,
+            '>': actual > self.value,
+            '>=': actual >= self.value
+        }[self.op]
+        return None if ok else f"{self.format_value(actual)} 不满足 {self}"
+
+    def format_value(self, value: float) -> str:
+        if self.metric in LATENCY_METRICS:
+            return f"{self.metric}={value:.1f}ms"
+        if self.metric in RATIO_METRICS:
+            return f"{self.metric}={value * 100:.3f}%"
+        return f"{self.metric}={value:.2f}/s"
+
+    def __str__(self) -> str:
+        if self.metric in LATENCY_METRICS:
+            return f"{self.metric}{self.op}{self.value:g}ms"
+        if self.metric in RATIO_METRICS:
+            return f"{self.metric}{self.op}{self.value * 100:g}%"
+        return f"{self.metric}{self.op}{self.value:g}/s"
+
+
+def parse_rule(text: str) -> SLORule:
+    """解析单条阈值描述，单位须与指标相符：延迟为 ms / s（默认 ms），比例为 %（默认小数），吞吐为 /s"""
+    match = _RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"无效的阈值: {text}")
+    metric, op, value, unit = match.groups()
+    value = float(value)
+    if metric in LATENCY_METRICS:
+        units = ('ms', 's')
+    elif metric in RATIO_METRICS:
+        units = ('%',)
+    elif metric in RATE_METRICS:
+        units = ('/s',)
+    else:
+        raise ValueError(f"不支持的阈值指标: {metric}")
+    if unit is not None and unit not in units:
+        raise ValueError(f"无效的阈值: {text.strip()}，{metric} 的单位只能是 {' / '.join(units)}")
+    if unit == 's':
+        value *= 1000
+    elif unit == '%':
+        value /= 100
+    return SLORule(metric, op, value)
+
+
+def parse_slo(spec: Any) -> List[SLORule]:
+    """解析阈值列表，支持逗号分隔的字符串 "p99<800ms,error_rate<0.5%" 或字符串列表"""
+    items = spec.split(',') if isinstance(spec, str) else list(spec or [])
+    return [parse_rule(item) for item in filter(None, (str(part).strip() for part in items))]
+
+
+@dataclass
+class Thresholds:
+    """压测通过标准
+
+    total 作用于整次压测的汇总，cases 作用于单个用例，scenarios 作用于混合场景负载中的单个场景。压测过程中每秒按累计统计检查一次，
+    abort_on_fail 为 true 时，首次违反即停止压测（rps 在爬坡阶段必然偏低，不参与实时判断），
+    abort_grace 秒内样本不足，不做实时判断。压测结束后给出最终判定。
+
+    套件YAML中的配置示例::
+
+        thresholds:
+          abort_on_fail: true
+          abort_grace: 30s
+          total: ["p95<500ms", "p99<800ms", "error_rate<1%", "checks>99%", "rps>=20"]
+          cases:
+            case_001: ["p99<1s"]
+          scenarios:
+            credit: ["p95<800ms"]
+
+    属性:
+        total: 整体阈值
+        cases: 用例ID -> 用例阈值
+        scenarios: 场景名 -> 场景阈值
+        abort_on_fail: 违反阈值时是否中止压测
+        abort_grace: 开始压测后多少秒内不做实时判断
+    """
+    total: List[SLORule] = field(default_factory=list)
+    cases: Dict[str, List[SLORule]] = field(default_factory=dict)
+    scenarios: Dict[str, List[SLORule]] = field(default_factory=dict)
+    abort_on_fail: bool = False
+    abort_grace: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'Thresholds':
+        """从套件YAML的 thresholds 配置构建"""
+        config = config or {}
+        return cls(
+            total=parse_slo(config.get('total')),
+            cases={case_id: parse_slo(rules) for case_id, rules in (config.get('cases') or {}).items()},
+            scenarios={name: parse_slo(rules) for name, rules in (config.get('scenarios') or {}).items()},
+            abort_on_fail=bool(config.get('abort_on_fail', False)),
+            abort_grace=parse_duration(config.get('abort_grace', 0))
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.total) or any(self.cases.values()) or any(self.scenarios.values())
+
+    def _scopes(self, report: Dict[str, Any]):
+        yield 'total', self.total, report['total']
+        for case_id, rules in self.cases.items():
+            yield case_id, rules, report['cases'].get(case_id)
+        for name, rules in self.scenarios.items():
+            yield name, rules, report.get('scenarios', {}).get(name)
+
+    def violations(self, report: Dict[str, Any], live: bool = False) -> Dict[str, str]:
+        """返回当前报告违反的阈值，键为 "范围: 阈值"，值为说明；
+        live 为 true 时跳过 rps 阈值与尚无请求的范围"""
+        found = {}
+        for scope, rules, summary in self._scopes(report):
+            if not summary or not summary['requests']:
+                if not live:
+                    found[scope] = f"{scope}: 没有完成的请求"
+                continue
+            for rule in rules:
+                if live and rule.metric in RATE_METRICS:
+                    continue
+                violation = rule.check(summary)
+                if violation:
+                    found[f"{scope}: {rule}"] = f"{scope}: {violation}"
+        return found
+
+    def evaluate(self, report: Dict[str, Any], aborted: Optional[str] = None) -> Dict[str, Any]:
+        """对最终报告给出判定，返回可序列化的结果"""
+        results = []
+        for scope, rules, summary in self._scopes(report):
+            for rule in rules:
+                has_data = bool(summary and summary['requests'])
+                actual = rule.actual(summary) if has_data else None
+                results.append({
+                    'scope': scope,
+                    'rule': str(rule),
+                    'actual': actual,
+                    'passed': has_data and rule.check(summary) is None
+                })
+        return {
+            'passed': aborted is None and all(item['passed'] for item in results),
+            'aborted': aborted,
+            'results': results
+        }
+
+
+def print_verdict(verdict: Dict[str, Any]) -> None:
+    """打印阈值判定结果"""
+    if not verdict['results']:
+        return
+    print("\n阈值判定:")
+    for item in verdict['results']:
+        actual = '无数据' if item['actual'] is None else f"{item['actual']:.4g}"
+        print(f"  {'通过' if item['passed'] else '失败'}  {item['scope']:<12} {item['rule']:<24} 实际 {actual}")
+    if verdict['aborted']:
+        print(f"压测已中止: {verdict['aborted']}")
+    print(f"结论: {'通过' if verdict['passed'] else '未通过'}")
@@ -0,0 +1,204 @@
+import csv
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from .stats import LatencyHistogram
+
+TOTAL = "total"
+
+
+class _Bucket:
+    """一个时间片内单个接口的统计"""
+    __slots__ = ('requests', 'failed', 'latency')
+
+    def __init__(self):
+        self.requests = 0
+        self.failed = 0
+        self.latency = LatencyHistogram()
+
+    def record(self, result) -> None:
+        self.requests += 1
+        if not result.passed:
+            self.failed += 1
+        self.latency.record(result.latency)
+
+    def merge(self, other: '_Bucket') -> None:
+        self.requests += other.requests
+        self.failed += other.failed
+        self.latency.merge(other.latency)
+
+    def subtract(self, other: '_Bucket') -> None:
+        """从滚动窗口的累计值中减去移出窗口的时间片（min/max 不再准确，只使用计数）"""
+        self.requests -= other.requests
+        self.failed -= other.failed
+        counts = self.latency.counts
+        for i, c in enumerate(other.latency.counts):
+            if c:
+                counts[i] -= c
+        self.latency.count -= other.latency.count
+
+    def quantile(self, q: float) -> float:
+        """按桶计数计算分位数（秒），不依赖 min/max"""
+        latency = self.latency
+        if latency.count <= 0:
+            return 0.0
+        target = max(1, math.ceil(q * latency.count))
+        seen = 0
+        for index, c in enumerate(latency.counts):
+            seen += c
+            if seen >= target:
+                return LatencyHistogram.bucket_value(index)
+        return 0.0
+
+
+class TimeSeries:
+    """按固定时间片统计的时间序列
+
+    请求按完成时间落入时间片，每个时间片按接口（以及 total）输出一行：
+    请求数、吞吐、失败率与延迟分位数，并附带最近 windows 秒的滚动窗口指标。
+    没有请求完成的时间片也会输出全零行，吞吐骤降在序列中可以直接看到。
+    只保留滚动窗口所需的历史时间片，内存与运行时长无关；
+    指定 path 时逐行追加写入，.jsonl 后缀写 JSONL，其余写 CSV。
+    """
+
+    def __init__(self, interval: float = 1.0, windows: Iterable[float] = (10.0, 60.0), path: Optional[str] = None):
+        if interval <= 0:
+            raise ValueError("时间片长度必须大于0")
+        self.interval = interval
+        self.windows = sorted(windows)
+        self.path = path
+        self.latest: List[Dict[str, Any]] = []
+        self.rows_written = 0
+        self._lock = threading.Lock()
+        self._open: Dict[int, Dict[str, _Bucket]] = {}
+        self._next: Optional[int] = None
+        self._first: int = 0
+        self._endpoints: List[str] = []
+        self._slots = {window: max(1, math.ceil(window / interval)) for window in self.windows}
+        self._history: deque = deque()
+        # 每个滚动窗口按接口维护累计值，新时间片加入、移出窗口的时间片减去
+        self._rolling_sums: Dict[float, Dict[str, _Bucket]] = {window: {} for window in self.windows}
+        self._file = None
+        self._writer = None
+
+    @property
+    def fieldnames(self) -> List[str]:
+        names = ['timestamp', 'time', 'elapsed', 'endpoint', 'requests', 'rps', 'failed', 'error_rate',
+                 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+        for window in self.windows:
+            label = f"{window:g}s"
+            names += [f'rps_{label}', f'error_rate_{label}', f'p99_{label}_ms']
+        return names
+
+    def start(self, now: Optional[float] = None) -> None:
+        """从 now 所在的时间片开始输出"""
+        now = time.time() if now is None else now
+        self._next = self._first = int(now // self.interval)
+        if self.path and self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8', newline='')
+            if not self.path.endswith('.jsonl'):
+                self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+                self._writer.writeheader()
+
+    def record(self, result) -> None:
+        index = int((result.start + result.latency) // self.interval)
+        with self._lock:
+            buckets = self._open.get(index)
+            if buckets is None:
+                buckets = self._open[index] = {}
+            bucket = buckets.get(result.endpoint)
+            if bucket is None:
+                bucket = buckets[result.endpoint] = _Bucket()
+            bucket.record(result)
+
+    def flush(self, now: Optional[float] = None, final: bool = False) -> List[Dict[str, Any]]:
+        """输出已结束的时间片，返回新输出的行；final 为 true 时输出全部时间片"""
+        now = time.time() if now is None else now
+        if self._next is None:
+            self.start(now)
+        # 留一个时间片的余量，等待跨越边界的请求写入
+        current = int(now // self.interval)
+        last = current if final else current - 2
+        rows = []
+        while self._next <= last:
+            with self._lock:
+                buckets = self._open.pop(self._next, {})
+                # 晚到的请求并入下一个待输出的时间片
+                for index in [index for index in self._open if index < self._next]:
+                    for endpoint, bucket in self._open.pop(index).items():
+                        buckets.setdefault(endpoint, _Bucket()).merge(bucket)
+            rows.extend(self._finalize(self._next, buckets))
+            self._next += 1
+        if final and self._file is not None:
+            self._file.close()
+            self._file = None
+        return rows
+
+    def _finalize(self, index: int, buckets: Dict[str, _Bucket]) -> List[Dict[str, Any]]:
+        for endpoint in buckets:
+            if endpoint not in self._endpoints:
+                self._endpoints.append(endpoint)
+        total = _Bucket()
+        for bucket in buckets.values():
+            total.merge(bucket)
+        buckets = dict(buckets)
+        buckets[TOTAL] = total
+        self._advance_windows(buckets)
+
+        timestamp = index * self.interval
+        rows = []
+        for endpoint in self._endpoints + [TOTAL]:
+            bucket = buckets.get(endpoint) or _Bucket()
+            p50, p90, p99 = bucket.latency.percentiles((0.5, 0.9, 0.99))
+            row = {
+                'timestamp': timestamp,
+                'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)),
+                'elapsed': round((index - self._first) * self.interval, 3),
+                'endpoint': endpoint,
+                'requests': bucket.requests,
+                'rps': bucket.requests / self.interval,
+                'failed': bucket.failed,
+                'error_rate': bucket.failed / bucket.requests if bucket.requests else 0.0,
+                'p50_ms': p50 * 1000,
+                'p90_ms': p90 * 1000,
+                'p99_ms': p99 * 1000,
+                'max_ms': bucket.latency.max * 1000
+            }
+            for window in self.windows:
+                label = f"{window:g}s"
+                rolling = self._rolling_sums[window].get(endpoint) or _Bucket()
+                span = min(self._slots[window], len(self._history)) * self.interval
+                row[f'rps_{label}'] = rolling.requests / span if span else 0.0
+                row[f'error_rate_{label}'] = rolling.failed / rolling.requests if rolling.requests else 0.0
+                row[f'p99_{label}_ms'] = rolling.quantile(0.99) * 1000
+            rows.append(row)
+        self.latest = rows
+        self._write(rows)
+        return rows
+
+    def _advance_windows(self, buckets: Dict[str, _Bucket]) -> None:
+        self._history.append(buckets)
+        for window, sums in self._rolling_sums.items():
+            for endpoint, bucket in buckets.items():
+                sums.setdefault(endpoint, _Bucket()).merge(bucket)
+            slots = self._slots[window]
+            if len(self._history) > slots:
+                for endpoint, bucket in self._history[-slots - 1].items():
+                    sums[endpoint].subtract(bucket)
+        while len(self._history) > max(self._slots.values(), default=1):
+            self._history.popleft()
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        self.rows_written += len(rows)
+        if self._file is None:
+            return
+        if self._writer is not None:
+            self._writer.writerows(rows)
+        else:
+            for row in rows:
+                self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self._file.flush()
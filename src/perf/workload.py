@@ -0,0 +1,259 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+import yaml
+
+from network.http_client import HttpClient
+from test.test_suite import TestSuite
+from .capture import TrafficRecorder
+from .hooks import HookStats
+from .executor import RequestResult, SuiteExecutor
+from .stats import SCENARIO_SEPARATOR
+from .thinktime import ThinkTime
+
+ITERATION_CASE = 'case'
+ITERATION_SUITE = 'suite'
+
+T = TypeVar('T')
+
+
+def is_workload(path: str) -> bool:
+    """顶层有 scenarios 的 YAML 为混合场景负载文件，否则为普通套件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    return isinstance(data, dict) and 'scenarios' in data
+
+
+class WeightedPicker(Generic[T]):
+    """平滑加权轮询（与 nginx upstream 相同）：任意一段连续选择中各项的次数都与权重成比例，
+    短时间的压测或低速率阶段也不会因随机波动偏离配比；可被多个线程同时调用"""
+
+    def __init__(self, items: Sequence[Tuple[T, float]]):
+        if not items:
+            raise ValueError("没有可选的项")
+        self._items = [item for item, _ in items]
+        self._weights = [float(weight) for _, weight in items]
+        self._current = [0.0] * len(items)
+        self._total = sum(self._weights)
+        self._lock = threading.Lock()
+
+    def pick(self) -> T:
+        with self._lock:
+            best = 0
+            for index, weight in enumerate(self._weights):
+                self._current[index] += weight
+                if self._current[index] > self._current[best]:
+                    best = index
+            self._current[best] -= self._total
+            return self._items[best]
+
+
+@dataclass
+class Scenario:
+    """负载文件中的一个场景
+
+    属性:
+        name: 场景名，作为用例ID的前缀（如 credit/case_001），报告中按场景汇总
+        suite: 场景使用的套件
+        weight: 每次迭代选中该场景的权重
+        cases: 用例ID -> 权重，iteration 为 case 时在场景内按权重选择用例，为空时所有用例权重相同
+        iteration: case 表示每次迭代执行一个用例（连同其依赖的用例），suite 表示按依赖顺序执行整个套件
+    """
+    name: str
+    suite: TestSuite
+    weight: float
+    cases: Dict[str, float] = field(default_factory=dict)
+    iteration: str = ITERATION_CASE
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any], base_dir: str) -> 'Scenario':
+        if SCENARIO_SEPARATOR in name:
+            raise ValueError(f"场景名不能包含 {SCENARIO_SEPARATOR}: {name}")
+        if not config.get('suite'):
+            raise ValueError(f"场景 {name} 未指定 suite")
+        suite = TestSuite.from_yaml(os.path.join(base_dir, config['suite']))
+        weight = float(config.get('weight', 1))
+        cases = {str(case_id): float(value) for case_id, value in (config.get('cases') or {}).items()}
+        iteration = config.get('iteration', ITERATION_CASE)
+        if weight <= 0 or any(value <= 0 for value in cases.values()):
+            raise ValueError(f"场景 {name} 的权重必须大于0")
+        if iteration not in (ITERATION_CASE, ITERATION_SUITE):
+            raise ValueError(f"场景 {name} 的 iteration 应为 {ITERATION_CASE} 或 {ITERATION_SUITE}")
+        unknown = [case_id for case_id in cases if case_id not in suite.cases]
+        if unknown:
+            raise ValueError(f"场景 {name} 的用例不存在: {', '.join(unknown)}")
+        return cls(name, suite, weight, cases, iteration)
+
+
+@dataclass
+class Workload:
+    """混合场景负载：多个套件按权重共同施压，接口之间的资源争用只有一起压测才能暴露
+
+    负载文件示例::
+
+        name: 混合流量
+        variables:
+          base_url: "http://192.168.1.2:8081"
+        scenarios:
+          credit:
+            suite: test_cases_user_credit.yaml
+            weight: 70
+          check:
+            suite: test_cases_user_check.yaml
+            weight: 20
+          repay:
+            suite: test_cases-repay.yaml
+            weight: 10
+            cases: {case_001: 3, case_002: 1}
+        load_profile: ...
+        thresholds: ...
+
+    suite 为相对负载文件的路径。权重作用于迭代：arrival_rate 模型下到达速率按权重分给各场景，
+    vus 模型下每个VU每次迭代按权重选择场景。
+
+    属性:
+        name: 负载名称
+        description: 负载描述
+        scenarios: 场景名 -> 场景
+        variables: 覆盖所有场景套件的同名变量（如 base_url），创建执行器时生效
+        load_profile: 负载模型配置，格式与套件相同
+        thresholds: 压测通过标准，格式与套件相同，另可按场景名配置 scenarios 阈值
+        pacing: 同一VU相邻两次迭代开始时间的最小间隔；各用例的思考时间沿用所属套件的配置
+    """
+    name: str
+    description: str
+    scenarios: Dict[str, Scenario]
+    variables: Dict[str, Any] = field(default_factory=dict)
+    load_profile: Dict[str, Any] = field(default_factory=dict)
+    thresholds: Dict[str, Any] = field(default_factory=dict)
+    pacing: Any = None
+
+    @classmethod
+    def from_yaml(cls, path: str) -> 'Workload':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        base_dir = os.path.dirname(os.path.abspath(path))
+        scenarios = {
+            str(name): Scenario.from_config(str(name), config or {}, base_dir)
+            for name, config in (data.get('scenarios') or {}).items()
+        }
+        if not scenarios:
+            raise ValueError(f"负载文件未配置场景: {path}")
+        return cls(
+            name=data.get('name', 'Mixed Workload'),
+            description=data.get('description', ''),
+            scenarios=scenarios,
+            variables=data.get('variables') or {},
+            load_profile=data.get('load_profile') or {},
+            thresholds=data.get('thresholds') or {},
+            pacing=data.get('pacing')
+        )
+
+
+class MixedClient:
+    """混合负载的客户端：每个场景一个 HttpClient，各自使用所属套件的限流器与重试预算"""
+
+    def __init__(self, clients: Dict[str, HttpClient]):
+        self.clients = clients
+
+    def close(self) -> None:
+        for client in self.clients.values():
+            client.close()
+
+
+class MixedExecutor:
+    """按权重混合多个套件的执行器，接口与 SuiteExecutor 相同，可直接交给 LoadEngine
+
+    所有场景的 (场景, 用例) 按 场景权重 x 用例在场景内的占比 展开后统一加权轮询，
+    每次迭代选择一项；用例ID加上场景名前缀（credit/case_001），统计报告据此给出分场景汇总。
+    """
+
+    def __init__(self, workload: Workload, timeout: int = 30, recorder: Optional[TrafficRecorder] = None):
+        self.workload = workload
+        self.executors: Dict[str, SuiteExecutor] = {}
+        entries: List[Tuple[List[str], float]] = []
+        for name, scenario in workload.scenarios.items():
+            scenario.suite.variables.update(workload.variables)
+            executor = self.executors[name] = SuiteExecutor(scenario.suite, timeout=timeout, recorder=recorder)
+            prefix = f"{name}{SCENARIO_SEPARATOR}"
+            if scenario.iteration == ITERATION_SUITE:
+                entries.append(([prefix + case_id for case_id in executor.order], scenario.weight))
+                continue
+            weights = scenario.cases or {case_id: 1.0 for case_id in scenario.suite.cases}
+            total = sum(weights.values())
+            for case_id, weight in weights.items():
+                chain = self._with_dependencies(scenario.suite, case_id, executor.order)
+                entries.append(([prefix + item for item in chain], scenario.weight * weight / total))
+        self.order = list(dict.fromkeys(case_id for chain, _ in entries for case_id in chain))
+        self.endpoints = {
+            f"{name}{SCENARIO_SEPARATOR}{case_id}": endpoint
+            for name, executor in self.executors.items() for case_id, endpoint in executor.endpoints.items()
+        }
+        weight_sum = sum(weight for _, weight in entries)
+        self.iteration_requests = sum(len(chain) * weight for chain, weight in entries) / weight_sum
+        self._picker = WeightedPicker(entries)
+        self.pacing = ThinkTime.from_config(workload.pacing)
+        self.once_cases = {
+            f"{name}{SCENARIO_SEPARATOR}{case_id}"
+            for name, executor in self.executors.items() for case_id in executor.once_cases
+        }
+
+    @staticmethod
+    def _with_dependencies(suite: TestSuite, case_id: str, order: List[str]) -> List[str]:
+        """用例连同其（递归）依赖的用例，按套件的执行顺序排列"""
+        needed = set()
+        pending = [case_id]
+        while pending:
+            current = pending.pop()
+            if current not in needed:
+                needed.add(current)
+                pending.extend(suite.cases[current].dependencies)
+        return [item for item in order if item in needed]
+
+    def next_iteration(self) -> List[str]:
+        """按权重选择本次迭代要执行的用例"""
+        return self._picker.pick()
+
+    def think_time(self, case_id: str) -> float:
+        name, _, suite_case = case_id.partition(SCENARIO_SEPARATOR)
+        return self.executors[name].think_time(suite_case)
+
+    def pacing_interval(self) -> float:
+        return self.pacing.sample() if self.pacing is not None else 0.0
+
+    def run_hooks(self, phase: str, scope: str, client: MixedClient, context: Dict[str, Any],
+                  case_id: Optional[str] = None) -> bool:
+        """case_id 指定时只执行其所属场景的钩子，否则执行所有场景该范围的钩子"""
+        if case_id is not None:
+            name, _, suite_case = case_id.partition(SCENARIO_SEPARATOR)
+            return self.executors[name].run_hooks(phase, scope, client.clients[name], context, suite_case)
+        results = [executor.run_hooks(phase, scope, client.clients[name], context)
+                   for name, executor in self.executors.items()]
+        return all(results)
+
+    @property
+    def hook_stats(self) -> HookStats:
+        stats = HookStats()
+        for executor in self.executors.values():
+            stats.merge(executor.hook_stats)
+        return stats
+
+    def new_client(self) -> MixedClient:
+        return MixedClient({name: executor.new_client() for name, executor in self.executors.items()})
+
+    def pool_stats(self) -> Dict[str, int]:
+        """汇总各场景执行器的连接池状态"""
+        total = {'clients': 0, 'connections': 0, 'idle': 0, 'active': 0, 'pending': 0}
+        for executor in self.executors.values():
+            for key, value in executor.pool_stats().items():
+                total[key] += value
+        return total
+
+    def execute_case(self, client: MixedClient, case_id: str, context: Optional[Dict[str, Any]] = None) -> RequestResult:
+        """执行场景中的用例，同一VU的上下文在各场景间共享"""
+        name, _, suite_case = case_id.partition(SCENARIO_SEPARATOR)
+        result = self.executors[name].execute_case(client.clients[name], suite_case, context)
+        result.case_id = case_id
+        return result
@@ -8,7 +8,14 @@ import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from network.http_client import HttpClient
 from ai.ai_service import AIService
+from util import json_codec
 from util.rsa_util import RSAEncrypUtil
+from perf.engine import LoadEngine
+from perf.executor import SuiteExecutor, collect_results
+from perf.profile import LoadProfile
+from perf.report import print_failures, print_report
+from perf.stats import StatsCollector
+from perf.thresholds import DEFAULT_THRESHOLDS, Thresholds, print_verdict
 from .test_suite import TestSuite
 from .test_case import TestCase, TestStatus
 
@@ -51,11 +58,15 @@ class TestConfigManager(unittest.TestCase):
         total_results = {
             'total_runs': 0,
             'successful_runs': 0,
-            'failed_runs': 0
+            'failed_runs': 0,
+            'attempts': 0,
+            'retries': 0
         }
         
         print(f"\n开始并发执行测试套件: {self.test_suite.name}")
         print(f"重复次数: {repeat_times}, 并发线程数: {max_workers}")
+        stats = StatsCollector()
+        started_at = time.time()
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [
@@ -67,6 +78,10 @@ class TestConfigManager(unittest.TestCase):
                 try:
                     result = future.result()
                     total_results['total_runs'] += 1
+                    total_results['attempts'] += result['retry_stats']['attempts']
+                    total_results['retries'] += result['retry_stats']['retries']
+                    for request_result in result['requests']:
+                        stats.record('concurrent', request_result)
                     if result['fail'] == 0:
                         total_results['successful_runs'] += 1
                     else:
@@ -75,6 +90,7 @@ class TestConfigManager(unittest.TestCase):
                     print(f"执行出错: {str(e)}")
                     total_results['total_runs'] += 1
                     total_results['failed_runs'] += 1
+        stats.mark_stage('concurrent', started_at, time.time())
         
         # 打印总体执行报告
         print("\n并发执行报告==================================")
@@ -82,11 +98,42 @@ class TestConfigManager(unittest.TestCase):
         print(f"成功执行次数: {total_results['successful_runs']}")
         print(f"失败执行次数: {total_results['failed_runs']}")
         print(f"成功率: {(total_results['successful_runs'] / total_results['total_runs'] * 100):.2f}%")
+        print(f"请求尝试次数: {total_results['attempts']}, 重试次数: {total_results['retries']}")
+        report = stats.report()
+        if report['failures']:
+            print_failures(report['failures'])
         
-        # 使用断言确保测试结果符合预期
-        self.assertGreater(total_results['successful_runs'] / total_results['total_runs'], 0.8, 
-                          "并发测试成功率低于80%")
+        # 按套件 thresholds 判定（未配置时要求用例通过率高于80%）
+        latency = report['total']['latency_ms']
+        print(f"请求延迟: p50 {latency['p50']:.1f}ms, p95 {latency['p95']:.1f}ms, p99 {latency['p99']:.1f}ms")
+        verdict = self.get_thresholds().evaluate(report)
+        print_verdict(verdict)
+        self.assertTrue(verdict['passed'], "并发测试未达到阈值要求")
         
+    def test_load_profile(self):
+        """按套件YAML中的 load_profile 执行分阶段压测"""
+        if not self.test_suite.load_profile:
+            self.skipTest("套件未配置 load_profile")
+        executor = SuiteExecutor(
+            self.test_suite,
+            channel_private_key=self.channel_private_key,
+            platform_public_key=self.platform_public_key
+        )
+        engine = LoadEngine(
+            executor,
+            LoadProfile.from_config(self.test_suite.load_profile),
+            thresholds=self.get_thresholds()
+        )
+        report = engine.run()
+        print_report(report)
+
+        self.assertGreater(report['total']['requests'], 0, "压测未产生任何请求")
+        self.assertTrue(report['thresholds']['passed'], "压测未达到阈值要求")
+
+    def get_thresholds(self):
+        """套件配置的通过标准，未配置时使用默认标准"""
+        return Thresholds.from_config(self.test_suite.thresholds or DEFAULT_THRESHOLDS)
+
     def execute_test_suite(self, timeout=30):
         """执行测试套件
         
@@ -97,15 +144,19 @@ class TestConfigManager(unittest.TestCase):
         execution_order = self.test_suite.get_execution_order()
         
         # 创建HTTP客户端，使用传入的超时时间
-        client = HttpClient(timeout=timeout)
+        client = HttpClient(timeout=timeout, capture_headers=False, limiter=self.test_suite.get_limiter())
         
         # 测试结果统计
         test_results = {
             'total': len(execution_order),
             'pass': 0,
             'fail': 0,
-            'failed_cases': []
+            'failed_cases': [],
+            'attempts': 0,            # 实际发送的请求数（含重试和对冲）
+            'server_time': 0.0,       # 请求耗时合计（秒，不含限流等待）
+            'throttle_wait': 0.0      # 限流等待时间合计（秒）
         }
+        responses = {}
         
         print(f"\n开始执行测试套件: {self.test_suite.name}")
         
@@ -140,7 +191,7 @@ class TestConfigManager(unittest.TestCase):
                 
                 # 将data对象转换为JSON字符串
                 if isinstance(case.body['data'], dict):
-                    data_str = json.dumps(case.body['data'], separators=(',', ':'))
+                    data_str = json_codec.dumps_str(case.body['data'])
                     # 加密数据
                     encrypted_data = RSAEncrypUtil.build_rsa_encrypt_by_public_key(
                         data_str,
@@ -160,41 +211,49 @@ class TestConfigManager(unittest.TestCase):
             
             # 执行请求
             try:
+                request_start = time.time()
                 if case.method == "GET":
                     response = client.get(
                         url=api_path,
                         headers=case.headers,
-                        params=case.params
+                        params=case.params,
+                        retry_policy=self.test_suite.get_retry_policy(case_id),
+                        case_id=case_id
                     )
                 elif case.method == "POST":
                     response = client.post(
                         url=api_path,
                         headers=case.headers,
-                        body=case.body
+                        body=case.body,
+                        retry_policy=self.test_suite.get_retry_policy(case_id),
+                        case_id=case_id
                     )
+                responses[case_id] = (request_start, api_path, response)
+                test_results['server_time'] += response.elapsed
+                test_results['throttle_wait'] += response.throttle_wait
                 # 验证响应状态码和格式
                 if response.status_code == case.expected_status:
                     try:
-                        response_body = json.loads(response.body)
+                        response_body = response.json()
                         # print(f"响应消息体: {response_body}")
+                        validator = self.test_suite.get_validator(case_id)
                         # 验证响应格式
-                        required_keys = ['code', 'data', 'sign']
-                        if not all(key in response_body for key in required_keys):
-                            print(f"测试失败: 响应格式不符合要求")
+                        failure = validator.check_format(response_body)
+                        if failure is not None:
+                            print(f"测试失败: {failure.message}")
                             case.status = TestStatus.FAILED
                             test_results['fail'] += 1
                             test_results['failed_cases'].append({
                                 'case_id': case.case_id,
                                 'name': case.name,
-                                'error': '响应格式不符合要求',
+                                'error': failure.message,
                                 'response': response_body
                             })
                             continue
                         
                         # 验证返回码
-                        expected_code = case.expected_response.get('code', '000000')
-                        if str(response_body['code']) != str(expected_code):
-                            print(f"测试失败: 业务返回码错误，预期: {expected_code}，实际: {response_body['code']}")
+                        if validator.check_code(response_body) is not None:
+                            print(f"测试失败: 业务返回码错误，预期: {validator.code}，实际: {response_body['code']}")
                             case.status = TestStatus.FAILED
                             test_results['fail'] += 1
                             test_results['failed_cases'].append({
@@ -247,42 +306,24 @@ class TestConfigManager(unittest.TestCase):
                                 self.channel_private_key
                             )
                             # 解析解密后的JSON数据
-                            decrypted_json = json.loads(decrypted_data)
-                            print(f"解密后的action数据: {decrypted_json['success'],decrypted_json['message']}")
-                            print(f"预期数据: {case.expected_data['success']}")
+                            decrypted_json = json_codec.loads(decrypted_data)
                             
-                            # 验证解密后的数据结构是否符合预期
-                            if case.expected_data['success'] != decrypted_json['success']:
-                                print(f"测试失败: 响应数据与预期不符")
+                            # 验证解密后的数据是否符合预期（还款的 success、初筛的 checkLoan 等按用例的 expected_data 校验）
+                            mismatches = validator.check_data(decrypted_json)
+                            if mismatches:
+                                for mismatch in mismatches:
+                                    print(f"测试失败: {mismatch.message}")
                                 case.status = TestStatus.FAILED
                                 test_results['fail'] += 1
                                 test_results['failed_cases'].append({
                                     'case_id': case.case_id,
                                     'name': case.name,
-                                    'error': '响应数据与预期不符',
+                                    'error': mismatches[0].message,
+                                    'failures': [mismatch.to_dict() for mismatch in mismatches],
                                     'expected': case.expected_data,
                                     'actual': decrypted_json
                                 })
                                 continue
-
-                            # # 解析解密后的JSON数据--初筛
-                            # decrypted_json = json.loads(decrypted_data)
-                            # print(f"解密后的action数据: {decrypted_json['checkLoan']}")
-                            # print(f"预期数据: {case.expected_data['checkLoan']}")
-                            
-                            # # 验证解密后的数据结构是否符合预期
-                            # if case.expected_data['checkLoan'] != decrypted_json['checkLoan']:
-                            #     print(f"测试失败: 响应数据与预期不符")
-                            #     case.status = TestStatus.FAILED
-                            #     test_results['fail'] += 1
-                            #     test_results['failed_cases'].append({
-                            #         'case_id': case.case_id,
-                            #         'name': case.name,
-                            #         'error': '响应数据与预期不符',
-                            #         'expected': case.expected_data,
-                            #         'actual': decrypted_json
-                            #     })
-                            #     continue
                     
                             print(f"测试通过: 状态码 {response.status_code}, 响应数据解密成功且符合预期")
                             case.status = TestStatus.PASSED
@@ -337,6 +378,9 @@ class TestConfigManager(unittest.TestCase):
             
             # test_results['total'] += 1
         
+        test_results['requests'] = collect_results(execution_order, responses, test_results['failed_cases'])
+        test_results['retry_stats'] = client.retry_stats.to_dict()
+        test_results['attempts'] = test_results['retry_stats']['attempts']
         client.close()
         
         # 输出测试报告（只打印一次）
@@ -344,6 +388,8 @@ class TestConfigManager(unittest.TestCase):
         print(f"总用例数: {test_results['total']}")
         print(f"通过用例数: {test_results['pass']}")
         print(f"失败用例数: {test_results['fail']}")
+        print(f"请求尝试次数: {test_results['attempts']} (重试 {test_results['retry_stats']['retries']} 次, 对冲 {test_results['retry_stats']['hedges']} 次)")
+        print(f"请求耗时: {test_results['server_time']:.3f}s, 限流等待: {test_results['throttle_wait']:.3f}s")
         
         if test_results['failed_cases']:
             print("\n失败用例详情:")
@@ -356,6 +402,8 @@ class TestConfigManager(unittest.TestCase):
         # 断言测试结果
         # self.assertEqual(test_results['fail'], 0, f"有 {test_results['fail']} 个测试用例失败")
 
+        return test_results
+
     @staticmethod
     def generate_random_id_number():
         """生成随机的18位身份证号码
@@ -13,7 +13,14 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from network.http_client import HttpClient
 from ai.ai_service import AIService
+from util import json_codec
 from util.rsa_util import RSAEncrypUtil
+from perf.engine import LoadEngine
+from perf.executor import SuiteExecutor, collect_results
+from perf.profile import LoadProfile
+from perf.report import print_failures, print_report
+from perf.stats import StatsCollector
+from perf.thresholds import DEFAULT_THRESHOLDS, Thresholds, print_verdict
 from .test_suite import TestSuite
 from .test_case import TestCase, TestStatus
 
@@ -118,12 +125,19 @@ class TestConfigManager(unittest.TestCase):
             'total_cases': 0,         # 所有执行中的用例总数
             'passed_cases': 0,        # 所有执行中通过的用例数
             'failed_cases': 0,        # 所有执行中失败的用例数
-            'failed_case_details': [] # 失败用例的详细信息
+            'attempts': 0,            # 实际发送的请求数（含重试和对冲）
+            'retries': 0,             # 重试次数
+            'hedges': 0,              # 对冲请求次数
+            'request_errors': {},     # 按错误类型统计的请求异常
+            'server_time': 0.0,       # 请求耗时合计（秒，不含限流等待）
+            'throttle_wait': 0.0      # 限流等待时间合计（秒）
         }
         
         print(f"\n开始并发执行测试套件: {self.test_suite.name}")
         print(f"重复次数: {repeat_times}, 并发线程数: {max_workers}")
         print(f"预期总执行次数: {expected_total_runs}")
+        stats = StatsCollector()
+        started_at = time.time()
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [
@@ -138,19 +152,28 @@ class TestConfigManager(unittest.TestCase):
                     total_results['total_cases'] += result['total']
                     total_results['passed_cases'] += result['pass']
                     total_results['failed_cases'] += result['fail']
+                    retry_stats = result['retry_stats']
+                    total_results['attempts'] += retry_stats['attempts']
+                    total_results['retries'] += retry_stats['retries']
+                    total_results['hedges'] += retry_stats['hedges']
+                    total_results['server_time'] += result['server_time']
+                    total_results['throttle_wait'] += result['throttle_wait']
+                    for request_result in result['requests']:
+                        stats.record('concurrent', request_result)
+                    for kind, count in retry_stats['errors'].items():
+                        total_results['request_errors'][kind] = total_results['request_errors'].get(kind, 0) + count
                     
                     # 如果这次执行所有用例都通过
                     if result['fail'] == 0:
                         total_results['successful_runs'] += 1
                     else:
                         total_results['failed_runs'] += 1
-                        # 添加失败用例详情
-                        total_results['failed_case_details'].extend(result['failed_cases'])
                         
                 except Exception as e:
                     print(f"执行出错: {str(e)}")
                     total_results['total_runs'] += 1
                     total_results['failed_runs'] += 1
+        stats.mark_stage('concurrent', started_at, time.time())
         
         # 打印总体执行报告
         print("\n并发执行总报告==================================")
@@ -165,29 +188,64 @@ class TestConfigManager(unittest.TestCase):
         print(f"用例通过次数: {total_results['passed_cases']}")
         print(f"用例失败次数: {total_results['failed_cases']}")
         print(f"用例通过率: {(total_results['passed_cases'] / total_results['total_cases'] * 100):.2f}%")
+        print(f"请求尝试次数: {total_results['attempts']}")
+        print(f"重试次数: {total_results['retries']}, 对冲请求次数: {total_results['hedges']}")
+        if total_results['attempts']:
+            print(f"平均请求耗时: {total_results['server_time'] / total_results['attempts'] * 1000:.1f}ms, "
+                  f"平均限流等待: {total_results['throttle_wait'] / total_results['attempts'] * 1000:.1f}ms")
+        if total_results['request_errors']:
+            print(f"请求异常分类: {total_results['request_errors']}")
         
-        if total_results['failed_case_details']:
-            print("\n失败用例详情:")
-            for case in total_results['failed_case_details']:
-                print(f"用例ID: {case['case_id']}")
-                print(f"用例名称: {case['name']}")
-                print(f"错误信息: {case['error']}")
-                print("------------------------")
+        # 失败按指纹分组，只保留计数与少量示例，长时间运行时内存不随失败数增长
+        report = stats.report()
+        if report['failures']:
+            print_failures(report['failures'])
         
-        # 使用断言确保测试结果符合预期
-        self.assertGreater(total_results['successful_runs'] / total_results['total_runs'], 0.8, 
-                          "并发测试成功率低于80%")
+        # 按套件 thresholds 判定（未配置时要求用例通过率高于80%）
+        latency = report['total']['latency_ms']
+        print(f"请求延迟: p50 {latency['p50']:.1f}ms, p95 {latency['p95']:.1f}ms, p99 {latency['p99']:.1f}ms")
+        verdict = self.get_thresholds().evaluate(report)
+        print_verdict(verdict)
+        self.assertTrue(verdict['passed'], "并发测试未达到阈值要求")
         
+    def test_load_profile(self):
+        """按套件YAML中的 load_profile 执行分阶段压测"""
+        if not self.test_suite.load_profile:
+            self.skipTest("套件未配置 load_profile")
+        executor = SuiteExecutor(
+            self.test_suite,
+            channel_private_key=self.channel_private_key,
+            platform_public_key=self.platform_public_key
+        )
+        engine = LoadEngine(
+            executor,
+            LoadProfile.from_config(self.test_suite.load_profile),
+            thresholds=self.get_thresholds()
+        )
+        report = engine.run()
+        print_report(report)
+
+        self.assertGreater(report['total']['requests'], 0, "压测未产生任何请求")
+        self.assertTrue(report['thresholds']['passed'], "压测未达到阈值要求")
+
+    def get_thresholds(self):
+        """套件配置的通过标准，未配置时使用默认标准"""
+        return Thresholds.from_config(self.test_suite.thresholds or DEFAULT_THRESHOLDS)
+
     def execute_test_suite(self, timeout=30):
         """执行测试套件"""
         execution_order = self.test_suite.get_execution_order()
-        client = HttpClient(timeout=timeout)
+        client = HttpClient(timeout=timeout, capture_headers=False, limiter=self.test_suite.get_limiter())
         test_results = {
             'total': len(execution_order),
             'pass': 0,
             'fail': 0,
-            'failed_cases': []
+            'failed_cases': [],
+            'attempts': 0,            # 实际发送的请求数（含重试和对冲）
+            'server_time': 0.0,       # 请求耗时合计（秒，不含限流等待）
+            'throttle_wait': 0.0      # 限流等待时间合计（秒）
         }
+        responses = {}
         
         print(f"\n开始执行测试套件: {self.test_suite.name}")
         
@@ -221,7 +279,7 @@ class TestConfigManager(unittest.TestCase):
                         print(f"对应的出生日期: {birth_date}")
                     
                     if isinstance(case.body['data'], dict):
-                        data_str = json.dumps(case.body['data'], separators=(',', ':'))
+                        data_str = json_codec.dumps_str(case.body['data'])
                         print(f"加密前的消息体: {data_str}")
                         
                         current_timestamp = int(time.time() * 1000)
@@ -238,32 +296,36 @@ class TestConfigManager(unittest.TestCase):
                         )
                 
                 # 执行请求
+                request_start = time.time()
                 if case.method == "GET":
                     response = client.get(
                         url=api_path,
                         headers=case.headers,
-                        params=case.params
+                        params=case.params,
+                        retry_policy=self.test_suite.get_retry_policy(case_id),
+                        case_id=case_id
                     )
                 elif case.method == "POST":
                     response = client.post(
                         url=api_path,
                         headers=case.headers,
-                        body=case.body
+                        body=case.body,
+                        retry_policy=self.test_suite.get_retry_policy(case_id),
+                        case_id=case_id
                     )
+                responses[case_id] = (request_start, api_path, response)
+                test_results['server_time'] += response.elapsed
+                test_results['throttle_wait'] += response.throttle_wait
                 
                 # 验证响应
                 if response.status_code == case.expected_status:
-                    response_body = json.loads(response.body)
-                    
-                    # 验证响应格式
-                    required_keys = ['code', 'data', 'sign']
-                    if not all(key in response_body for key in required_keys):
-                        raise ValueError("响应格式不符合要求")
+                    response_body = response.json()
+                    validator = self.test_suite.get_validator(case_id)
                     
-                    # 验证返回码
-                    expected_code = case.expected_response.get('code', '000000')
-                    if str(response_body['code']) != str(expected_code):
-                        raise ValueError(f"业务返回码错误: {response_body['code']}")
+                    # 验证响应格式与返回码
+                    failure = validator.check_format(response_body) or validator.check_code(response_body)
+                    if failure is not None:
+                        raise ValueError(failure.message)
                     
                     # 验证签名和处理响应数据
                     response_data = response_body['data']
@@ -281,10 +343,11 @@ class TestConfigManager(unittest.TestCase):
                         response_body['data'],
                         self.channel_private_key
                     )
-                    decrypted_json = json.loads(decrypted_data)
+                    decrypted_json = json_codec.loads(decrypted_data)
                     
-                    if case.expected_data['success'] != decrypted_json['success']:
-                        raise ValueError("响应数据与预期不符")
+                    mismatches = validator.check_data(decrypted_json)
+                    if mismatches:
+                        raise ValueError("; ".join(failure.message for failure in mismatches))
                     
                     print(f"测试通过: {case.name}")
                     case.status = TestStatus.PASSED
@@ -304,6 +367,9 @@ class TestConfigManager(unittest.TestCase):
                     'error': error_msg
                 })
         
+        test_results['requests'] = collect_results(execution_order, responses, test_results['failed_cases'])
+        test_results['retry_stats'] = client.retry_stats.to_dict()
+        test_results['attempts'] = test_results['retry_stats']['attempts']
         client.close()
         
         # 打印测试报告
@@ -311,6 +377,8 @@ class TestConfigManager(unittest.TestCase):
         print(f"总用例数: {test_results['total']}")
         print(f"通过用例数: {test_results['pass']}")
         print(f"失败用例数: {test_results['fail']}")
+        print(f"请求尝试次数: {test_results['attempts']} (重试 {test_results['retry_stats']['retries']} 次, 对冲 {test_results['retry_stats']['hedges']} 次)")
+        print(f"请求耗时: {test_results['server_time']:.3f}s, 限流等待: {test_results['throttle_wait']:.3f}s")
         
         if test_results['failed_cases']:
             print("\n失败用例详情:")
@@ -28,6 +28,12 @@ class TestCase:
         expected_response: 预期响应
         timeout: 超时时间
         dependencies: 依赖的用例ID列表
+        retry: 用例级重试策略，覆盖套件级配置（整数表示重试次数）
+        think_time: 压测时执行本用例后的思考时间，覆盖套件级配置（时长或分布）
+        extract: 变量名 -> 解密后响应数据中的路径（如 $.loans[0].loanId），压测时提取到VU上下文
+        once: 压测时每个VU只执行一次（成功后不再执行），如用户检查
+        setup: 压测时每次执行本用例之前运行的钩子（不计入统计）
+        teardown: 压测时每次执行本用例之后运行的钩子（不计入统计）
         status: 用例执行状态
     """
     case_id: str
@@ -43,6 +49,12 @@ class TestCase:
     expected_data: Optional[Dict[str, Any]] = None
     timeout: int = 30
     dependencies: List[str] = None
+    retry: Optional[Any] = None
+    think_time: Optional[Any] = None
+    extract: Optional[Dict[str, str]] = None
+    once: bool = False
+    setup: Optional[Any] = None
+    teardown: Optional[Any] = None
     status: TestStatus = TestStatus.PENDING
     
     def __post_init__(self):
@@ -1,9 +1,14 @@
+import threading
 import yaml
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional
 import json
 from pathlib import Path
 from .test_case import TestCase, TestStatus
+from .validators import DECRYPT, ResponseValidator, ValidationFailure
+from network.retry_policy import RetryPolicy
+from network.rate_limiter import TrafficLimiter
+from util import json_codec
 
 @dataclass
 class TestSuite:
@@ -14,11 +19,33 @@ class TestSuite:
         description: 套件描述
         cases: 测试用例字典
         variables: 变量字典
+        retry: 套件级重试策略配置
+        limits: 全局/接口/用例的限流与并发配置
+        load_profile: 负载模型配置（阶段、目标VU数或到达速率）
+        thresholds: 压测通过标准（整体与用例级的延迟、失败率、吞吐量、校验通过率阈值）
+        think_time: 压测时每个用例之后的默认思考时间（时长或分布）
+        pacing: 压测时同一VU相邻两次迭代开始时间的最小间隔（时长或分布）
+        setup: 压测时按 run / worker / vu / iteration 范围运行的准备钩子
+        teardown: 压测时按范围运行的清理钩子
+        path: 套件文件路径，钩子函数所在的模块从其目录中查找
     """
     name: str
     description: str
     cases: Dict[str, TestCase]
     variables: Dict[str, Any] = field(default_factory=dict)
+    retry: Any = None
+    limits: Dict[str, Any] = field(default_factory=dict)
+    load_profile: Dict[str, Any] = field(default_factory=dict)
+    thresholds: Dict[str, Any] = field(default_factory=dict)
+    think_time: Any = None
+    pacing: Any = None
+    setup: Any = None
+    teardown: Any = None
+    path: Optional[str] = None
+    _limiter: Optional[TrafficLimiter] = field(default=None, init=False, repr=False)
+    _limiter_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _retry_policies: Dict[str, RetryPolicy] = field(default_factory=dict, init=False, repr=False)
+    _validators: Dict[str, ResponseValidator] = field(default_factory=dict, init=False, repr=False)
     
     @classmethod
     def from_yaml(cls, yaml_path: str) -> 'TestSuite':
@@ -30,16 +57,22 @@ class TestSuite:
                 cases = {}
                 for case_id, case_data in data['test_cases'].items():
                     case_data['case_id'] = case_id
-                    # 移除setup字段，因为TestCase类不需要这个字段
-                    if 'setup' in case_data:
-                        del case_data['setup']
                     cases[case_id] = TestCase(**case_data)
                 
                 return cls(
                     name=data.get('name', 'Default Suite'),
                     description=data.get('description', ''),
                     cases=cases,
-                    variables=data.get('variables', {})
+                    variables=data.get('variables', {}),
+                    retry=data.get('retry'),
+                    limits=data.get('limits') or {},
+                    load_profile=data.get('load_profile') or {},
+                    thresholds=data.get('thresholds') or {},
+                    think_time=data.get('think_time'),
+                    pacing=data.get('pacing'),
+                    setup=data.get('setup'),
+                    teardown=data.get('teardown'),
+                    path=yaml_path
                 )
         except Exception as e:
             raise ValueError(f"加载测试套件失败: {str(e)}")
@@ -67,6 +100,24 @@ class TestSuite:
         
         return order
     
+    def get_retry_policy(self, case_id: str) -> RetryPolicy:
+        """获取用例的重试策略（套件级配置被用例级配置覆盖），结果按用例缓存"""
+        policy = self._retry_policies.get(case_id)
+        if policy is None:
+            suite_policy = RetryPolicy.from_config(self.retry)
+            policy = RetryPolicy.from_config(self.cases[case_id].retry, base=suite_policy)
+            self._retry_policies[case_id] = policy
+        return policy
+
+    def get_limiter(self) -> Optional[TrafficLimiter]:
+        """获取套件共享的限流器，未配置 limits 时返回 None"""
+        if self._limiter is None and self.limits:
+            # 多个执行线程同时首次获取时只构建一个，否则各自的限流器互不约束
+            with self._limiter_lock:
+                if self._limiter is None:
+                    self._limiter = TrafficLimiter.from_config(self.limits)
+        return self._limiter
+
     def resolve_variables(self, text: str) -> str:
         """解析变量引用"""
         if not isinstance(text, str):
@@ -120,7 +171,7 @@ class TestSuite:
             # 对data字段进行加密
             if 'data' in case.body and isinstance(case.body['data'], dict):
                 # 先将data字段转换为JSON字符串
-                data_str = json.dumps(case.body['data'], separators=(',', ':'))
+                data_str = json_codec.dumps_str(case.body['data'])
                 # 对data字段进行加密
                 case.body['data'] = self._encrypt_data(data_str)
                 # 生成签名
@@ -148,52 +199,26 @@ class TestSuite:
                     elif isinstance(item, dict):
                         self._resolve_dict_variables(item)
     
-    def _verify_response_data(self, actual_data: Dict[str, Any], expected_data: Dict[str, Any]) -> bool:
-        """验证响应数据是否符合预期"""
-        if not expected_data:
-            return True
-            
-        try:
-            for key, expected_value in expected_data.items():
-                if key not in actual_data:
-                    print(f"响应数据缺少字段: {key}")
-                    return False
-                
-                actual_value = actual_data[key]
-                if expected_value is None:
-                    if actual_value is not None:
-                        print(f"字段 {key} 预期为 None，实际为: {actual_value}")
-                        return False
-                elif actual_value != expected_value:
-                    print(f"字段 {key} 值不匹配，预期: {expected_value}，实际: {actual_value}")
-                    return False
-            
-            return True
-        except Exception as e:
-            print(f"验证响应数据时发生错误: {str(e)}")
-            return False
-    
-    def validate_response(self, case: TestCase, response_data: Dict[str, Any]) -> bool:
-        """验证响应数据"""
-        # 验证业务状态码
-        if case.expected_response:
-            expected_code = case.expected_response.get('code')
-            actual_code = response_data.get('code')
-            if expected_code and str(actual_code) != str(expected_code):
-                print(f"业务状态码不匹配，预期: {expected_code}，实际: {actual_code}")
-                return False
-        
-        # 验证业务数据
-        if case.expected_data:
-            decrypted_data = response_data.get('data', {})
-            if isinstance(decrypted_data, str):
-                try:
-                    decrypted_data = json.loads(decrypted_data)
-                except json.JSONDecodeError:
-                    print("解密后的数据不是有效的JSON格式")
-                    return False
-            
-            if not self._verify_response_data(decrypted_data, case.expected_data):
-                return False
-        
-        return True
+    def get_validator(self, case_id: str) -> ResponseValidator:
+        """获取用例的响应校验器（expected_response 与 expected_data 编译而成），结果按用例缓存"""
+        validator = self._validators.get(case_id)
+        if validator is None:
+            validator = ResponseValidator.from_case(self.cases[case_id])
+            self._validators[case_id] = validator
+        return validator
+
+    def validate_response(self, case: TestCase, response_data: Dict[str, Any]) -> List[ValidationFailure]:
+        """验证业务返回码与业务数据（data 为解密后的JSON字符串或字典），返回失败记录，通过时为空列表"""
+        validator = self.get_validator(case.case_id)
+        failure = validator.check_code(response_data)
+        if failure is not None:
+            return [failure]
+
+        decrypted_data = response_data.get('data', {})
+        if isinstance(decrypted_data, str):
+            try:
+                decrypted_data = json_codec.loads(decrypted_data)
+            except ValueError as e:
+                return [ValidationFailure(DECRYPT, '$.data', 'type', 'object', decrypted_data,
+                                          f"解密后的数据不是有效的JSON格式: {e}")]
+        return validator.check_data(decrypted_data)
@@ -0,0 +1,391 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# 校验环节，与 perf.failures 中的同名常量一致
+FORMAT = "format"
+CODE = "code"
+DECRYPT = "decrypt"
+DATA = "data"
+
+REQUIRED_KEYS = ('code', 'data', 'sign')
+DEFAULT_CODE = '000000'
+
+_PATH_TOKEN = re.compile(r"\.([^.\[\]]+)|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+_MISSING = object()
+
+# 规则名 -> 类型；整数与数值不接受布尔值
+_TYPES = {
+    'string': (str,), 'str': (str,),
+    'integer': (int,), 'int': (int,),
+    'number': (int, float), 'float': (int, float),
+    'boolean': (bool,), 'bool': (bool,),
+    'object': (dict,), 'dict': (dict,),
+    'array': (list,), 'list': (list,),
+    'null': (type(None),),
+}
+RULE_KEYS = frozenset({'eq', 'ne', 'type', 'regex', 'min', 'max', 'in', 'min_len', 'max_len', 'exists', 'schema'})
+
+Path = Tuple[Union[str, int], ...]
+# 编译后的检查：(值, 路径文本, 失败列表)，不通过时向列表追加失败记录
+Check = Callable[[Any, str, List['ValidationFailure']], None]
+
+
+def compile_path(expr: str) -> Path:
+    """把 $.loans[0].loanId 形式的路径编译为键与下标的序列，$ 与开头的 . 可以省略"""
+    text = expr.strip()
+    if text.startswith('$'):
+        text = text[1:]
+    if text and not text.startswith(('.', '[')):
+        text = '.' + text
+    path = []
+    position = 0
+    for match in _PATH_TOKEN.finditer(text):
+        if match.start() != position:
+            break
+        key, index, quoted = match.groups()
+        path.append(int(index) if index is not None else key if key is not None else quoted)
+        position = match.end()
+    if position != len(text) or not path:
+        raise ValueError(f"无效的路径: {expr}")
+    return tuple(path)
+
+
+def _lookup(data: Any, path: Path) -> Any:
+    """按路径取值，路径不存在时返回 _MISSING"""
+    value = data
+    for step in path:
+        if isinstance(step, int) and isinstance(value, list) and -len(value) <= step < len(value):
+            value = value[step]
+        elif isinstance(value, dict) and step in value:
+            value = value[step]
+        else:
+            return _MISSING
+    return value
+
+
+def _type_name(value: Any) -> str:
+    if value is _MISSING:
+        return '不存在'
+    return {bool: 'boolean', int: 'integer', float: 'number', str: 'string',
+            dict: 'object', list: 'array', type(None): 'null'}.get(type(value), type(value).__name__)
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if isinstance(value, bool) and name in ('integer', 'int', 'number', 'float'):
+        return False
+    return isinstance(value, _TYPES[name])
+
+
+@dataclass(frozen=True)
+class ValidationFailure:
+    """一条校验失败记录
+
+    属性:
+        stage: 校验环节（format/code/decrypt/data）
+        path: 失败的字段路径（如 $.loans[0].status），整个响应为 $
+        rule: 未通过的规则（eq/type/regex/min/exists 等）
+        expected: 规则的预期值
+        actual: 实际值，字段不存在时为 None
+        message: 失败原因，以校验环节的前缀开头，可直接作为运行器的错误信息
+    """
+    stage: str
+    path: str
+    rule: str
+    expected: Any
+    actual: Any
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stage': self.stage, 'path': self.path, 'rule': self.rule,
+                'expected': self.expected, 'actual': self.actual, 'message': self.message}
+
+
+_RULE_TEXT = {
+    'eq': '预期 {expected!r}，实际 {actual!r}',
+    'ne': '不应为 {expected!r}',
+    'type': '类型应为 {expected}，实际为 {actual_type}',
+    'regex': '{actual!r} 不匹配 {expected}',
+    'min': '{actual!r} 小于 {expected!r}',
+    'max': '{actual!r} 大于 {expected!r}',
+    'exclusive_min': '{actual!r} 应大于 {expected!r}',
+    'exclusive_max': '{actual!r} 应小于 {expected!r}',
+    'in': '{actual!r} 不在 {expected!r} 中',
+    'min_len': '长度 {length} 小于 {expected}',
+    'max_len': '长度 {length} 大于 {expected}',
+    'exists': '字段不存在',
+    'absent': '字段不应存在',
+    'additional': '不允许的字段 {expected}',
+}
+
+
+def _fail(out: List[ValidationFailure], path: str, rule: str, expected: Any, actual: Any) -> None:
+    text = _RULE_TEXT[rule].format(
+        expected=expected, actual=actual, actual_type=_type_name(actual),
+        length=len(actual) if hasattr(actual, '__len__') else '-'
+    )
+    if actual is _MISSING:
+        actual = None
+    out.append(ValidationFailure(DATA, path, 'exists' if rule == 'absent' else rule, expected, actual,
+                                 f"响应数据与预期不符: {path} {text}"))
+
+
+def _compare(rule: str, expected: Any, test: Callable[[Any], bool], type_name: Optional[str] = None) -> Check:
+    """比较类规则：值不可比较（如字符串与数字比大小）时记为 type 失败，type_name 为可比较的类型，
+    默认按预期值推断（数值统一为 number）"""
+    if type_name is None:
+        numeric = isinstance(expected, (int, float)) and not isinstance(expected, bool)
+        type_name = 'number' if numeric else _type_name(expected)
+
+    def check(value, path, out):
+        try:
+            passed = test(value)
+        except TypeError:
+            _fail(out, path, 'type', type_name, value)
+            return
+        if not passed:
+            _fail(out, path, rule, expected, value)
+    return check
+
+
+def _type_check(names: Union[str, List[str]]) -> Check:
+    names = [names] if isinstance(names, str) else list(names)
+    unknown = [name for name in names if name not in _TYPES]
+    if unknown:
+        raise ValueError(f"未知的类型: {', '.join(unknown)}，可用 {'/'.join(sorted(_TYPES))}")
+    expected = '/'.join(names)
+
+    def check(value, path, out):
+        if not any(_is_type(value, name) for name in names):
+            _fail(out, path, 'type', expected, value)
+    return check
+
+
+def _regex_check(pattern: str) -> Check:
+    compiled = re.compile(pattern)
+
+    def check(value, path, out):
+        if not isinstance(value, str) or compiled.search(value) is None:
+            _fail(out, path, 'regex', pattern, value)
+    return check
+
+
+def _length_check(rule: str, limit: int) -> Check:
+    if rule == 'min_len':
+        return _compare(rule, limit, lambda value: len(value) >= limit, 'string/array/object')
+    return _compare(rule, limit, lambda value: len(value) <= limit, 'string/array/object')
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """把 JSON Schema 的子集编译为检查函数
+
+    支持 type、enum、const、pattern、minimum、maximum、exclusiveMinimum、exclusiveMaximum、
+    minLength、maxLength、minItems、maxItems、required、properties、items、additionalProperties: false。
+    与 JSON Schema 相同，类型相关的关键字只作用于对应类型的值（如 minimum 不检查字符串），类型由 type 约束。
+    """
+    if not isinstance(schema, dict):
+        raise ValueError(f"schema 应为字典: {schema}")
+    checks: List[Check] = []
+    if 'type' in schema:
+        checks.append(_type_check(schema['type']))
+    if 'const' in schema:
+        const = schema['const']
+        checks.append(_compare('eq', const, lambda value: value == const))
+    if 'enum' in schema:
+        enum = list(schema['enum'])
+        checks.append(_compare('in', enum, lambda value: value in enum))
+
+    string_checks: List[Check] = []
+    if 'pattern' in schema:
+        string_checks.append(_regex_check(schema['pattern']))
+    if 'minLength' in schema:
+        string_checks.append(_length_check('min_len', schema['minLength']))
+    if 'maxLength' in schema:
+        string_checks.append(_length_check('max_len', schema['maxLength']))
+
+    number_checks: List[Check] = []
+    for keyword, rule, test in (
+        ('minimum', 'min', lambda limit: lambda value: value >= limit),
+        ('maximum', 'max', lambda limit: lambda value: value <= limit),
+        ('exclusiveMinimum', 'exclusive_min', lambda limit: lambda value: value > limit),
+        ('exclusiveMaximum', 'exclusive_max', lambda limit: lambda value: value < limit),
+    ):
+        if keyword in schema:
+            number_checks.append(_compare(rule, schema[keyword], test(schema[keyword])))
+
+    array_checks: List[Check] = []
+    if 'minItems' in schema:
+        array_checks.append(_length_check('min_len', schema['minItems']))
+    if 'maxItems' in schema:
+        array_checks.append(_length_check('max_len', schema['maxItems']))
+    if 'items' in schema:
+        item_check = compile_schema(schema['items'])
+
+        def check_items(value, path, out):
+            for index, item in enumerate(value):
+                item_check(item, f"{path}[{index}]", out)
+        array_checks.append(check_items)
+
+    object_checks: List[Check] = []
+    required = list(schema.get('required') or [])
+    properties = {name: compile_schema(item) for name, item in (schema.get('properties') or {}).items()}
+    if required:
+        def check_required(value, path, out):
+            for name in required:
+                if name not in value:
+                    _fail(out, f"{path}.{name}", 'exists', True, _MISSING)
+        object_checks.append(check_required)
+    if properties:
+        def check_properties(value, path, out):
+            for name, item_check in properties.items():
+                if name in value:
+                    item_check(value[name], f"{path}.{name}", out)
+        object_checks.append(check_properties)
+    if schema.get('additionalProperties') is False:
+        allowed = set(properties)
+
+        def check_additional(value, path, out):
+            for name in value:
+                if name not in allowed:
+                    _fail(out, path, 'additional', name, value[name])
+        object_checks.append(check_additional)
+
+    def check(value, path, out):
+        for item in checks:
+            item(value, path, out)
+        if string_checks and isinstance(value, str):
+            for item in string_checks:
+                item(value, path, out)
+        elif number_checks and isinstance(value, (int, float)) and not isinstance(value, bool):
+            for item in number_checks:
+                item(value, path, out)
+        elif array_checks and isinstance(value, list):
+            for item in array_checks:
+                item(value, path, out)
+        elif object_checks and isinstance(value, dict):
+            for item in object_checks:
+                item(value, path, out)
+    return check
+
+
+def is_rule(spec: Any) -> bool:
+    """非空且只含规则关键字的字典为规则，其余的值（含普通字典）按相等比较"""
+    return isinstance(spec, dict) and bool(spec) and set(spec) <= RULE_KEYS
+
+
+def compile_rule(spec: Any) -> Tuple[Check, bool]:
+    """把一个字段的预期编译为检查函数，返回 (检查函数, 字段不存在是否算通过)"""
+    if not is_rule(spec):
+        return _compare('eq', spec, lambda value: value == spec), False
+    exists = spec.get('exists', True)
+    if not exists:
+        if len(spec) > 1:
+            raise ValueError(f"exists: false 不能与其他规则同时使用: {spec}")
+
+        def absent(value, path, out):
+            _fail(out, path, 'absent', False, value)
+        return absent, True
+
+    checks: List[Check] = []
+    if 'eq' in spec:
+        expected = spec['eq']
+        checks.append(_compare('eq', expected, lambda value: value == expected))
+    if 'ne' in spec:
+        unexpected = spec['ne']
+        checks.append(_compare('ne', unexpected, lambda value: value != unexpected))
+    if 'type' in spec:
+        checks.append(_type_check(spec['type']))
+    if 'regex' in spec:
+        checks.append(_regex_check(spec['regex']))
+    if 'min' in spec:
+        low = spec['min']
+        checks.append(_compare('min', low, lambda value: value >= low))
+    if 'max' in spec:
+        high = spec['max']
+        checks.append(_compare('max', high, lambda value: value <= high))
+    if 'in' in spec:
+        choices = list(spec['in'])
+        checks.append(_compare('in', choices, lambda value: value in choices))
+    if 'min_len' in spec:
+        checks.append(_length_check('min_len', spec['min_len']))
+    if 'max_len' in spec:
+        checks.append(_length_check('max_len', spec['max_len']))
+    if 'schema' in spec:
+        checks.append(compile_schema(spec['schema']))
+    if len(checks) == 1:
+        return checks[0], False
+
+    def check(value, path, out):
+        for item in checks:
+            item(value, path, out)
+    return check, False
+
+
+class ResponseValidator:
+    """用例预期编译得到的响应校验器，每个用例编译一次，校验时不再解释配置，也不打印
+
+    expected_response 中校验 code（未配置时为 000000，按字符串比较），其余字段只作说明。
+    expected_data 校验解密后的响应数据，每项的键为字段名或以 $ 开头的嵌套路径，值为预期值或规则::
+
+        expected_data:
+          success: true                              # 相等（null 表示字段存在且为 null）
+          $.loans[0].status: {in: [1, 2]}            # 嵌套路径
+          userId: {type: string, regex: "^U\\d+$"}
+          amount: {type: number, min: 100, max: 50000}
+          rejectReason: {exists: false}              # 字段不应存在
+          loans: {schema: {type: array, minItems: 1, items: {type: object, required: [loanId]}}}
+
+    规则: eq / ne / type / regex / min / max / in / min_len / max_len / exists / schema（JSON Schema 子集）。
+    只含这些关键字的字典视为规则，需要比较这样的字典时写成 {eq: {...}}。
+
+    属性:
+        code: 预期的业务返回码
+    """
+    __slots__ = ('code', '_checks')
+
+    def __init__(self, expected_response: Optional[Dict[str, Any]] = None,
+                 expected_data: Optional[Dict[str, Any]] = None):
+        self.code = str((expected_response or {}).get('code', DEFAULT_CODE))
+        self._checks: List[Tuple[str, Path, Check, bool]] = []
+        for key, spec in (expected_data or {}).items():
+            key = str(key)
+            path = compile_path(key) if key.startswith('$') else (key,)
+            text = key if key.startswith('$') else f"$.{key}"
+            check, optional = compile_rule(spec)
+            self._checks.append((text, path, check, optional))
+
+    @classmethod
+    def from_case(cls, case) -> 'ResponseValidator':
+        return cls(case.expected_response, case.expected_data)
+
+    def check_format(self, body: Any) -> Optional[ValidationFailure]:
+        """响应体应为含 code、data、sign 的JSON对象"""
+        if not isinstance(body, dict):
+            return ValidationFailure(FORMAT, '$', 'type', 'object', None,
+                                     f"响应格式不符合要求: 应为JSON对象，实际为 {_type_name(body)}")
+        missing = [key for key in REQUIRED_KEYS if key not in body]
+        if missing:
+            return ValidationFailure(FORMAT, '$', 'exists', list(REQUIRED_KEYS), sorted(body),
+                                     f"响应格式不符合要求: 缺少字段 {', '.join(missing)}")
+        return None
+
+    def check_code(self, body: Dict[str, Any]) -> Optional[ValidationFailure]:
+        actual = str(body.get('code'))
+        if actual != self.code:
+            return ValidationFailure(CODE, '$.code', 'eq', self.code, actual, f"业务返回码错误: {actual}")
+        return None
+
+    def check_data(self, data: Any) -> List[ValidationFailure]:
+        """校验解密后的响应数据，返回全部失败记录，通过时为空列表"""
+        out: List[ValidationFailure] = []
+        for text, path, check, optional in self._checks:
+            if len(path) == 1:
+                value = data.get(path[0], _MISSING) if isinstance(data, dict) else _MISSING
+            else:
+                value = _lookup(data, path)
+            if value is _MISSING:
+                if not optional:
+                    _fail(out, text, 'exists', True, _MISSING)
+            else:
+                check(value, text, out)
+        return out
@@ -0,0 +1,58 @@
+import json
+from typing import Any, Union
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# 按 orjson、msgspec、标准库 json 的顺序选择可用的实现，输出统一为紧凑的 UTF-8 字节（不转义非 ASCII 字符），
+# 快速实现不支持的值（如超过 64 位的整数）回退到标准库
+try:
+    import orjson  # 可选依赖
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        """序列化为紧凑的 UTF-8 字节"""
+        try:
+            return orjson.dumps(obj, option=_OPTIONS)
+        except TypeError:
+            return _std_dumps(obj)
+
+    loads = orjson.loads
+    BACKEND = 'orjson'
+except ImportError:
+    try:
+        import msgspec  # 可选依赖
+
+        _encoder = msgspec.json.Encoder()
+        _decoder = msgspec.json.Decoder()
+
+        def dumps(obj: Any) -> bytes:
+            """序列化为紧凑的 UTF-8 字节"""
+            try:
+                return _encoder.encode(obj)
+            except (TypeError, OverflowError):
+                return _std_dumps(obj)
+
+        def loads(data: Union[bytes, str]) -> Any:
+            try:
+                return _decoder.decode(data)
+            except msgspec.DecodeError as e:
+                # 与标准库和 orjson 一致，解析失败抛出 json.JSONDecodeError
+                doc = data if isinstance(data, str) else bytes(data).decode('utf-8', errors='replace')
+                raise json.JSONDecodeError(str(e), doc, 0) from e
+
+        BACKEND = 'msgspec'
+    except ImportError:
+        dumps = _std_dumps
+        loads = json.loads
+        BACKEND = 'json'
+
+
+def dumps_str(obj: Any) -> str:
+    """序列化为紧凑的字符串，用于加密、签名等需要文本的场合"""
+    return dumps(obj).decode('utf-8')
@@ -1,5 +1,6 @@
 import base64
 import logging
+from functools import lru_cache
 from io import BytesIO
 from typing import Dict, Tuple
 
@@ -17,6 +18,19 @@ ALGORITHM_RSA = 'RSA'
 ALGORITHM_RSA_PRIVATE_KEY_LENGTH = 2048
 ALGORITHM_RSA_SIGN = "SHA256withRSA"
 
+
+@lru_cache(maxsize=32)
+def _load_der_public_key(key: str):
+    """解析Base64编码的DER公钥，按密钥字符串缓存"""
+    return serialization.load_der_public_key(base64.b64decode(key))
+
+
+@lru_cache(maxsize=32)
+def _load_der_private_key(key: str):
+    """解析Base64编码的DER私钥，按密钥字符串缓存（每次解析私钥约几十毫秒，与一次签名相当）"""
+    return serialization.load_der_private_key(base64.b64decode(key), password=None)
+
+
 class RSAEncrypUtil:
 
     @staticmethod
@@ -30,14 +44,8 @@ class RSAEncrypUtil:
         try:
             logger.info(f"开始RSA公钥加密，数据长度：{len(data)}")
             
-            # 解码Base64公钥
-            logger.info("正在解码Base64公钥...")
-            public_key_bytes = base64.b64decode(key)
-            logger.info(f"公钥解码后字节长度：{len(public_key_bytes)}")
-            
-            # 加载公钥
-            logger.info("正在加载DER格式公钥...")
-            public_key = serialization.load_der_public_key(public_key_bytes)
+            # 加载DER格式公钥（已解析过的密钥直接复用）
+            public_key = _load_der_public_key(key)
             
             # 将数据转换为字节
             logger.info("正在将数据转换为字节...")
@@ -137,14 +145,8 @@ class RSAEncrypUtil:
                 encrypted_data += '=' * (4 - missing_padding)
             encrypted_bytes = base64.b64decode(encrypted_data)
             
-            # 解码Base64格式的私钥
-            private_key_bytes = base64.b64decode(private_key)
-            
-            # 使用DER格式加载私钥
-            private_key_obj = serialization.load_der_private_key(
-                private_key_bytes,
-                password=None
-            )
+            # 使用DER格式加载私钥（已解析过的密钥直接复用）
+            private_key_obj = _load_der_private_key(private_key)
             
             # 使用PKCS1v15填充方案进行解密
             decrypted_data = private_key_obj.decrypt(
@@ -155,8 +157,8 @@ class RSAEncrypUtil:
             return decrypted_data.decode(CHARSET)
         except Exception as e:
             print(f"解密失败详细信息: {str(e)}")
-            print(f"加密数据长度: {len(encrypted_bytes)}")
-            print(f"私钥长度: {len(private_key_bytes)}")
+            print(f"加密数据长度: {len(encrypted_data)}")
+            print(f"私钥长度: {len(private_key)}")
             raise RuntimeError(f"解密失败: {str(e)}")
     # def build_rsa_decrypt_by_private_key(data: str, key: str) -> str:
     #     """
@@ -192,9 +194,8 @@ class RSAEncrypUtil:
         :return: RSA私钥签名后的经过Base64编码的字符串
         """
         try:
-            # 直接解码Base64私钥
-            private_key_bytes = base64.b64decode(key)
-            private_key = serialization.load_der_private_key(private_key_bytes, password=None)
+            # 加载Base64编码的DER私钥（已解析过的密钥直接复用）
+            private_key = _load_der_private_key(key)
             
             # 生成签名
             signature = private_key.sign(
@@ -219,9 +220,8 @@ class RSAEncrypUtil:
         :return: 验证结果，True表示验证通过，False表示验证失败
         """
         try:
-            # 解码Base64公钥
-            public_key_bytes = base64.b64decode(key)
-            public_key = serialization.load_der_public_key(public_key_bytes)
+            # 加载Base64编码的DER公钥（已解析过的密钥直接复用）
+            public_key = _load_der_public_key(key)
             
             # 处理URL-safe的Base64编码的签名
             sign = sign.replace('-', '+').replace('_', '/')
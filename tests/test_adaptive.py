@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.adaptive import AdaptiveProfile
+from perf.executor import RequestResult
+from perf.profile import LoadProfile
+
+
+def result(latency=0.01, status_code=200, passed=True):
+    item = RequestResult('case_001', '/api/case_001', 0.0)
+    item.latency = latency
+    item.status_code = status_code
+    item.passed = passed
+    return item
+
+
+class AdaptiveProfileTest(unittest.TestCase):
+    def profile(self, **options):
+        options = dict(dict(duration=100, initial=10, min_vus=2, max_vus=12, increase=1, decrease=0.5, interval=5,
+                            latency_target=0.5), **options)
+        return AdaptiveProfile(**options)
+
+    def window(self, profile, elapsed, results):
+        """喂入一个窗口的结果，在 elapsed 秒时触发调整，返回新的目标VU数"""
+        for item in results:
+            profile.observe(item)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return profile.target_at(elapsed)[1]
+
+    def test_additive_increase_clamped_to_max(self):
+        profile = self.profile()
+        self.assertEqual(profile.target_at(0), ('adaptive', 10))
+        self.assertEqual(self.window(profile, 2, [result()] * 10), 10)
+        self.assertEqual(self.window(profile, 5, [result()] * 10), 11)
+        self.assertEqual(self.window(profile, 10, [result()] * 10), 12)
+        self.assertEqual(self.window(profile, 15, [result()] * 10), 12)
+        self.assertEqual([point['vus'] for point in profile.trajectory], [11, 12, 12])
+        self.assertEqual(profile.trajectory[0]['rps'], 4.0)
+
+    def test_multiplicative_decrease(self):
+        cases = {
+            'timeout': [result()] * 99 + [result(status_code=-1, passed=False)],
+            '5xx': [result()] * 99 + [result(status_code=503)],
+            'error_rate': [result()] * 97 + [result(passed=False)] * 3,
+            'latency': [result()] * 90 + [result(latency=0.8)] * 10,
+        }
+        for reason, results in cases.items():
+            with self.subTest(reason=reason):
+                profile = self.profile()
+                profile.target_at(0)
+                self.assertEqual(self.window(profile, 5, results), 5)
+                self.assertTrue(profile.trajectory[-1]['decreased'])
+                self.assertEqual(self.window(profile, 10, results), 2)
+                self.assertEqual(self.window(profile, 15, results), 2)
+
+    def test_tolerated_errors_and_empty_window(self):
+        profile = self.profile()
+        profile.target_at(0)
+        self.assertEqual(self.window(profile, 5, [result()] * 199 + [result(passed=False)]), 11)
+        # 窗口内没有请求时保持不变
+        self.assertEqual(self.window(profile, 10, []), 11)
+        self.assertFalse(profile.trajectory[-1]['decreased'])
+
+    def test_ends_after_duration(self):
+        profile = self.profile()
+        self.assertEqual(profile.target_at(100), (None, 0))
+        self.assertEqual(profile.peak, 12)
+
+    def test_from_config(self):
+        profile = LoadProfile.from_cli('adaptive:duration=30m,interval=10s,latency_target=800ms,initial=5,'
+                                       'max_vus=200,decrease=0.7,latency_metric=p99', max_vus=50)
+        self.assertIsInstance(profile, AdaptiveProfile)
+        self.assertEqual((profile.duration, profile.interval, profile.latency_target), (1800, 10, 0.8))
+        self.assertEqual((profile.limit, profile.max_vus, profile.decrease), (5, 50, 0.7))
+        self.assertEqual(profile.latency_metric, 'p99')
+        with self.assertRaisesRegex(ValueError, '需要配置 duration'):
+            AdaptiveProfile.from_config({'initial': 1})
+        with self.assertRaisesRegex(ValueError, '未知的自适应配置项: speed'):
+            AdaptiveProfile.from_config({'duration': '1m', 'speed': 2})
+
+    def test_invalid_options(self):
+        with self.assertRaisesRegex(ValueError, 'decrease'):
+            self.profile(decrease=1.0)
+        with self.assertRaisesRegex(ValueError, '不支持的延迟指标'):
+            self.profile(latency_metric='p42')
+        with self.assertRaisesRegex(ValueError, '并发范围配置无效'):
+            self.profile(min_vus=5, max_vus=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import contextlib
+import io
+import os
+import sys
+import time
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.capacity import CapacitySearch
+from perf.executor import RequestResult
+from perf.hooks import HookStats
+from perf.thresholds import parse_slo
+
+
+class FakeClient:
+    def close(self):
+        pass
+
+
+class KneeExecutor:
+    """模拟容量拐点的执行器：速率不超过 knee 时延迟 10ms，超过后 1s；
+    slow_until（monotonic 时间）之前的请求一律 1s；delay 为每个请求实际占用工作线程的秒数"""
+    iteration_requests = 1
+
+    def __init__(self, knee, delay=0.0):
+        self.knee = knee
+        self.delay = delay
+        self.rate = 0.0
+        self.slow_until = 0.0
+        self.once_cases = set()
+        self.hook_stats = HookStats()
+
+    def new_client(self):
+        return FakeClient()
+
+    def run_hooks(self, phase, scope, client, context, case_id=None):
+        return True
+
+    def next_iteration(self):
+        return ['case_001']
+
+    def execute_case(self, client, case_id, context=None):
+        if self.delay:
+            time.sleep(self.delay)
+        result = RequestResult(case_id, '/api/' + case_id, time.time())
+        slow = self.rate > self.knee or time.monotonic() < self.slow_until
+        result.latency = 1.0 if slow else 0.01
+        result.status_code = 200
+        result.attempts = 1
+        result.passed = True
+        return result
+
+    def pacing_interval(self):
+        return 0.0
+
+    def think_time(self, case_id):
+        return 0.0
+
+
+class KneeSearch(CapacitySearch):
+    """把当前级别的速率告诉执行器"""
+
+    def measure_level(self, rate):
+        self.executor.rate = rate
+        return super().measure_level(rate)
+
+
+def search(executor, **options):
+    options = dict(dict(start_rate=20, step=20, max_rate=200, settle=0, measure=0.25), **options)
+    runner = KneeSearch(executor, parse_slo('p99<500ms'), **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return runner, runner.run()
+
+
+class CapacitySearchTest(unittest.TestCase):
+    def test_step_stops_at_first_violation(self):
+        runner, result = search(KneeExecutor(knee=50))
+        self.assertEqual([level.rate for level in runner.levels], [20, 40, 60])
+        self.assertEqual(result['max_sustainable_rate'], 40)
+        self.assertEqual([point['sustainable'] for point in result['curve']], [True, True, False])
+        self.assertGreater(result['max_sustainable_rps'], 0)
+
+    def test_binary_narrows_to_precision(self):
+        runner, result = search(KneeExecutor(knee=50), mode='binary', precision=10)
+        # 倍增步长 20 -> 40 -> 80，再在 40 与 80 之间二分：60 失败，50 通过，区间缩小到 10
+        self.assertEqual([level.rate for level in runner.levels], [20, 40, 80, 60, 50])
+        self.assertEqual(result['max_sustainable_rate'], 50)
+        self.assertEqual([point['rate'] for point in result['curve']], [20, 40, 50, 60, 80])
+
+    def test_start_rate_above_knee(self):
+        _, result = search(KneeExecutor(knee=10))
+        self.assertIsNone(result['max_sustainable_rate'])
+        self.assertIsNone(result['max_sustainable_rps'])
+
+    def test_dropped_iterations_unsustainable(self):
+        # 每个请求占用工作线程 50ms，1 个并发最多约 20 迭代/秒
+        runner, result = search(KneeExecutor(knee=1000, delay=0.05), start_rate=100, max_vus=1)
+        level = runner.levels[0]
+        self.assertGreater(level.dropped_iterations, 0)
+        self.assertFalse(level.sustainable)
+        self.assertTrue(any('丢弃迭代' in violation for violation in level.violations))
+        self.assertIsNone(result['max_sustainable_rate'])
+
+    def test_settle_excluded_from_measurement(self):
+        executor = KneeExecutor(knee=1000)
+        runner = KneeSearch(executor, parse_slo('p99<500ms'), settle=0.4, measure=0.3)
+        executor.slow_until = time.monotonic() + 0.3
+        with contextlib.redirect_stdout(io.StringIO()):
+            level = runner.measure_level(100)
+        # 稳定阶段的慢请求不计入测量窗口
+        self.assertTrue(level.sustainable, level.violations)
+        self.assertEqual(level.summary['latency_ms']['max'], 10.0)
+        self.assertTrue(15 <= level.summary['requests'] <= 45, level.summary['requests'])
+        self.assertEqual(runner.levels, [level])
+
+    def test_invalid_options(self):
+        with self.assertRaisesRegex(ValueError, '不支持的搜索模式'):
+            CapacitySearch(KneeExecutor(knee=1), parse_slo('p99<1s'), mode='linear')
+        with self.assertRaisesRegex(ValueError, '至少需要一条SLO'):
+            CapacitySearch(KneeExecutor(knee=1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
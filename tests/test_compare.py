@@ -0,0 +1,123 @@
+import contextlib
+import io
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import Counter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf import cli
+from perf.baseline import Baseline, EndpointBaseline
+from perf.compare import compare_baselines, mann_whitney, proportion_test
+from perf.stats import LatencyHistogram
+
+ENDPOINT = '/api/credit/apply'
+
+
+def latencies(seed, count=5000, slow_tail=0.0):
+    """对数正态分布的延迟（中位数 50ms），slow_tail 比例的请求慢一倍"""
+    rng = random.Random(seed)
+    values = [rng.lognormvariate(math.log(0.05), 0.3) for _ in range(count)]
+    return [value * 2 if rng.random() < slow_tail else value for value in values]
+
+
+def baseline(name, values, failed=0, rate=100, seconds=60, seed=0):
+    """由延迟样本与每秒请求数（带少量抖动）构造基线"""
+    rng = random.Random(seed)
+    histogram = dict(Counter(LatencyHistogram.bucket_of(value) for value in values))
+    endpoint = EndpointBaseline(len(values), failed, histogram)
+    requests = [rate + rng.randint(-3, 3) for _ in range(seconds)]
+    return Baseline(name=name, created_at=0.0, config_hash='abc', git_revision=None, info={},
+                    endpoints={ENDPOINT: endpoint, 'total': endpoint}, requests=requests,
+                    failed=[0] * seconds)
+
+
+class MannWhitneyTest(unittest.TestCase):
+    def test_identical_distributions(self):
+        sample = Counter({1: 5, 2: 10, 3: 5})
+        result = mann_whitney(sample, sample)
+        self.assertAlmostEqual(result['z'], 0.0)
+        self.assertAlmostEqual(result['p_value'], 1.0)
+        self.assertAlmostEqual(result['probability'], 0.5)
+
+    def test_fully_shifted_without_ties(self):
+        # 10 对 10 且 candidate 全部更大：U=100，均值 50，方差 10*10*21/12=175
+        base = Counter(range(10))
+        candidate = Counter(range(10, 20))
+        result = mann_whitney(base, candidate)
+        self.assertAlmostEqual(result['z'], 50 / math.sqrt(175))
+        self.assertAlmostEqual(result['p_value'], math.erfc(50 / math.sqrt(175) / math.sqrt(2)))
+        self.assertEqual(result['probability'], 1.0)
+        reverse = mann_whitney(candidate, base)
+        self.assertAlmostEqual(reverse['z'], -result['z'])
+        self.assertEqual(reverse['probability'], 0.0)
+
+    def test_degenerate_inputs(self):
+        self.assertEqual(mann_whitney({}, {1: 3}), {'z': 0.0, 'p_value': 1.0, 'probability': 0.5})
+        # 全部并列时方差为 0
+        self.assertEqual(mann_whitney({1: 3}, {1: 4})['z'], 0.0)
+
+
+class ProportionTest(unittest.TestCase):
+    def test_known_value(self):
+        # 10/100 对 20/100：合并比例 0.15，z=0.1/sqrt(0.15*0.85*0.02)≈1.980
+        self.assertAlmostEqual(proportion_test(10, 100, 20, 100), 0.0477, places=4)
+        self.assertAlmostEqual(proportion_test(20, 100, 10, 100), proportion_test(10, 100, 20, 100))
+
+    def test_no_difference(self):
+        self.assertAlmostEqual(proportion_test(5, 100, 50, 1000), 1.0)
+        self.assertEqual(proportion_test(0, 100, 0, 100), 1.0)
+        self.assertEqual(proportion_test(1, 0, 1, 100), 1.0)
+
+
+class CompareBaselinesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.base = baseline('base', latencies(1), failed=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_cli(self, base, candidate):
+        paths = []
+        for item in (base, candidate):
+            path = os.path.join(self.dir, item.name + '.json')
+            item.save(path)
+            paths.append(path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return cli.main(['compare'] + paths)
+
+    def test_same_distribution_passes(self):
+        candidate = baseline('candidate', latencies(2), failed=55, seed=1)
+        result = compare_baselines(self.base, candidate)
+        self.assertTrue(result['passed'], result['regressions'])
+        self.assertTrue(result['comparable'])
+        self.assertEqual(self.run_cli(self.base, candidate), 0)
+
+    def test_shifted_p99_fails(self):
+        candidate = baseline('candidate', latencies(2, slow_tail=0.02), failed=50, seed=1)
+        result = compare_baselines(self.base, candidate)
+        regressed = {metric['metric'] for metric in result['endpoints'][0]['latency'] if metric['regressed']}
+        self.assertEqual(regressed, {'p99'})
+        self.assertFalse(result['throughput']['regressed'])
+        self.assertEqual(self.run_cli(self.base, candidate), 1)
+
+    def test_lower_throughput_fails(self):
+        candidate = baseline('candidate', latencies(2), failed=50, rate=80, seed=1)
+        result = compare_baselines(self.base, candidate)
+        self.assertTrue(result['throughput']['regressed'])
+        self.assertAlmostEqual(result['throughput']['change'], -0.2, delta=0.02)
+        self.assertEqual(self.run_cli(self.base, candidate), 1)
+
+    def test_error_rate_increase_fails(self):
+        candidate = baseline('candidate', latencies(2), failed=150, seed=1)
+        result = compare_baselines(self.base, candidate)
+        self.assertTrue(result['endpoints'][0]['error_rate']['regressed'])
+        self.assertEqual(self.run_cli(self.base, candidate), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
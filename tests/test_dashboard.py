@@ -0,0 +1,70 @@
+import io
+import os
+import re
+import sys
+import unittest
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.dashboard import Dashboard
+from perf.executor import RequestResult
+from perf.stats import StatsCollector
+
+
+def result(endpoint, latency, passed=True):
+    item = RequestResult('case_001', endpoint, 1700000000.0)
+    item.latency = latency
+    item.status_code = 200
+    item.attempts = 1
+    item.passed = passed
+    item.error = None if passed else '业务返回码错误: 100001'
+    return item
+
+
+class DashboardTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = StatsCollector()
+        engine = SimpleNamespace(stats=self.stats, current_stage='steady', stopping=False, active_vus=2,
+                                 dropped_iterations=0, violations={})
+        self.dashboard = Dashboard(engine, stream=io.StringIO())
+
+    def record(self, count, latency, passed=True, endpoint='/api/a'):
+        for _ in range(count):
+            self.stats.record('steady', result(endpoint, latency, passed))
+
+    def summary_line(self):
+        return self.dashboard.render(self.stats.report()).splitlines()[1]
+
+    def assert_latency(self, line, name, expected):
+        value = float(re.search(name + r' ([\d.]+)ms', line).group(1))
+        self.assertLess(abs(value - expected) / expected, 0.01, line)
+
+    def test_current_values_exclude_earlier_refreshes(self):
+        self.record(1000, 0.5, passed=False)
+        line = self.summary_line()
+        self.assertIn('失败率 100.00%', line)
+        self.assert_latency(line, 'p99', 500)
+
+        # 之后只有快速成功的请求，累计统计仍被早先的慢请求和失败主导，当前值不应如此
+        self.record(100, 0.01)
+        line = self.summary_line()
+        self.assertIn('失败率   0.00%', line)
+        self.assert_latency(line, 'p50', 10)
+        self.assert_latency(line, 'p99', 10)
+        self.assertGreater(self.stats.report()['total']['latency_ms']['p50'], 400)
+
+    def test_endpoint_rows_use_interval(self):
+        self.record(10, 0.2, endpoint='/api/a')
+        self.record(10, 0.2, endpoint='/api/b')
+        self.summary_line()
+        self.record(5, 0.02, passed=False, endpoint='/api/b')
+        rows = {line.split()[0]: line.split() for line in self.dashboard.render(self.stats.report()).splitlines()
+                if re.match(r'/api/', line)}
+        self.assertEqual(rows['/api/a'][1], '10')
+        self.assertEqual(rows['/api/a'][3:], ['0.00%', '0.0', '0.0'])
+        self.assertEqual(rows['/api/b'][1], '15')
+        self.assertEqual(rows['/api/b'][3], '100.00%')
+        self.assertLess(abs(float(rows['/api/b'][5]) - 20) / 20, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.engine import LoadEngine, VirtualUser
+from perf.executor import RequestResult
+from perf.hooks import RUN, SETUP, TEARDOWN, VU, WORKER, HookStats
+from perf.profile import ARRIVAL_RATE, LoadProfile, LoadStage
+from perf.thresholds import Thresholds
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeExecutor:
+    """只记录调用的执行器，failing_hooks 中的 (phase, scope) 钩子返回失败；
+    error 为 None 时请求立即通过，blocker 不为 None 时第一个请求等待它被置位"""
+
+    def __init__(self, failing_hooks=(), error=None, blocker=None):
+        self.failing_hooks = set(failing_hooks)
+        self.error = error
+        self.blocker = blocker
+        self.once_cases = set()
+        self.hooks = []
+        self.executed = []
+        self.clients = []
+        self.hook_stats = HookStats()
+
+    def new_client(self):
+        client = FakeClient()
+        self.clients.append(client)
+        return client
+
+    def run_hooks(self, phase, scope, client, context, case_id=None):
+        self.hooks.append((phase, scope))
+        failed = (phase, scope) in self.failing_hooks
+        self.hook_stats.record(f"{phase}:{scope}", 0.0, 'hook failed' if failed else None)
+        return not failed
+
+    def next_iteration(self):
+        return ['case_001']
+
+    def execute_case(self, client, case_id, context=None):
+        self.executed.append(case_id)
+        if self.error is not None:
+            raise self.error
+        if self.blocker is not None and len(self.executed) == 1:
+            self.blocker.wait(5)
+        result = RequestResult(case_id, '/api/' + case_id, time.time())
+        result.latency = 0.001
+        result.status_code = 200
+        result.attempts = 1
+        result.passed = True
+        return result
+
+    def pacing_interval(self):
+        return 0.0
+
+    def think_time(self, case_id):
+        return 0.01
+
+    def count(self, phase, scope):
+        return sum(1 for hook in self.hooks if hook == (phase, scope))
+
+
+def arrival_engine(executor):
+    engine = LoadEngine(executor, SimpleNamespace(executor=ARRIVAL_RATE))
+    engine._in_flight = 1
+    return engine
+
+
+class StepTest(unittest.TestCase):
+    def test_unexpected_error_finishes_vu_and_releases_slot(self):
+        engine = arrival_engine(FakeExecutor(error=RuntimeError('boom')))
+        vu = VirtualUser(1, once=True)
+        engine._step(vu)
+        self.assertTrue(vu.finished)
+        self.assertEqual(engine._in_flight, 0)
+        self.assertEqual(engine.step_errors, 1)
+        self.assertEqual(engine._live, set())
+
+    def test_stopping_skips_queued_vu(self):
+        executor = FakeExecutor(error=RuntimeError('boom'))
+        engine = arrival_engine(executor)
+        engine.stop()
+        engine._step(VirtualUser(1, once=True))
+        self.assertEqual(executor.executed, [])
+        self.assertEqual(executor.hooks, [])
+
+    def test_failed_vu_setup_sends_no_request(self):
+        executor = FakeExecutor(failing_hooks=[(SETUP, VU)], error=RuntimeError('boom'))
+        engine = arrival_engine(executor)
+        vu = VirtualUser(1, once=True)
+        engine._step(vu)
+        self.assertTrue(vu.finished)
+        self.assertFalse(vu.started)
+        self.assertEqual(executor.executed, [])
+        self.assertEqual(engine._in_flight, 0)
+        self.assertEqual(engine.step_errors, 0)
+
+    def test_failed_worker_setup_finishes_vus_without_teardown(self):
+        executor = FakeExecutor(failing_hooks=[(SETUP, WORKER)], error=RuntimeError('boom'))
+        engine = arrival_engine(executor)
+        vu = VirtualUser(1, once=True)
+        engine._step(vu)
+        self.assertTrue(vu.finished)
+        self.assertEqual(executor.executed, [])
+        self.assertEqual(executor.hooks, [(SETUP, WORKER)])
+        self.assertEqual(engine._in_flight, 0)
+        self.assertTrue(engine.stopping)
+        self.assertEqual(engine.setup_failures, 1)
+        # 工作线程标记为未就绪，排空时不执行其 worker teardown
+        self.assertEqual([ready for _, _, ready in engine._workers.values()], [False])
+
+
+class SetupFailureTest(unittest.TestCase):
+    def test_failed_setup_aborts_instead_of_respawning(self):
+        for scope in (VU, WORKER):
+            with self.subTest(scope=scope):
+                executor = FakeExecutor(failing_hooks=[(SETUP, scope)])
+                engine = LoadEngine(executor, LoadProfile.from_cli('2s:5'), tick=0.02,
+                                    thresholds=Thresholds.from_config({'total': ['error_rate<1%']}))
+                begin = time.monotonic()
+                report = engine.run()
+                self.assertLess(time.monotonic() - begin, 1)
+                self.assertEqual(executor.executed, [])
+                # 中止前至多再补充一轮VU
+                self.assertLessEqual(executor.count(SETUP, scope), 10)
+                self.assertEqual(report['run']['setup_failures'], executor.count(SETUP, scope))
+                self.assertEqual(report['run']['aborted'], f"{scope} 范围的 setup 钩子失败: hook failed")
+                self.assertFalse(report['thresholds']['passed'])
+                self.assertEqual(report['thresholds']['aborted'], report['run']['aborted'])
+
+
+class DrainTest(unittest.TestCase):
+    def test_drain_timeout_cleans_up_idle_workers(self):
+        blocker = threading.Event()
+        executor = FakeExecutor(blocker=blocker)
+        profile = LoadProfile(stages=[LoadStage('hold', 0.3, 3, ramp=0)])
+        try:
+            report = LoadEngine(executor, profile, tick=0.02, drain=0.2).run()
+            self.assertEqual(report['run']['interrupted'], 1)
+            # 仍在执行请求的工作线程不清理，其余工作线程与其上的VU照常 teardown 并关闭客户端
+            # 首尾两个客户端属于 run 范围的 setup 与 teardown
+            workers = executor.clients[1:-1]
+            self.assertEqual(len(workers), executor.count(SETUP, WORKER))
+            self.assertEqual(sum(1 for client in workers if not client.closed), 1)
+            self.assertEqual(executor.count(TEARDOWN, WORKER), len(workers) - 1)
+            self.assertEqual(executor.count(TEARDOWN, VU), executor.count(SETUP, VU) - 1)
+            self.assertEqual(executor.count(TEARDOWN, RUN), 1)
+        finally:
+            blocker.set()
+
+
+if __name__ == '__main__':
+    unittest.main()
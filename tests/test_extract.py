@@ -0,0 +1,110 @@
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from network.http_client import HttpResponse
+from perf import failures
+from perf.executor import SuiteExecutor
+from perf.extract import Extractor, has_placeholder, substitute
+from perf.mockgateway import load_gateway
+from test import test_suite
+from util import json_codec
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITE = os.path.join(TESTS_DIR, 'test_cases_user_check.yaml')
+
+
+class ExtractorTest(unittest.TestCase):
+    def test_extract(self):
+        data = {'userId': 'u1', 'loans': [{'loanId': 'l1'}, {'loanId': 'l2'}], 'flag': None, 'a.b': 2}
+        cases = {'$.userId': 'u1', 'userId': 'u1', '$.loans[0].loanId': 'l1', "$['a.b']": 2,
+                 '$.loans[1]': {'loanId': 'l2'}, '$.flag': None}
+        for expr, expected in cases.items():
+            with self.subTest(expr=expr):
+                self.assertEqual(Extractor.from_config('v', expr).extract(data), expected)
+        for expr in ('$.missing', '$.loans[2].loanId', '$.userId.x', '$.loans.loanId'):
+            with self.subTest(expr=expr):
+                with self.assertRaises(KeyError):
+                    Extractor.from_config('v', expr).extract(data)
+        with self.assertRaisesRegex(ValueError, '无效的路径'):
+            Extractor.from_config('v', '$.a[')
+
+    def test_has_placeholder(self):
+        self.assertTrue(has_placeholder({'data': [{'id': '${userId}'}]}))
+        self.assertFalse(has_placeholder({'data': [{'id': '$userId', 'n': 1}]}))
+        self.assertFalse(has_placeholder(None))
+
+    def test_substitute(self):
+        variables = {'userId': 'u1', 'amount': 100, 'items': [1, 2]}
+        body = {'path': '/users/${userId}/loans', 'amount': '${amount}', 'items': '${items}', 'note': 'n=${amount}',
+                'list': ['${userId}', 3], 'plain': 'text'}
+        self.assertEqual(substitute(body, variables), {
+            'path': '/users/u1/loans', 'amount': 100, 'items': [1, 2], 'note': 'n=100', 'list': ['u1', 3], 'plain': 'text'
+        })
+        # 返回副本，不修改原配置
+        self.assertEqual(body['amount'], '${amount}')
+        with self.assertRaises(KeyError):
+            substitute('${missing}', variables)
+
+
+class GatewayClient:
+    """用进程内的模拟网关应答请求，记录每次请求解密后的数据"""
+
+    def __init__(self):
+        self.gateway = load_gateway(os.path.join(TESTS_DIR, 'mock_gateway.yaml'), [SUITE], seed=1)
+        self.requests = []
+
+    def request(self, method, url, headers=None, body=None, retry_policy=None, case_id=None):
+        body = body if isinstance(body, bytes) else json_codec.dumps(body)
+        self.requests.append(self.gateway.codec.decrypt(json_codec.loads(body)['data']))
+        behavior = self.gateway.scenario.behavior('user-check', 0)
+        _, payload = self.gateway._business('yibeixiaochengxu', 'user-check', body, behavior)
+        return HttpResponse(200, payload, elapsed=0.01)
+
+
+class SessionContextTest(unittest.TestCase):
+    def executor(self, extract):
+        """case_001 提取变量，case_002 的请求数据引用提取到的值"""
+        suite = test_suite.TestSuite.from_yaml(SUITE)
+        suite.cases['case_001'].extract = extract
+        suite.cases['case_002'].dependencies = ['case_001']
+        suite.cases['case_002'].body['data']['name'] = '用户${checkLoan}'
+        suite.cases['case_002'].body['data']['type'] = '${checkLoan}'
+        return SuiteExecutor(suite)
+
+    def test_extracted_values_flow_to_next_case(self):
+        executor = self.executor({'checkLoan': '$.checkLoan', 'reason': '$.rejectReason'})
+        client = GatewayClient()
+        context = {}
+        first = executor.execute_case(client, 'case_001', context)
+        self.assertTrue(first.passed, first.error)
+        self.assertEqual(context, {'checkLoan': 1, 'reason': None})
+        second = executor.execute_case(client, 'case_002', context)
+        self.assertTrue(second.passed, second.error)
+        # 整个字符串是占位符时保留原值的类型
+        self.assertEqual((client.requests[1]['name'], client.requests[1]['type']), ('用户1', 1))
+        self.assertEqual([result.passed for result in executor.run_iteration(client)], [True, True])
+
+    def test_contexts_are_isolated(self):
+        executor = self.executor({'checkLoan': '$.checkLoan'})
+        client = GatewayClient()
+        executor.execute_case(client, 'case_001', {})
+        result = executor.execute_case(client, 'case_002', {})
+        self.assertFalse(result.passed)
+        self.assertEqual(result.failure_stage, failures.BUILD)
+        self.assertIn('变量 checkLoan 未定义', result.error)
+        self.assertEqual(len(client.requests), 1)
+
+    def test_missing_path_fails_case(self):
+        executor = self.executor({'checkLoan': '$.checkLoan', 'loanId': '$.loans[0].loanId'})
+        context = {}
+        result = executor.execute_case(GatewayClient(), 'case_001', context)
+        self.assertFalse(result.passed)
+        self.assertEqual(result.failure_stage, failures.EXTRACT)
+        self.assertIn('loanId ($.loans[0].loanId) 不存在', result.error)
+        # 提取失败时不写入部分结果
+        self.assertEqual(context, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
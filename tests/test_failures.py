@@ -0,0 +1,102 @@
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf import failures
+from perf.executor import RequestResult
+from perf.failures import FailureIndex, classify_message, template_message, truncate_payload
+
+
+def failed(error, status_code=200, biz_code=None, stage=None, start=0.0, case_id='case_001'):
+    item = RequestResult(case_id, '/api/' + case_id, start)
+    item.status_code = status_code
+    item.biz_code = biz_code
+    item.passed = False
+    item.error = error
+    item.failure_stage = stage
+    return item
+
+
+class TemplateTest(unittest.TestCase):
+    def test_variable_parts_replaced(self):
+        cases = {
+            '业务返回码错误: 100001': '业务返回码错误: <n>',
+            "字段 'orderNo' 的值不符": '字段 <str> 的值不符',
+            '请求 3f2b8c1e-1a2b-4c3d-8e9f-0123456789ab 超时 1.5s': '请求 <uuid> 超时 <n>s',
+            '签名 MEUCIQDx7dJk9Fh2ZbLqYw8nR3tV 无效': '签名 <token> 无效',
+        }
+        for error, template in cases.items():
+            with self.subTest(error=error):
+                self.assertEqual(template_message(error), template)
+
+    def test_classify_by_prefix(self):
+        cases = {
+            '请求构建失败: boom': failures.BUILD,
+            'HTTP 状态码 502': failures.HTTP,
+            '响应不是有效的JSON': failures.FORMAT,
+            '业务返回码错误: 100001': failures.CODE,
+            '验签失败': failures.SIGN,
+            '响应数据解密失败': failures.DECRYPT,
+            '响应数据与预期不符': failures.DATA,
+            '响应数据提取失败: token': failures.EXTRACT,
+            '未知错误': failures.UNKNOWN,
+        }
+        for error, stage in cases.items():
+            with self.subTest(error=error):
+                self.assertEqual(classify_message(error), stage)
+
+    def test_truncate_payload(self):
+        self.assertIsNone(truncate_payload(None))
+        self.assertEqual(truncate_payload('short'), 'short')
+        long = 'x' * (failures.MAX_EXAMPLE_LENGTH + 10)
+        self.assertEqual(truncate_payload(long), 'x' * failures.MAX_EXAMPLE_LENGTH + '...')
+
+
+class FingerprintTest(unittest.TestCase):
+    def test_code_depends_on_stage(self):
+        self.assertEqual(FailureIndex.fingerprint(failed('业务返回码错误: 100001', biz_code='100001')),
+                         (failures.CODE, '100001', '业务返回码错误: <n>'))
+        self.assertEqual(FailureIndex.fingerprint(failed('HTTP 状态码 502', status_code=502)),
+                         (failures.HTTP, '502', 'HTTP 状态码 <n>'))
+        self.assertEqual(FailureIndex.fingerprint(failed('响应数据与预期不符: amount', biz_code='000000')),
+                         (failures.DATA, None, '响应数据与预期不符: amount'))
+        # 结果自带的 failure_stage 优先于按前缀判断
+        self.assertEqual(FailureIndex.fingerprint(failed('boom', status_code=-1, stage=failures.BUILD)),
+                         (failures.BUILD, '-1', 'boom'))
+
+
+class FailureIndexTest(unittest.TestCase):
+    def test_deduplicates_by_fingerprint(self):
+        index = FailureIndex(max_examples=2)
+        for number in range(5):
+            index.record(failed(f"业务返回码错误: 10000{number}", biz_code='100001', start=10.0 + number))
+        index.record(failed('HTTP 状态码 502', status_code=502, start=3.0))
+        groups = index.to_list()
+        self.assertEqual([(group['stage'], group['count']) for group in groups], [(failures.CODE, 5), (failures.HTTP, 1)])
+        self.assertEqual((groups[0]['first'], groups[0]['last']), (10.0, 14.0))
+        self.assertEqual([example['error'] for example in groups[0]['examples']],
+                         ['业务返回码错误: 100000', '业务返回码错误: 100001'])
+
+    def test_overflow_group(self):
+        index = FailureIndex(max_groups=2)
+        for code in ('1', '2', '3', '4'):
+            index.record(failed(f"业务返回码错误: {code}", biz_code=code))
+        self.assertEqual(len(index.groups), 3)
+        self.assertEqual(index.groups[(failures.CODE, None, '<其他>')].count, 2)
+
+    def test_merge(self):
+        left, right = FailureIndex(max_examples=2), FailureIndex(max_examples=2)
+        left.record(failed('验签失败', start=5.0))
+        for start in (1.0, 9.0, 7.0):
+            right.record(failed('验签失败', start=start))
+        right.record(failed('响应不是有效的JSON', start=2.0))
+        left.merge(right)
+        groups = {group['stage']: group for group in left.to_list()}
+        self.assertEqual(groups[failures.SIGN]['count'], 4)
+        self.assertEqual((groups[failures.SIGN]['first'], groups[failures.SIGN]['last']), (1.0, 9.0))
+        self.assertEqual(len(groups[failures.SIGN]['examples']), 2)
+        self.assertEqual(groups[failures.FORMAT]['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import random
+import sys
+import unittest
+import urllib.error
+import urllib.request
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.faultproxy import TCP, FaultProxy, FaultRule, FaultSchedule, _read_body, parse_bandwidth
+from perf.mockgateway import LatencyModel
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_body(data, headers, until_eof=False):
+    """把 data 作为已收到的字节交给 _read_body 解析"""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_body(reader, headers, until_eof), await reader.read()
+    return asyncio.run(run())
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_bandwidth(self):
+        cases = {None: None, 512: 512.0, '100B': 100.0, '64KB/s': 65536.0, '1.5MB/s': 1.5 * 1024 * 1024, ' 2kb ': 2048.0}
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(parse_bandwidth(value), expected)
+        with self.assertRaisesRegex(ValueError, '无效的带宽: 1GB/s'):
+            parse_bandwidth('1GB/s')
+
+    def test_read_body(self):
+        self.assertEqual(read_body(b'abcdef', [('Content-Length', '3')]), (b'abc', b'def'))
+        chunked = b'3\r\nabc\r\n4;ext=1\r\ndefg\r\n0\r\nX-Trailer: 1\r\n\r\nnext'
+        self.assertEqual(read_body(chunked, [('Transfer-Encoding', 'chunked')]), (b'abcdefg', b'next'))
+        self.assertEqual(read_body(b'rest', []), (b'', b'rest'))
+        self.assertEqual(read_body(b'rest', [], until_eof=True), (b'rest', b''))
+
+
+class FaultRuleTest(unittest.TestCase):
+    def test_from_config(self):
+        base = FaultRule.from_config({'latency': 100, 'bandwidth': '2KB/s'})
+        rule = FaultRule.from_config({'reset': 0.1, 'status': {502: 0.2}, 'stall_time': '5s'}, base)
+        self.assertEqual(rule.latency, LatencyModel('fixed', (('value', 0.1),)))
+        self.assertEqual((rule.bandwidth, rule.reset, rule.status, rule.stall_time), (2048.0, 0.1, (('502', 0.2),), 5.0))
+        self.assertIs(FaultRule.from_config({}, base), base)
+        with self.assertRaisesRegex(ValueError, '未知的故障配置项: drop'):
+            FaultRule.from_config({'drop': 0.1})
+
+    def test_choose_fault(self):
+        rng = random.Random(5)
+        rule = FaultRule.from_config({'reset': 0.1, 'half_open': 0.05, 'partial': 0.05, 'status': {502: 0.2, 503: 0.1}})
+        counts = {}
+        for _ in range(20000):
+            key = rule.choose_fault(rng)
+            counts[key] = counts.get(key, 0) + 1
+        expected = {('reset', None): 0.1, ('half_open', None): 0.05, ('partial', None): 0.05,
+                    ('status', 502): 0.2, ('status', 503): 0.1, (None, None): 0.5}
+        self.assertEqual(set(counts), set(expected))
+        for key, probability in expected.items():
+            with self.subTest(fault=key):
+                self.assertAlmostEqual(counts[key] / 20000, probability, delta=0.015)
+        self.assertEqual(FaultRule().choose_fault(rng), (None, None))
+
+
+class FaultScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = FaultSchedule.from_config({
+            'defaults': {'latency': 5},
+            'phases': [
+                {'name': 'slow', 'at': '10s', 'duration': '20s', 'latency': 800},
+                {'at': '20s', 'duration': '20s', 'reset': 0.5, 'path': 'user-credit$'},
+            ],
+        })
+
+    def test_rule_by_time_and_path(self):
+        cases = {
+            (5, '/api/user-credit'): ('baseline', 0.005, 0.0),
+            (15, '/api/user-credit'): ('slow', 0.8, 0.0),
+            (25, '/api/user-credit'): ('slow+phase2', 0.8, 0.5),
+            (25, '/api/user-check'): ('slow', 0.8, 0.0),
+            (25, None): ('slow', 0.8, 0.0),
+            (35, '/api/user-credit'): ('phase2', 0.005, 0.5),
+            (40, '/api/user-credit'): ('baseline', 0.005, 0.0),
+        }
+        for (elapsed, path), (phase, latency, reset) in cases.items():
+            with self.subTest(elapsed=elapsed, path=path):
+                rule, name = self.schedule.rule(elapsed, path)
+                self.assertEqual((name, rule.latency.sample(random.Random()), rule.reset), (phase, latency, reset))
+
+    def test_invalid(self):
+        cases = {
+            '不支持的代理模式: udp': {'mode': 'udp'},
+            '未知的故障配置项: drop': {'phases': [{'duration': 10, 'drop': 0.1}]},
+            '无法按请求路径': {'mode': TCP, 'phases': [{'duration': 10, 'reset': 0.1, 'path': 'x'}]},
+            '无法返回HTTP错误状态码': {'mode': TCP, 'phases': [{'duration': 10, 'status': {502: 0.1}}]},
+        }
+        for message, config in cases.items():
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(ValueError, message):
+                    FaultSchedule.from_config(config)
+
+    def test_load_example(self):
+        schedule = FaultSchedule.load(os.path.join(TESTS_DIR, 'fault_proxy.yaml'))
+        self.assertEqual([phase.name for phase in schedule.phases],
+                         ['slow', 'resets', 'slow-502', 'partial', 'half-open', 'narrow'])
+        self.assertEqual(schedule.rule(125, '/api/v2/traffic/x/user-check')[1], 'baseline')
+        self.assertEqual(schedule.rule(125, '/api/v2/traffic/x/user-credit')[0].bandwidth, 2048.0)
+
+
+class FaultProxyTest(unittest.TestCase):
+    def test_invalid_target(self):
+        for target in ('ftp://host', 'http://'):
+            with self.subTest(target=target):
+                with self.assertRaisesRegex(ValueError, '无效的上游地址'):
+                    FaultProxy(target, FaultSchedule.from_config(None))
+        proxy = FaultProxy('example.com:8443', FaultSchedule.from_config(None))
+        self.assertEqual((proxy.upstream_host, proxy.upstream_port), ('example.com', 8443))
+        self.assertEqual(FaultProxy('https://example.com', FaultSchedule.from_config(None)).upstream_port, 443)
+
+    def test_status_fault_served_without_upstream(self):
+        # 上游地址不可达，命中状态码故障的请求由代理直接返回
+        schedule = FaultSchedule.from_config({'defaults': {'status': {503: 1.0}}})
+        with FaultProxy('http://127.0.0.1:9', schedule, seed=1) as proxy:
+            for _ in range(3):
+                with self.assertRaises(urllib.error.HTTPError) as context:
+                    urllib.request.urlopen(urllib.request.Request(proxy.url + '/api', data=b'{}'), timeout=5)
+                self.assertEqual(context.exception.code, 503)
+        self.assertEqual(proxy.summary(), {'baseline': {'requests': 3, 'status': 3}})
+
+
+if __name__ == '__main__':
+    unittest.main()
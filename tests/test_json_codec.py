@@ -0,0 +1,56 @@
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from util import json_codec
+
+SAMPLE = {'name': '张三', 'amount': 12.5, 'count': 3, 'ok': True, 'none': None, 'items': [1, 'a', {'b': []}]}
+
+
+def load_codec(blocked):
+    """屏蔽指定的可选依赖后重新加载一份独立的 json_codec，不影响已导入的模块"""
+    spec = importlib.util.spec_from_file_location('json_codec_fallback', json_codec.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, {name: None for name in blocked}):
+        spec.loader.exec_module(module)
+    return module
+
+
+class JsonCodecTest(unittest.TestCase):
+    def check_codec(self, codec):
+        encoded = codec.dumps(SAMPLE)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(encoded, json.dumps(SAMPLE, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        self.assertEqual(codec.loads(encoded), SAMPLE)
+        self.assertEqual(codec.loads(encoded.decode('utf-8')), SAMPLE)
+        self.assertEqual(codec.dumps_str({'k': '值'}), '{"k":"值"}')
+        # 超过 64 位的整数回退到标准库
+        self.assertEqual(codec.dumps({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+        with self.assertRaises(json.JSONDecodeError):
+            codec.loads('{oops')
+
+    def test_default_backend(self):
+        self.check_codec(json_codec)
+
+    def test_stdlib_fallback(self):
+        codec = load_codec(['orjson', 'msgspec'])
+        self.assertEqual(codec.BACKEND, 'json')
+        self.check_codec(codec)
+
+    @unittest.skipUnless(importlib.util.find_spec('msgspec'), 'msgspec 未安装')
+    def test_msgspec_fallback(self):
+        codec = load_codec(['orjson'])
+        self.assertEqual(codec.BACKEND, 'msgspec')
+        self.check_codec(codec)
+
+    @unittest.skipUnless(importlib.util.find_spec('orjson'), 'orjson 未安装')
+    def test_orjson_non_str_keys(self):
+        self.assertEqual(json_codec.BACKEND, 'orjson')
+        self.assertEqual(json_codec.dumps({1: 'a'}), b'{"1":"a"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.executor import RequestResult
+from perf.metrics import CONTENT_TYPE, LATENCY_BUCKETS, MetricsExporter, MetricsServer, cumulative_buckets
+from perf.stats import LatencyHistogram, StatsCollector
+
+
+def result(endpoint, latency, status_code=200, biz_code='000000', passed=True):
+    item = RequestResult('case_001', endpoint, 0.0)
+    item.latency = latency
+    item.status_code = status_code
+    item.biz_code = biz_code
+    item.attempts = 1
+    item.passed = passed
+    item.error = None if passed else '业务返回码错误: 100001'
+    return item
+
+
+def engine(stats):
+    pool = {'clients': 2, 'active': 1, 'idle': 3, 'pending': 0}
+    return SimpleNamespace(stats=stats, active_vus=4, dropped_iterations=1, warmup_requests=7, current_stage='steady',
+                           executor=SimpleNamespace(pool_stats=lambda: pool))
+
+
+def samples(text):
+    """解析为 指标名{标签} -> 值"""
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+class CumulativeBucketsTest(unittest.TestCase):
+    def test_counts_assigned_by_upper_edge(self):
+        histogram = LatencyHistogram()
+        for value in (0.0009, 0.004, 0.004, 0.1, 0.9, 100.0):
+            histogram.record(value)
+        buckets = dict(cumulative_buckets(histogram))
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS))
+        counts = list(buckets.values())
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(buckets[2 ** -10], 1)
+        self.assertEqual(buckets[2 ** -7], 3)
+        self.assertEqual(buckets[2 ** -3], 4)
+        self.assertEqual(buckets[1.0], 5)
+        # 超过最大边界的请求只计入 +Inf
+        self.assertEqual(counts[-1], 5)
+
+    def test_bounds_match_native_schema(self):
+        self.assertAlmostEqual(LATENCY_BUCKETS[1] / LATENCY_BUCKETS[0], 2 ** 0.25)
+        self.assertEqual((LATENCY_BUCKETS[0], LATENCY_BUCKETS[-1]), (2 ** -11, 2 ** 6))
+
+
+class MetricsExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = StatsCollector()
+        for latency in (0.01, 0.02, 0.03):
+            self.stats.record('steady', result('/api/a', latency))
+        self.stats.record('steady', result('/api/a', 0.05, biz_code='100001', passed=False))
+        self.stats.record('steady', result('/api/b "x"', 0.2, status_code=502, biz_code=None, passed=False))
+
+    def test_render(self):
+        text = MetricsExporter(engine(self.stats)).render()
+        self.assertTrue(text.endswith('# EOF\n'))
+        values = samples(text)
+        ok = 'stage="steady",endpoint="/api/a",status="200"'
+        self.assertEqual(values[f'perf_requests_total{{{ok},biz_code="000000"}}'], '3')
+        self.assertEqual(values[f'perf_request_failures_total{{{ok},biz_code="000000"}}'], '0')
+        self.assertEqual(values[f'perf_request_failures_total{{{ok},biz_code="100001"}}'], '1')
+        self.assertEqual(values['perf_requests_total{stage="steady",endpoint="/api/b \\"x\\"",status="502",biz_code=""}'], '1')
+        self.assertEqual(values['perf_request_duration_seconds_count{endpoint="/api/a"}'], '4')
+        self.assertEqual(values['perf_request_duration_seconds_bucket{endpoint="/api/a",le="+Inf"}'], '4')
+        self.assertEqual(values['perf_request_duration_seconds_bucket{endpoint="/api/a",le="0.015625"}'], '1')
+        self.assertAlmostEqual(float(values['perf_request_duration_seconds_sum{endpoint="/api/a"}']), 0.11)
+        self.assertEqual(values['perf_active_vus'], '4')
+        self.assertEqual(values['perf_dropped_iterations_total'], '1')
+        self.assertEqual(values['perf_warmup_requests_total'], '7')
+        self.assertEqual(values['perf_stage_info{stage="steady"}'], '1')
+        self.assertEqual(values['perf_http_pool_connections{state="idle"}'], '3')
+
+    def test_server(self):
+        with MetricsServer(engine(self.stats), port=0) as server:
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+                self.assertIn('perf_requests_total', response.read().decode('utf-8'))
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(server.url.replace('/metrics', '/other'), timeout=5)
+            self.assertEqual(context.exception.code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
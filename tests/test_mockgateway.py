@@ -0,0 +1,180 @@
+import base64
+import json
+import os
+import random
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import yaml
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from perf.mockgateway import (DEFAULT_DATA, SUCCESS_CODE, Behavior, GatewayCodec, LatencyModel, MockScenario,
+                              load_gateway)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIO = os.path.join(TESTS_DIR, 'mock_gateway.yaml')
+SUITE = os.path.join(TESTS_DIR, 'test_cases_user_check.yaml')
+
+
+def suite_variables():
+    with open(SUITE, encoding='utf-8') as f:
+        return yaml.safe_load(f)['variables']
+
+
+class LatencyModelTest(unittest.TestCase):
+    def test_from_config(self):
+        self.assertEqual(LatencyModel.from_config(30), LatencyModel('fixed', (('value', 0.03),)))
+        self.assertEqual(LatencyModel.from_config('1.5s'), LatencyModel('fixed', (('value', 1.5),)))
+        model = LatencyModel.from_config({'distribution': 'lognormal', 'median': '20ms', 'sigma': 0.5, 'cap': '2s'})
+        self.assertEqual(model, LatencyModel('lognormal', (('median', 0.02), ('sigma', 0.5)), 2.0))
+        with self.assertRaisesRegex(ValueError, '不支持的延迟分布: pareto'):
+            LatencyModel.from_config({'distribution': 'pareto'})
+        with self.assertRaisesRegex(ValueError, '需要参数 min, max'):
+            LatencyModel.from_config({'distribution': 'uniform', 'min': 5})
+        with self.assertRaisesRegex(ValueError, '需要参数 mean'):
+            LatencyModel.from_config({'distribution': 'exponential', 'mean': 5, 'median': 5})
+
+    def test_sample_within_bounds(self):
+        rng = random.Random(1)
+        uniform = LatencyModel.from_config({'distribution': 'uniform', 'min': 5, 'max': 50})
+        self.assertTrue(all(0.005 <= uniform.sample(rng) <= 0.05 for _ in range(1000)))
+        # 负值截断为0，长尾截断到上限
+        normal = LatencyModel.from_config({'distribution': 'normal', 'mean': 0, 'stddev': 10})
+        self.assertTrue(all(normal.sample(rng) >= 0 for _ in range(1000)))
+        lognormal = LatencyModel.from_config({'distribution': 'lognormal', 'median': '1s', 'sigma': 3, 'cap': '2s'})
+        samples = sorted(lognormal.sample(rng) for _ in range(1001))
+        self.assertEqual(samples[-1], 2.0)
+        self.assertAlmostEqual(samples[500], 1.0, delta=0.3)
+        self.assertEqual(LatencyModel().sample(rng), 0.0)
+
+    def test_sample_is_reproducible(self):
+        model = LatencyModel.from_config({'distribution': 'exponential', 'mean': 20})
+        first = [model.sample(random.Random(7)) for _ in range(3)]
+        self.assertEqual(first, [model.sample(random.Random(7)) for _ in range(3)])
+
+
+class BehaviorTest(unittest.TestCase):
+    def test_inherits_base(self):
+        base = Behavior.from_config({'latency': 10, 'codes': {'000000': 9, '100001': 1}, 'message': 'ok'})
+        behavior = Behavior.from_config({'status': {502: 0.1}, 'hang_time': '5s'}, base)
+        self.assertEqual(behavior.latency, base.latency)
+        self.assertEqual(behavior.codes, (('000000', 9.0), ('100001', 1.0)))
+        self.assertEqual((behavior.status, behavior.hang_time, behavior.message), ((('502', 0.1),), 5.0, 'ok'))
+        self.assertIs(Behavior.from_config(None, base), base)
+        with self.assertRaisesRegex(ValueError, '未知的模拟行为配置项: delay'):
+            Behavior.from_config({'delay': 10})
+
+    def test_choose_status_and_code(self):
+        rng = random.Random(3)
+        behavior = Behavior.from_config({'status': {502: 0.1, 503: 0.2}, 'codes': {'000000': 3, '100001': 1}})
+        statuses = [behavior.choose_status(rng) for _ in range(10000)]
+        self.assertAlmostEqual(statuses.count(502) / 10000, 0.1, delta=0.02)
+        self.assertAlmostEqual(statuses.count(503) / 10000, 0.2, delta=0.02)
+        self.assertAlmostEqual(statuses.count(None) / 10000, 0.7, delta=0.02)
+        codes = [behavior.choose_code(rng) for _ in range(10000)]
+        self.assertAlmostEqual(codes.count('100001') / 10000, 0.25, delta=0.02)
+        self.assertIsNone(Behavior().choose_status(rng))
+        self.assertEqual(Behavior().choose_code(rng), SUCCESS_CODE)
+
+    def test_response_data_matches_request(self):
+        behavior = Behavior.from_config({'data': {'checkLoan': 1}, 'responses': [
+            {'match': {'phoneNo': '1', 'name': 'a'}, 'data': {'checkLoan': 0}},
+            {'match': {'phoneNo': '1'}, 'data': {'checkLoan': 2}},
+        ]})
+        self.assertEqual(behavior.response_data({'phoneNo': '1', 'name': 'a'}), {'checkLoan': 0})
+        self.assertEqual(behavior.response_data({'phoneNo': '1', 'name': 'b'}), {'checkLoan': 2})
+        self.assertEqual(behavior.response_data({'phoneNo': '2'}), {'checkLoan': 1})
+        self.assertEqual(behavior.response_data('not a dict'), {'checkLoan': 1})
+
+
+class MockScenarioTest(unittest.TestCase):
+    def setUp(self):
+        self.scenario = MockScenario.from_config({
+            'defaults': {'latency': 20},
+            'endpoints': {'user-credit': {'codes': {'100001': 1}}},
+            'phases': [
+                {'at': '10s', 'duration': '10s', 'endpoint': 'user-credit', 'latency': 800},
+                {'at': '15s', 'duration': '10s', 'reset': 0.5},
+            ],
+        })
+
+    def test_endpoint_defaults(self):
+        for endpoint, data in DEFAULT_DATA.items():
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(self.scenario.behavior(endpoint, 0).data, data)
+        self.assertEqual(self.scenario.behavior('user-credit', 0).codes, (('100001', 1.0),))
+        self.assertEqual(self.scenario.behavior('user-check', 0).codes, ((SUCCESS_CODE, 1.0),))
+
+    def test_phases_override_in_order(self):
+        credit = [self.scenario.behavior('user-credit', elapsed) for elapsed in (5, 12, 17, 22, 30)]
+        self.assertEqual([b.latency.sample(random.Random()) for b in credit], [0.02, 0.8, 0.8, 0.02, 0.02])
+        self.assertEqual([b.reset for b in credit], [0.0, 0.0, 0.5, 0.5, 0.0])
+        # 阶段之外沿用接口自身的配置
+        self.assertEqual(credit[2].codes, (('100001', 1.0),))
+        self.assertEqual(self.scenario.behavior('user-check', 12).latency.sample(random.Random()), 0.02)
+        self.assertIs(self.scenario.behavior('user-credit', 18), credit[2])
+
+    def test_invalid_phase(self):
+        with self.assertRaisesRegex(ValueError, '未知的模拟行为配置项: speed'):
+            MockScenario.from_config({'phases': [{'at': 0, 'duration': 10, 'speed': 2}]})
+
+
+class GatewayTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        variables = suite_variables()
+        cls.gateway = load_gateway(SCENARIO, [SUITE], seed=1)
+        # 渠道侧与网关侧算法对称：平台公钥加密请求、渠道私钥签名
+        cls.client = GatewayCodec(variables['channel_private_key'], {}, variables['platform_public_key'])
+
+    def request(self, payload, channel='yibeixiaochengxu'):
+        data, sign = self.client.encrypt_and_sign(channel, payload)
+        return json.dumps({'data': data, 'sign': sign}).encode('utf-8')
+
+    def business(self, body, endpoint='user-check', channel='yibeixiaochengxu', behavior=None):
+        behavior = behavior or self.gateway.scenario.behavior(endpoint, 0)
+        code, payload = self.gateway._business(channel, endpoint, body, behavior)
+        return code, json.loads(payload)
+
+    def test_success_round_trip(self):
+        for phone, expected in (('19585085482', {'checkLoan': 0, 'rejectReason': '重复'}),
+                                ('13800000000', {'checkLoan': 1, 'rejectReason': None})):
+            with self.subTest(phone=phone):
+                code, response = self.business(self.request({'phoneNo': phone, 'name': '张三' * 100}))
+                self.assertEqual((code, response['code'], response['message']), (SUCCESS_CODE, SUCCESS_CODE, '成功'))
+                self.assertTrue(self.client.verify('yibeixiaochengxu', response['data'], response['sign']))
+                self.assertEqual(self.client.decrypt(response['data']), expected)
+
+    def test_business_code(self):
+        behavior = Behavior.from_config({'codes': {'100001': 1}})
+        code, response = self.business(self.request({'phoneNo': '1'}), behavior=behavior)
+        self.assertEqual((code, response['data'], response['sign']), ('100001', '', ''))
+
+    def test_invalid_requests(self):
+        body = json.loads(self.request({'phoneNo': '1'}))
+        tampered = dict(body, data=self.client.encrypt_and_sign('x', {'phoneNo': '2'})[0])
+        garbage = base64.b64encode(b'x' * 256).decode('utf-8')
+        signature = self.client.platform_private_key.sign(garbage.encode('utf-8'), padding.PKCS1v15(), hashes.SHA256())
+        undecryptable = {'data': garbage, 'sign': base64.b64encode(signature).decode('utf-8')}
+        cases = {
+            'not json': (b'{', '100003'),
+            'missing sign': (json.dumps({'data': body['data']}).encode('utf-8'), '100003'),
+            'bad sign': (json.dumps(tampered).encode('utf-8'), '100002'),
+            'bad data': (json.dumps(undecryptable).encode('utf-8'), '100003'),
+        }
+        for name, (request, expected) in cases.items():
+            with self.subTest(name=name):
+                code, response = self.business(request)
+                self.assertEqual((code, response['code']), (expected, expected))
+
+    def test_suite_channels_derived(self):
+        self.assertIn('yibeixiaochengxu', self.gateway.codec.channel_keys)
+        codec = GatewayCodec(suite_variables()['channel_private_key'], {})
+        with self.assertRaisesRegex(KeyError, '未配置渠道 other 的公钥'):
+            codec.channel_key('other')
+        with self.assertRaisesRegex(ValueError, 'platform_private_key'):
+            load_gateway(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
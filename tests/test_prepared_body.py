@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import yaml
+from perf import executor as executor_module
+from perf.executor import PreparedBody, SuiteExecutor
+from perf.mockgateway import GatewayCodec
+from test import test_suite
+from util import json_codec
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES = ('test_cases_user_credit.yaml', 'test_cases_user_check.yaml', 'test_cases-repay.yaml')
+ID_NUMBER = '110101199003074514'
+
+
+def gateway_codec(suite):
+    """网关侧的解密与验签，渠道公钥由套件的渠道私钥推出"""
+    with open(os.path.join(TESTS_DIR, 'mock_gateway.yaml'), encoding='utf-8') as f:
+        keys = yaml.safe_load(f)['keys']
+    channel_key = GatewayCodec.public_key_of(suite.variables['channel_private_key'])
+    return GatewayCodec(keys['platform_private_key'], {}, channel_key)
+
+
+class PreparedBodyTest(unittest.TestCase):
+    def build(self, executor, case_id, prepared):
+        """固定身份证号与时间戳，分别按预序列化路径与逐次构建的字典路径生成请求体"""
+        saved = executor._prepared[case_id]
+        executor._prepared[case_id] = saved if prepared else None
+        try:
+            with mock.patch.object(executor_module, 'generate_random_id_number', return_value=ID_NUMBER), \
+                    mock.patch.object(executor_module.time, 'time', return_value=1700000000.0):
+                body, data = executor._build_body(case_id)
+        finally:
+            executor._prepared[case_id] = saved
+        return json_codec.loads(body) if isinstance(body, bytes) else body, data
+
+    def test_render_matches_dict_path(self):
+        for name in SUITES:
+            suite = test_suite.TestSuite.from_yaml(os.path.join(TESTS_DIR, name))
+            executor = SuiteExecutor(suite)
+            codec = gateway_codec(suite)
+            for case_id, prepared in executor._prepared.items():
+                if prepared is None or prepared.data is None:
+                    continue
+                with self.subTest(suite=name, case=case_id):
+                    fast, _ = self.build(executor, case_id, prepared=True)
+                    slow, expected = self.build(executor, case_id, prepared=False)
+                    self.assertEqual(codec.decrypt(fast['data']), expected)
+                    self.assertEqual(codec.decrypt(slow['data']), expected)
+                    self.assertEqual({k: v for k, v in fast.items() if k not in ('data', 'sign')},
+                                     {k: v for k, v in slow.items() if k not in ('data', 'sign')})
+                    self.assertTrue(codec.verify('', fast['data'], fast['sign']))
+
+    def test_id_slots_filled(self):
+        prepared = PreparedBody({'channel': 'c', 'data': {'idNo': 'x', 'userAuthInfo': {'idNo': 'x', 'birthDay': 'y'}}})
+        self.assertEqual(prepared.slots, {'idNo', 'birthDay'})
+        values = {'idNo': json_codec.dumps(ID_NUMBER), 'birthDay': json_codec.dumps('1990-03-07')}
+        data = json_codec.loads(PreparedBody.render(prepared.data, values))
+        self.assertEqual(data, {'idNo': ID_NUMBER, 'userAuthInfo': {'idNo': ID_NUMBER, 'birthDay': '1990-03-07'}})
+        self.assertEqual(prepared.rest, {'channel': 'c'})
+
+    def test_unprepared_bodies(self):
+        self.assertIsNone(PreparedBody.prepare('raw'))
+        self.assertIsNone(PreparedBody.prepare({'data': {'note': '@@idNo@@'}}))
+        plain = PreparedBody.prepare({'page': 1, 'name': '张三'})
+        self.assertIsNone(plain.data)
+        self.assertEqual(json_codec.loads(PreparedBody.render(plain.body, {})), {'page': 1, 'name': '张三'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.profile import ARRIVAL_RATE, LoadProfile, LoadStage, expand_pattern, parse_duration
+
+
+def shape(stages):
+    return [(stage.name, stage.duration, stage.target, stage.ramp) for stage in stages]
+
+
+class ParseDurationTest(unittest.TestCase):
+    def test_valid(self):
+        cases = {5: 5.0, 2.5: 2.5, '30': 30.0, '1.5': 1.5, '30s': 30.0, '500ms': 0.5, '5m': 300.0,
+                 '2h': 7200.0, '1m30s': 90.0, '1h2m3s': 3723.0, '1.5s': 1.5, ' 10s ': 10.0}
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertAlmostEqual(parse_duration(value), expected)
+
+    def test_invalid(self):
+        for value in ('', 'abc', '5x', '1m 30s', '-5s', 's', '10s5'):
+            with self.subTest(value=value):
+                with self.assertRaisesRegex(ValueError, '无效的时长'):
+                    parse_duration(value)
+
+
+class LoadStageTest(unittest.TestCase):
+    def test_ramp_defaults_and_clamps(self):
+        self.assertEqual(LoadStage('a', 10, 5).ramp, 10)
+        self.assertEqual(LoadStage('a', 10, 5, ramp=30).ramp, 10)
+        self.assertEqual(LoadStage('a', 10, 5, ramp=-1).ramp, 0)
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, '时长必须大于0'):
+            LoadStage('a', 0, 5)
+        with self.assertRaisesRegex(ValueError, '目标值不能小于0'):
+            LoadStage('a', 10, -1)
+
+
+class TargetAtTest(unittest.TestCase):
+    def setUp(self):
+        self.profile = LoadProfile(stages=[
+            LoadStage('ramp-up', 10, 20),
+            LoadStage('hold', 20, 20, ramp=0),
+            LoadStage('step', 10, 40, ramp=4),
+            LoadStage('ramp-down', 5, 0),
+        ], start=10)
+
+    def test_linear_ramps_and_holds(self):
+        cases = {
+            0: ('ramp-up', 10), 5: ('ramp-up', 15), 9.5: ('ramp-up', 19.5),
+            10: ('hold', 20), 29.9: ('hold', 20),
+            30: ('step', 20), 32: ('step', 30), 34: ('step', 40), 39: ('step', 40),
+            40: ('ramp-down', 40), 42.5: ('ramp-down', 20),
+            45: (None, 0), 100: (None, 0),
+        }
+        for elapsed, (stage, target) in cases.items():
+            with self.subTest(elapsed=elapsed):
+                name, value = self.profile.target_at(elapsed)
+                self.assertEqual(name, stage)
+                self.assertAlmostEqual(value, target)
+
+    def test_duration_and_peak(self):
+        self.assertEqual(self.profile.duration, 45)
+        self.assertEqual(self.profile.peak, 40)
+        self.assertEqual(LoadProfile(stages=[LoadStage('down', 10, 0)], start=50).peak, 50)
+
+    def test_invalid_profile(self):
+        with self.assertRaisesRegex(ValueError, '至少需要一个阶段'):
+            LoadProfile(stages=[])
+        with self.assertRaisesRegex(ValueError, '不支持的负载模型'):
+            LoadProfile(executor='closed', stages=[LoadStage('a', 1, 1)])
+
+
+class PatternTest(unittest.TestCase):
+    def test_ramp(self):
+        start, stages = expand_pattern('ramp', {'from': '5', 'to': '50', 'duration': '1m', 'hold': '30s'})
+        self.assertEqual(start, 5)
+        self.assertEqual(shape(stages), [('ramp', 60, 50, 60), ('hold', 30, 50, 0)])
+        start, stages = expand_pattern('ramp', {'to': 10, 'duration': 20})
+        self.assertEqual((start, shape(stages)), (0, [('ramp', 20, 10, 20)]))
+
+    def test_steps(self):
+        start, stages = expand_pattern('steps', {'start': 10, 'step': 5, 'every': '30s', 'count': 3})
+        self.assertEqual(start, 10)
+        # ramp 默认为 min(5s, every/5)
+        self.assertEqual(shape(stages), [('step-1', 30, 15, 5), ('step-2', 30, 20, 5), ('step-3', 30, 25, 5)])
+        _, stages = expand_pattern('steps', {'step': 1, 'every': '10s', 'count': 1})
+        self.assertEqual(stages[0].ramp, 2)
+
+    def test_spike(self):
+        start, stages = expand_pattern('spike', {'base': 10, 'peak': 100, 'hold': '5m'})
+        self.assertEqual(start, 10)
+        self.assertEqual(shape(stages), [('baseline', 60, 10, 60), ('spike', 310, 100, 10), ('recover', 130, 10, 10)])
+        profile = LoadProfile(stages=stages, start=start)
+        self.assertEqual(profile.target_at(65), ('spike', 55))
+        self.assertEqual(profile.target_at(300), ('spike', 100))
+        self.assertEqual(profile.target_at(375), ('recover', 55))
+
+    def test_soak(self):
+        start, stages = expand_pattern('soak', {'target': 20, 'duration': '2h'})
+        self.assertEqual((start, shape(stages)), (0, [('ramp-up', 60, 20, 60), ('soak', 7200, 20, 0)]))
+
+    def test_missing_and_unknown(self):
+        with self.assertRaisesRegex(ValueError, '缺少负载参数: peak'):
+            expand_pattern('spike', {'base': 10})
+        with self.assertRaisesRegex(ValueError, '不支持的负载模型: wave'):
+            expand_pattern('wave', {})
+
+
+class BuildProfileTest(unittest.TestCase):
+    def test_from_cli_stages(self):
+        profile = LoadProfile.from_cli('1m:20, 5m:20:hold,30s:0', executor=ARRIVAL_RATE, max_vus=50)
+        self.assertEqual(shape(profile.stages), [('stage-1', 60, 20, 60), ('hold', 300, 20, 300), ('stage-3', 30, 0, 30)])
+        self.assertEqual((profile.executor, profile.max_vus, profile.start), (ARRIVAL_RATE, 50, 0))
+        with self.assertRaisesRegex(ValueError, '无效的阶段描述'):
+            LoadProfile.from_cli('1m')
+
+    def test_from_cli_pattern(self):
+        profile = LoadProfile.from_cli('spike:base=10,peak=100,hold=5m,warm=30s')
+        self.assertEqual(profile.start, 10)
+        self.assertEqual([stage.name for stage in profile.stages], ['baseline', 'spike', 'recover'])
+        self.assertEqual(profile.stages[0].duration, 30)
+
+    def test_from_config(self):
+        profile = LoadProfile.from_config({
+            'executor': ARRIVAL_RATE, 'max_vus': 30, 'start': 2,
+            'stages': [{'duration': '2m', 'target': 20}, {'name': 'hold', 'duration': '5m', 'target': 20, 'ramp': 0}]
+        })
+        self.assertEqual(shape(profile.stages), [('stage-1', 120, 20, 120), ('hold', 300, 20, 0)])
+        self.assertEqual((profile.executor, profile.max_vus, profile.start), (ARRIVAL_RATE, 30, 2))
+        pattern = LoadProfile.from_config({'pattern': 'soak', 'target': 5, 'duration': '10m', 'ramp': '30s'})
+        self.assertEqual(shape(pattern.stages), [('ramp-up', 30, 5, 30), ('soak', 600, 5, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
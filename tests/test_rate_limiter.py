@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from network.rate_limiter import Bulkhead, LimitConfig, LimitExceeded, TokenBucket, TrafficLimiter
+from test import test_suite
+
+
+class BulkheadTest(unittest.TestCase):
+    def test_full_bulkhead_waits_until_released(self):
+        bulkhead = Bulkhead(1)
+        bulkhead.acquire()
+        acquired = threading.Event()
+        waits = []
+
+        def worker():
+            waits.append(bulkhead.acquire(max_wait=None))
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.2), "名额已满时不应立即获得")
+        bulkhead.release()
+        self.assertTrue(acquired.wait(2), "释放后等待的线程应获得名额")
+        thread.join()
+        self.assertGreaterEqual(waits[0], 0.15)
+        self.assertEqual(bulkhead.active, 1)
+
+    def test_max_wait_rejects_after_timeout(self):
+        bulkhead = Bulkhead(1)
+        bulkhead.acquire()
+        start = time.perf_counter()
+        with self.assertRaises(LimitExceeded):
+            bulkhead.acquire(max_wait=0.1)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(bulkhead.active, 1)
+
+
+class TrafficLimiterTest(unittest.TestCase):
+    def test_tokens_refunded_when_later_scope_rejects(self):
+        limiter = TrafficLimiter(
+            global_limit=LimitConfig(rate=1, burst=1, max_wait=0),
+            cases={'case_001': LimitConfig(rate=0.001, burst=2, max_wait=0)}
+        )
+        with limiter.acquire('http://host/api', 'case_001'):
+            pass
+        # 全局令牌已用完，用例级令牌桶中取出的令牌应归还
+        with self.assertRaises(LimitExceeded):
+            with limiter.acquire('http://host/api', 'case_001'):
+                pass
+        case_bucket = limiter._cases['case_001'].bucket
+        self.assertGreaterEqual(case_bucket._tokens, 0.99)
+
+    def test_refund_does_not_exceed_burst(self):
+        bucket = TokenBucket(rate=5, burst=2)
+        bucket.refund(10)
+        self.assertEqual(bucket._tokens, 2)
+
+
+class SuiteLimiterTest(unittest.TestCase):
+    def test_concurrent_get_limiter_builds_one_instance(self):
+        suite = test_suite.TestSuite(name='s', description='', cases={}, limits={'global': {'rate': 100}})
+        barrier = threading.Barrier(8)
+        limiters = []
+
+        def worker():
+            barrier.wait()
+            limiters.append(suite.get_limiter())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(limiter) for limiter in limiters}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf import replay
+from perf.capture import CapturedRequest, TrafficRecorder
+from perf.stats import StatsCollector
+
+KEYS = {'channel_private_key': '', 'platform_public_key': ''}
+
+
+def _report(index, queue):
+    queue.put((index, ('result', index), None))
+
+
+def _crash(index, queue):
+    os._exit(3)
+
+
+def start(targets):
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=target, args=(index, queue), name=f"replay-{index}")
+                 for index, target in enumerate(targets)]
+    for process in processes:
+        process.start()
+    return processes, queue
+
+
+class CollectTest(unittest.TestCase):
+    def test_results_in_shard_order(self):
+        processes, queue = start([_report, _report, _report])
+        self.assertEqual(replay._collect(processes, queue), [('result', 0), ('result', 1), ('result', 2)])
+
+    @mock.patch.object(replay, 'RESULT_POLL', 0.1)
+    def test_dead_worker_does_not_hang(self):
+        processes, queue = start([_report, _crash])
+        begin = time.monotonic()
+        with self.assertRaisesRegex(RuntimeError, 'replay-1 异常退出（exitcode 3）'):
+            replay._collect(processes, queue)
+        self.assertLess(time.monotonic() - begin, 5)
+        self.assertTrue(all(process.exitcode is not None for process in processes))
+
+    def test_worker_error_raised_in_parent(self):
+        queue = multiprocessing.Queue()
+        missing = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'missing.capture')
+        processes = [multiprocessing.Process(
+            target=replay._replay_worker,
+            args=(missing, KEYS, time.time(), 0, 1, queue),
+            name='replay-0'
+        )]
+        processes[0].start()
+        with self.assertRaisesRegex(RuntimeError, r'(?s)replay-0 出错.*FileNotFoundError'):
+            replay._collect(processes, queue)
+
+
+class ReplayUrlTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'access.jsonl')
+        with TrafficRecorder(self.path, 'access_log', started_at=1700000000.0) as recorder:
+            for index in range(3):
+                recorder.record(CapturedRequest(t=1700000000.0 + index, method='POST', url='/api/credit/apply',
+                                                body={'channelCode': 'c'}))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_relative_paths_without_base_url_fail_fast(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                with self.assertRaisesRegex(ValueError, '需要指定 --base-url'):
+                    replay.replay(self.path, workers=workers, lead=0, speed=0, **KEYS)
+
+    def test_task_error_recorded_as_build_failure(self):
+        replayer = replay.Replayer(base_url='http://127.0.0.1:9', speed=0, **KEYS)
+        stats = StatsCollector()
+        with mock.patch.object(replay.Replayer, 'send', side_effect=RuntimeError('boom')):
+            replayer.run(self.path, time.time(), stats)
+        report = stats.report()
+        self.assertEqual(report['total']['requests'], 3)
+        self.assertEqual(report['total']['failed'], 3)
+        self.assertEqual(report['total']['errors'], {'请求构建失败: boom': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf import resultlog
+from perf.executor import RequestResult
+from perf.resultlog import ResultLog, ResultLogWriter
+from perf.stats import StatsCollector
+
+
+def result(case_id, index, passed=True):
+    item = RequestResult(case_id, '/api/' + case_id, 1700000000.0 + index)
+    item.latency = 0.01
+    item.status_code = 200
+    item.biz_code = '000000' if passed else f"1{index:05d}"
+    item.attempts = 1
+    item.passed = passed
+    item.error = None if passed else f"业务返回码错误: 1{index:05d}"
+    return item
+
+
+class ResultLogWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'run.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read_meta(self):
+        with open(self.path + '.json', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_meta_not_rewritten_per_new_name(self):
+        writer = ResultLogWriter(self.path, chunk_records=16)
+        with mock.patch.object(writer, '_write_meta', wraps=writer._write_meta) as write_meta:
+            for index in range(200):
+                writer.write('steady', result(f"case_{index:03d}", index, passed=index % 2 == 0))
+            self.assertLessEqual(write_meta.call_count, 1)
+            writer.close()
+            self.assertLessEqual(write_meta.call_count, 2)
+        meta = self.read_meta()
+        self.assertEqual(len(meta['cases']), 200)
+        self.assertEqual(len(meta['fingerprints']), 100)
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 200)
+        self.assertEqual(log.summarize()['total']['failed'], 100)
+
+    @mock.patch.object(resultlog, 'META_INTERVAL', 0.0)
+    def test_meta_flushed_on_timer(self):
+        writer = ResultLogWriter(self.path)
+        writer.write('steady', result('case_001', 0))
+        self.assertEqual(self.read_meta()['cases'], ['case_001'])
+        writer.close()
+
+    def test_unclosed_log_readable_with_missing_names(self):
+        writer = ResultLogWriter(self.path)
+        for index in range(3):
+            writer.write('steady', result(f"case_{index:03d}", index, passed=False))
+        # 模拟进程崩溃：记录已写入 mmap，字典文件仍是创建时的版本
+        writer._map.flush()
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.name('cases', 3), '(未知 3)')
+        report = log.summarize()
+        self.assertEqual(report['total']['failed'], 3)
+        self.assertEqual(len(report['failures']), 3)
+        writer.close()
+
+
+class SummarizeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'run.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assert_summary(self, expected, actual, path):
+        for key in ('requests', 'passed', 'failed', 'attempts', 'error_rate', 'http_error_rate', 'checks'):
+            self.assertEqual(actual[key], expected[key], f"{path}.{key}")
+        self.assertAlmostEqual(actual['rps'], expected['rps'], places=6, msg=f"{path}.rps")
+        # 日志中的延迟为 float32，分位数取相同的直方图桶
+        for key, value in expected['latency_ms'].items():
+            self.assertTrue(math.isclose(actual['latency_ms'][key], value, rel_tol=1e-5), f"{path}.latency_ms.{key}")
+
+    def test_matches_stats_collector(self):
+        rng = random.Random(3)
+        stats = StatsCollector()
+        with ResultLogWriter(self.path, chunk_records=512) as writer:
+            for index in range(3000):
+                item = result(f"case_{rng.randrange(3):03d}", index, passed=rng.random() > 0.1)
+                item.endpoint = f"/api/{rng.randrange(2)}"
+                item.latency = rng.lognormvariate(-3, 0.8)
+                item.attempts = rng.choice((1, 1, 2))
+                if not item.passed:
+                    item.biz_code, item.error = '100001', '业务返回码错误: 100001'
+                stage = None if index < 300 else ('ramp' if index < 1200 else 'steady')
+                writer.write(stage, item)
+                if stage is not None:
+                    stats.record(stage, item)
+        expected = stats.report()
+        log = ResultLog(self.path)
+        for chunk_size in (1 << 20, 700):
+            with self.subTest(chunk_size=chunk_size):
+                report = log.summarize(chunk_size=chunk_size)
+                self.assertEqual(list(report['stages']), ['ramp', 'steady'])
+                self.assert_summary(expected['total'], report['total'], 'total')
+                # 结果日志按失败指纹的模板归并错误
+                self.assertEqual(report['total']['errors'], {'业务返回码错误: <n>': expected['total']['failed']})
+                for stage, data in expected['stages'].items():
+                    self.assert_summary(data['total'], report['stages'][stage]['total'], stage)
+                    for case_id, summary in data['cases'].items():
+                        self.assert_summary(summary, report['stages'][stage]['cases'][case_id], f"{stage}.{case_id}")
+                for case_id, summary in expected['cases'].items():
+                    self.assert_summary(summary, report['cases'][case_id], case_id)
+                for endpoint, summary in expected['endpoints'].items():
+                    self.assert_summary(summary, report['endpoints'][endpoint], endpoint)
+                    self.assertEqual(report['endpoints'][endpoint]['codes'], summary['codes'])
+                self.assertEqual([(item['template'], item['count']) for item in report['failures']],
+                                 [(item['template'], item['count']) for item in expected['failures']])
+        self.assertEqual(log.summarize(include_warmup=True)['total']['requests'], 3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
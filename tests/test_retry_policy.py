@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import httpx
+from network.retry_policy import RetryBudget, RetryPolicy, RetryStats, classify_error
+
+
+class ShouldRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=2)
+
+    def test_idempotent_retries_any_error(self):
+        self.assertTrue(self.policy.should_retry('get', 'read_timeout', 0))
+        self.assertTrue(self.policy.should_retry('PUT', 'protocol_error', 0))
+
+    def test_non_idempotent_retries_only_safe_errors(self):
+        self.assertTrue(self.policy.should_retry('POST', 'connect_error', 0))
+        self.assertTrue(self.policy.should_retry('POST', 'pool_timeout', 0))
+        self.assertFalse(self.policy.should_retry('POST', 'read_timeout', 0))
+
+    def test_status_codes_only_for_idempotent(self):
+        self.assertTrue(self.policy.should_retry('GET', None, 503))
+        self.assertFalse(self.policy.should_retry('POST', None, 503))
+        self.assertFalse(self.policy.should_retry('GET', None, 500))
+        self.assertFalse(self.policy.should_retry('GET', None, 200))
+
+    def test_classify_error(self):
+        request = httpx.Request('GET', 'http://host')
+        self.assertEqual(classify_error(httpx.ConnectTimeout('x', request=request)), 'connect_timeout')
+        self.assertEqual(classify_error(httpx.ReadTimeout('x', request=request)), 'read_timeout')
+        self.assertEqual(classify_error(ValueError('x')), 'error')
+
+
+class BackoffTest(unittest.TestCase):
+    def test_exponential_without_jitter(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=0.5, jitter='none')
+        self.assertEqual([policy.backoff(attempt) for attempt in range(1, 5)], [0.1, 0.2, 0.4, 0.5])
+
+    def test_full_jitter_range(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=2.0, jitter='full')
+        with mock.patch('network.retry_policy.random.uniform', side_effect=lambda low, high: (low, high)):
+            self.assertEqual(policy.backoff(3), (0, 0.4))
+
+    def test_equal_jitter_keeps_half(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=2.0, jitter='equal')
+        with mock.patch('network.retry_policy.random.uniform', side_effect=lambda low, high: high):
+            self.assertAlmostEqual(policy.backoff(3), 0.4)
+        with mock.patch('network.retry_policy.random.uniform', side_effect=lambda low, high: low):
+            self.assertAlmostEqual(policy.backoff(3), 0.2)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_retries=-1)
+        with self.assertRaises(ValueError):
+            RetryPolicy(jitter='random')
+        with self.assertRaises(ValueError):
+            RetryPolicy.from_config({'retries': 3})
+
+    def test_from_config_overrides_base(self):
+        base = RetryPolicy(max_retries=3, backoff_base=0.5)
+        self.assertEqual(RetryPolicy.from_config(1, base), RetryPolicy(max_retries=1, backoff_base=0.5))
+        policy = RetryPolicy.from_config({'retry_on_status': [500]}, base)
+        self.assertEqual(policy.retry_on_status, (500,))
+        self.assertEqual(policy.max_retries, 3)
+        self.assertIs(RetryPolicy.from_config(None, base), base)
+
+
+class RetryBudgetTest(unittest.TestCase):
+    def test_min_tokens_allow_initial_retries(self):
+        budget = RetryBudget(ratio=0.2, min_tokens=2)
+        self.assertTrue(budget.try_withdraw())
+        self.assertTrue(budget.try_withdraw())
+        self.assertFalse(budget.try_withdraw())
+
+    def test_retries_limited_to_ratio_of_requests(self):
+        budget = RetryBudget(ratio=0.2, min_tokens=0)
+        for _ in range(10):
+            budget.deposit()
+        # 10 个请求按 0.2 的比例存入 2 个令牌
+        retries = 0
+        while budget.try_withdraw():
+            retries += 1
+        self.assertEqual(retries, 2)
+        for _ in range(5):
+            budget.deposit()
+        self.assertTrue(budget.try_withdraw())
+
+    def test_tokens_capped(self):
+        budget = RetryBudget(ratio=1, min_tokens=0, max_tokens=3)
+        for _ in range(10):
+            budget.deposit()
+        self.assertEqual(sum(budget.try_withdraw() for _ in range(10)), 3)
+
+    def test_stats_record(self):
+        stats = RetryStats()
+        stats.record(3, 2, True, False, ['read_timeout', 'read_timeout'])
+        stats.record(1, 0, False, True, [])
+        self.assertEqual(stats.to_dict(), {'requests': 2, 'attempts': 4, 'retries': 2, 'hedges': 1,
+                                           'budget_exhausted': 1, 'errors': {'read_timeout': 2}})
+
+
+if __name__ == '__main__':
+    unittest.main()
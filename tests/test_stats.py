@@ -0,0 +1,149 @@
+import math
+import os
+import random
+import sys
+import threading
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.executor import RequestResult
+from perf.stats import FailureReservoir, LatencyHistogram, StatsCollector, _Shard
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+def exact(values, q):
+    """与直方图一致的最近秩分位数"""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q * len(ordered))) - 1]
+
+
+def result(case_id, latency, passed=True, error=None, start=0.0):
+    item = RequestResult(case_id, '/api/' + case_id, start)
+    item.latency = latency
+    item.status_code = 200
+    item.attempts = 1
+    item.passed = passed
+    item.error = error
+    return item
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.values = [rng.lognormvariate(math.log(0.05), 1.0) for _ in range(20000)]
+
+    def test_percentiles_within_relative_precision(self):
+        histogram = LatencyHistogram()
+        for value in self.values:
+            histogram.record(value)
+        for q, value in zip(QUANTILES, histogram.percentiles(QUANTILES)):
+            expected = exact(self.values, q)
+            self.assertLess(abs(value - expected) / expected, 0.011, f"p{q * 100:g}")
+        self.assertEqual(histogram.count, len(self.values))
+        self.assertAlmostEqual(histogram.mean, sum(self.values) / len(self.values))
+
+    def test_extremes_clamped_to_observed_range(self):
+        histogram = LatencyHistogram()
+        for value in (0.0101, 0.0102, 0.0103):
+            histogram.record(value)
+        for q in (0, 0.5, 1):
+            value = histogram.percentile(q)
+            self.assertTrue(0.0101 <= value <= 0.0103, f"p{q * 100:g}={value}")
+        self.assertAlmostEqual(histogram.percentile(1), 0.0103, delta=0.0103 * 0.01)
+        self.assertEqual(LatencyHistogram().percentiles((0.5, 0.99)), [0.0, 0.0])
+
+    def test_merge_equals_single_histogram(self):
+        whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for index, value in enumerate(self.values):
+            whole.record(value)
+            (left if index % 3 else right).record(value)
+        left.merge(right)
+        left.merge(LatencyHistogram())
+        self.assertEqual(left.counts, whole.counts)
+        self.assertEqual((left.count, left.min, left.max), (whole.count, whole.min, whole.max))
+        self.assertAlmostEqual(left.total, whole.total)
+        self.assertEqual(left.percentiles(QUANTILES), whole.percentiles(QUANTILES))
+
+
+class ShardMergeTest(unittest.TestCase):
+    def test_shards_from_threads_merge(self):
+        collector = StatsCollector(reservoir_size=5)
+
+        def worker(offset):
+            for index in range(100):
+                collector.record('steady', result('case_001', 0.01 * (offset + 1), passed=index % 10 != 0,
+                                                  error='业务返回码错误: 100001', start=float(index)))
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 新线程注册分片时，已退出线程的分片并入 retired
+        collector.record('steady', result('case_002', 0.02))
+
+        total = collector.report()['total']
+        self.assertEqual(total['requests'], 401)
+        self.assertEqual(total['failed'], 40)
+        self.assertEqual(total['errors'], {'业务返回码错误: 100001': 40})
+        self.assertEqual(total['latency_ms']['max'], 40.0)
+        merged = collector.merged()
+        self.assertEqual(merged.failures.seen, 40)
+        self.assertEqual(len(merged.failures.samples), 5)
+        self.assertEqual(len(collector._shards), 1)
+
+    def test_merge_shard_keeps_keys_apart(self):
+        target, source = _Shard(None, 10), _Shard(None, 10)
+        collector = StatsCollector()
+        collector.record('steady', result('case_001', 0.01))
+        collector.record('steady', result('case_001', 0.03))
+        collector.record('warmup', result('case_001', 0.02))
+        StatsCollector._merge_shard(source, collector.merged())
+        StatsCollector._merge_shard(target, source)
+        StatsCollector._merge_shard(target, source)
+        counts = {key[0]: stats.requests for key, stats in target.stats.items()}
+        self.assertEqual(counts, {'steady': 4, 'warmup': 2})
+
+
+class FailureReservoirTest(unittest.TestCase):
+    @staticmethod
+    def filled(tag, count, size):
+        reservoir = FailureReservoir(size)
+        for index in range(count):
+            reservoir.offer(result(f"{tag}{index}", 0.01, passed=False, error=tag))
+        return reservoir
+
+    def test_merge_weighted_by_seen(self):
+        random.seed(11)
+        taken = 0
+        for _ in range(400):
+            reservoir = self.filled('a', 300, 10)
+            reservoir.merge(self.filled('b', 100, 10))
+            self.assertEqual(reservoir.seen, 400)
+            self.assertEqual(len(reservoir.samples), 10)
+            taken += sum(1 for sample in reservoir.samples if sample['error'] == 'b')
+        # b 占全部失败的 1/4，期望 1000 条，标准差约 26
+        self.assertLess(abs(taken - 1000), 120)
+
+    def test_merge_draws_without_replacement(self):
+        # 两边各见过 10 条失败并全部保留，合并取 10 条相当于从 20 条中不放回地抽取：
+        # 来自一侧的条数服从超几何分布，方差 10*0.5*0.5*10/19≈1.32，有放回抽取（二项分布）则为 2.5
+        random.seed(5)
+        counts = []
+        for _ in range(2000):
+            reservoir = self.filled('a', 10, 10)
+            reservoir.merge(self.filled('b', 10, 10))
+            counts.append(sum(1 for sample in reservoir.samples if sample['error'] == 'b'))
+        mean = sum(counts) / len(counts)
+        variance = sum((count - mean) ** 2 for count in counts) / (len(counts) - 1)
+        self.assertLess(abs(mean - 5), 0.15)
+        self.assertLess(variance, 1.7)
+
+    def test_merge_into_empty(self):
+        reservoir = FailureReservoir(10)
+        reservoir.merge(self.filled('b', 3, 10))
+        self.assertEqual((reservoir.seen, len(reservoir.samples)), (3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.thresholds import SLORule, parse_rule, parse_slo
+
+
+class ParseRuleTest(unittest.TestCase):
+    def test_units_converted(self):
+        cases = {
+            'p95<200ms': SLORule('p95', '<', 200.0),
+            'p99 <= 1.5s': SLORule('p99', '<=', 1500.0),
+            'mean<80': SLORule('mean', '<', 80.0),
+            'error_rate<0.5%': SLORule('error_rate', '<', 0.005),
+            'checks>0.99': SLORule('checks', '>', 0.99),
+            'rps>=20/s': SLORule('rps', '>=', 20.0),
+            'rps>10': SLORule('rps', '>', 10.0),
+        }
+        for text, rule in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_rule(text), rule)
+
+    def test_mismatched_units_rejected(self):
+        for text in ('p95<200%', 'max<1/s', 'rps>10ms', 'rps>1s', 'rps>5%', 'error_rate<1ms', 'checks>99s',
+                     'http_error_rate<1/s'):
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, '的单位只能是'):
+                    parse_rule(text)
+
+    def test_invalid_rules_rejected(self):
+        for text in ('latency<1ms', 'p95=200ms', 'p95<', 'p95<200us'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_rule(text)
+
+    def test_parse_slo_round_trip(self):
+        rules = parse_slo('p99<800ms, error_rate<0.5%,,rps>=20')
+        self.assertEqual([str(rule) for rule in rules], ['p99<800ms', 'error_rate<0.5%', 'rps>=20/s'])
+        self.assertEqual(parse_slo([str(rule) for rule in rules]), rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.executor import RequestResult
+from perf.timeseries import TOTAL, TimeSeries
+
+START = 1700000000.0
+
+
+def result(end, latency=0.01, passed=True, endpoint='/api/a'):
+    item = RequestResult('case_001', endpoint, START + end - latency)
+    item.latency = latency
+    item.passed = passed
+    return item
+
+
+def rows_by(rows, endpoint):
+    return [row for row in rows if row['endpoint'] == endpoint]
+
+
+class TimeSeriesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_slots_by_completion_time(self):
+        series = TimeSeries(interval=1.0, windows=())
+        series.start(START)
+        # 开始于第 0 秒、完成于第 1 秒的请求计入第 1 秒
+        series.record(result(1.2, latency=0.5))
+        series.record(result(0.3))
+        series.record(result(0.6, passed=False, endpoint='/api/b'))
+        rows = series.flush(START + 3.5)
+        self.assertEqual([(row['elapsed'], row['endpoint'], row['requests']) for row in rows], [
+            (0.0, '/api/a', 1), (0.0, '/api/b', 1), (0.0, TOTAL, 2),
+            (1.0, '/api/a', 1), (1.0, '/api/b', 0), (1.0, TOTAL, 1),
+        ])
+        total = rows_by(rows, TOTAL)[0]
+        self.assertEqual((total['failed'], total['error_rate'], total['rps']), (1, 0.5, 2.0))
+        self.assertAlmostEqual(rows_by(rows, TOTAL)[1]['max_ms'], 500.0, delta=5)
+
+    def test_keeps_one_slot_margin_and_zero_rows(self):
+        series = TimeSeries(interval=1.0, windows=())
+        series.start(START)
+        series.record(result(0.5))
+        self.assertEqual(series.flush(START + 1.5), [])
+        rows = series.flush(START + 4.0, final=True)
+        self.assertEqual([row['requests'] for row in rows_by(rows, TOTAL)], [1, 0, 0, 0, 0])
+        self.assertEqual(series.rows_written, 10)
+
+    def test_late_results_merged_into_next_slot(self):
+        series = TimeSeries(interval=1.0, windows=())
+        series.start(START)
+        series.record(result(0.5))
+        series.flush(START + 2.5)
+        series.record(result(0.8))
+        rows = series.flush(START + 3.5)
+        self.assertEqual([(row['elapsed'], row['requests']) for row in rows_by(rows, TOTAL)], [(1.0, 1)])
+
+    def test_rolling_windows(self):
+        series = TimeSeries(interval=1.0, windows=(3.0,))
+        series.start(START)
+        for second, count in enumerate((1, 2, 3, 4, 5)):
+            for _ in range(count):
+                series.record(result(second + 0.5, latency=0.01 * (second + 1), passed=second != 0))
+        rows = rows_by(series.flush(START + 5.0, final=True), TOTAL)
+        # 窗口未满时按已有时间片计算
+        self.assertEqual([row['rps_3s'] for row in rows[:6]], [1.0, 1.5, 2.0, 3.0, 4.0, 3.0])
+        self.assertAlmostEqual(rows[0]['error_rate_3s'], 1.0)
+        self.assertAlmostEqual(rows[2]['error_rate_3s'], 1 / 6)
+        self.assertEqual(rows[3]['error_rate_3s'], 0.0)
+        self.assertAlmostEqual(rows[4]['p99_3s_ms'], 50.0, delta=0.5)
+        self.assertAlmostEqual(rows[5]['p99_3s_ms'], 50.0, delta=0.5)
+
+    def test_csv_and_jsonl_output(self):
+        for name in ('series.csv', 'series.jsonl'):
+            with self.subTest(name=name):
+                path = os.path.join(self.dir, name)
+                series = TimeSeries(interval=1.0, windows=(10.0,), path=path)
+                series.start(START)
+                series.record(result(0.5))
+                series.flush(START + 1.0, final=True)
+                with open(path, encoding='utf-8') as f:
+                    if name.endswith('.csv'):
+                        rows = list(csv.DictReader(f))
+                    else:
+                        rows = [json.loads(line) for line in f]
+                self.assertEqual(list(rows[0]), series.fieldnames)
+                self.assertEqual([str(row['requests']) for row in rows_by(rows, TOTAL)], ['1', '0'])
+
+    def test_invalid_interval(self):
+        with self.assertRaisesRegex(ValueError, '时间片长度必须大于0'):
+            TimeSeries(interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from test import test_case, test_suite
+from test.validators import CODE, DATA, DECRYPT, ResponseValidator, ValidationFailure, compile_path
+
+
+def check(expected_data, data):
+    return ResponseValidator(expected_data=expected_data).check_data(data)
+
+
+def rules(failures):
+    return [(failure.path, failure.rule) for failure in failures]
+
+
+class PathTest(unittest.TestCase):
+    def test_compile_path(self):
+        self.assertEqual(compile_path('$.loans[0].loanId'), ('loans', 0, 'loanId'))
+        self.assertEqual(compile_path('loans[1]'), ('loans', 1))
+        self.assertEqual(compile_path("$['user.name']"), ('user.name',))
+
+    def test_invalid_path(self):
+        for expr in ('$', '$.loans[x]', '$..a'):
+            with self.assertRaises(ValueError):
+                compile_path(expr)
+
+    def test_nested_lookup(self):
+        data = {'loans': [{'status': 1}, {'status': 3}]}
+        self.assertEqual(check({'$.loans[0].status': 1}, data), [])
+        self.assertEqual(check({'$.loans[1].status': 3}, data), [])
+        self.assertEqual(rules(check({'$.loans[2].status': 1}, data)), [('$.loans[2].status', 'exists')])
+        self.assertEqual(rules(check({'$.loans.status': 1}, data)), [('$.loans.status', 'exists')])
+
+    def test_plain_key_reported_as_path(self):
+        self.assertEqual(rules(check({'success': True}, {'success': False})), [('$.success', 'eq')])
+
+
+class RuleTest(unittest.TestCase):
+    def test_eq_and_ne(self):
+        self.assertEqual(check({'a': None}, {'a': None}), [])
+        self.assertEqual(rules(check({'a': None}, {})), [('$.a', 'exists')])
+        self.assertEqual(check({'a': {'ne': 0}}, {'a': 1}), [])
+        self.assertEqual(rules(check({'a': {'ne': 0}}, {'a': 0})), [('$.a', 'ne')])
+
+    def test_plain_dict_compared_for_equality(self):
+        self.assertEqual(check({'a': {'x': 1}}, {'a': {'x': 1}}), [])
+        self.assertEqual(check({'a': {'eq': {'min': 1}}}, {'a': {'min': 1}}), [])
+
+    def test_type_does_not_accept_bool_as_number(self):
+        self.assertEqual(check({'a': {'type': 'integer'}}, {'a': 5}), [])
+        self.assertEqual(rules(check({'a': {'type': 'integer'}}, {'a': True})), [('$.a', 'type')])
+        self.assertEqual(rules(check({'a': {'type': 'number'}}, {'a': False})), [('$.a', 'type')])
+        self.assertEqual(check({'a': {'type': 'boolean'}}, {'a': True}), [])
+        self.assertEqual(check({'a': {'type': ['string', 'null']}}, {'a': None}), [])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            ResponseValidator(expected_data={'a': {'type': 'decimal'}})
+
+    def test_regex(self):
+        self.assertEqual(check({'userId': {'regex': r'^U\d+$'}}, {'userId': 'U123'}), [])
+        self.assertEqual(rules(check({'userId': {'regex': r'^U\d+$'}}, {'userId': 'X1'})), [('$.userId', 'regex')])
+        self.assertEqual(rules(check({'userId': {'regex': r'\d'}}, {'userId': 123})), [('$.userId', 'regex')])
+
+    def test_min_max(self):
+        spec = {'amount': {'min': 100, 'max': 50000}}
+        self.assertEqual(check(spec, {'amount': 100}), [])
+        self.assertEqual(check(spec, {'amount': 50000.0}), [])
+        self.assertEqual(rules(check(spec, {'amount': 99.9})), [('$.amount', 'min')])
+        self.assertEqual(rules(check(spec, {'amount': 50001})), [('$.amount', 'max')])
+
+    def test_uncomparable_value_is_type_failure(self):
+        failures = check({'amount': {'min': 100}}, {'amount': 'x'})
+        self.assertEqual(rules(failures), [('$.amount', 'type')])
+        self.assertEqual(failures[0].expected, 'number')
+        self.assertIn('类型应为 number，实际为 string', failures[0].message)
+        self.assertEqual(rules(check({'name': {'min_len': 1}}, {'name': 5})), [('$.name', 'type')])
+
+    def test_in(self):
+        self.assertEqual(check({'status': {'in': [1, 2]}}, {'status': 2}), [])
+        self.assertEqual(rules(check({'status': {'in': [1, 2]}}, {'status': 3})), [('$.status', 'in')])
+
+    def test_length(self):
+        spec = {'loans': {'min_len': 1, 'max_len': 2}}
+        self.assertEqual(check(spec, {'loans': [1]}), [])
+        self.assertEqual(rules(check(spec, {'loans': []})), [('$.loans', 'min_len')])
+        self.assertEqual(rules(check(spec, {'loans': [1, 2, 3]})), [('$.loans', 'max_len')])
+
+    def test_exists_false(self):
+        self.assertEqual(check({'rejectReason': {'exists': False}}, {}), [])
+        failures = check({'rejectReason': {'exists': False}}, {'rejectReason': None})
+        self.assertEqual(rules(failures), [('$.rejectReason', 'exists')])
+        self.assertIsNone(failures[0].actual)
+        with self.assertRaises(ValueError):
+            ResponseValidator(expected_data={'a': {'exists': False, 'type': 'string'}})
+
+    def test_all_failures_reported(self):
+        spec = {'a': {'type': 'string', 'min_len': 3}, 'b': 1}
+        self.assertEqual(rules(check(spec, {'a': 'x', 'b': 2})), [('$.a', 'min_len'), ('$.b', 'eq')])
+        self.assertTrue(all(failure.stage == DATA for failure in check(spec, {'a': 'x', 'b': 2})))
+
+
+class SchemaTest(unittest.TestCase):
+    SCHEMA = {'schema': {
+        'type': 'array', 'minItems': 1,
+        'items': {'type': 'object', 'required': ['loanId'], 'additionalProperties': False,
+                  'properties': {'loanId': {'type': 'string'}, 'amount': {'minimum': 0}}}
+    }}
+
+    def test_valid(self):
+        self.assertEqual(check({'loans': self.SCHEMA}, {'loans': [{'loanId': 'L1', 'amount': 5}]}), [])
+
+    def test_item_failures(self):
+        data = {'loans': [{'amount': -1}, {'loanId': 2}]}
+        self.assertEqual(rules(check({'loans': self.SCHEMA}, data)),
+                         [('$.loans[0].loanId', 'exists'), ('$.loans[0].amount', 'min'), ('$.loans[1].loanId', 'type')])
+
+    def test_additional_properties(self):
+        failures = check({'loans': self.SCHEMA}, {'loans': [{'loanId': 'L1', 'extra': 1}]})
+        self.assertEqual(rules(failures), [('$.loans[0]', 'additional')])
+        self.assertEqual(failures[0].expected, 'extra')
+
+    def test_keywords_apply_to_matching_type_only(self):
+        self.assertEqual(check({'a': {'schema': {'minimum': 1, 'minLength': 2}}}, {'a': 'xy'}), [])
+        self.assertEqual(rules(check({'a': {'schema': {'minItems': 1}}}, {'a': []})), [('$.a', 'min_len')])
+
+
+class ValidateResponseTest(unittest.TestCase):
+    def setUp(self):
+        case = test_case.TestCase(case_id='case_001', name='c', description='', api_path='/api', method='POST',
+                                  expected_response={'code': '000000'}, expected_data={'success': True})
+        self.suite = test_suite.TestSuite(name='s', description='', cases={'case_001': case})
+        self.case = case
+
+    def test_pass_returns_empty_list(self):
+        result = self.suite.validate_response(self.case, {'code': '000000', 'data': '{"success": true}'})
+        self.assertEqual(result, [])
+
+    def test_failures_returned_as_list(self):
+        result = self.suite.validate_response(self.case, {'code': '000000', 'data': {'success': False}})
+        self.assertIsInstance(result, list)
+        self.assertTrue(all(isinstance(failure, ValidationFailure) for failure in result))
+        self.assertEqual(rules(result), [('$.success', 'eq')])
+
+    def test_code_mismatch(self):
+        result = self.suite.validate_response(self.case, {'code': 100001, 'data': {'success': True}})
+        self.assertEqual([(failure.stage, failure.actual) for failure in result], [(CODE, '100001')])
+
+    def test_invalid_json_data(self):
+        result = self.suite.validate_response(self.case, {'code': '000000', 'data': '{oops'})
+        self.assertEqual([failure.stage for failure in result], [DECRYPT])
+
+    def test_validator_cached_per_case(self):
+        self.assertIs(self.suite.get_validator('case_001'), self.suite.get_validator('case_001'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import sys
+import unittest
+from collections import Counter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from perf.workload import ITERATION_SUITE, MixedExecutor, Scenario, WeightedPicker, Workload, is_workload
+from test import test_suite
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKLOAD = os.path.join(TESTS_DIR, 'workload_mixed.yaml')
+CREDIT = 'test_cases_user_credit.yaml'
+CHECK = 'test_cases_user_check.yaml'
+
+
+def suite(name):
+    return test_suite.TestSuite.from_yaml(os.path.join(TESTS_DIR, name))
+
+
+class WeightedPickerTest(unittest.TestCase):
+    def test_smooth_interleaving(self):
+        picker = WeightedPicker([('a', 5), ('b', 1), ('c', 1)])
+        # 与 nginx 平滑加权轮询的经典序列一致，任意一轮中各项次数与权重成比例
+        self.assertEqual([picker.pick() for _ in range(14)], list('aabacaa') * 2)
+
+    def test_fractional_weights(self):
+        picker = WeightedPicker([('a', 0.7), ('b', 0.2), ('c', 0.1)])
+        for _ in range(5):
+            self.assertEqual(Counter(picker.pick() for _ in range(10)), Counter(a=7, b=2, c=1))
+
+    def test_empty(self):
+        with self.assertRaisesRegex(ValueError, '没有可选的项'):
+            WeightedPicker([])
+
+
+class WorkloadConfigTest(unittest.TestCase):
+    def test_is_workload(self):
+        self.assertTrue(is_workload(WORKLOAD))
+        self.assertFalse(is_workload(os.path.join(TESTS_DIR, CREDIT)))
+
+    def test_from_yaml(self):
+        workload = Workload.from_yaml(WORKLOAD)
+        self.assertEqual(workload.name, '混合流量')
+        self.assertEqual({name: scenario.weight for name, scenario in workload.scenarios.items()},
+                         {'credit': 70.0, 'check': 20.0, 'repay': 10.0})
+        self.assertEqual(workload.scenarios['check'].cases, {'case_001': 3.0, 'case_002': 1.0})
+        self.assertEqual(workload.variables, {'base_url': 'http://192.168.1.2:8081'})
+        self.assertEqual(workload.load_profile['executor'], 'arrival_rate')
+
+    def test_invalid_scenario(self):
+        cases = [
+            ('场景名不能包含 /', 'a/b', {'suite': CREDIT}),
+            ('场景 a 未指定 suite', 'a', {}),
+            ('场景 a 的权重必须大于0', 'a', {'suite': CREDIT, 'weight': 0}),
+            ('场景 a 的权重必须大于0', 'a', {'suite': CHECK, 'cases': {'case_001': -1}}),
+            ('iteration 应为 case 或 suite', 'a', {'suite': CREDIT, 'iteration': 'vu'}),
+            ('场景 a 的用例不存在: case_009', 'a', {'suite': CHECK, 'cases': {'case_009': 1}}),
+        ]
+        for message, name, config in cases:
+            with self.subTest(config=config):
+                with self.assertRaisesRegex(ValueError, message):
+                    Scenario.from_config(name, config, TESTS_DIR)
+
+
+class MixedExecutorTest(unittest.TestCase):
+    def test_case_iteration_mix(self):
+        executor = MixedExecutor(Workload.from_yaml(WORKLOAD))
+        picks = Counter(tuple(executor.next_iteration()) for _ in range(1000))
+        self.assertEqual(picks[('check/case_001',)], 150)
+        self.assertEqual(picks[('check/case_002',)], 50)
+        self.assertEqual(sum(count for chain, count in picks.items() if chain[0].startswith('credit/')), 700)
+        self.assertEqual(sum(count for chain, count in picks.items() if chain[0].startswith('repay/')), 100)
+        self.assertEqual(executor.iteration_requests, 1.0)
+        self.assertIn('credit/case_001', executor.endpoints)
+        # 负载文件的变量覆盖各套件的同名变量
+        self.assertEqual({e.suite.variables['base_url'] for e in executor.executors.values()}, {'http://192.168.1.2:8081'})
+
+    def test_dependencies_and_suite_iteration(self):
+        check = suite(CHECK)
+        check.cases['case_001'].dependencies = ['case_002']
+        workload = Workload('w', '', {
+            'check': Scenario('check', check, 1, {'case_001': 1}),
+            'credit': Scenario('credit', suite(CREDIT), 1, iteration=ITERATION_SUITE),
+        })
+        executor = MixedExecutor(workload)
+        chains = {tuple(executor.next_iteration()) for _ in range(4)}
+        self.assertEqual(chains, {('check/case_002', 'check/case_001'),
+                                  ('credit/case_001', 'credit/case_002', 'credit/case_003')})
+        self.assertEqual(executor.iteration_requests, 2.5)
+        self.assertEqual(executor.order[:2], ['check/case_002', 'check/case_001'])
+
+    def test_think_time_by_scenario(self):
+        executor = MixedExecutor(Workload.from_yaml(WORKLOAD))
+        self.assertEqual(executor.think_time('check/case_001'), executor.executors['check'].think_time('case_001'))
+        self.assertEqual(executor.pacing_interval(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()